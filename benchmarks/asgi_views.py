@@ -0,0 +1,269 @@
+"""Requests per second and latency of the timer endpoints under WSGI and ASGI at high concurrency.
+
+Each server is benchmarked in a process of its own, against the database of the settings:
+
+- "wsgi": Django's WSGI handler serving the sync views, called by a pool of `--threads` threads
+  like the threads of a WSGI worker process (e.g. gunicorn --threads).
+- "asgi": Django's ASGI handler serving the async views (TIMER_ASYNC_VIEWS), on a single event
+  loop like an ASGI worker process (e.g. uvicorn).
+
+`--concurrency` clients send `--requests` requests in total: `--get-ratio` of them look up one of
+the timers created so far (GET /timer/<id>/), the others create a timer (POST /timer). The
+latency of a request is measured from its submission, so it includes the time spent waiting for
+a free thread. The start_timer messages are not published: publishing is replaced by a
+`--publish-latency` sleep standing for the round trip to the broker, so no broker is needed.
+
+With `--wsgi-url` and `--asgi-url` the requests are sent over HTTP to running servers instead,
+e.g. gunicorn and uvicorn started with TIMER_ASYNC_VIEWS=true, and publish to their broker.
+
+Usage:
+    python -m benchmarks.asgi_views --requests 5000 --concurrency 200 --threads 8
+    python -m benchmarks.asgi_views --wsgi-url http://localhost:8000 --asgi-url http://localhost:8001
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from types import SimpleNamespace
+from uuid import uuid4
+
+from benchmarks.common import report, setup_django, summarize
+
+
+BENCHMARK_URL = "http://benchmark.invalid/asgi-views"
+SERVERS = ("wsgi", "asgi")
+
+
+class RequestMix:
+    """The sequence of requests of the clients: timer creations and lookups of created timers."""
+
+    def __init__(self, requests: int, get_ratio: float, seed: int):
+        self.remaining = requests
+        self.get_ratio = get_ratio
+        self.timer_ids: list[str] = []
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def next(self) -> tuple[str, str, bytes] | None:
+        """Return the method, path and body of the next request, or None once all are sent."""
+        with self._lock:
+            if not self.remaining:
+                return None
+            self.remaining -= 1
+
+            if self.timer_ids and self._rng.random() < self.get_ratio:
+                return "GET", f"/timer/{self._rng.choice(self.timer_ids)}/", b""
+            payload = {"hours": 1, "minutes": 0, "seconds": 0, "url": BENCHMARK_URL}
+            return "POST", "/timer", json.dumps(payload).encode()
+
+    def record(self, method: str, status_code: int, body: bytes):
+        if method == "POST" and status_code == 201:
+            with self._lock:
+                self.timer_ids.append(json.loads(body)["id"])
+
+
+def summarize_run(latencies: list[float], statuses: dict, elapsed: float) -> dict:
+    return {
+        "requests_per_second": len(latencies) / elapsed,
+        "status_codes": statuses,
+        "latency_seconds": summarize(latencies),
+    }
+
+
+def serve_wsgi(mix: RequestMix, concurrency: int, threads: int) -> dict:
+    from django.core.wsgi import get_wsgi_application
+
+    application = get_wsgi_application()
+    latencies, statuses = [], {}
+    lock = threading.Lock()
+
+    def handle(method: str, path: str, body: bytes, submitted_at: float):
+        environ = {
+            "REQUEST_METHOD": method,
+            "PATH_INFO": path,
+            "QUERY_STRING": "",
+            "CONTENT_TYPE": "application/json",
+            "CONTENT_LENGTH": str(len(body)),
+            "SERVER_NAME": "localhost",
+            "SERVER_PORT": "80",
+            "wsgi.url_scheme": "http",
+            "wsgi.input": BytesIO(body),
+            "wsgi.errors": sys.stderr,
+        }
+        status = []
+        content = b"".join(application(environ, lambda line, headers: status.append(line)))
+        status_code = int(status[0].split()[0])
+
+        mix.record(method, status_code, content)
+        with lock:
+            latencies.append(time.perf_counter() - submitted_at)
+            statuses[status_code] = statuses.get(status_code, 0) + 1
+
+    # The clients keep `concurrency` requests submitted, the server handles `threads` at a time
+    in_flight = threading.BoundedSemaphore(concurrency)
+    started_at = time.perf_counter()
+    with ThreadPoolExecutor(threads) as server:
+        while (request := mix.next()) is not None:
+            in_flight.acquire()
+            future = server.submit(handle, *request, time.perf_counter())
+            future.add_done_callback(lambda _: in_flight.release())
+    return summarize_run(latencies, statuses, time.perf_counter() - started_at)
+
+
+async def serve_asgi(mix: RequestMix, concurrency: int) -> dict:
+    from django.core.asgi import get_asgi_application
+
+    application = get_asgi_application()
+    latencies, statuses = [], {}
+
+    async def handle(method: str, path: str, body: bytes):
+        submitted_at = time.perf_counter()
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": b"",
+            "headers": [(b"content-type", b"application/json"), (b"host", b"localhost")],
+            "server": ("localhost", 80),
+            "client": ("127.0.0.1", 0),
+        }
+        received = asyncio.Event()
+        messages = []
+
+        async def receive():
+            if not received.is_set():
+                received.set()
+                return {"type": "http.request", "body": body, "more_body": False}
+            # The client never disconnects
+            await asyncio.Future()
+
+        async def send(message: dict):
+            messages.append(message)
+
+        await application(scope, receive, send)
+        status_code = messages[0]["status"]
+        content = b"".join(message.get("body", b"") for message in messages[1:])
+
+        mix.record(method, status_code, content)
+        latencies.append(time.perf_counter() - submitted_at)
+        statuses[status_code] = statuses.get(status_code, 0) + 1
+
+    async def client():
+        while (request := mix.next()) is not None:
+            await handle(*request)
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return summarize_run(latencies, statuses, time.perf_counter() - started_at)
+
+
+async def load_http(base_url: str, mix: RequestMix, concurrency: int) -> dict:
+    import aiohttp
+
+    latencies, statuses = [], {}
+    connector = aiohttp.TCPConnector(limit=concurrency)
+
+    async with aiohttp.ClientSession(base_url, connector=connector) as session:
+
+        async def client():
+            while (request := mix.next()) is not None:
+                method, path, body = request
+                submitted_at = time.perf_counter()
+                async with session.request(
+                    method, path, data=body or None, headers={"Content-Type": "application/json"}
+                ) as response:
+                    content = await response.read()
+
+                mix.record(method, response.status, content)
+                latencies.append(time.perf_counter() - submitted_at)
+                statuses[response.status] = statuses.get(response.status, 0) + 1
+
+        started_at = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+    return summarize_run(latencies, statuses, time.perf_counter() - started_at)
+
+
+def serve(args) -> dict:
+    """Benchmark the server of `args.serve` in the current process."""
+    setup_django()
+
+    from unittest.mock import patch
+
+    from django.test import override_settings
+
+    from task_scheduler.webhook_timer.models import WebhookTimer
+    from task_scheduler.webhook_timer.tasks import start_timer
+
+    def publish(*publish_args, **publish_kwargs):
+        time.sleep(args.publish_latency)
+        return SimpleNamespace(id=publish_kwargs.get("task_id") or str(uuid4()))
+
+    mix = RequestMix(args.requests, args.get_ratio, args.seed)
+    try:
+        with (
+            override_settings(TIMER_DISPATCH_MODE="eta"),
+            patch.object(start_timer, "apply_async", side_effect=publish),
+        ):
+            if args.serve == "wsgi":
+                return serve_wsgi(mix, args.concurrency, args.threads)
+            return asyncio.run(serve_asgi(mix, args.concurrency))
+    finally:
+        WebhookTimer.objects.filter(url=BENCHMARK_URL).delete()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=8, help="Threads of the WSGI process.")
+    parser.add_argument("--get-ratio", type=float, default=0.5)
+    parser.add_argument("--publish-latency", type=float, default=0.005)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--wsgi-url", help="Running WSGI server to benchmark over HTTP.")
+    parser.add_argument("--asgi-url", help="Running ASGI server to benchmark over HTTP.")
+    parser.add_argument("--serve", choices=SERVERS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        json.dump(serve(args), sys.stdout)
+        return
+
+    results = {}
+    if args.wsgi_url or args.asgi_url:
+        for server, base_url in (("wsgi", args.wsgi_url), ("asgi", args.asgi_url)):
+            if base_url:
+                mix = RequestMix(args.requests, args.get_ratio, args.seed)
+                results[server] = asyncio.run(load_http(base_url, mix, args.concurrency))
+    else:
+        for server in SERVERS:
+            # The views are chosen when the URLconf is loaded, hence a process per server
+            environment = {**os.environ, "TIMER_ASYNC_VIEWS": str(server == "asgi").lower()}
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.asgi_views", *sys.argv[1:], "--serve", server],
+                env=environment,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+            results[server] = json.loads(output)
+
+    report(
+        "asgi_views", {key: value for key, value in vars(args).items() if key != "serve"}, results
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Webhook delivery throughput against a slow endpoint: prefork, threads and asyncio engines.
+
+A local webhook sink, running in its own process, answers every webhook after `--delay` seconds.
+
+- "prefork" mimics the start_timer path: `--processes` processes, each firing one webhook at a
+  time with a blocking requests.post, like the children of a prefork Celery worker.
+- "threads" delivers all the webhooks as one start_timers batch with the thread pool engine.
+- "asyncio" delivers all the webhooks as one start_timers batch with the asyncio engine.
+
+Usage:
+    python -m benchmarks.async_delivery --webhooks 2000 --delay 0.5 --processes 8
+"""
+
+import argparse
+import multiprocessing
+import time
+from uuid import uuid4
+
+import requests
+
+from benchmarks.common import report, setup_django
+
+
+def post_webhook(url: str) -> bool:
+    return requests.post(url, json={"id": str(uuid4())}).ok
+
+
+def measure(deliver, webhooks: int) -> dict:
+    started_at = time.perf_counter()
+    delivered = deliver()
+    elapsed = time.perf_counter() - started_at
+
+    return {
+        "delivered": delivered,
+        "seconds": elapsed,
+        "webhooks_per_second": webhooks / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--webhooks", type=int, default=2000)
+    parser.add_argument("--delay", type=float, default=0.5, help="Response time of the sink.")
+    parser.add_argument("--processes", type=int, default=8, help="Prefork worker children.")
+    parser.add_argument("--threads", type=int, default=16, help="Threads of the threads engine.")
+    parser.add_argument("--concurrency", type=int, default=1000, help="Asyncio in-flight limit.")
+    args = parser.parse_args()
+
+    setup_django()
+
+    from task_scheduler.utils.webhook_sink import WebhookSink
+    from task_scheduler.webhook_timer.async_delivery import AsyncDeliveryEngine
+    from task_scheduler.webhook_timer.delivery import deliver_in_batches, session_pool
+    from task_scheduler.webhook_timer.models import WebhookTimer
+
+    fork_context = multiprocessing.get_context("fork")
+    sink = WebhookSink(delay=args.delay)
+    sink_process = fork_context.Process(target=sink.serve_forever, daemon=True)
+    sink_process.start()
+
+    results = {}
+    try:
+        webhook_timers = [
+            WebhookTimer(id=uuid4(), url=sink.url, expires_at=None) for _ in range(args.webhooks)
+        ]
+
+        with fork_context.Pool(args.processes) as pool:
+            results["prefork"] = measure(
+                lambda: sum(pool.map(post_webhook, [sink.url] * args.webhooks, chunksize=1)),
+                args.webhooks,
+            )
+
+        def trigger_webhook(url: str, timer_id: str):
+            session_pool.post(url, json={"id": timer_id}).raise_for_status()
+
+        results["threads"] = measure(
+            lambda: len(
+                deliver_in_batches(webhook_timers, trigger_webhook, max_workers=args.threads)[0]
+            ),
+            args.webhooks,
+        )
+
+        engine = AsyncDeliveryEngine(concurrency=args.concurrency, timeout=args.delay + 30)
+        results["asyncio"] = measure(lambda: len(engine.deliver(webhook_timers)[0]), args.webhooks)
+        engine.close()
+    finally:
+        sink_process.terminate()
+
+    report("async_delivery", vars(args), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Timer creation throughput of POST /timer versus POST /timers/bulk.
+
+The same number of timers is created once with one request per timer and once with requests of
+`--batch-size` timers. Without `--base-url` the requests go through the Django test client, so
+the numbers cover the whole view path (validation, INSERT, broker publish) without the HTTP
+server. With `--base-url` the requests are sent to a running server.
+
+Usage:
+    python -m benchmarks.bulk_create --timers 10000 --batch-size 1000
+    python -m benchmarks.bulk_create --base-url http://localhost:8000
+"""
+
+import argparse
+import time
+
+from benchmarks.common import report, setup_django
+
+
+BENCHMARK_URL = "http://benchmark.invalid/bulk-create"
+
+
+def make_client(base_url: str | None):
+    if base_url:
+        import requests
+
+        session = requests.Session()
+        return lambda path, payload: session.post(f"{base_url}{path}", json=payload).status_code
+
+    from django.test import Client
+
+    client = Client()
+    return lambda path, payload: client.post(
+        path, payload, content_type="application/json"
+    ).status_code
+
+
+def run(post, path: str, payloads: list, timers: int) -> dict:
+    failures = 0
+    started_at = time.perf_counter()
+    for payload in payloads:
+        if post(path, payload) != 201:
+            failures += 1
+    elapsed = time.perf_counter() - started_at
+
+    return {
+        "requests": len(payloads),
+        "failed_requests": failures,
+        "seconds": elapsed,
+        "timers_per_second": timers / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--timers", type=int, default=10_000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--base-url", help="Benchmark a running server instead of the views.")
+    args = parser.parse_args()
+
+    setup_django()
+
+    item = {"hours": 1, "minutes": 0, "seconds": 0, "url": BENCHMARK_URL}
+    post = make_client(args.base_url)
+
+    results = {
+        "single": run(post, "/timer", [item] * args.timers, args.timers),
+        "bulk": run(
+            post,
+            "/timers/bulk",
+            [[item] * args.batch_size for _ in range(0, args.timers, args.batch_size)],
+            args.timers,
+        ),
+    }
+    results["speedup"] = (
+        results["bulk"]["timers_per_second"] / results["single"]["timers_per_second"]
+    )
+
+    if not args.base_url:
+        from task_scheduler.webhook_timer.models import WebhookTimer
+
+        WebhookTimer.objects.filter(url=BENCHMARK_URL).delete()
+
+    report("bulk_create", vars(args), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Lateness of a burst of timers expiring together, with and without the look-ahead.
+
+`--timers` timers spread over `--hosts` local webhook sinks all expire at the same instant, as
+timers set with the same round duration do. They are fired by a LocalDispatcher over a
+MemoryTimerStore, once without the look-ahead and once with a look-ahead of `--lookahead`
+seconds. Every sink waits `--connect-delay` seconds before serving a new connection, the cost
+of resolving a distant host and going through its TCP and TLS handshakes, which the look-ahead
+pays before the timers expire instead of after.
+
+The lateness of a webhook is the time between the expiry of its timer and its arrival at the
+sink.
+
+Usage:
+    python -m benchmarks.burst_lateness --timers 500 --hosts 20 --connect-delay 0.05
+"""
+
+import argparse
+import tempfile
+import threading
+import time
+from contextlib import ExitStack
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from benchmarks.common import report, setup_django, summarize
+
+
+def run(args, lookahead: float) -> dict:
+    from task_scheduler.utils.webhook_sink import WebhookSink
+    from task_scheduler.webhook_timer.delivery import session_pool
+    from task_scheduler.webhook_timer.local_dispatcher import LocalDispatcher
+    from task_scheduler.webhook_timer.memory_store import MemoryTimerStore
+
+    # Every run starts without any open connection
+    session_pool.close()
+
+    with ExitStack() as stack:
+        directory = stack.enter_context(tempfile.TemporaryDirectory())
+        sinks = [
+            stack.enter_context(WebhookSink(connect_delay=args.connect_delay))
+            for _ in range(args.hosts)
+        ]
+
+        store = MemoryTimerStore(directory)
+        store.open()
+        stack.callback(store.close)
+
+        expires_at = time.time() + args.lead
+        for index in range(args.timers):
+            store.create(
+                uuid4(),
+                sinks[index % args.hosts].url,
+                datetime.fromtimestamp(expires_at, timezone.utc),
+            )
+
+        stop_event = threading.Event()
+        thread = threading.Thread(
+            target=LocalDispatcher(store, lookahead=lookahead).run_forever, args=(stop_event,)
+        )
+        thread.start()
+
+        deadline = expires_at + 60
+        while sum(len(sink.received) for sink in sinks) < args.timers and time.time() < deadline:
+            time.sleep(0.05)
+        stop_event.set()
+        store.due_changed.set()
+        thread.join()
+
+        lateness = [arrived_at - expires_at for sink in sinks for _, arrived_at in sink.received]
+        return {
+            "connections": sum(sink.connection_count for sink in sinks),
+            "lateness_seconds": summarize(lateness),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--timers", type=int, default=500)
+    parser.add_argument("--hosts", type=int, default=20)
+    parser.add_argument("--connect-delay", type=float, default=0.05)
+    parser.add_argument("--lookahead", type=float, default=2.0)
+    parser.add_argument(
+        "--lead", type=float, default=3.0, help="Seconds between creating and firing the burst"
+    )
+    args = parser.parse_args()
+
+    setup_django()
+
+    results = {
+        "without_lookahead": run(args, lookahead=0),
+        "with_lookahead": run(args, lookahead=args.lookahead),
+    }
+    report("burst_lateness", vars(args), results)
+
+
+if __name__ == "__main__":
+    main()
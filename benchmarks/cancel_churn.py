@@ -0,0 +1,132 @@
+"""Throughput of timer cancellation and rescheduling under heavy churn.
+
+`--timers` pending timers are created, then `--operations` requests cancel (DELETE) or
+reschedule (PATCH) random timers, `--cancel-ratio` of them being cancellations. Without
+`--base-url` the requests go through the Django test client, so the numbers cover the whole view
+path without the HTTP server. With `--base-url` the requests are sent to a running server and the
+timers are created through POST /timers/bulk.
+
+Finally the stale tasks are replayed: every rescheduled or cancelled timer is claimed with the
+version it was created with, as its original task would, which measures how cheaply the workers
+drop the tasks superseded by the churn. Unlike revoking the tasks, none of this leaves any state
+behind in the broker or the workers.
+
+Usage:
+    python -m benchmarks.cancel_churn --timers 10000 --operations 5000 --cancel-ratio 0.5
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from benchmarks.common import report, setup_django, summarize
+
+
+BENCHMARK_URL = "http://benchmark.invalid/cancel-churn"
+
+
+def make_client(base_url: str | None):
+    if base_url:
+        import requests
+
+        session = requests.Session()
+        return lambda method, path, payload=None: getattr(session, method)(
+            f"{base_url}{path}", json=payload
+        ).status_code
+
+    from django.test import Client
+
+    client = Client()
+    return lambda method, path, payload=None: getattr(client, method)(
+        path, payload, content_type="application/json"
+    ).status_code
+
+
+def create_timers(base_url: str | None, timers: int) -> list[str]:
+    if base_url:
+        import requests
+
+        timer_ids = []
+        item = {"hours": 1, "minutes": 0, "seconds": 0, "url": BENCHMARK_URL}
+        for start in range(0, timers, 1000):
+            response = requests.post(
+                f"{base_url}/timers/bulk", json=[item] * min(1000, timers - start)
+            )
+            timer_ids.extend(timer["id"] for timer in response.json()["timers"])
+        return timer_ids
+
+    from task_scheduler.webhook_timer.models import WebhookTimer
+
+    expires_at = datetime.now(timezone.utc) + timedelta(hours=1)
+    webhook_timers = WebhookTimer.objects.bulk_create(
+        (WebhookTimer(id=uuid4(), url=BENCHMARK_URL, expires_at=expires_at) for _ in range(timers)),
+        batch_size=1000,
+    )
+    return [str(webhook_timer.id) for webhook_timer in webhook_timers]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--timers", type=int, default=10_000)
+    parser.add_argument("--operations", type=int, default=5_000)
+    parser.add_argument("--cancel-ratio", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--base-url", help="Benchmark a running server instead of the views.")
+    args = parser.parse_args()
+
+    setup_django()
+
+    request = make_client(args.base_url)
+    rng = random.Random(args.seed)
+    timer_ids = create_timers(args.base_url, args.timers)
+
+    latencies = {"cancel": [], "reschedule": []}
+    statuses = {}
+    touched = set()
+    started_at = time.perf_counter()
+    for _ in range(args.operations):
+        timer_id = rng.choice(timer_ids)
+        operation = "cancel" if rng.random() < args.cancel_ratio else "reschedule"
+
+        operation_started_at = time.perf_counter()
+        if operation == "cancel":
+            status_code = request("delete", f"/timer/{timer_id}/")
+        else:
+            payload = {"hours": 0, "minutes": rng.randint(1, 59), "seconds": 0}
+            status_code = request("patch", f"/timer/{timer_id}/", payload)
+        latencies[operation].append(time.perf_counter() - operation_started_at)
+
+        statuses[status_code] = statuses.get(status_code, 0) + 1
+        touched.add(timer_id)
+    elapsed = time.perf_counter() - started_at
+
+    results = {
+        "operations_per_second": args.operations / elapsed,
+        "status_codes": statuses,
+        "latency": {operation: summarize(values) for operation, values in latencies.items()},
+    }
+
+    if not args.base_url:
+        from task_scheduler.webhook_timer.models import WebhookTimer
+
+        # The original tasks of the touched timers were published with version 0
+        stale_ids = sorted(touched)
+        started_at = time.perf_counter()
+        for start in range(0, len(stale_ids), 100):
+            batch = stale_ids[start : start + 100]
+            _, claimed = WebhookTimer.objects.claim(
+                batch, versions={timer_id: 0 for timer_id in batch}
+            )
+            assert not claimed, "A stale task claimed a timer"
+        elapsed = time.perf_counter() - started_at
+        results["stale_tasks_dropped_per_second"] = len(stale_ids) / elapsed
+
+        WebhookTimer.objects.filter(url=BENCHMARK_URL).delete()
+
+    report("cancel_churn", vars(args), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+# Re-exported for the benchmarks, the benchmark management command shares them
+from task_scheduler.utils.helpers import percentile, summarize  # noqa: F401
+
+
+def setup_django():
+    """Configure Django, so that the benchmarks can use the models and the Celery app.
+
+    The settings module defaults to the project settings, which means the benchmarks run against
+    the database and the broker configured by the environment (see .envrc).
+    """
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "task_scheduler.settings")
+
+    import django
+
+    django.setup()
+
+
+@contextmanager
+def stopwatch(results: dict, key: str):
+    """Store the seconds spent in the block under the given key of the results."""
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        results[key] = time.perf_counter() - started_at
+
+
+def report(name: str, parameters: dict, results: dict):
+    """Print the results of a benchmark as a single JSON document on stdout."""
+    json.dump(
+        {"benchmark": name, "parameters": parameters, "results": results}, sys.stdout, indent=2
+    )
+    sys.stdout.write("\n")
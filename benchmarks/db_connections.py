@@ -0,0 +1,109 @@
+"""Database connections opened and latency of requests and tasks, by connection max age.
+
+The same work is run once per `--max-ages` value (0 closes the connection after every request
+or task, "none" never does), against the database of the settings:
+
+- "requests": GET /timer/<id>/ through the Django test client, whose request signals open and
+  close the connections like a WSGI server does. The timer cache is cleared before every
+  request, so that every request reads the database.
+- "tasks": start_timer tasks run in-process, between the close_old_connections calls the
+  Django fixup of Celery makes before and after every task of a worker child. The tasks are
+  published with a stale version, so they only read the timer and drop it.
+
+The connections opened are counted with the connection_created signal. Against MySQL, opening a
+connection costs a TCP round trip and the authentication handshake, which persistent
+connections save on all but the first request or task of a thread.
+
+Usage:
+    python -m benchmarks.db_connections --operations 2000 --max-ages 0 60
+"""
+
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from benchmarks.common import report, setup_django, summarize
+
+
+BENCHMARK_URL = "http://benchmark.invalid/db-connections"
+
+
+def run(operation, operations: int) -> dict:
+    from django.db import connections
+    from django.db.backends.signals import connection_created
+
+    opened = []
+
+    def count(sender, connection, **kwargs):
+        opened.append(connection.alias)
+
+    connections.close_all()
+    connection_created.connect(count)
+    latencies = []
+    try:
+        started_at = time.perf_counter()
+        for _ in range(operations):
+            operation_started_at = time.perf_counter()
+            operation()
+            latencies.append(time.perf_counter() - operation_started_at)
+        elapsed = time.perf_counter() - started_at
+    finally:
+        connection_created.disconnect(count)
+
+    return {
+        "operations_per_second": operations / elapsed,
+        "connections_opened": len(opened),
+        "latency_seconds": summarize(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--operations", type=int, default=2000)
+    parser.add_argument("--max-ages", nargs="+", default=["0", "60"])
+    parser.add_argument("--health-checks", action=argparse.BooleanOptionalAction, default=True)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.db import close_old_connections, connections
+    from django.test import Client
+
+    from task_scheduler.webhook_timer.cache import timer_cache
+    from task_scheduler.webhook_timer.models import WebhookTimer
+    from task_scheduler.webhook_timer.tasks import start_timer
+
+    webhook_timer = WebhookTimer.objects.create(
+        id=uuid4(), url=BENCHMARK_URL, expires_at=datetime.now(timezone.utc) + timedelta(hours=1)
+    )
+    client = Client()
+
+    def request():
+        timer_cache.invalidate([webhook_timer.id])
+        client.get(f"/timer/{webhook_timer.id}/")
+
+    def task():
+        close_old_connections()
+        start_timer.apply(task_id=str(webhook_timer.id), kwargs={"version": -1})
+        close_old_connections()
+
+    results = {}
+    try:
+        for max_age in args.max_ages:
+            settings_dict = connections["default"].settings_dict
+            settings_dict["CONN_MAX_AGE"] = None if max_age.lower() == "none" else int(max_age)
+            settings_dict["CONN_HEALTH_CHECKS"] = args.health_checks
+
+            results[f"max_age_{max_age}"] = {
+                "requests": run(request, args.operations),
+                "tasks": run(task, args.operations),
+            }
+    finally:
+        WebhookTimer.objects.filter(url=BENCHMARK_URL).delete()
+
+    report("db_connections", vars(args), results)
+
+
+if __name__ == "__main__":
+    main()
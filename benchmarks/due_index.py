@@ -0,0 +1,80 @@
+"""Query plan and latency of WebhookTimer.objects.due on a table with millions of rows.
+
+The table is filled with `--timers` timers expiring uniformly within `--max-delay` seconds
+around now, `--fired-ratio` of which are already fired. The benchmark reports the EXPLAIN output
+of a due() page and the time it takes to read the pending timers due now, page by page.
+
+Usage:
+    python -m benchmarks.due_index --timers 2000000
+"""
+
+import argparse
+import random
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from benchmarks.common import report, setup_django, stopwatch
+
+
+BENCHMARK_URL = "http://benchmark.invalid/due-index"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--timers", type=int, default=2_000_000)
+    parser.add_argument("--max-delay", type=float, default=30 * 24 * 3600)
+    parser.add_argument("--fired-ratio", type=float, default=0.9)
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--keep", action="store_true", help="Keep the inserted timers.")
+    args = parser.parse_args()
+
+    setup_django()
+
+    from task_scheduler.webhook_timer.models import WebhookTimer
+
+    now = datetime.now(timezone.utc)
+    results = {}
+
+    with stopwatch(results, "insert_seconds"):
+        for start in range(0, args.timers, 10_000):
+            WebhookTimer.objects.bulk_create(
+                WebhookTimer(
+                    id=uuid4(),
+                    url=BENCHMARK_URL,
+                    expires_at=now + timedelta(seconds=random.uniform(-1, 1) * args.max_delay),
+                    is_url_called=random.random() < args.fired_ratio,
+                )
+                for _ in range(start, min(start + 10_000, args.timers))
+            )
+
+    try:
+        results["query_plan"] = WebhookTimer.objects.due(before=now, limit=args.page_size).explain()
+
+        with stopwatch(results, "first_page_seconds"):
+            list(WebhookTimer.objects.due(before=now, limit=args.page_size))
+
+        due_count = 0
+        after = None
+        with stopwatch(results, "all_pages_seconds"):
+            while True:
+                page = list(
+                    WebhookTimer.objects.due(
+                        before=now, after=after, limit=args.page_size
+                    ).values_list("id", "expires_at")
+                )
+                due_count += len(page)
+                if len(page) < args.page_size:
+                    break
+                last_id, last_expires_at = page[-1]
+                after = (last_expires_at, last_id)
+
+        results["due_timers"] = due_count
+    finally:
+        if not args.keep:
+            WebhookTimer.objects.filter(url=BENCHMARK_URL).delete()
+
+    report("due_index", vars(args), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Delivery lateness of small tenants while a large tenant bursts: FIFO versus fair scheduling.
+
+The dispatcher is simulated on a virtual clock ticking every `--tick` seconds. A large tenant
+has `--burst` timers expiring within the first second, and `--small-tenants` small tenants have
+`--small-timers` timers each, expiring uniformly over the run. The workers deliver
+`--capacity` webhooks per second.
+
+- "fifo" releases the due timers in expiry order, at most `--capacity` per second, like a single
+  queue in front of the workers.
+- "fair" releases them through the FairScheduler of the dispatcher: `--capacity` per second shared
+  by weighted fair queuing, and every host limited to `--host-rate` per second beyond a burst of
+  `--host-burst`.
+
+The lateness of a timer is the time between its expiry and its release to the workers.
+
+Usage:
+    python -m benchmarks.fair_delivery --burst 100000 --capacity 2000 --small-tenants 50
+"""
+
+import argparse
+import random
+from collections import deque
+
+from benchmarks.common import report, summarize
+from task_scheduler.webhook_timer.utils.fair_scheduler import FairScheduler
+
+
+def make_timers(args: argparse.Namespace) -> list[tuple[float, str]]:
+    rng = random.Random(args.seed)
+    timers = [(rng.uniform(0, 1), "big") for _ in range(args.burst)]
+    for tenant in range(args.small_tenants):
+        timers.extend(
+            (rng.uniform(0, args.duration), f"small-{tenant}") for _ in range(args.small_timers)
+        )
+    return sorted(timers)
+
+
+def simulate(timers: list[tuple[float, str]], take, add, tick: float) -> dict[str, list[float]]:
+    """Run the virtual clock until every timer is released, returning the lateness by tenant."""
+    lateness = {"big": [], "small": []}
+    pending = deque(timers)
+    released_count = 0
+    now = 0.0
+
+    while released_count < len(timers):
+        now += tick
+        while pending and pending[0][0] <= now:
+            add(*pending.popleft())
+
+        for expires_at, tenant in take(now):
+            lateness["big" if tenant == "big" else "small"].append(now - expires_at)
+            released_count += 1
+
+    return lateness
+
+
+def run_fifo(timers: list[tuple[float, str]], args: argparse.Namespace) -> dict[str, list[float]]:
+    queue = deque()
+    credit = 0.0
+
+    def take(now: float) -> list[tuple[float, str]]:
+        nonlocal credit
+        credit = min(credit + args.capacity * args.tick, args.capacity)
+        count = min(int(credit), len(queue))
+        credit -= count
+        return [queue.popleft() for _ in range(count)]
+
+    return simulate(timers, take, lambda *timer: queue.append(timer), args.tick)
+
+
+def run_fair(timers: list[tuple[float, str]], args: argparse.Namespace) -> dict[str, list[float]]:
+    scheduler = FairScheduler(
+        get_limits=lambda tenant: (args.host_rate, args.host_burst), rate=args.capacity
+    )
+    return simulate(
+        timers, scheduler.take, lambda *timer: scheduler.add(timer[1], timer), args.tick
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--burst", type=int, default=100000, help="Timers of the large tenant.")
+    parser.add_argument("--small-tenants", type=int, default=50)
+    parser.add_argument("--small-timers", type=int, default=200, help="Timers per small tenant.")
+    parser.add_argument("--duration", type=float, default=60, help="Seconds the small timers span.")
+    parser.add_argument("--capacity", type=float, default=2000, help="Webhooks per second.")
+    parser.add_argument("--host-rate", type=float, default=1000)
+    parser.add_argument("--host-burst", type=float, default=2000)
+    parser.add_argument("--tick", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    timers = make_timers(args)
+    results = {}
+    for name, run in (("fifo", run_fifo), ("fair", run_fair)):
+        lateness = run(timers, args)
+        results[name] = {tenant: summarize(values) for tenant, values in lateness.items()}
+
+    report("fair_delivery", vars(args), results)
+
+
+if __name__ == "__main__":
+    main()
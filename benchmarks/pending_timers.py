@@ -0,0 +1,106 @@
+"""Memory held for pending timers with Celery ETA messages versus the dispatcher.
+
+In "eta" mode RabbitMQ hands every ETA message to a worker right away and the worker keeps it
+in memory until it is due. The benchmark builds the real start_timer task messages and keeps
+them in a heap ordered by eta, which is a lower bound of what a worker holds (the worker also
+keeps the decoded request and the AMQP frame of every message).
+
+In "dispatcher" mode the timers are only stored in the database. The benchmark inserts the
+timers, runs one poll of the dispatcher and reports the memory allocated by it.
+
+Usage:
+    python -m benchmarks.pending_timers --timers 1000000 --max-delay 604800
+"""
+
+import argparse
+import gc
+import heapq
+import random
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from benchmarks.common import report, setup_django, stopwatch
+
+
+BENCHMARK_URL = "http://benchmark.invalid/pending-timers"
+
+
+def measure_eta_mode(expirations: list[datetime]) -> dict:
+    from task_scheduler.celery import app
+    from task_scheduler.webhook_timer.tasks import start_timer
+
+    gc.collect()
+    tracemalloc.start()
+
+    held_messages = []
+    for expires_at in expirations:
+        message = app.amqp.as_task_v2(str(uuid4()), start_timer.name, eta=expires_at)
+        heapq.heappush(held_messages, (expires_at, message))
+
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"held_messages": len(held_messages), "peak_memory_bytes": peak}
+
+
+def measure_dispatcher_mode(expirations: list[datetime], horizon: float, keep: bool) -> dict:
+    from task_scheduler.webhook_timer.dispatcher import TimerDispatcher
+    from task_scheduler.webhook_timer.models import WebhookTimer
+
+    results = {}
+    with stopwatch(results, "insert_seconds"):
+        for start in range(0, len(expirations), 10_000):
+            WebhookTimer.objects.bulk_create(
+                WebhookTimer(id=uuid4(), url=BENCHMARK_URL, expires_at=expires_at)
+                for expires_at in expirations[start : start + 10_000]
+            )
+
+    try:
+        dispatcher = TimerDispatcher(horizon=horizon, enqueue=lambda timer_ids: None)
+
+        gc.collect()
+        tracemalloc.start()
+        with stopwatch(results, "poll_seconds"):
+            dispatcher.poll()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        results["held_timers"] = dispatcher.scheduled_count
+        results["peak_memory_bytes"] = peak
+    finally:
+        if not keep:
+            WebhookTimer.objects.filter(url=BENCHMARK_URL).delete()
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--timers", type=int, default=1_000_000)
+    parser.add_argument(
+        "--max-delay", type=float, default=7 * 24 * 3600, help="Timers expire uniformly within."
+    )
+    parser.add_argument("--horizon", type=float, default=60, help="Dispatcher horizon (seconds).")
+    parser.add_argument("--mode", choices=("eta", "dispatcher", "both"), default="both")
+    parser.add_argument("--keep", action="store_true", help="Keep the inserted timers.")
+    args = parser.parse_args()
+
+    setup_django()
+
+    now = datetime.now(timezone.utc)
+    expirations = [
+        now + timedelta(seconds=random.uniform(1, args.max_delay)) for _ in range(args.timers)
+    ]
+
+    results = {}
+    if args.mode in ("eta", "both"):
+        results["eta"] = measure_eta_mode(expirations)
+    if args.mode in ("dispatcher", "both"):
+        results["dispatcher"] = measure_dispatcher_mode(expirations, args.horizon, args.keep)
+
+    report("pending_timers", vars(args), results)
+
+
+if __name__ == "__main__":
+    main()
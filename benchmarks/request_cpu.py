@@ -0,0 +1,129 @@
+"""CPU time per request of the timer endpoints, with and without the fast path (TIMER_FAST_PATH).
+
+Two scopes are measured with `time.process_time`, so that waiting on the database is left out:
+
+- "codec": parsing, validating and encoding alone, i.e. the work the fast path replaces, for a
+  valid and an invalid POST /timer body.
+- "view": POST /timer and GET /timer/<id>/ called on the view with a request of the
+  RequestFactory, which adds the routing-free part of DRF, the database and the timer cache.
+  The timers are dispatched by the dispatcher, so nothing is published.
+
+Every measurement is repeated `--rounds` times and the best round is kept, in microseconds.
+
+Usage:
+    python -m benchmarks.request_cpu --requests 5000 --rounds 5
+"""
+
+import argparse
+import json
+import time
+
+from benchmarks.common import report, setup_django
+
+
+BENCHMARK_URL = "http://benchmark.invalid/request-cpu"
+BODIES = {
+    "valid": {"hours": 1, "minutes": 30, "seconds": 15, "url": BENCHMARK_URL},
+    "invalid": {"hours": -1, "minutes": "x", "seconds": 0, "url": "invalid"},
+}
+
+
+def measure(function, requests: int, rounds: int) -> float:
+    """Return the best CPU time per call of the function over the rounds, in microseconds."""
+    best = float("inf")
+    for _ in range(rounds):
+        started_at = time.process_time()
+        for _ in range(requests):
+            function()
+        best = min(best, time.process_time() - started_at)
+    return best / requests * 1e6
+
+
+def measure_codec(body: bytes, requests: int, rounds: int) -> float:
+    from django.test import RequestFactory
+    from rest_framework.request import Request
+    from rest_framework.settings import api_settings
+
+    from task_scheduler.webhook_timer.serializers import SET_TIMER_SCHEMA, SetTimerSerializer
+    from task_scheduler.webhook_timer.views import (
+        _get_request_data,
+        _json_response,
+        _validate_data,
+    )
+
+    factory = RequestFactory()
+    parsers = [parser() for parser in api_settings.DEFAULT_PARSER_CLASSES]
+
+    def handle():
+        request = Request(factory.post("/timer", body, "application/json"), parsers=parsers)
+        data, errors = _validate_data(
+            _get_request_data(request), SetTimerSerializer, SET_TIMER_SCHEMA
+        )
+        if errors is not None:
+            return _json_response({"error": errors}, status=400)
+        return _json_response({"id": "a7293427-c147-455e-bf41-ddb36eea4119", "time_left": 1}, 201)
+
+    return measure(handle, requests, rounds)
+
+
+def measure_view(requests: int, rounds: int) -> dict:
+    from django.test import RequestFactory
+
+    from task_scheduler.webhook_timer.views import WebhookTimerView
+
+    factory = RequestFactory()
+    view = WebhookTimerView.as_view()
+    body = json.dumps(BODIES["valid"])
+    timer_ids = []
+
+    def post():
+        response = view(factory.post("/timer", body, "application/json"))
+        timer_ids.append(json.loads(response.content)["id"])
+
+    def get():
+        view(factory.get("/timer/x/"), timer_id=timer_ids[0])
+
+    return {"post": measure(post, requests, rounds), "get": measure(get, requests, rounds)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.test import override_settings
+
+    from task_scheduler.utils import fast_json
+    from task_scheduler.webhook_timer.models import WebhookTimer
+
+    results = {"json_codec": "orjson" if fast_json.orjson is not None else "json"}
+    try:
+        for fast_path in (False, True):
+            with override_settings(TIMER_FAST_PATH=fast_path, TIMER_DISPATCH_MODE="dispatcher"):
+                path_results = {
+                    f"codec_{name}_us": measure_codec(
+                        json.dumps(body).encode(), args.requests, args.rounds
+                    )
+                    for name, body in BODIES.items()
+                }
+                path_results.update(
+                    {
+                        f"view_{method}_us": cpu_time
+                        for method, cpu_time in measure_view(args.requests, args.rounds).items()
+                    }
+                )
+                results["fast_path" if fast_path else "drf"] = path_results
+    finally:
+        WebhookTimer.objects.filter(url=BENCHMARK_URL).delete()
+
+    results["speedup"] = {
+        key: results["drf"][key] / results["fast_path"][key] for key in results["drf"]
+    }
+    report("request_cpu", vars(args), results)
+
+
+if __name__ == "__main__":
+    main()
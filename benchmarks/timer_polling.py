@@ -0,0 +1,80 @@
+"""Latency and database queries of polling GET /timer/<id>/ with each timer cache backend.
+
+`--timers` timers are created and polled `--polls` times in total, round-robin, through the
+Django test client once per TIMER_CACHE_BACKEND. Every poll after the first one of a timer is
+expected to be answered by the cache unless the cache is disabled.
+
+Usage:
+    python -m benchmarks.timer_polling --timers 1000 --polls 100000
+"""
+
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from benchmarks.common import report, setup_django, summarize
+
+
+BENCHMARK_URL = "http://benchmark.invalid/timer-polling"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--timers", type=int, default=1000)
+    parser.add_argument("--polls", type=int, default=100_000)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.db import connection
+    from django.test import Client, override_settings
+
+    from task_scheduler.utils.constants import TIMER_CACHE_BACKENDS
+    from task_scheduler.webhook_timer.cache import timer_cache
+    from task_scheduler.webhook_timer.models import WebhookTimer
+
+    expires_at = datetime.now(timezone.utc) + timedelta(hours=1)
+    timer_ids = [
+        timer.id
+        for timer in WebhookTimer.objects.bulk_create(
+            WebhookTimer(id=uuid4(), url=BENCHMARK_URL, expires_at=expires_at)
+            for _ in range(args.timers)
+        )
+    ]
+
+    client = Client()
+    results = {}
+    try:
+        for backend in TIMER_CACHE_BACKENDS:
+            with override_settings(TIMER_CACHE_BACKEND=backend):
+                if timer_cache.backend is not None:
+                    timer_cache.backend.clear()
+                timer_cache.hits = timer_cache.misses = 0
+
+                latencies = []
+                queries = []
+
+                def count_query(execute, sql, *query_args):
+                    queries.append(sql)
+                    return execute(sql, *query_args)
+
+                with connection.execute_wrapper(count_query):
+                    for poll in range(args.polls):
+                        started_at = time.perf_counter()
+                        client.get(f"/timer/{timer_ids[poll % args.timers]}/")
+                        latencies.append(time.perf_counter() - started_at)
+
+                results[backend] = {
+                    "queries": len(queries),
+                    "latency_seconds": summarize(latencies),
+                    **timer_cache.stats(),
+                }
+    finally:
+        WebhookTimer.objects.filter(url=BENCHMARK_URL).delete()
+
+    report("timer_polling", vars(args), results)
+
+
+if __name__ == "__main__":
+    main()
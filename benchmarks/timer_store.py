@@ -0,0 +1,122 @@
+"""Throughput of creating, looking up and firing timers, by timer store backend.
+
+For every backend of `--backends`, `--timers` timers are created one at a time, looked up one at
+a time in random order, then claimed and marked delivered `--batch-size` at a time, which is
+the storage work of firing them without the webhooks themselves:
+
+- "database": the WebhookTimer table through the ORM, against the database of the settings, as
+  the views and the tasks access it (create, PK lookup, claim and mark_delivered UPDATEs).
+- "memory": a MemoryTimerStore in a temporary directory, with every change appended to its
+  write-ahead log and the logs synced every `--fsync-interval` seconds (0 syncs every write).
+
+The memory store is then reopened twice, to measure its recovery from the logs alone and from
+the snapshots.
+
+Usage:
+    python -m benchmarks.timer_store --timers 20000 --batch-size 100
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from benchmarks.common import report, setup_django
+
+
+BENCHMARK_URL = "http://benchmark.invalid/timer-store"
+
+
+def measure(operation, items: list) -> float:
+    started_at = time.perf_counter()
+    for item in items:
+        operation(item)
+    return len(items) / (time.perf_counter() - started_at)
+
+
+def run_database(timer_ids: list, expires_at: datetime, batch_size: int) -> dict:
+    from task_scheduler.webhook_timer.models import WebhookTimer
+    from task_scheduler.webhook_timer.timer_store import DatabaseTimerStore
+
+    store = DatabaseTimerStore()
+    batches = [
+        timer_ids[index : index + batch_size] for index in range(0, len(timer_ids), batch_size)
+    ]
+
+    def fire(batch: list):
+        lease_owner, _ = WebhookTimer.objects.claim(batch)
+        WebhookTimer.objects.mark_delivered(lease_owner)
+
+    try:
+        return {
+            "creates_per_second": measure(
+                lambda timer_id: store.create(timer_id, BENCHMARK_URL, expires_at), timer_ids
+            ),
+            "lookups_per_second": measure(store.lookup, random.sample(timer_ids, len(timer_ids))),
+            "fires_per_second": measure(fire, batches) * batch_size,
+        }
+    finally:
+        WebhookTimer.objects.filter(url=BENCHMARK_URL).delete()
+
+
+def run_memory(timer_ids: list, expires_at: datetime, batch_size: int, fsync_interval: float):
+    from task_scheduler.webhook_timer.memory_store import MemoryTimerStore
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = MemoryTimerStore(directory, fsync_interval=fsync_interval)
+        store.open()
+
+        def fire(_):
+            lease_owner, timers = store.claim_due(limit=batch_size)
+            store.mark_delivered(lease_owner, timers)
+
+        results = {
+            "creates_per_second": measure(
+                lambda timer_id: store.create(timer_id, BENCHMARK_URL, expires_at), timer_ids
+            ),
+            "lookups_per_second": measure(store.lookup, random.sample(timer_ids, len(timer_ids))),
+            "fires_per_second": measure(fire, range(0, len(timer_ids), batch_size)) * batch_size,
+        }
+
+        # Reopened from the logs alone, as after a crash, then from the snapshots
+        store.sync()
+        store._lock_file.close()
+        store._lock_file = None
+        for key in ("recovery_from_log_seconds", "recovery_from_snapshot_seconds"):
+            started_at = time.perf_counter()
+            store = MemoryTimerStore(directory, fsync_interval=fsync_interval)
+            store.open()
+            results[key] = time.perf_counter() - started_at
+            store.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--timers", type=int, default=20000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--backends", nargs="+", default=["database", "memory"])
+    parser.add_argument("--fsync-interval", type=float, default=1.0)
+    args = parser.parse_args()
+
+    setup_django()
+
+    timer_ids = [uuid4() for _ in range(args.timers)]
+    expires_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+
+    results = {}
+    for backend in args.backends:
+        if backend == "memory":
+            results[backend] = run_memory(
+                timer_ids, expires_at, args.batch_size, args.fsync_interval
+            )
+        else:
+            results[backend] = run_database(timer_ids, expires_at, args.batch_size)
+
+    report("timer_store", vars(args), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -15,3 +15,9 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "task_scheduler.settings")
 
 application = get_asgi_application()
+
+# With the memory timer store, the process serving the API fires the timers as well
+from task_scheduler.webhook_timer.local_dispatcher import start_local_dispatcher  # noqa: E402
+
+
+start_local_dispatcher()
@@ -17,6 +17,9 @@ from task_scheduler.utils.constants import (
     CELERY_BROKER_PASSWORD,
     CELERY_BROKER_PORT,
     CELERY_BROKER_USER,
+    DB_CONN_HEALTH_CHECKS,
+    DB_CONN_MAX_AGE,
+    DB_CONNECT_TIMEOUT,
     DB_HOST,
     DB_NAME,
     DB_PASSWORD,
@@ -24,6 +27,71 @@ from task_scheduler.utils.constants import (
     DB_USER,
     DJANGO_SECRET_KEY,
     IS_DEBUG_ON,
+    METRICS_DB_GAUGES_TTL,
+    METRICS_DIR,
+    METRICS_FLUSH_INTERVAL,
+    METRICS_WORKER_PORT,
+    SHARED_CACHE_BACKEND,
+    SHARED_CACHE_LOCATION,
+    TIMER_ARCHIVE_CHUNK_SIZE,
+    TIMER_ARCHIVE_PAUSE,
+    TIMER_ARCHIVE_RETENTION_DAYS,
+    TIMER_ASYNC_PUBLISH_THREADS,
+    TIMER_ASYNC_VIEWS,
+    TIMER_BULK_MAX_ITEMS,
+    TIMER_CACHE_BACKEND,
+    TIMER_CACHE_MAX_ENTRIES,
+    TIMER_CACHE_TTL,
+    TIMER_CLAIM_LEASE,
+    TIMER_DISPATCH_MODE,
+    TIMER_DISPATCHER_BATCH_SIZE,
+    TIMER_DISPATCHER_CHUNK_SIZE,
+    TIMER_DISPATCHER_HORIZON,
+    TIMER_DISPATCHER_MAX_RATE,
+    TIMER_DISPATCHER_POLL_INTERVAL,
+    TIMER_DISPATCHER_TICK,
+    TIMER_FAST_PATH,
+    TIMER_LOCAL_DISPATCHER_BATCH_SIZE,
+    TIMER_LOCAL_DISPATCHER_LOOKAHEAD,
+    TIMER_LOCAL_DISPATCHER_THREADS,
+    TIMER_LOCAL_DISPATCHER_TICK,
+    TIMER_OUTBOX_BATCH_SIZE,
+    TIMER_OUTBOX_CONFIRM_TIMEOUT,
+    TIMER_OUTBOX_POLL_INTERVAL,
+    TIMER_SHARD_COUNT,
+    TIMER_SHARD_LEASE,
+    TIMER_STATUS_MAX_IDS,
+    TIMER_STORE_BACKEND,
+    TIMER_STORE_DIR,
+    TIMER_STORE_FSYNC_INTERVAL,
+    TIMER_STORE_SHARDS,
+    TIMER_STORE_SNAPSHOT_INTERVAL,
+    TIMER_SWEEPER_CHUNK_SIZE,
+    TIMER_SWEEPER_INSPECT_TIMEOUT,
+    TIMER_SWEEPER_INTERVAL,
+    WEBHOOK_ASYNC_CONCURRENCY,
+    WEBHOOK_CIRCUIT_FAILURE_THRESHOLD,
+    WEBHOOK_CIRCUIT_OPEN_SECONDS,
+    WEBHOOK_CIRCUIT_WINDOW,
+    WEBHOOK_DELIVERY_ENGINE,
+    WEBHOOK_DELIVERY_HISTORY_LIMIT,
+    WEBHOOK_DELIVERY_LOG_BATCH_SIZE,
+    WEBHOOK_DELIVERY_LOG_FLUSH_INTERVAL,
+    WEBHOOK_DELIVERY_LOG_MAX_BUFFERED,
+    WEBHOOK_DELIVERY_PRUNE_CHUNK_SIZE,
+    WEBHOOK_DELIVERY_RETENTION_DAYS,
+    WEBHOOK_DELIVERY_THREADS,
+    WEBHOOK_HOST_BURST,
+    WEBHOOK_HOST_LIMITS,
+    WEBHOOK_HOST_RATE,
+    WEBHOOK_HOST_WEIGHTS,
+    WEBHOOK_MAX_RETRIES,
+    WEBHOOK_POOL_MAX_HOSTS,
+    WEBHOOK_POOL_MAXSIZE,
+    WEBHOOK_RETRY_BASE_DELAY,
+    WEBHOOK_RETRY_MAX_DELAY,
+    WEBHOOK_RETRYABLE_STATUS_CODES,
+    WEBHOOK_TIMEOUT,
 )
 
 
@@ -96,6 +164,187 @@ CELERY_BROKER_URL = (
     f"{CELERY_BROKER_HOST}:{CELERY_BROKER_PORT}/"
 )
 
+# Timer dispatching
+
+# How timers reach the workers: "eta" publishes one Celery ETA message per timer at creation,
+# "outbox" stores that message in the transaction storing the timer and lets the outbox relay
+# publish it, "dispatcher" only stores the timer and lets the dispatcher process enqueue it when it
+# is due.
+TIMER_DISPATCH_MODE = TIMER_DISPATCH_MODE
+
+# Where the timers are stored: "database" in the WebhookTimer table, "memory" in the memory of the
+# process serving the API, which then fires the timers itself with its local dispatcher, made
+# durable by a write-ahead log and snapshots in TIMER_STORE_DIR. The memory store must be served
+# by a single process, e.g. "uvicorn task_scheduler.asgi:application" without workers.
+TIMER_STORE_BACKEND = TIMER_STORE_BACKEND
+TIMER_STORE_DIR = TIMER_STORE_DIR
+
+# Number of shards of the memory store, each with its lock, log and snapshot.
+TIMER_STORE_SHARDS = TIMER_STORE_SHARDS
+
+# Maximum seconds between two syncs of the logs of the memory store to disk, 0 syncs every write.
+TIMER_STORE_FSYNC_INTERVAL = TIMER_STORE_FSYNC_INTERVAL
+
+# Seconds between two snapshots of the memory store, each emptying the logs.
+TIMER_STORE_SNAPSHOT_INTERVAL = TIMER_STORE_SNAPSHOT_INTERVAL
+
+# Maximum seconds between two looks of the local dispatcher for due timers in the memory store,
+# which otherwise wakes up when the next timer is due, the maximum number of timers it fires at
+# once and the number of threads firing them.
+TIMER_LOCAL_DISPATCHER_TICK = TIMER_LOCAL_DISPATCHER_TICK
+TIMER_LOCAL_DISPATCHER_BATCH_SIZE = TIMER_LOCAL_DISPATCHER_BATCH_SIZE
+TIMER_LOCAL_DISPATCHER_THREADS = TIMER_LOCAL_DISPATCHER_THREADS
+
+# Seconds ahead of their expiry the local dispatcher opens the connections to the hosts of the
+# timers about to be fired, 0 not to open them ahead.
+TIMER_LOCAL_DISPATCHER_LOOKAHEAD = TIMER_LOCAL_DISPATCHER_LOOKAHEAD
+
+# Whether POST /timer and /timer/<id>/ are served by the async views, which query the database
+# with the async ORM and publish off the event loop. Meant for an ASGI server, e.g.
+# "uvicorn task_scheduler.asgi:application".
+TIMER_ASYNC_VIEWS = TIMER_ASYNC_VIEWS
+
+# Number of threads publishing the start_timer messages of the async views.
+TIMER_ASYNC_PUBLISH_THREADS = TIMER_ASYNC_PUBLISH_THREADS
+
+# Whether the timer endpoints parse and validate their JSON bodies with precompiled schemas instead
+# of the parsers and serializers of DRF, and encode their responses with orjson when installed.
+TIMER_FAST_PATH = TIMER_FAST_PATH
+
+# Seconds ahead of now the dispatcher loads pending timers into its timing wheel.
+TIMER_DISPATCHER_HORIZON = TIMER_DISPATCHER_HORIZON
+
+# Seconds between two database polls of the dispatcher.
+TIMER_DISPATCHER_POLL_INTERVAL = TIMER_DISPATCHER_POLL_INTERVAL
+
+# Resolution of the dispatcher's timing wheel in seconds.
+TIMER_DISPATCHER_TICK = TIMER_DISPATCHER_TICK
+
+# Number of rows the dispatcher reads per query while loading the horizon.
+TIMER_DISPATCHER_CHUNK_SIZE = TIMER_DISPATCHER_CHUNK_SIZE
+
+# Maximum number of due timers fired by a single start_timers task published by the dispatcher.
+TIMER_DISPATCHER_BATCH_SIZE = TIMER_DISPATCHER_BATCH_SIZE
+
+# Maximum number of timers per second the dispatcher enqueues over all the hosts, 0 for no limit.
+# The hosts share it by weighted fair queuing, see WEBHOOK_HOST_WEIGHTS. Sharded dispatchers
+# share it in proportion to the shards they hold.
+TIMER_DISPATCHER_MAX_RATE = TIMER_DISPATCHER_MAX_RATE
+
+# Seconds a task delivering timers holds them before they can be claimed by another task. Must
+# be well above WEBHOOK_TIMEOUT.
+TIMER_CLAIM_LEASE = TIMER_CLAIM_LEASE
+
+# Maximum number of messages the outbox relay publishes at once, seconds it waits before polling
+# an empty outbox again, and seconds it waits for the broker to confirm a batch of messages.
+TIMER_OUTBOX_BATCH_SIZE = TIMER_OUTBOX_BATCH_SIZE
+TIMER_OUTBOX_POLL_INTERVAL = TIMER_OUTBOX_POLL_INTERVAL
+TIMER_OUTBOX_CONFIRM_TIMEOUT = TIMER_OUTBOX_CONFIRM_TIMEOUT
+
+# Number of shards the timers are split into by id, shared out between the dispatcher nodes, and
+# seconds a node holds the lease of its shards without renewing it. Changing the number of shards
+# requires running "python manage.py assign_timer_shards" with the dispatchers stopped.
+TIMER_SHARD_COUNT = TIMER_SHARD_COUNT
+TIMER_SHARD_LEASE = TIMER_SHARD_LEASE
+
+# Seconds between two sweeps re-publishing the timers whose ETA message has been lost.
+TIMER_SWEEPER_INTERVAL = TIMER_SWEEPER_INTERVAL
+
+# Number of pending timers read per query by the sweeper.
+TIMER_SWEEPER_CHUNK_SIZE = TIMER_SWEEPER_CHUNK_SIZE
+
+# Days after their last expiry the fired and cancelled timers are moved to the archive table by
+# archive_timers, by chunks of TIMER_ARCHIVE_CHUNK_SIZE timers with a pause of
+# TIMER_ARCHIVE_PAUSE seconds between two chunks.
+TIMER_ARCHIVE_RETENTION_DAYS = TIMER_ARCHIVE_RETENTION_DAYS
+TIMER_ARCHIVE_CHUNK_SIZE = TIMER_ARCHIVE_CHUNK_SIZE
+TIMER_ARCHIVE_PAUSE = TIMER_ARCHIVE_PAUSE
+
+# Seconds the sweeper waits for the workers to report the tasks they hold.
+TIMER_SWEEPER_INSPECT_TIMEOUT = TIMER_SWEEPER_INSPECT_TIMEOUT
+
+# Maximum number of timers accepted by a single request to the bulk endpoint.
+TIMER_BULK_MAX_ITEMS = TIMER_BULK_MAX_ITEMS
+
+# Maximum number of timer ids accepted by a single request to the status endpoint.
+TIMER_STATUS_MAX_IDS = TIMER_STATUS_MAX_IDS
+
+# Webhook delivery
+
+# Maximum number of hosts a worker process keeps keep-alive connections open to.
+WEBHOOK_POOL_MAX_HOSTS = WEBHOOK_POOL_MAX_HOSTS
+
+# Maximum number of keep-alive connections a worker process keeps open to a single host.
+WEBHOOK_POOL_MAXSIZE = WEBHOOK_POOL_MAXSIZE
+
+# Number of threads firing the webhooks of a batch of timers concurrently.
+WEBHOOK_DELIVERY_THREADS = WEBHOOK_DELIVERY_THREADS
+
+# Engine firing the webhooks of a batch of timers: "threads" or "asyncio".
+WEBHOOK_DELIVERY_ENGINE = WEBHOOK_DELIVERY_ENGINE
+
+# Maximum number of webhooks a worker process keeps in flight with the "asyncio" engine.
+WEBHOOK_ASYNC_CONCURRENCY = WEBHOOK_ASYNC_CONCURRENCY
+
+# Timeout of a webhook request in seconds.
+WEBHOOK_TIMEOUT = WEBHOOK_TIMEOUT
+
+# The attempts at firing a webhook are buffered by every worker process and written by a
+# background thread with one INSERT per WEBHOOK_DELIVERY_LOG_BATCH_SIZE attempts, at least every
+# WEBHOOK_DELIVERY_LOG_FLUSH_INTERVAL seconds. At most WEBHOOK_DELIVERY_LOG_MAX_BUFFERED attempts
+# are kept while the writes fall behind, the oldest ones being dropped beyond.
+WEBHOOK_DELIVERY_LOG_BATCH_SIZE = WEBHOOK_DELIVERY_LOG_BATCH_SIZE
+WEBHOOK_DELIVERY_LOG_FLUSH_INTERVAL = WEBHOOK_DELIVERY_LOG_FLUSH_INTERVAL
+WEBHOOK_DELIVERY_LOG_MAX_BUFFERED = WEBHOOK_DELIVERY_LOG_MAX_BUFFERED
+
+# Maximum number of attempts returned by the delivery history of a timer, the latest ones.
+WEBHOOK_DELIVERY_HISTORY_LIMIT = WEBHOOK_DELIVERY_HISTORY_LIMIT
+
+# Days the delivery attempts are kept for by prune_deliveries, which deletes the older ones by
+# chunks of WEBHOOK_DELIVERY_PRUNE_CHUNK_SIZE rows.
+WEBHOOK_DELIVERY_RETENTION_DAYS = WEBHOOK_DELIVERY_RETENTION_DAYS
+WEBHOOK_DELIVERY_PRUNE_CHUNK_SIZE = WEBHOOK_DELIVERY_PRUNE_CHUNK_SIZE
+
+# Maximum number of retries of a failed webhook.
+WEBHOOK_MAX_RETRIES = WEBHOOK_MAX_RETRIES
+
+# The n-th retry of a webhook is delayed by a random number of seconds between 0 and
+# min(WEBHOOK_RETRY_MAX_DELAY, WEBHOOK_RETRY_BASE_DELAY * 2^n) (exponential backoff, full jitter).
+WEBHOOK_RETRY_BASE_DELAY = WEBHOOK_RETRY_BASE_DELAY
+WEBHOOK_RETRY_MAX_DELAY = WEBHOOK_RETRY_MAX_DELAY
+
+# Status codes of a webhook response after which the webhook is retried.
+WEBHOOK_RETRYABLE_STATUS_CODES = WEBHOOK_RETRYABLE_STATUS_CODES
+
+# The circuit of a host opens after WEBHOOK_CIRCUIT_FAILURE_THRESHOLD failed webhooks within
+# WEBHOOK_CIRCUIT_WINDOW seconds, and no webhook is sent to the host for
+# WEBHOOK_CIRCUIT_OPEN_SECONDS seconds. A single webhook then probes the host, closing the circuit
+# if it is delivered. The circuits are stored in the "shared" cache.
+WEBHOOK_CIRCUIT_FAILURE_THRESHOLD = WEBHOOK_CIRCUIT_FAILURE_THRESHOLD
+WEBHOOK_CIRCUIT_WINDOW = WEBHOOK_CIRCUIT_WINDOW
+WEBHOOK_CIRCUIT_OPEN_SECONDS = WEBHOOK_CIRCUIT_OPEN_SECONDS
+
+# The dispatcher enqueues the due timers of a host at most WEBHOOK_HOST_RATE per second on
+# average, in bursts of at most WEBHOOK_HOST_BURST timers. WEBHOOK_HOST_LIMITS overrides them
+# per host. Sharded dispatchers share the limits in proportion to the shards they hold.
+WEBHOOK_HOST_RATE = WEBHOOK_HOST_RATE
+WEBHOOK_HOST_BURST = WEBHOOK_HOST_BURST
+WEBHOOK_HOST_LIMITS = WEBHOOK_HOST_LIMITS
+
+# Weights of the hosts sharing TIMER_DISPATCHER_MAX_RATE, 1 for the hosts not listed.
+WEBHOOK_HOST_WEIGHTS = WEBHOOK_HOST_WEIGHTS
+
+# Directory shared by the worker processes, each writing the snapshot of its metrics to it every
+# METRICS_FLUSH_INTERVAL seconds. The main worker process serves the merged snapshots on
+# METRICS_WORKER_PORT (0 disables it), and GET /metrics merges them with the metrics of the web
+# process. An empty METRICS_DIR disables the snapshots.
+METRICS_DIR = METRICS_DIR
+METRICS_FLUSH_INTERVAL = METRICS_FLUSH_INTERVAL
+METRICS_WORKER_PORT = METRICS_WORKER_PORT
+
+# Seconds the pending and overdue timer counts of the metrics are cached.
+METRICS_DB_GAUGES_TTL = METRICS_DB_GAUGES_TTL
+
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
@@ -108,12 +357,43 @@ DATABASES = {
         "NAME": DB_NAME,
         "USER": DB_USER,
         "PASSWORD": DB_PASSWORD,
+        # Every thread keeps its connection open across requests and tasks for CONN_MAX_AGE
+        # seconds, pinging it before reusing it in a new request or task when CONN_HEALTH_CHECKS
+        # is on. The Celery children open their own connections, Celery closing those inherited
+        # from the parent, and the dispatcher and sweeper loops recycle theirs between two rounds.
+        "CONN_MAX_AGE": DB_CONN_MAX_AGE,
+        "CONN_HEALTH_CHECKS": DB_CONN_HEALTH_CHECKS,
+        "OPTIONS": {
+            "connect_timeout": DB_CONNECT_TIMEOUT,
+        },
     },
-    "OPTIONS": {
-        "connect_timeout": 30,
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Cache shared by the web and worker processes. The local-memory default only stands in for
+    # a shared backend (e.g. DatabaseCache, Memcached or Redis) in development.
+    "shared": {
+        "BACKEND": SHARED_CACHE_BACKEND,
+        "LOCATION": SHARED_CACHE_LOCATION,
     },
 }
 
+# Backend of the timer cache used by GET /timer/<timer_id>/: "local", "shared" or "none".
+TIMER_CACHE_BACKEND = TIMER_CACHE_BACKEND
+
+# Seconds a timer is kept in the timer cache.
+TIMER_CACHE_TTL = TIMER_CACHE_TTL
+
+# Maximum number of timers kept in the timer cache of a process with the "local" backend.
+TIMER_CACHE_MAX_ENTRIES = TIMER_CACHE_MAX_ENTRIES
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.1/topics/i18n/
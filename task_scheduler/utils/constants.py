@@ -1,4 +1,5 @@
-from task_scheduler.utils.helpers import get_env_var
+from task_scheduler.utils.exceptions import ConfigError
+from task_scheduler.utils.helpers import get_env_var, parse_key_values
 
 
 IS_DEBUG_ON: bool = get_env_var("ENVIRONMENT", required=True).lower() == "dev"
@@ -14,3 +15,209 @@ DB_PORT: str = get_env_var("DB_PORT", required=True)
 DB_NAME: str = get_env_var("DB_NAME", required=True)
 DB_USER: str = get_env_var("DB_USER", required=True)
 DB_PASSWORD: str = get_env_var("DB_PASSWORD", required=True)
+DB_CONNECT_TIMEOUT: int = int(get_env_var("DB_CONNECT_TIMEOUT", default="30"))
+
+# Seconds a database connection is reused by the requests, tasks and loops of a thread, "none" to
+# reuse it for the lifetime of the thread and 0 to open a connection for each of them.
+_db_conn_max_age = get_env_var("DB_CONN_MAX_AGE", default="60")
+DB_CONN_MAX_AGE: int | None = None if _db_conn_max_age.lower() == "none" else int(_db_conn_max_age)
+DB_CONN_HEALTH_CHECKS: bool = get_env_var("DB_CONN_HEALTH_CHECKS", default="true").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+# "eta" publishes one Celery ETA message per timer, "outbox" stores the message with the timer
+# for the outbox relay (manage.py run_outbox_relay) to publish it, "dispatcher" leaves the
+# scheduling to the dispatcher process (manage.py run_dispatcher) which reads the due timers from
+# the database.
+TIMER_DISPATCH_MODES = ("eta", "outbox", "dispatcher")
+TIMER_DISPATCH_MODE: str = get_env_var("TIMER_DISPATCH_MODE", default="eta").lower()
+if TIMER_DISPATCH_MODE not in TIMER_DISPATCH_MODES:
+    raise ConfigError(
+        f"TIMER_DISPATCH_MODE must be one of {TIMER_DISPATCH_MODES}, "
+        f"but given '{TIMER_DISPATCH_MODE}'."
+    )
+
+# "database" stores the timers in the WebhookTimer table, "memory" in the memory of the process
+# serving the API with a write-ahead log in TIMER_STORE_DIR, the process then firing the timers.
+TIMER_STORE_BACKENDS = ("database", "memory")
+TIMER_STORE_BACKEND: str = get_env_var("TIMER_STORE_BACKEND", default="database").lower()
+if TIMER_STORE_BACKEND not in TIMER_STORE_BACKENDS:
+    raise ConfigError(
+        f"TIMER_STORE_BACKEND must be one of {TIMER_STORE_BACKENDS}, "
+        f"but given '{TIMER_STORE_BACKEND}'."
+    )
+
+TIMER_STORE_DIR: str = get_env_var("TIMER_STORE_DIR", default="timer_store")
+TIMER_STORE_SHARDS: int = int(get_env_var("TIMER_STORE_SHARDS", default="16"))
+TIMER_STORE_FSYNC_INTERVAL: float = float(get_env_var("TIMER_STORE_FSYNC_INTERVAL", default="1"))
+TIMER_STORE_SNAPSHOT_INTERVAL: float = float(
+    get_env_var("TIMER_STORE_SNAPSHOT_INTERVAL", default="300")
+)
+TIMER_LOCAL_DISPATCHER_TICK: float = float(
+    get_env_var("TIMER_LOCAL_DISPATCHER_TICK", default="0.05")
+)
+TIMER_LOCAL_DISPATCHER_BATCH_SIZE: int = int(
+    get_env_var("TIMER_LOCAL_DISPATCHER_BATCH_SIZE", default="500")
+)
+TIMER_LOCAL_DISPATCHER_THREADS: int = int(
+    get_env_var("TIMER_LOCAL_DISPATCHER_THREADS", default="4")
+)
+TIMER_LOCAL_DISPATCHER_LOOKAHEAD: float = float(
+    get_env_var("TIMER_LOCAL_DISPATCHER_LOOKAHEAD", default="2")
+)
+
+# Serve POST /timer and /timer/<id>/ with the async views, for an ASGI server.
+TIMER_ASYNC_VIEWS: bool = get_env_var("TIMER_ASYNC_VIEWS", default="false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+TIMER_ASYNC_PUBLISH_THREADS: int = int(get_env_var("TIMER_ASYNC_PUBLISH_THREADS", default="64"))
+
+# Validate and encode the timer requests with the precompiled schemas and the fast JSON codec.
+TIMER_FAST_PATH: bool = get_env_var("TIMER_FAST_PATH", default="false").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+TIMER_DISPATCHER_HORIZON: float = float(get_env_var("TIMER_DISPATCHER_HORIZON", default="60"))
+TIMER_DISPATCHER_POLL_INTERVAL: float = float(
+    get_env_var("TIMER_DISPATCHER_POLL_INTERVAL", default="5")
+)
+TIMER_DISPATCHER_TICK: float = float(get_env_var("TIMER_DISPATCHER_TICK", default="0.1"))
+TIMER_DISPATCHER_CHUNK_SIZE: int = int(get_env_var("TIMER_DISPATCHER_CHUNK_SIZE", default="5000"))
+TIMER_DISPATCHER_BATCH_SIZE: int = int(get_env_var("TIMER_DISPATCHER_BATCH_SIZE", default="100"))
+TIMER_DISPATCHER_MAX_RATE: float = float(get_env_var("TIMER_DISPATCHER_MAX_RATE", default="0"))
+
+TIMER_CLAIM_LEASE: float = float(get_env_var("TIMER_CLAIM_LEASE", default="60"))
+
+TIMER_OUTBOX_BATCH_SIZE: int = int(get_env_var("TIMER_OUTBOX_BATCH_SIZE", default="500"))
+TIMER_OUTBOX_POLL_INTERVAL: float = float(get_env_var("TIMER_OUTBOX_POLL_INTERVAL", default="0.1"))
+TIMER_OUTBOX_CONFIRM_TIMEOUT: float = float(
+    get_env_var("TIMER_OUTBOX_CONFIRM_TIMEOUT", default="10")
+)
+
+TIMER_SHARD_COUNT: int = int(get_env_var("TIMER_SHARD_COUNT", default="64"))
+TIMER_SHARD_LEASE: float = float(get_env_var("TIMER_SHARD_LEASE", default="15"))
+
+TIMER_SWEEPER_INTERVAL: float = float(get_env_var("TIMER_SWEEPER_INTERVAL", default="300"))
+TIMER_SWEEPER_CHUNK_SIZE: int = int(get_env_var("TIMER_SWEEPER_CHUNK_SIZE", default="10000"))
+TIMER_SWEEPER_INSPECT_TIMEOUT: float = float(
+    get_env_var("TIMER_SWEEPER_INSPECT_TIMEOUT", default="2")
+)
+
+TIMER_ARCHIVE_RETENTION_DAYS: float = float(
+    get_env_var("TIMER_ARCHIVE_RETENTION_DAYS", default="7")
+)
+TIMER_ARCHIVE_CHUNK_SIZE: int = int(get_env_var("TIMER_ARCHIVE_CHUNK_SIZE", default="500"))
+TIMER_ARCHIVE_PAUSE: float = float(get_env_var("TIMER_ARCHIVE_PAUSE", default="0.05"))
+
+TIMER_BULK_MAX_ITEMS: int = int(get_env_var("TIMER_BULK_MAX_ITEMS", default="10000"))
+TIMER_STATUS_MAX_IDS: int = int(get_env_var("TIMER_STATUS_MAX_IDS", default="1000"))
+
+WEBHOOK_POOL_MAX_HOSTS: int = int(get_env_var("WEBHOOK_POOL_MAX_HOSTS", default="100"))
+WEBHOOK_POOL_MAXSIZE: int = int(get_env_var("WEBHOOK_POOL_MAXSIZE", default="10"))
+WEBHOOK_DELIVERY_THREADS: int = int(get_env_var("WEBHOOK_DELIVERY_THREADS", default="16"))
+
+# "threads" fires the webhooks of a batch on a thread pool, "asyncio" on the event loop of the
+# worker process with an asynchronous HTTP client.
+WEBHOOK_DELIVERY_ENGINES = ("threads", "asyncio")
+WEBHOOK_DELIVERY_ENGINE: str = get_env_var("WEBHOOK_DELIVERY_ENGINE", default="threads").lower()
+if WEBHOOK_DELIVERY_ENGINE not in WEBHOOK_DELIVERY_ENGINES:
+    raise ConfigError(
+        f"WEBHOOK_DELIVERY_ENGINE must be one of {WEBHOOK_DELIVERY_ENGINES}, "
+        f"but given '{WEBHOOK_DELIVERY_ENGINE}'."
+    )
+
+WEBHOOK_ASYNC_CONCURRENCY: int = int(get_env_var("WEBHOOK_ASYNC_CONCURRENCY", default="1000"))
+WEBHOOK_TIMEOUT: float = float(get_env_var("WEBHOOK_TIMEOUT", default="10"))
+
+WEBHOOK_DELIVERY_LOG_BATCH_SIZE: int = int(
+    get_env_var("WEBHOOK_DELIVERY_LOG_BATCH_SIZE", default="500")
+)
+WEBHOOK_DELIVERY_LOG_FLUSH_INTERVAL: float = float(
+    get_env_var("WEBHOOK_DELIVERY_LOG_FLUSH_INTERVAL", default="2")
+)
+WEBHOOK_DELIVERY_LOG_MAX_BUFFERED: int = int(
+    get_env_var("WEBHOOK_DELIVERY_LOG_MAX_BUFFERED", default="50000")
+)
+WEBHOOK_DELIVERY_HISTORY_LIMIT: int = int(
+    get_env_var("WEBHOOK_DELIVERY_HISTORY_LIMIT", default="100")
+)
+WEBHOOK_DELIVERY_RETENTION_DAYS: float = float(
+    get_env_var("WEBHOOK_DELIVERY_RETENTION_DAYS", default="30")
+)
+WEBHOOK_DELIVERY_PRUNE_CHUNK_SIZE: int = int(
+    get_env_var("WEBHOOK_DELIVERY_PRUNE_CHUNK_SIZE", default="1000")
+)
+
+WEBHOOK_MAX_RETRIES: int = int(get_env_var("WEBHOOK_MAX_RETRIES", default="3"))
+WEBHOOK_RETRY_BASE_DELAY: float = float(get_env_var("WEBHOOK_RETRY_BASE_DELAY", default="10"))
+WEBHOOK_RETRY_MAX_DELAY: float = float(get_env_var("WEBHOOK_RETRY_MAX_DELAY", default="600"))
+
+# Status codes of a webhook response after which the webhook is retried. Any other error status
+# code fails the webhook for good.
+WEBHOOK_RETRYABLE_STATUS_CODES: frozenset[int] = frozenset(
+    int(status_code)
+    for status_code in get_env_var(
+        "WEBHOOK_RETRYABLE_STATUS_CODES", default="408,425,429,500,502,503,504"
+    ).split(",")
+    if status_code.strip()
+)
+
+WEBHOOK_CIRCUIT_FAILURE_THRESHOLD: int = int(
+    get_env_var("WEBHOOK_CIRCUIT_FAILURE_THRESHOLD", default="5")
+)
+WEBHOOK_CIRCUIT_WINDOW: float = float(get_env_var("WEBHOOK_CIRCUIT_WINDOW", default="60"))
+WEBHOOK_CIRCUIT_OPEN_SECONDS: float = float(
+    get_env_var("WEBHOOK_CIRCUIT_OPEN_SECONDS", default="30")
+)
+
+WEBHOOK_HOST_RATE: float = float(get_env_var("WEBHOOK_HOST_RATE", default="100"))
+WEBHOOK_HOST_BURST: float = float(get_env_var("WEBHOOK_HOST_BURST", default="200"))
+
+# Per-host "host=rate[:burst]" overrides of WEBHOOK_HOST_RATE and WEBHOOK_HOST_BURST, e.g.
+# "https://example.com=10:50,https://example.org=500". The burst defaults to the rate, a rate of 0
+# disables the limit of the host.
+WEBHOOK_HOST_LIMITS: dict[str, tuple[float, float]] = {
+    host.lower(): (float(rate), float(burst or rate))
+    for host, (rate, _, burst) in (
+        (host, limit.partition(":"))
+        for host, limit in parse_key_values(get_env_var("WEBHOOK_HOST_LIMITS")).items()
+    )
+}
+
+# Per-host "host=weight" weights in the fair scheduling of the webhooks, 1 by default.
+WEBHOOK_HOST_WEIGHTS: dict[str, float] = {
+    host.lower(): float(weight)
+    for host, weight in parse_key_values(get_env_var("WEBHOOK_HOST_WEIGHTS")).items()
+}
+if any(weight <= 0 for weight in WEBHOOK_HOST_WEIGHTS.values()):
+    raise ConfigError("The WEBHOOK_HOST_WEIGHTS must be positive.")
+
+# "local" caches the timers per process, "shared" in the Django cache shared by the processes,
+# "none" disables the cache.
+TIMER_CACHE_BACKENDS = ("local", "shared", "none")
+TIMER_CACHE_BACKEND: str = get_env_var("TIMER_CACHE_BACKEND", default="local").lower()
+if TIMER_CACHE_BACKEND not in TIMER_CACHE_BACKENDS:
+    raise ConfigError(
+        f"TIMER_CACHE_BACKEND must be one of {TIMER_CACHE_BACKENDS}, "
+        f"but given '{TIMER_CACHE_BACKEND}'."
+    )
+
+TIMER_CACHE_TTL: float = float(get_env_var("TIMER_CACHE_TTL", default="60"))
+TIMER_CACHE_MAX_ENTRIES: int = int(get_env_var("TIMER_CACHE_MAX_ENTRIES", default="100000"))
+
+SHARED_CACHE_BACKEND: str = get_env_var(
+    "SHARED_CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"
+)
+SHARED_CACHE_LOCATION: str = get_env_var("SHARED_CACHE_LOCATION", default="task_scheduler")
+
+# Directory the worker processes write their metrics snapshots to, "" disables the snapshots.
+METRICS_DIR: str = get_env_var("METRICS_DIR")
+METRICS_FLUSH_INTERVAL: float = float(get_env_var("METRICS_FLUSH_INTERVAL", default="5"))
+METRICS_WORKER_PORT: int = int(get_env_var("METRICS_WORKER_PORT", default="9100"))
+METRICS_DB_GAUGES_TTL: float = float(get_env_var("METRICS_DB_GAUGES_TTL", default="30"))
@@ -1,3 +1,4 @@
+import math
 from os import getenv
 
 from task_scheduler.utils.exceptions import ConfigError
@@ -24,3 +25,62 @@ def get_env_var(env_var_name: str, default: str = "", required: bool = False) ->
         raise ConfigError(f"Environment variable '{env_var_name}' is required but not set.")
 
     return value.strip() if value is not None else default
+
+
+def parse_key_values(value: str) -> dict[str, str]:
+    """Parse a comma-separated list of key=value pairs, e.g. the value of an environment variable.
+
+    The last "=" of every pair separates its key from its value, so the keys may contain "=" but
+    not the values.
+
+    Args:
+        value (str): The pairs, e.g. "https://example.com=10,https://example.org=5".
+
+    Raises:
+        ConfigError: If a pair has no "=" or an empty key.
+
+    Returns:
+        dict[str, str]: The values by key, both stripped.
+    """
+    pairs = {}
+
+    for pair in value.split(","):
+        if not pair.strip():
+            continue
+
+        key, separator, item = pair.rpartition("=")
+        if not separator or not key.strip():
+            raise ConfigError(f"Expected a key=value pair, but given '{pair.strip()}'.")
+        pairs[key.strip()] = item.strip()
+
+    return pairs
+
+
+def percentile(values: list[float], percent: float) -> float:
+    """Return the percentile of the values using the nearest-rank method.
+
+    Args:
+        values (list[float]): The measured values.
+        percent (float): The percentile to compute, between 0 and 100.
+
+    Returns:
+        float: The percentile, or NaN if there are no values.
+    """
+    if not values:
+        return math.nan
+
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def summarize(values: list[float]) -> dict:
+    """Return the count, mean and the usual percentiles of the values."""
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values) if values else math.nan,
+        "p50": percentile(values, 50),
+        "p90": percentile(values, 90),
+        "p99": percentile(values, 99),
+        "max": max(values) if values else math.nan,
+    }
@@ -0,0 +1,351 @@
+import bisect
+import glob
+import json
+import logging
+import math
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterable
+
+
+logger = logging.getLogger(__name__)
+
+COUNTER = "counter"
+GAUGE = "gauge"
+HISTOGRAM = "histogram"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+
+class _ShardedValues:
+    """Values recorded without locks: every thread adds to its own shard of the values.
+
+    A thread only ever writes its own shard, so recording never waits for another thread. The
+    shards are summed when the values are collected, which is the only operation taking the
+    lock, besides the first recording of every thread. The shards of the threads which have
+    exited are folded into the retired values then, so short-lived threads do not pile up.
+    """
+
+    def __init__(self, size: int):
+        self._local = threading.local()
+        self._shards: list[tuple[threading.Thread, list[float]]] = []
+        self._retired = [0.0] * size
+        self._lock = threading.Lock()
+
+    def shard(self) -> list[float]:
+        """Return the shard of the current thread."""
+        try:
+            return self._local.values
+        except AttributeError:
+            values = self._local.values = [0.0] * len(self._retired)
+            with self._lock:
+                self._shards.append((threading.current_thread(), values))
+            return values
+
+    def collect(self) -> list[float]:
+        """Return the sum of the shards."""
+        with self._lock:
+            alive = []
+            for thread, values in self._shards:
+                if thread.is_alive():
+                    alive.append((thread, values))
+                else:
+                    self._retired = [a + b for a, b in zip(self._retired, values)]
+            self._shards = alive
+
+            return [
+                math.fsum(column) for column in zip(self._retired, *(values for _, values in alive))
+            ]
+
+
+class _Metric:
+    """Base class of the metrics, a family of children identified by their label values."""
+
+    type = ""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        registry: "MetricsRegistry | None" = None,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], _Metric] = {}
+        self._lock = threading.Lock()
+
+        if not self.labelnames:
+            self._init_values()
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def labels(self, *values: str, **labels: str) -> "_Metric":
+        """Return the child of the metric with the given label values."""
+        key = tuple(str(value) for value in values) or tuple(
+            str(labels[name]) for name in self.labelnames
+        )
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"Expected the labels {self.labelnames} of '{self.name}'")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def collect(self) -> dict:
+        """Return the current values of the metric, by JSON-encoded label values."""
+        children = {(): self} if not self.labelnames else dict(self._children)
+        return {
+            "type": self.type,
+            "help": self.documentation,
+            "labelnames": list(self.labelnames),
+            "values": {json.dumps(list(key)): child._collect() for key, child in children.items()},
+            **self._describe(),
+        }
+
+    def _new_child(self) -> "_Metric":
+        child = object.__new__(type(self))
+        child.__dict__.update(self.__dict__)
+        child.labelnames = ()
+        child._children = {}
+        child._init_values()
+        return child
+
+    def _describe(self) -> dict:
+        return {}
+
+    def _init_values(self):
+        raise NotImplementedError
+
+    def _collect(self) -> list[float]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing value, e.g. the number of fired webhooks."""
+
+    type = COUNTER
+
+    def inc(self, amount: float = 1):
+        self._values.shard()[0] += amount
+
+    def _init_values(self):
+        self._values = _ShardedValues(1)
+
+    def _collect(self) -> list[float]:
+        return self._values.collect()
+
+
+class Gauge(_Metric):
+    """Value which goes up and down, either set directly or computed when collected."""
+
+    type = GAUGE
+
+    def set(self, value: float):
+        # A single attribute assignment, atomic under the GIL
+        self._value = float(value)
+
+    def set_function(self, function: Callable[[], float]):
+        """Compute the value of the gauge with the given function whenever it is collected."""
+        self._function = function
+
+    def _init_values(self):
+        self._value = 0.0
+        self._function = None
+
+    def _collect(self) -> list[float]:
+        if self._function is None:
+            return [self._value]
+        try:
+            return [float(self._function())]
+        except Exception as err:
+            logger.error(f"Failed to compute the gauge '{self.name}': {str(err)}")
+            return [math.nan]
+
+
+class Histogram(_Metric):
+    """Distribution of observed values, e.g. latencies, counted in cumulative buckets."""
+
+    type = HISTOGRAM
+
+    def __init__(self, name: str, documentation: str, buckets=DEFAULT_BUCKETS, **kwargs):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, **kwargs)
+
+    def observe(self, value: float):
+        # One count per bucket, the last one for +Inf, followed by the sum of the values
+        values = self._values.shard()
+        values[bisect.bisect_left(self.buckets, value)] += 1
+        values[-1] += value
+
+    @contextmanager
+    def time(self):
+        """Observe the seconds spent in the block."""
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started_at)
+
+    def _init_values(self):
+        self._values = _ShardedValues(len(self.buckets) + 2)
+
+    def _collect(self) -> list[float]:
+        return self._values.collect()
+
+    def _describe(self) -> dict:
+        return {"buckets": list(self.buckets)}
+
+
+class MetricsRegistry:
+    """Set of metrics collected and rendered together."""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"A metric named '{metric.name}' is already registered")
+            self._metrics[metric.name] = metric
+
+    def collect(self) -> dict[str, dict]:
+        """Return the current values of every metric by metric name."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.collect() for metric in metrics}
+
+
+REGISTRY = MetricsRegistry()
+
+
+def merge_snapshots(snapshots: Iterable[dict[str, dict]]) -> dict[str, dict]:
+    """Merge the metrics collected by several processes.
+
+    The values of the counters and the histograms are added up. The gauges are added up as
+    well, so a gauge is expected to be set by a single process.
+    """
+    merged = {}
+    for snapshot in snapshots:
+        for name, metric in snapshot.items():
+            if name not in merged:
+                merged[name] = {**metric, "values": dict(metric["values"])}
+                continue
+
+            values = merged[name]["values"]
+            for key, metric_values in metric["values"].items():
+                if key in values:
+                    values[key] = [a + b for a, b in zip(values[key], metric_values)]
+                else:
+                    values[key] = metric_values
+    return merged
+
+
+def render(metrics: dict[str, dict]) -> str:
+    """Render the metrics in the Prometheus text exposition format (version 0.0.4)."""
+    lines = []
+    for name, metric in sorted(metrics.items()):
+        lines.append(f"# HELP {name} {_escape(metric['help'], is_help=True)}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+
+        for key, values in sorted(metric["values"].items()):
+            labels = list(zip(metric["labelnames"], json.loads(key)))
+            if metric["type"] != HISTOGRAM:
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(values[0])}")
+                continue
+
+            cumulative = 0.0
+            bounds = [*map(_format_value, metric["buckets"]), "+Inf"]
+            for bound, count in zip(bounds, values[:-1]):
+                cumulative += count
+                bucket_labels = _format_labels([*labels, ("le", bound)])
+                lines.append(f"{name}_bucket{bucket_labels} {_format_value(cumulative)}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(values[-1])}")
+            lines.append(f"{name}_count{_format_labels(labels)} {_format_value(cumulative)}")
+
+    return "\n".join(lines) + "\n"
+
+
+class SnapshotWriter:
+    """Background thread writing the metrics of the process to a directory shared by processes.
+
+    Every process writing its snapshot to the same directory, e.g. the children of a prefork
+    Celery worker, can then be exposed by any process merging the snapshots of the directory
+    (see read_snapshots). The snapshots are replaced atomically, so a reader never sees a
+    partial one.
+    """
+
+    def __init__(self, directory: str, interval: float, registry: MetricsRegistry | None = None):
+        self.directory = directory
+        self.interval = interval
+        self.registry = registry or REGISTRY
+        self.path = os.path.join(directory, f"{os.getpid()}.json")
+        self._stop_event = threading.Event()
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        threading.Thread(target=self._run, name="metrics-snapshot", daemon=True).start()
+
+    def stop(self):
+        self._stop_event.set()
+        self.write()
+
+    def write(self):
+        descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(descriptor, "w") as file:
+            json.dump(self.registry.collect(), file)
+        os.replace(temporary_path, self.path)
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.write()
+            except Exception as err:
+                logger.error(f"Failed to write the metrics snapshot: {str(err)}")
+
+
+def read_snapshots(directory: str, exclude_pid: int | None = None) -> list[dict[str, dict]]:
+    """Read the metrics snapshots written to the directory by the SnapshotWriter of processes.
+
+    Args:
+        directory (str): The directory of the snapshots.
+        exclude_pid (int, optional): A process whose snapshot is skipped, e.g. the reading
+            process whose live metrics are used instead. Defaults to None.
+
+    Returns:
+        list[dict[str, dict]]: The snapshots, to merge with merge_snapshots.
+    """
+    snapshots = []
+    for path in glob.glob(os.path.join(directory, "*.json")):
+        if exclude_pid is not None and os.path.basename(path) == f"{exclude_pid}.json":
+            continue
+        try:
+            with open(path) as file:
+                snapshots.append(json.load(file))
+        except (OSError, ValueError) as err:
+            logger.warning(f"Skipping the metrics snapshot '{path}': {str(err)}")
+    return snapshots
+
+
+def _format_labels(labels: list[tuple[str, str]]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _escape(value: str, is_help: bool = False) -> str:
+    value = value.replace("\\", "\\\\").replace("\n", "\\n")
+    return value if is_help else value.replace('"', '\\"')
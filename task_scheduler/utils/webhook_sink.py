@@ -0,0 +1,122 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+
+
+class _SinkServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Lets thousands of clients connect at once without being refused
+    request_queue_size = 4096
+
+
+class WebhookSink:
+    """Local HTTP server receiving webhooks, used by the benchmarks and the tests.
+
+    The sink accepts POST requests on any path, records the id sent in the JSON body together
+    with the time of arrival, optionally sleeps to simulate a slow endpoint and answers with the
+    status code chosen by `respond`. Connections are kept alive (HTTP/1.1) and every connection
+    is served by its own thread, which may first sleep to simulate the handshakes of a distant
+    host.
+
+    Usage:
+        with WebhookSink(delay=0.1) as sink:
+            requests.post(sink.url, json={"id": "..."})
+            sink.received  # [("...", 1735689600.123)]
+
+    Attributes:
+        delay (float): Seconds the sink waits before answering a webhook.
+        connect_delay (float): Seconds the sink waits before reading from a new connection.
+        respond (Callable[[int], int]): Called with the 1-based number of the received webhook,
+            returns the status code of the response.
+        received (list[tuple[str, float]]): The id of every received webhook and the wall-clock
+            time of its arrival.
+        connection_count (int): Number of connections accepted.
+    """
+
+    def __init__(
+        self,
+        delay: float = 0.0,
+        respond: Callable[[int], int] = lambda count: 200,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        connect_delay: float = 0.0,
+    ):
+        self.delay = delay
+        self.respond = respond
+        self.connect_delay = connect_delay
+        self.received: list[tuple[str, float]] = []
+        self.connection_count = 0
+
+        self._lock = threading.Lock()
+        self._server = _SinkServer((host, port), self._make_handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        """The URL of the sink, e.g. "http://127.0.0.1:49152/webhook"."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/webhook"
+
+    def start(self) -> "WebhookSink":
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Serve in the calling thread, e.g. as the target of a forked process.
+
+        Running the sink in its own process keeps its threads from competing for the GIL with
+        the client being benchmarked. The received webhooks are then only recorded in that
+        process.
+        """
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "WebhookSink":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _record(self, timer_id: str) -> int:
+        with self._lock:
+            self.received.append((timer_id, time.time()))
+            return len(self.received)
+
+    def _make_handler(self):
+        sink = self
+
+        class WebhookSinkHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with sink._lock:
+                    sink.connection_count += 1
+                if sink.connect_delay:
+                    time.sleep(sink.connect_delay)
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                try:
+                    timer_id = str(json.loads(body).get("id"))
+                except (ValueError, AttributeError):
+                    timer_id = ""
+
+                count = sink._record(timer_id)
+                if sink.delay:
+                    time.sleep(sink.delay)
+
+                self.send_response(sink.respond(count))
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                # Keep the output of the benchmarks and the tests clean
+                pass
+
+        return WebhookSinkHandler
@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+import aiohttp
+from django.conf import settings
+
+from task_scheduler.webhook_timer.delivery_log import delivery_log
+from task_scheduler.webhook_timer.metrics import get_status_class, webhook_request_duration
+from task_scheduler.webhook_timer.models import WebhookDelivery, WebhookTimer
+from task_scheduler.webhook_timer.retry_policy import is_retryable_status
+
+
+logger = logging.getLogger("webhook_timer")
+
+
+class AsyncDeliveryEngine:
+    """Webhook delivery engine running on an asyncio event loop.
+
+    A single event loop per process, running in a background thread, fires the webhooks with an
+    aiohttp client session. The number of requests in flight is bounded by a semaphore and
+    every request has a timeout, so a process can keep thousands of slow deliveries in flight
+    without dedicating a thread or a worker child to each of them. The session, and therefore its
+    keep-alive connections, is shared by all the batches delivered by the process.
+
+    The loop is started on first use and again after a fork, so every worker child has its own.
+
+    Attributes:
+        concurrency (int): Maximum number of requests in flight.
+        timeout (float): Timeout of every request in seconds.
+    """
+
+    def __init__(self, concurrency: int | None = None, timeout: float | None = None):
+        self.concurrency = concurrency or settings.WEBHOOK_ASYNC_CONCURRENCY
+        self.timeout = timeout or settings.WEBHOOK_TIMEOUT
+
+        self._lock = threading.Lock()
+        self._pid = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._session: aiohttp.ClientSession | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+
+    def deliver(
+        self, webhook_timers: list[WebhookTimer], attempt: int = 1
+    ) -> tuple[list, list, list]:
+        """Fire the webhooks of the given timers concurrently and wait for all of them.
+
+        Args:
+            webhook_timers (list[WebhookTimer]): The timers to fire.
+            attempt (int, optional): The attempt number of the deliveries, as recorded in the
+                delivery log. Defaults to 1.
+
+        Returns:
+            tuple[list[WebhookTimer], list[WebhookTimer], list[WebhookTimer]]: The delivered
+                timers, the failed timers to retry and the timers rejected by their endpoint.
+        """
+        if not webhook_timers:
+            return [], [], []
+
+        loop = self._ensure_started()
+        future = asyncio.run_coroutine_threadsafe(self._deliver(webhook_timers, attempt), loop)
+        return future.result()
+
+    def close(self):
+        """Close the HTTP session and stop the event loop."""
+        with self._lock:
+            if self._loop is None or self._pid != os.getpid():
+                return
+
+            asyncio.run_coroutine_threadsafe(self._session.close(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop = None
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is not None and self._pid == os.getpid():
+                return self._loop
+
+            self._pid = os.getpid()
+            self._loop = asyncio.new_event_loop()
+            threading.Thread(target=self._loop.run_forever, daemon=True).start()
+            asyncio.run_coroutine_threadsafe(self._open(), self._loop).result()
+            return self._loop
+
+    async def _open(self):
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.concurrency),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+
+    async def _deliver(
+        self, webhook_timers: list[WebhookTimer], attempt: int
+    ) -> tuple[list, list, list]:
+        outcomes = await asyncio.gather(*(self._fire(timer, attempt) for timer in webhook_timers))
+
+        delivered, failed, rejected = [], [], []
+        outcome_lists = {"delivered": delivered, "failed": failed, "rejected": rejected}
+        for webhook_timer, outcome in zip(webhook_timers, outcomes):
+            outcome_lists[outcome].append(webhook_timer)
+        return delivered, failed, rejected
+
+    async def _fire(self, webhook_timer: WebhookTimer, attempt: int) -> str:
+        url = webhook_timer.url
+        async with self._semaphore:
+            attempted_at = datetime.now(timezone.utc)
+            started_at = time.perf_counter()
+            status_code = None
+            try:
+                async with self._session.post(url, json={"id": str(webhook_timer.id)}) as response:
+                    status_code = response.status
+                    reason = response.reason or ""
+            except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+                logger.error(f"Failed to fire a webhook to '{url}': {err!r}")
+                delivery_log.record(
+                    str(webhook_timer.id),
+                    attempt,
+                    WebhookDelivery.Outcome.FAILED,
+                    attempted_at,
+                    time.perf_counter() - started_at,
+                    error=f"{type(err).__name__}: {str(err)}",
+                )
+                return "failed"
+            finally:
+                duration = time.perf_counter() - started_at
+                webhook_request_duration.labels(get_status_class(status_code)).observe(duration)
+
+        if status_code >= 400:
+            logger.error(f"Failed to fire a webhook to '{url}', status code: {status_code}")
+            outcome = "failed" if is_retryable_status(status_code) else "rejected"
+        else:
+            logger.info(f"Successfully fired a webhook to '{url}'")
+            outcome, reason = "delivered", ""
+
+        delivery_log.record(
+            str(webhook_timer.id), attempt, outcome, attempted_at, duration, status_code, reason
+        )
+        return outcome
+
+
+# The event loop is started on first use, so every forked worker child ends up with its own
+async_engine = AsyncDeliveryEngine()
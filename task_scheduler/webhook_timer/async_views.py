@@ -0,0 +1,214 @@
+import logging
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from uuid import UUID, uuid4
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+
+from task_scheduler.utils import fast_json
+from task_scheduler.utils.constants import IS_DEBUG_ON
+from task_scheduler.webhook_timer.cache import timer_cache
+from task_scheduler.webhook_timer.metrics import instrument_view, timers_created
+from task_scheduler.webhook_timer.serializers import (
+    RESCHEDULE_TIMER_SCHEMA,
+    SET_TIMER_SCHEMA,
+    RescheduleTimerSerializer,
+    SetTimerSerializer,
+)
+from task_scheduler.webhook_timer.tasks import start_timer
+from task_scheduler.webhook_timer.timer_store import get_timer_store
+from task_scheduler.webhook_timer.views import (
+    _get_first_expires_at,
+    _get_time_left,
+    _get_timer_kind,
+    _json_response,
+    _parse_timer_id,
+    _publishes_tasks,
+    _validate_data,
+)
+
+
+logger = logging.getLogger("webhook_timer")
+
+
+# Publishing blocks on the broker connection, so it runs on threads of its own rather than on the
+# event loop, or on the default executor of the loop whose few threads would cap the number of
+# requests publishing at once
+_publish_executor = ThreadPoolExecutor(
+    max_workers=settings.TIMER_ASYNC_PUBLISH_THREADS, thread_name_prefix="timer-publish"
+)
+
+
+async def _publish_timer(timer_id: UUID, expires_at: datetime, version: int):
+    """Publish the start_timer ETA message of a timer without blocking the event loop."""
+    await sync_to_async(
+        start_timer.apply_async, thread_sensitive=False, executor=_publish_executor
+    )(eta=expires_at, task_id=str(timer_id), kwargs={"version": version})
+
+
+def _parse_json_body(request: HttpRequest) -> dict:
+    """Return the JSON object of the request body.
+
+    Raises:
+        ValueError: If the body is not a JSON object, with the message returned to the client.
+    """
+    try:
+        data = fast_json.loads(request.body or b"{}")
+    except ValueError as exc:
+        raise ValueError(f"JSON parse error - {str(exc)}") from None
+
+    if not isinstance(data, dict):
+        raise ValueError(f"Expected a JSON object, but given {type(data).__name__}")
+    return data
+
+
+async def _atimer_conflict_response(timer_id: UUID) -> HttpResponse:
+    """Asynchronous version of views._timer_conflict_response."""
+    if not await get_timer_store().aexists(timer_id):
+        return _json_response({"error": "No timer matches the given id"}, status=404)
+    return _json_response(
+        {"error": "The timer has already been fired or cancelled, or is being fired"}, status=409
+    )
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncWebhookTimerView(View):
+    """Asynchronous version of WebhookTimerView, served by routing /timer to it under ASGI.
+
+    The endpoints, their request bodies and their responses are the same as those of
+    WebhookTimerView. The database is queried with the async ORM and the start_timer task is
+    published on a pool of TIMER_ASYNC_PUBLISH_THREADS threads, so a request waiting on the
+    database or the broker does not hold a worker thread of the server: a single ASGI process
+    keeps many more requests in flight than the threads of a WSGI process.
+
+    The view is selected by TIMER_ASYNC_VIEWS (see urls.py). Served by WSGI, it still works, but
+    every request then runs its own event loop, which is slower than WebhookTimerView.
+    """
+
+    http_method_names = ["get", "post", "patch", "delete"]
+
+    async def dispatch(self, request: HttpRequest, *args, **kwargs):
+        # Same error responses as the custom exception handler of the DRF views
+        try:
+            return await super().dispatch(request, *args, **kwargs)
+        except Exception as exc:
+            logger.error(traceback.format_exc())
+            error_message = str(exc) if IS_DEBUG_ON else "Please contact the system administrator."
+            return _json_response({"error": error_message}, status=500)
+
+    @instrument_view("timer")
+    async def post(self, request: HttpRequest, *args, **kwargs):
+        """Create a new timer for triggering a webhook, see WebhookTimerView.post.
+
+        POST /timer
+        """
+        try:
+            data = _parse_json_body(request)
+        except ValueError as exc:
+            return _json_response({"error": str(exc)}, status=400)
+
+        data, errors = _validate_data(data, SetTimerSerializer, SET_TIMER_SCHEMA)
+        if errors is not None:
+            return _json_response({"error": errors}, status=400)
+
+        now = datetime.now(timezone.utc)
+        expires_at = _get_first_expires_at(data, now)
+        timer_id = uuid4()
+
+        if _publishes_tasks():
+            # Published before the row is inserted, as by WebhookTimerView.post: a task whose row
+            # failed to be inserted is ignored by start_timer, while a row is never stored
+            # without its task (see TimerSweeper)
+            await _publish_timer(timer_id, expires_at, version=0)
+
+        await get_timer_store().acreate(
+            timer_id=timer_id,
+            url=data["url"],
+            expires_at=expires_at,
+            interval=data.get("interval"),
+            cron=data.get("cron"),
+        )
+
+        await timer_cache.aset(timer_id, expires_at, is_url_called=False)
+        timers_created.labels(_get_timer_kind(data)).inc()
+
+        return _json_response(
+            {"id": str(timer_id), "time_left": _get_time_left(expires_at, now)}, status=201
+        )
+
+    @instrument_view("timer")
+    async def get(self, request: HttpRequest, timer_id: str, *args, **kwargs):
+        """Retrieve the remaining time for a specific timer, see WebhookTimerView.get.
+
+        GET /timer/<timer_id>/
+        """
+        try:
+            timer_id = _parse_timer_id(timer_id)
+        except ValueError as exc:
+            return _json_response({"error": str(exc)}, status=400)
+
+        cached_timer = await timer_cache.aget(timer_id)
+        if cached_timer is None:
+            cached_timer = await get_timer_store().alookup(timer_id)
+            if cached_timer is None:
+                return _json_response({"error": "No timer matches the given id"}, status=404)
+            await timer_cache.aset(timer_id, *cached_timer)
+
+        time_left = _get_time_left(cached_timer.expires_at, datetime.now(timezone.utc))
+
+        return _json_response({"id": timer_id, "time_left": time_left}, status=200)
+
+    @instrument_view("timer")
+    async def patch(self, request: HttpRequest, timer_id: str, *args, **kwargs):
+        """Reschedule a pending timer, see WebhookTimerView.patch.
+
+        PATCH /timer/<timer_id>/
+        """
+        try:
+            timer_id = _parse_timer_id(timer_id)
+            data = _parse_json_body(request)
+        except ValueError as exc:
+            return _json_response({"error": str(exc)}, status=400)
+
+        data, errors = _validate_data(data, RescheduleTimerSerializer, RESCHEDULE_TIMER_SCHEMA)
+        if errors is not None:
+            return _json_response({"error": errors}, status=400)
+
+        now = datetime.now(timezone.utc)
+        expires_at = _get_first_expires_at(data, now)
+
+        version = await get_timer_store().amove(timer_id, expires_at)
+        await timer_cache.ainvalidate([timer_id])
+        if version is None:
+            return await _atimer_conflict_response(timer_id)
+
+        if _publishes_tasks():
+            await _publish_timer(timer_id, expires_at, version)
+
+        return _json_response(
+            {"id": str(timer_id), "time_left": _get_time_left(expires_at, now)}, status=200
+        )
+
+    @instrument_view("timer")
+    async def delete(self, request: HttpRequest, timer_id: str, *args, **kwargs):
+        """Cancel a pending timer, see WebhookTimerView.delete.
+
+        DELETE /timer/<timer_id>/
+        """
+        try:
+            timer_id = _parse_timer_id(timer_id)
+        except ValueError as exc:
+            return _json_response({"error": str(exc)}, status=400)
+
+        is_cancelled = await get_timer_store().acancel(timer_id)
+        await timer_cache.ainvalidate([timer_id])
+        if not is_cancelled:
+            return await _atimer_conflict_response(timer_id)
+
+        return HttpResponse(status=204)
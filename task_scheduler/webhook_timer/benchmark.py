@@ -0,0 +1,332 @@
+import json
+import logging
+import math
+import random
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable
+
+from django.conf import settings
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from task_scheduler.utils.helpers import summarize
+from task_scheduler.utils.webhook_sink import WebhookSink
+from task_scheduler.webhook_timer.dispatcher import TimerDispatcher
+from task_scheduler.webhook_timer.models import WebhookTimer
+from task_scheduler.webhook_timer.tasks import start_timer, start_timers
+
+
+logger = logging.getLogger("webhook_timer")
+
+DISTRIBUTIONS = ("uniform", "burst", "exponential")
+FIRING_PATHS = ("start_timer", "start_timers")
+
+# Results compared by TimerBenchmark.compare, and whether a higher value is an improvement
+COMPARED_RESULTS = {
+    ("create", "timers_per_second"): True,
+    ("delivery", "webhooks_per_second"): True,
+    ("lateness", "p50"): False,
+    ("lateness", "p90"): False,
+    ("lateness", "p99"): False,
+    ("lateness", "max"): False,
+}
+
+
+def get_expiry_offsets(distribution: str, timers: int, spread: float, seed: int = 0) -> list[float]:
+    """Return the seconds from the start of the benchmark at which every timer should expire.
+
+    Args:
+        distribution (str): "uniform" spreads the expiries evenly over `spread` seconds, "burst"
+            makes every timer expire `spread` seconds after the start, "exponential" makes most
+            timers expire early with a long tail, `spread / 3` seconds after the start on average.
+        timers (int): Number of timers.
+        spread (float): Seconds over which the expiries are spread.
+        seed (int, optional): Seed of the random expiries. Defaults to 0.
+
+    Raises:
+        ValueError: If the distribution is unknown.
+
+    Returns:
+        list[float]: The offsets, of at least one second.
+    """
+    rng = random.Random(seed)
+
+    if distribution == "uniform":
+        offsets = [rng.uniform(1, max(spread, 1)) for _ in range(timers)]
+    elif distribution == "burst":
+        offsets = [spread] * timers
+    elif distribution == "exponential":
+        offsets = [1 + rng.expovariate(3 / max(spread, 1)) for _ in range(timers)]
+    else:
+        raise ValueError(
+            f"The distribution must be one of {DISTRIBUTIONS}, but given '{distribution}'"
+        )
+
+    return [max(offset, 1.0) for offset in offsets]
+
+
+class TimerBenchmark:
+    """End-to-end benchmark of the timers, from POST /timer to the webhook reaching its endpoint.
+
+    The timers are created through POST /timer, either with the Django test client, which runs
+    the whole view path in-process, or over HTTP against a running server (`base_url`). Their
+    webhooks point to a local WebhookSink recording the arrival time of every webhook, so the
+    firing lateness is measured where it matters, at the endpoint.
+
+    With `fire_locally`, the timers are fired in-process through the real tasks executed with
+    Celery's `apply`, without a broker or workers:
+        - "start_timer": every timer is fired by its own start_timer task once it is due, as an
+          ETA message would, `workers` at a time.
+        - "start_timers": a TimerDispatcher enqueues the due timers in start_timers batches,
+          `workers` batches at a time.
+    Otherwise the timers are created in the configured TIMER_DISPATCH_MODE and fired by the
+    running workers (and dispatcher), which must be able to reach the sink (`sink_host`).
+
+    The benchmark writes to the configured database, it is meant to be run against a database of
+    its own: the dispatcher started by the "start_timers" path loads every pending timer, even
+    though only the timers of the benchmark are fired.
+    """
+
+    def __init__(
+        self,
+        timers: int,
+        distribution: str = "uniform",
+        spread: float = 10,
+        firing_path: str = "start_timers",
+        fire_locally: bool = True,
+        workers: int = 8,
+        base_url: str | None = None,
+        sink_host: str = "127.0.0.1",
+        sink_port: int = 0,
+        timeout: float | None = None,
+        seed: int = 0,
+    ):
+        if firing_path not in FIRING_PATHS:
+            raise ValueError(
+                f"The firing path must be one of {FIRING_PATHS}, but given '{firing_path}'"
+            )
+
+        self.timers = timers
+        self.distribution = distribution
+        self.spread = spread
+        self.firing_path = firing_path
+        self.fire_locally = fire_locally
+        self.workers = workers
+        self.base_url = base_url
+        self.sink_host = sink_host
+        self.sink_port = sink_port
+        self.timeout = timeout if timeout is not None else spread + 60
+        self.seed = seed
+
+    @property
+    def parameters(self) -> dict:
+        return {
+            "timers": self.timers,
+            "distribution": self.distribution,
+            "spread": self.spread,
+            "firing_path": self.firing_path if self.fire_locally else "workers",
+            "workers": self.workers if self.fire_locally else None,
+            "base_url": self.base_url,
+            "seed": self.seed,
+        }
+
+    def run(self) -> dict:
+        """Create and fire the timers, then delete them.
+
+        Returns:
+            dict: The create and delivery throughputs and the firing lateness percentiles.
+        """
+        offsets = get_expiry_offsets(self.distribution, self.timers, self.spread, self.seed)
+
+        with WebhookSink(host=self.sink_host, port=self.sink_port) as sink:
+            started_at = time.time()
+            timer_ids, create_latencies = self._create_timers(sink.url, started_at, offsets)
+            create_seconds = time.time() - started_at
+
+            expiry_times = dict(
+                WebhookTimer.objects.filter(id__in=timer_ids).values_list("id", "expires_at")
+            )
+            try:
+                if self.fire_locally:
+                    self._fire(timer_ids, expiry_times, sink)
+                self._wait_for_webhooks(sink, len(timer_ids), max(expiry_times.values()))
+            finally:
+                received = list(sink.received)
+                WebhookTimer.objects.filter(id__in=timer_ids).delete()
+
+        return self._get_results(
+            timer_ids, expiry_times, received, create_seconds, create_latencies
+        )
+
+    @staticmethod
+    def compare(results: dict, baseline: dict) -> dict:
+        """Compare the results with the results of a previous run, e.g. of another commit.
+
+        Args:
+            results (dict): The results of the run.
+            baseline (dict): The results of the previous run.
+
+        Returns:
+            dict: The baseline and current value of the compared results, their change in percent
+                and whether the change is an improvement.
+        """
+        comparison = {}
+        for (section, name), higher_is_better in COMPARED_RESULTS.items():
+            current = results.get(section, {}).get(name)
+            previous = baseline.get(section, {}).get(name)
+            if current is None or previous is None or math.isnan(current) or not previous:
+                continue
+
+            change = (current - previous) / previous * 100
+            comparison[f"{section}.{name}"] = {
+                "baseline": previous,
+                "current": current,
+                "change_percent": change,
+                "improved": change > 0 if higher_is_better else change < 0,
+            }
+        return comparison
+
+    def _create_timers(
+        self, url: str, started_at: float, offsets: list[float]
+    ) -> tuple[list[str], list[float]]:
+        post = self._make_post()
+        timer_ids, latencies = [], []
+
+        for offset in offsets:
+            # The durations are in whole seconds, relative to the creation of every timer
+            seconds = max(round(started_at + offset - time.time()), 1)
+            request_started_at = time.perf_counter()
+            status_code, body = post({"hours": 0, "minutes": 0, "seconds": seconds, "url": url})
+            latencies.append(time.perf_counter() - request_started_at)
+
+            if status_code != 201:
+                raise RuntimeError(f"POST /timer failed with status code {status_code}: {body}")
+            timer_ids.append(body["id"])
+
+        return timer_ids, latencies
+
+    def _make_post(self) -> Callable[[dict], tuple[int, dict]]:
+        if self.base_url:
+            import requests
+
+            session = requests.Session()
+
+            def post(payload: dict) -> tuple[int, dict]:
+                response = session.post(f"{self.base_url}/timer", json=payload)
+                return response.status_code, response.json()
+
+            return post
+
+        client = Client()
+        path = reverse("set_timer")
+
+        def post(payload: dict) -> tuple[int, dict]:
+            if self.fire_locally:
+                # The timers are fired by the benchmark, nothing is published to the broker
+                with override_settings(TIMER_DISPATCH_MODE="dispatcher"):
+                    response = client.post(path, payload, content_type="application/json")
+            else:
+                response = client.post(path, payload, content_type="application/json")
+            return response.status_code, json.loads(response.content)
+
+        return post
+
+    def _fire(self, timer_ids: list[str], expiry_times: dict, sink: WebhookSink):
+        # A single worker fires in the calling thread, which shares its database connection
+        pool = ThreadPoolExecutor(self.workers) if self.workers > 1 else None
+        submit = pool.submit if pool is not None else lambda function, **kwargs: function(**kwargs)
+        deadline = time.time() + self.timeout
+
+        try:
+            if self.firing_path == "start_timer":
+                for expires_at, timer_id in sorted(
+                    (expiry_times[timer_id], str(timer_id)) for timer_id in expiry_times
+                ):
+                    time.sleep(max(expires_at.timestamp() - time.time(), 0))
+                    submit(start_timer.apply, task_id=timer_id, kwargs={"version": 0})
+            else:
+                benchmark_ids = {str(timer_id) for timer_id in timer_ids}
+
+                def enqueue(batch_ids: list, versions: list[int]):
+                    # The dispatcher loads every pending timer, only those of the benchmark fire
+                    batch = [
+                        (str(timer_id), version)
+                        for timer_id, version in zip(batch_ids, versions)
+                        if str(timer_id) in benchmark_ids
+                    ]
+                    if batch:
+                        submit(
+                            start_timers.apply,
+                            args=[[timer_id for timer_id, _ in batch]],
+                            kwargs={"versions": dict(batch)},
+                        )
+
+                dispatcher = TimerDispatcher(enqueue=enqueue)
+                while len(sink.received) < len(timer_ids) and time.time() < deadline:
+                    dispatcher.tick()
+                    time.sleep(settings.TIMER_DISPATCHER_TICK)
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=True)
+
+    def _wait_for_webhooks(self, sink: WebhookSink, count: int, last_expires_at: datetime):
+        deadline = max(time.time(), last_expires_at.timestamp()) + self.timeout
+        while len(sink.received) < count and time.time() < deadline:
+            time.sleep(0.05)
+
+        if len(sink.received) < count:
+            logger.warning(f"Only {len(sink.received)} of {count} webhook(s) received in time")
+
+    def _get_results(
+        self,
+        timer_ids: list[str],
+        expiry_times: dict,
+        received: list[tuple[str, float]],
+        create_seconds: float,
+        create_latencies: list[float],
+    ) -> dict:
+        expiry_by_id = {str(timer_id): expires_at for timer_id, expires_at in expiry_times.items()}
+        lateness = []
+        first_arrivals = {}
+        for timer_id, arrived_at in received:
+            if timer_id in expiry_by_id and timer_id not in first_arrivals:
+                first_arrivals[timer_id] = arrived_at
+                lateness.append(arrived_at - expiry_by_id[timer_id].timestamp())
+
+        delivery_seconds = (
+            max(first_arrivals.values()) - min(expiry_times.values()).timestamp()
+            if first_arrivals
+            else math.nan
+        )
+        return {
+            "create": {
+                "timers": len(timer_ids),
+                "seconds": create_seconds,
+                "timers_per_second": len(timer_ids) / create_seconds,
+                "latency_seconds": summarize(create_latencies),
+            },
+            "delivery": {
+                "delivered": len(first_arrivals),
+                "duplicates": len(received) - len(first_arrivals),
+                "missing": len(timer_ids) - len(first_arrivals),
+                # From the first expiry to the last webhook received
+                "seconds": delivery_seconds,
+                "webhooks_per_second": (
+                    len(first_arrivals) / delivery_seconds if delivery_seconds > 0 else math.nan
+                ),
+            },
+            "lateness": summarize(lateness),
+        }
+
+
+def get_commit() -> str | None:
+    """Return the git commit the benchmark runs on, to tell the results of commits apart."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
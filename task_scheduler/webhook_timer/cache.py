@@ -0,0 +1,265 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Iterable, NamedTuple
+from uuid import UUID
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class CachedTimer(NamedTuple):
+    """The fields of a WebhookTimer needed to answer a timer lookup."""
+
+    expires_at: datetime
+    is_url_called: bool
+
+
+class LocalTimerCacheBackend:
+    """In-process LRU cache whose entries expire after a TTL.
+
+    Attributes:
+        ttl (float): Seconds an entry is kept.
+        max_entries (int): Maximum number of entries, the least recently used one is evicted
+            beyond it.
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self._entries: OrderedDict[str, tuple[float, CachedTimer]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> CachedTimer | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, CachedTimer]:
+        values = {key: self.get(key) for key in keys}
+        return {key: value for key, value in values.items() if value is not None}
+
+    def set_many(self, values: dict[str, CachedTimer]):
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            for key, value in values.items():
+                self._entries[key] = (expires_at, value)
+                self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete_many(self, keys: Iterable[str]):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    # The entries are in memory, the asynchronous methods never wait on anything but the lock
+    async def aget(self, key: str) -> CachedTimer | None:
+        return self.get(key)
+
+    async def aset_many(self, values: dict[str, CachedTimer]):
+        self.set_many(values)
+
+    async def adelete_many(self, keys: Iterable[str]):
+        self.delete_many(keys)
+
+
+class SharedTimerCacheBackend:
+    """Cache shared by the web and worker processes, stored in a Django cache.
+
+    The Django cache alias defaults to "shared" (see CACHES in the settings), a local-memory
+    cache standing in for a shared one until a shared backend is configured.
+
+    Attributes:
+        ttl (float): Seconds an entry is kept.
+    """
+
+    def __init__(self, ttl: float, alias: str = "shared"):
+        self.ttl = ttl
+        self._cache = caches[alias]
+
+    def get(self, key: str) -> CachedTimer | None:
+        value = self._cache.get(key)
+        return CachedTimer(*value) if value is not None else None
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, CachedTimer]:
+        return {key: CachedTimer(*value) for key, value in self._cache.get_many(keys).items()}
+
+    def set_many(self, values: dict[str, CachedTimer]):
+        self._cache.set_many({key: tuple(value) for key, value in values.items()}, self.ttl)
+
+    def delete_many(self, keys: Iterable[str]):
+        self._cache.delete_many(list(keys))
+
+    def clear(self):
+        self._cache.clear()
+
+    async def aget(self, key: str) -> CachedTimer | None:
+        value = await self._cache.aget(key)
+        return CachedTimer(*value) if value is not None else None
+
+    async def aset_many(self, values: dict[str, CachedTimer]):
+        await self._cache.aset_many({key: tuple(value) for key, value in values.items()}, self.ttl)
+
+    async def adelete_many(self, keys: Iterable[str]):
+        await self._cache.adelete_many(list(keys))
+
+
+class TimerCache:
+    """Read-through cache of the expiry and the fired flag of the timers, by timer id.
+
+    The cache is populated when timers are created and invalidated when they are fired, so the
+    polling of a timer's remaining time is answered without reading the database. The backend is
+    chosen by the TIMER_CACHE_BACKEND setting:
+
+    - "local": an LRU cache per process. Invalidations only reach the cache of the process
+      making them, not that of the web processes when a worker fires a timer. An entry of a
+      timer which is due but not fired yet is therefore a miss, so that the fired flag of the
+      timer is read again from the database until the timer has been fired.
+    - "shared": a Django cache shared by all the processes.
+    - "none": caching is disabled.
+
+    Attributes:
+        hits (int): Number of lookups answered by the cache.
+        misses (int): Number of lookups not found in the cache.
+    """
+
+    KEY_PREFIX = "webhook_timer:"
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+        self._backend = None
+        self._backend_name = None
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self) -> LocalTimerCacheBackend | SharedTimerCacheBackend | None:
+        """The configured backend, created on first use and again if the setting changes."""
+        if self._backend_name != settings.TIMER_CACHE_BACKEND:
+            self._backend_name = settings.TIMER_CACHE_BACKEND
+            if self._backend_name == "local":
+                self._backend = LocalTimerCacheBackend(
+                    settings.TIMER_CACHE_TTL, settings.TIMER_CACHE_MAX_ENTRIES
+                )
+            elif self._backend_name == "shared":
+                self._backend = SharedTimerCacheBackend(settings.TIMER_CACHE_TTL)
+            else:
+                self._backend = None
+        return self._backend
+
+    def get(self, timer_id: UUID | str) -> CachedTimer | None:
+        """Return the cached fields of the timer, or None on a miss."""
+        backend = self.backend
+        value = backend.get(self._key(timer_id)) if backend is not None else None
+        value = value if not self._is_unsettled(value) else None
+
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    async def aget(self, timer_id: UUID | str) -> CachedTimer | None:
+        """Asynchronous version of get, for the async views."""
+        backend = self.backend
+        value = await backend.aget(self._key(timer_id)) if backend is not None else None
+        value = value if not self._is_unsettled(value) else None
+
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def get_many(self, timer_ids: Iterable[UUID]) -> dict[UUID, CachedTimer]:
+        """Return the cached fields of the timers found in the cache, by timer id."""
+        timer_ids = list(timer_ids)
+        backend = self.backend
+        values = (
+            backend.get_many([self._key(timer_id) for timer_id in timer_ids])
+            if backend is not None
+            else {}
+        )
+        found = {
+            timer_id: values[self._key(timer_id)]
+            for timer_id in timer_ids
+            if self._key(timer_id) in values and not self._is_unsettled(values[self._key(timer_id)])
+        }
+
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(timer_ids) - len(found)
+        return found
+
+    def set(self, timer_id: UUID | str, expires_at: datetime, is_url_called: bool):
+        """Cache the fields of a timer."""
+        self.set_many({timer_id: CachedTimer(expires_at, is_url_called)})
+
+    async def aset(self, timer_id: UUID | str, expires_at: datetime, is_url_called: bool):
+        """Asynchronous version of set, for the async views."""
+        if self.backend is not None:
+            await self.backend.aset_many(
+                {self._key(timer_id): CachedTimer(expires_at, is_url_called)}
+            )
+
+    def set_many(self, values: dict[UUID | str, CachedTimer]):
+        """Cache the fields of many timers, by timer id."""
+        if self.backend is not None:
+            self.backend.set_many(
+                {self._key(timer_id): value for timer_id, value in values.items()}
+            )
+
+    def invalidate(self, timer_ids: Iterable[UUID | str]):
+        """Drop the cached fields of the given timers."""
+        if self.backend is not None:
+            self.backend.delete_many(self._key(timer_id) for timer_id in timer_ids)
+
+    async def ainvalidate(self, timer_ids: Iterable[UUID | str]):
+        """Asynchronous version of invalidate, for the async views."""
+        if self.backend is not None:
+            await self.backend.adelete_many(self._key(timer_id) for timer_id in timer_ids)
+
+    def stats(self) -> dict:
+        """Return the backend in use and the hit and miss counters."""
+        lookups = self.hits + self.misses
+        return {
+            "backend": settings.TIMER_CACHE_BACKEND,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _is_unsettled(self, value: CachedTimer | None) -> bool:
+        # The fired flag of a due timer cached by the local backend may be outdated, see above
+        return (
+            isinstance(self._backend, LocalTimerCacheBackend)
+            and value is not None
+            and not value.is_url_called
+            and value.expires_at <= datetime.now(timezone.utc)
+        )
+
+    def _key(self, timer_id: UUID | str) -> str:
+        return f"{self.KEY_PREFIX}{timer_id}"
+
+
+timer_cache = TimerCache()
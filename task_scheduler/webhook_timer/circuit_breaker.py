@@ -0,0 +1,212 @@
+import logging
+import random
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Callable, Iterable
+
+from django.conf import settings
+from django.core.cache import caches
+
+from task_scheduler.webhook_timer.delivery import get_host_key
+from task_scheduler.webhook_timer.models import WebhookTimer
+
+
+logger = logging.getLogger("webhook_timer")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Per-host circuit breaker shared by the worker processes through a Django cache.
+
+    The failed webhooks of a host are counted within a window of `window` seconds. Once they
+    reach `failure_threshold`, the circuit of the host opens: no webhook is sent to the host for
+    `open_seconds` seconds. The circuit is then half open: a single webhook, sent by whichever
+    worker asks first, probes the host. The circuit closes if the probe is delivered and opens
+    again otherwise. Any delivered webhook, or any webhook rejected by the endpoint, which shows
+    the host is up, closes the circuit and resets the failure count.
+
+    The counters live in the cache given by `alias`, so the circuit of a host is shared by all
+    the workers using that cache. The cache operations are not transactional: concurrent workers
+    may each count a failure the other one does not see the effect of yet, which only makes the
+    circuit open a few webhooks later.
+
+    Attributes:
+        failure_threshold (int): Failed webhooks opening the circuit of a host.
+        window (float): Seconds over which the failed webhooks are counted.
+        open_seconds (float): Seconds the circuit stays open before a probe is allowed.
+    """
+
+    KEY_PREFIX = "webhook_circuit:"
+
+    def __init__(
+        self,
+        failure_threshold: int | None = None,
+        window: float | None = None,
+        open_seconds: float | None = None,
+        alias: str = "shared",
+        clock: Callable[[], float] = time.time,
+    ):
+        self._failure_threshold = failure_threshold
+        self._window = window
+        self._open_seconds = open_seconds
+        self.alias = alias
+        self.clock = clock
+
+    @property
+    def failure_threshold(self) -> int:
+        return self._failure_threshold or settings.WEBHOOK_CIRCUIT_FAILURE_THRESHOLD
+
+    @property
+    def window(self) -> float:
+        return self._window or settings.WEBHOOK_CIRCUIT_WINDOW
+
+    @property
+    def open_seconds(self) -> float:
+        return self._open_seconds or settings.WEBHOOK_CIRCUIT_OPEN_SECONDS
+
+    def get_state(self, host_key: str) -> dict:
+        """Return the state of the circuit of the host, e.g. to expose it for inspection.
+
+        Args:
+            host_key (str): The host, as returned by get_host_key.
+
+        Returns:
+            dict: The host, the state of its circuit ("closed", "open" or "half_open"), the
+                failures counted in the current window and the time the circuit stays open
+                until, if it has been opened.
+        """
+        cache = caches[self.alias]
+        values = cache.get_many([self._key(host_key, "failures"), self._key(host_key, "open")])
+        opened_until = values.get(self._key(host_key, "open"))
+
+        if opened_until is None:
+            state = CLOSED
+        elif self.clock() < opened_until:
+            state = OPEN
+        else:
+            state = HALF_OPEN
+
+        return {
+            "host": host_key,
+            "state": state,
+            "failures": values.get(self._key(host_key, "failures"), 0),
+            "opened_until": (
+                datetime.fromtimestamp(opened_until, tz=timezone.utc).isoformat()
+                if opened_until is not None
+                else None
+            ),
+        }
+
+    def acquire(self, host_key: str) -> str:
+        """Ask to send webhooks to the host.
+
+        Returns:
+            str: "closed" if any number of webhooks can be sent, "half_open" if the caller may
+                send a single webhook probing the host, "open" if no webhook can be sent.
+        """
+        cache = caches[self.alias]
+        opened_until = cache.get(self._key(host_key, "open"))
+
+        if opened_until is None:
+            return CLOSED
+        if self.clock() < opened_until:
+            return OPEN
+
+        # Only the first caller gets the probe, which is given up after open_seconds in case
+        # its outcome is never recorded
+        if cache.add(self._key(host_key, "probe"), True, timeout=self.open_seconds):
+            return HALF_OPEN
+        return OPEN
+
+    def record_success(self, host_key: str):
+        """Close the circuit of the host and reset its failure count."""
+        caches[self.alias].delete_many(
+            [self._key(host_key, name) for name in ("failures", "open", "probe")]
+        )
+
+    def record_failure(self, host_key: str, count: int = 1):
+        """Count failed webhooks of the host, opening its circuit if they reach the threshold."""
+        cache = caches[self.alias]
+        failures_key = self._key(host_key, "failures")
+
+        if cache.add(failures_key, count, timeout=self.window):
+            failures = count
+        else:
+            try:
+                failures = cache.incr(failures_key, count)
+            except ValueError:
+                # The window expired in the meantime
+                cache.set(failures_key, count, timeout=self.window)
+                failures = count
+
+        # A failed probe opens the circuit again right away
+        is_probing = cache.get(self._key(host_key, "open")) is not None
+        if failures >= self.failure_threshold or is_probing:
+            cache.set(self._key(host_key, "open"), self.clock() + self.open_seconds, timeout=None)
+            cache.delete_many([failures_key, self._key(host_key, "probe")])
+            logger.warning(
+                f"Circuit of '{host_key}' opened for {self.open_seconds}s after {failures} "
+                f"failed webhook(s)"
+            )
+
+    def split(
+        self, webhook_timers: Iterable[WebhookTimer]
+    ) -> tuple[list[WebhookTimer], list[WebhookTimer]]:
+        """Split the timers into the ones whose webhook can be sent and the short-circuited ones.
+
+        Returns:
+            tuple[list[WebhookTimer], list[WebhookTimer]]: The timers to fire and the timers of
+                the hosts whose circuit is open.
+        """
+        timers_by_host = defaultdict(list)
+        for webhook_timer in webhook_timers:
+            timers_by_host[get_host_key(webhook_timer.url)].append(webhook_timer)
+
+        allowed, short_circuited = [], []
+        for host_key, host_timers in timers_by_host.items():
+            state = self.acquire(host_key)
+            if state == CLOSED:
+                allowed.extend(host_timers)
+            elif state == HALF_OPEN:
+                allowed.append(host_timers[0])
+                short_circuited.extend(host_timers[1:])
+            else:
+                short_circuited.extend(host_timers)
+
+        return allowed, short_circuited
+
+    def record(
+        self,
+        delivered: Iterable[WebhookTimer],
+        failed: Iterable[WebhookTimer],
+        rejected: Iterable[WebhookTimer] = (),
+    ):
+        """Record the outcome of the webhooks of a delivery, host by host."""
+        up_hosts = {get_host_key(webhook_timer.url) for webhook_timer in [*delivered, *rejected]}
+        failures_by_host = defaultdict(int)
+        for webhook_timer in failed:
+            failures_by_host[get_host_key(webhook_timer.url)] += 1
+
+        for host_key in up_hosts:
+            self.record_success(host_key)
+        for host_key, count in failures_by_host.items():
+            if host_key not in up_hosts:
+                self.record_failure(host_key, count)
+
+    def get_requeue_delay(self) -> float:
+        """Return the delay after which short-circuited webhooks are enqueued again.
+
+        The delay is drawn between one and two open periods, so the webhooks short-circuited at
+        the same time do not all ask for the probe of their host at once.
+        """
+        return self.open_seconds * random.uniform(1, 2)
+
+    def _key(self, host_key: str, name: str) -> str:
+        return f"{self.KEY_PREFIX}{name}:{host_key}"
+
+
+circuit_breaker = CircuitBreaker()
@@ -0,0 +1,218 @@
+import logging
+import threading
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from task_scheduler.webhook_timer.models import WebhookTimer
+from task_scheduler.webhook_timer.utils.exceptions import WebhookRejectedError
+
+
+logger = logging.getLogger("webhook_timer")
+
+
+def get_host_key(url: str) -> str:
+    """Return the key under which the connections to the host of the URL are pooled.
+
+    Args:
+        url (str): The webhook URL.
+
+    Returns:
+        str: The scheme and the network location of the URL, e.g. "https://example.com:8443".
+    """
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+class HostSessionPool:
+    """Per-host keep-alive HTTP sessions shared by the deliveries of a process.
+
+    Every host gets its own requests session with a connection pool of `maxsize` connections, so
+    the TCP and TLS handshakes are paid once per connection instead of once per webhook. At most
+    `max_hosts` sessions are kept open, the least recently used one is closed when a new host
+    exceeds the limit.
+
+    Attributes:
+        max_hosts (int): Maximum number of hosts with an open session.
+        maxsize (int): Maximum number of keep-alive connections per host.
+    """
+
+    def __init__(self, max_hosts: int | None = None, maxsize: int | None = None):
+        self.max_hosts = max_hosts or settings.WEBHOOK_POOL_MAX_HOSTS
+        self.maxsize = maxsize or settings.WEBHOOK_POOL_MAXSIZE
+
+        self._sessions: OrderedDict[str, requests.Session] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get_session(self, url: str) -> requests.Session:
+        """Return the session of the host of the URL, creating it if needed."""
+        host_key = get_host_key(url)
+
+        with self._lock:
+            session = self._sessions.get(host_key)
+            if session is not None:
+                self._sessions.move_to_end(host_key)
+                return session
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.maxsize)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self._sessions[host_key] = session
+
+            if len(self._sessions) > self.max_hosts:
+                _, evicted_session = self._sessions.popitem(last=False)
+                evicted_session.close()
+
+        return session
+
+    def prewarm(self, url: str, connections: int = 1) -> int:
+        """Open keep-alive connections to the host of the URL ahead of its webhooks.
+
+        The connections are opened in the pool the POST requests to the URL are sent through,
+        resolving the host and going through the TCP and TLS handshakes, and left idle in it.
+        The connections already idle in the pool count towards `connections`.
+
+        Args:
+            url (str): A webhook URL of the host.
+            connections (int, optional): Number of idle connections wanted, at most `maxsize`.
+                Defaults to 1.
+
+        Returns:
+            int: The number of connections opened.
+        """
+        session = self.get_session(url)
+        environment = session.merge_environment_settings(url, {}, None, None, None)
+        request = requests.Request("POST", url).prepare()
+        pool = session.get_adapter(url).get_connection_with_tls_context(
+            request, environment["verify"], environment["proxies"], environment["cert"]
+        )
+
+        # Taken out of the pool together, so that the same idle connection is not counted twice
+        taken = [pool._get_conn() for _ in range(min(connections, self.maxsize))]
+        opened = 0
+        try:
+            for conn in taken:
+                if not conn.is_connected:
+                    conn.connect()
+                    opened += 1
+        finally:
+            for conn in taken:
+                pool._put_conn(conn)
+        return opened
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        """Send a POST request over the session of the host of the URL."""
+        return self.get_session(url).post(url, **kwargs)
+
+    def close(self):
+        """Close every session and its connections."""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+# The sessions are opened on first use, so every forked worker child ends up with its own
+session_pool = HostSessionPool()
+
+
+def prewarm_hosts(webhook_timers: Iterable[WebhookTimer], max_workers: int | None = None) -> int:
+    """Open the connections the webhooks of the given timers are about to be fired over.
+
+    Every host gets as many idle connections as deliver_in_batches fires groups of its timers
+    over, at most `session_pool.maxsize`. A host failing to be reached is only logged, its
+    webhooks then open their connections when they are fired.
+
+    Args:
+        webhook_timers (Iterable[WebhookTimer]): The timers about to be fired.
+        max_workers (int, optional): Number of threads opening the connections. Defaults to
+            WEBHOOK_DELIVERY_THREADS.
+
+    Returns:
+        int: The number of connections opened.
+    """
+    counts = defaultdict(int)
+    urls = {}
+    for webhook_timer in webhook_timers:
+        host_key = get_host_key(webhook_timer.url)
+        counts[host_key] += 1
+        urls.setdefault(host_key, webhook_timer.url)
+    if not urls:
+        return 0
+
+    def prewarm(host_key: str) -> int:
+        try:
+            return session_pool.prewarm(urls[host_key], counts[host_key])
+        except Exception as err:
+            logger.warning(f"Failed to open connections to '{host_key}': {str(err)}")
+            return 0
+
+    max_workers = min(max_workers or settings.WEBHOOK_DELIVERY_THREADS, len(urls))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return sum(executor.map(prewarm, urls))
+
+
+def deliver_in_batches(
+    webhook_timers: Iterable[WebhookTimer],
+    trigger_webhook: Callable[[str, str], None],
+    max_workers: int | None = None,
+) -> tuple[list[WebhookTimer], list[WebhookTimer], list[WebhookTimer]]:
+    """Fire the webhooks of the given timers, grouped by the host of their URL.
+
+    The timers of a host are split into at most `session_pool.maxsize` groups fired concurrently,
+    every group reusing one keep-alive connection of the host for all of its webhooks. The groups
+    of all hosts share a thread pool of `max_workers` threads.
+
+    Args:
+        webhook_timers (Iterable[WebhookTimer]): The timers to fire.
+        trigger_webhook (Callable[[str, str], None]): Fires the webhook of a URL and a timer id,
+            raising an exception if it fails, WebhookRejectedError if it must not be retried.
+        max_workers (int, optional): Number of delivery threads. Defaults to
+            WEBHOOK_DELIVERY_THREADS.
+
+    Returns:
+        tuple[list[WebhookTimer], list[WebhookTimer], list[WebhookTimer]]: The delivered timers,
+            the failed timers to retry and the timers rejected by their endpoint.
+    """
+    timers_by_host = defaultdict(list)
+    for webhook_timer in webhook_timers:
+        timers_by_host[get_host_key(webhook_timer.url)].append(webhook_timer)
+
+    groups = []
+    for host_timers in timers_by_host.values():
+        group_count = min(len(host_timers), session_pool.maxsize)
+        groups.extend(host_timers[index::group_count] for index in range(group_count))
+
+    def deliver_group(group: list[WebhookTimer]) -> list[tuple[WebhookTimer, list]]:
+        outcomes = []
+        for webhook_timer in group:
+            try:
+                trigger_webhook(webhook_timer.url, str(webhook_timer.id))
+                outcomes.append((webhook_timer, delivered))
+            except WebhookRejectedError:
+                outcomes.append((webhook_timer, rejected))
+            except Exception as err:
+                logger.error(f"Failed to deliver timer '{webhook_timer.id}': {str(err)}")
+                outcomes.append((webhook_timer, failed))
+        return outcomes
+
+    delivered, failed, rejected = [], [], []
+    if not groups:
+        return delivered, failed, rejected
+
+    max_workers = min(max_workers or settings.WEBHOOK_DELIVERY_THREADS, len(groups))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for outcomes in executor.map(deliver_group, groups):
+            for webhook_timer, outcome in outcomes:
+                outcome.append(webhook_timer)
+
+    return delivered, failed, rejected
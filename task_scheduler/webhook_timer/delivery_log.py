@@ -0,0 +1,185 @@
+import logging
+import os
+import threading
+from collections import deque
+from datetime import datetime
+
+from celery.signals import (
+    worker_process_init,
+    worker_process_shutdown,
+    worker_ready,
+    worker_shutdown,
+)
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+from task_scheduler.webhook_timer.models import WebhookDelivery
+
+
+logger = logging.getLogger("webhook_timer")
+
+# Long errors, e.g. the body of a proxy error page, are cut down to this many characters
+MAX_ERROR_LENGTH = 1000
+
+
+class DeliveryLog:
+    """Buffered writer of the attempts at firing webhooks, see WebhookDelivery.
+
+    The delivery paths only append their attempts to an in-memory buffer, from any thread or
+    from the event loop of the asyncio engine, and never wait on the database. A background
+    thread of the process writes the buffer with one bulk INSERT per `batch_size` attempts, as
+    soon as a batch is full and at least every `flush_interval` seconds.
+
+    The thread is started in every worker process (see the signal handlers below). Elsewhere,
+    e.g. in the tests, the attempts stay buffered until `flush` is called. At most
+    `max_buffered` attempts are kept, the oldest ones being dropped, so that the buffer stays
+    bounded when the thread is not running or falls behind. A batch failing to be written is
+    dropped as well, as are the attempts buffered when a process is killed: the log is an audit
+    trail, not the state of the timers.
+
+    Attributes:
+        batch_size (int): Number of attempts per INSERT.
+        flush_interval (float): Maximum seconds between two writes of the buffer.
+        max_buffered (int): Maximum number of attempts waiting to be written.
+    """
+
+    def __init__(
+        self,
+        batch_size: int | None = None,
+        flush_interval: float | None = None,
+        max_buffered: int | None = None,
+    ):
+        self.batch_size = batch_size or settings.WEBHOOK_DELIVERY_LOG_BATCH_SIZE
+        self.flush_interval = flush_interval or settings.WEBHOOK_DELIVERY_LOG_FLUSH_INTERVAL
+        self.max_buffered = max_buffered or settings.WEBHOOK_DELIVERY_LOG_MAX_BUFFERED
+        self.dropped_count = 0
+
+        self._buffer: deque[WebhookDelivery] = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._batch_ready = threading.Event()
+        self._stop_event = threading.Event()
+        self._pid = None
+
+    def record(
+        self,
+        timer_id: str,
+        attempt: int,
+        outcome: str,
+        attempted_at: datetime,
+        duration: float,
+        status_code: int | None = None,
+        error: str = "",
+    ):
+        """Buffer an attempt at firing the webhook of a timer, see WebhookDelivery."""
+        delivery = WebhookDelivery(
+            timer_id=timer_id,
+            attempt=attempt,
+            outcome=outcome,
+            attempted_at=attempted_at,
+            duration=duration,
+            status_code=status_code,
+            error=error[:MAX_ERROR_LENGTH],
+        )
+
+        with self._lock:
+            if len(self._buffer) >= self.max_buffered:
+                self._buffer.popleft()
+                self.dropped_count += 1
+            self._buffer.append(delivery)
+            is_batch_ready = len(self._buffer) >= self.batch_size
+
+        if is_batch_ready:
+            self._batch_ready.set()
+
+    def flush(self) -> int:
+        """Write the buffered attempts to the database.
+
+        Returns:
+            int: The number of attempts written.
+        """
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = [
+                        self._buffer.popleft()
+                        for _ in range(min(self.batch_size, len(self._buffer)))
+                    ]
+                if not batch:
+                    break
+
+                try:
+                    WebhookDelivery.objects.bulk_create(batch)
+                except Exception as err:
+                    # Dropped rather than put back, a batch the database rejects would otherwise
+                    # hold back all the following ones
+                    logger.error(f"Failed to write {len(batch)} delivery attempt(s): {str(err)}")
+                    continue
+                written += len(batch)
+
+        if self.dropped_count:
+            with self._lock:
+                dropped_count, self.dropped_count = self.dropped_count, 0
+            logger.warning(f"Dropped {dropped_count} delivery attempt(s), the buffer was full")
+        return written
+
+    def pending_count(self) -> int:
+        """Return the number of attempts waiting to be written."""
+        return len(self._buffer)
+
+    def clear(self):
+        """Drop the buffered attempts without writing them."""
+        with self._lock:
+            self._buffer.clear()
+
+    def start(self):
+        """Start the thread writing the buffer, once per process."""
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stop_event.clear()
+
+        threading.Thread(target=self._run, name="delivery-log", daemon=True).start()
+
+    def stop(self):
+        """Stop the thread and write what is left in the buffer."""
+        self._stop_event.set()
+        self._batch_ready.set()
+        with self._lock:
+            self._pid = None
+        self.flush()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self._batch_ready.wait(self.flush_interval)
+            self._batch_ready.clear()
+
+            # The thread outlives any request or task, its connection is recycled here instead
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception as err:
+                logger.error(f"Failed to write the delivery log: {str(err)}")
+        connection.close()
+
+
+delivery_log = DeliveryLog()
+
+
+@worker_process_init.connect
+@worker_ready.connect
+def start_delivery_log(**kwargs):
+    """Write the delivery attempts of every worker process in the background.
+
+    worker_process_init starts the thread in the children of a prefork worker, worker_ready in
+    the worker process itself for the pools without children (solo, threads).
+    """
+    delivery_log.start()
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def stop_delivery_log(**kwargs):
+    delivery_log.stop()
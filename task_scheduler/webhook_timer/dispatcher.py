@@ -0,0 +1,327 @@
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable
+from uuid import UUID
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import close_old_connections
+
+from task_scheduler.webhook_timer.delivery import get_host_key
+from task_scheduler.webhook_timer.models import DispatcherNode, WebhookTimer, get_shard
+from task_scheduler.webhook_timer.sharding import ShardCoordinator
+from task_scheduler.webhook_timer.tasks import start_timers
+from task_scheduler.webhook_timer.utils.fair_scheduler import FairScheduler
+from task_scheduler.webhook_timer.utils.timing_wheel import HierarchicalTimingWheel
+
+
+logger = logging.getLogger("webhook_timer")
+
+
+QUEUE_DEPTHS_CACHE_KEY = "webhook_queue_depths"
+
+
+def enqueue_timers(timer_ids: list[UUID], versions: list[int]):
+    """Publish a start_timers task firing the given due timers, at their versions, right away."""
+    start_timers.apply_async(
+        args=[[str(timer_id) for timer_id in timer_ids]],
+        kwargs={
+            "versions": {str(timer_id): version for timer_id, version in zip(timer_ids, versions)}
+        },
+    )
+
+
+def get_host_limits(host_key: str) -> tuple[float | None, float]:
+    """Return the rate (None for no limit) and the burst the timers of the host are enqueued at."""
+    rate, burst = settings.WEBHOOK_HOST_LIMITS.get(
+        host_key, (settings.WEBHOOK_HOST_RATE, settings.WEBHOOK_HOST_BURST)
+    )
+    # A burst below one timer would never let a timer through
+    return (rate or None), max(burst, 1.0)
+
+
+def get_host_weight(host_key: str) -> float:
+    """Return the weight of the host in the fair scheduling of the due timers."""
+    return settings.WEBHOOK_HOST_WEIGHTS.get(host_key, 1.0)
+
+
+def get_queue_depths_key(node_id: str | None = None) -> str:
+    """Return the cache key of the queue depths of a dispatcher node, see get_queue_depths."""
+    return f"{QUEUE_DEPTHS_CACHE_KEY}:{node_id}" if node_id else QUEUE_DEPTHS_CACHE_KEY
+
+
+def get_queue_depths() -> dict:
+    """Return the due timers held back by the dispatchers per host, as last published by them.
+
+    Every dispatcher node publishes the depths of its own fair scheduler, which are summed over
+    the registered nodes and the dispatcher running without shards, if any.
+
+    Returns:
+        dict: The number of held back timers by host, their total and the time they were last
+            published at, None if no dispatcher published them.
+    """
+    keys = [get_queue_depths_key()] + [
+        get_queue_depths_key(node_id)
+        for node_id in DispatcherNode.objects.values_list("id", flat=True)
+    ]
+
+    hosts, updated_at = {}, None
+    for depths in caches["shared"].get_many(keys).values():
+        for host_key, depth in depths["hosts"].items():
+            hosts[host_key] = hosts.get(host_key, 0) + depth
+        updated_at = max(updated_at or depths["updated_at"], depths["updated_at"])
+    return {"hosts": hosts, "total": sum(hosts.values()), "updated_at": updated_at}
+
+
+class TimerDispatcher:
+    """Dispatcher feeding due timers from the database to the Celery workers.
+
+    Instead of publishing one ETA message per timer when it is created, the timers stay in the
+    database until they are about to expire. The dispatcher periodically loads the pending timers
+    that expire within the next `horizon` seconds into a hierarchical timing wheel and enqueues
+    the due timers in start_timers batches once their deadline passes. The memory held by the
+    dispatcher and the workers is therefore bounded by the number of timers expiring within the
+    horizon, not by the total number of pending timers.
+
+    The due timers then go through a FairScheduler keyed by the host of their webhook before being
+    enqueued: every host is enqueued under its own token bucket (WEBHOOK_HOST_RATE,
+    WEBHOOK_HOST_BURST, WEBHOOK_HOST_LIMITS), and the hosts share TIMER_DISPATCHER_MAX_RATE by
+    weighted fair queuing (WEBHOOK_HOST_WEIGHTS). A burst of timers of one host is therefore
+    spread over time instead of delaying the timers of every other host behind it. The number of
+    due timers held back per host is published to the "shared" cache after every poll.
+
+    The timers already handed to the wheel are remembered by their (id, expires_at, version)
+    until they disappear from the pending window, so a timer is enqueued once per expiry time
+    even though the window is re-read on every poll. The timers are enqueued with their version,
+    so an entry left in the wheel by a timer cancelled or rescheduled since is dropped by the
+    task instead of firing the timer.
+
+    The timers overdue by more than a poll interval, left behind while no dispatcher was
+    running, are loaded at most `batch_size` at a time: the next ones are loaded once the
+    previous ones have been enqueued, so a backlog never fills the wheel all at once.
+
+    Several dispatchers may run side by side with a ShardCoordinator each: every dispatcher then
+    only loads and enqueues the timers of the shards it holds the lease of, and the shards are
+    rebalanced as dispatchers start and stop. The timers of a shard given up are dropped from
+    the wheel and the fair scheduler, the new owner of the shard loading them again. The timers
+    of a host being spread over all the shards, every dispatcher applies the rate limits scaled
+    by its share of the shards, so that the dispatchers together enqueue the timers of a host at
+    WEBHOOK_HOST_RATE and all the timers at TIMER_DISPATCHER_MAX_RATE. Every dispatcher
+    publishes its queue depths under its own key, see get_queue_depths.
+
+    Attributes:
+        horizon (float): Seconds ahead of now for which the pending timers are loaded.
+        poll_interval (float): Seconds between two database polls.
+        chunk_size (int): Number of rows read per query while loading the window.
+        batch_size (int): Maximum number of timers enqueued together.
+        enqueue (Callable[[list[UUID], list[int]], None]): Called with the ids and the versions
+            of every batch of due timers.
+        scheduler (FairScheduler): Due timers held back by the rate limits, keyed by host.
+        coordinator (ShardCoordinator | None): The leases of the shards of this dispatcher,
+            None for a dispatcher loading the timers of every shard.
+    """
+
+    def __init__(
+        self,
+        horizon: float | None = None,
+        poll_interval: float | None = None,
+        tick: float | None = None,
+        chunk_size: int | None = None,
+        batch_size: int | None = None,
+        enqueue: Callable[[list[UUID], list[int]], None] = enqueue_timers,
+        clock: Callable[[], float] = time.time,
+        scheduler: FairScheduler | None = None,
+        coordinator: ShardCoordinator | None = None,
+    ):
+        self.horizon = horizon if horizon is not None else settings.TIMER_DISPATCHER_HORIZON
+        self.poll_interval = (
+            poll_interval if poll_interval is not None else settings.TIMER_DISPATCHER_POLL_INTERVAL
+        )
+        self.chunk_size = chunk_size or settings.TIMER_DISPATCHER_CHUNK_SIZE
+        self.batch_size = batch_size or settings.TIMER_DISPATCHER_BATCH_SIZE
+        self.enqueue = enqueue
+        self.clock = clock
+
+        self._wheel = HierarchicalTimingWheel(
+            tick=tick or settings.TIMER_DISPATCHER_TICK, start=self.clock()
+        )
+        self.scheduler = scheduler or FairScheduler(
+            get_limits=self._get_host_limits,
+            get_weight=get_host_weight,
+            rate=settings.TIMER_DISPATCHER_MAX_RATE or None,
+            start=self.clock(),
+        )
+        self.coordinator = coordinator
+        self._scheduled: set[tuple[UUID, datetime, int]] = set()
+        self._owned: frozenset[int] | None = None
+        self._next_poll_at = 0.0
+        self._is_backlogged = False
+        self._share = 1.0
+
+    @property
+    def scheduled_count(self) -> int:
+        """Number of timers loaded from the database and not yet due."""
+        return len(self._wheel)
+
+    @property
+    def held_back_count(self) -> int:
+        """Number of due timers held back by the rate limits."""
+        return len(self.scheduler)
+
+    def poll(self):
+        """Load the pending timers expiring within the horizon into the timing wheel.
+
+        The window is read in chunks ordered by (expires_at, id) using keyset pagination, so a
+        burst of timers never has to be materialized by a single query. At most `batch_size`
+        timers of the backlog, overdue by more than a poll interval, are loaded per poll.
+        """
+        now = self.clock()
+        window_end = datetime.fromtimestamp(now + self.horizon, tz=timezone.utc)
+        backlog_end = datetime.fromtimestamp(now - self.poll_interval, tz=timezone.utc)
+
+        seen = set()
+        added = 0
+        self._is_backlogged = False
+        for timer_id, expires_at, version, url in self._iter_window(window_end):
+            key = (timer_id, expires_at, version)
+            if key in self._scheduled:
+                seen.add(key)
+                continue
+            if expires_at < backlog_end and added >= self.batch_size:
+                self._is_backlogged = True
+                break
+
+            seen.add(key)
+            self._wheel.add((key, get_host_key(url)), expires_at.timestamp())
+            added += 1
+
+        if self._is_backlogged:
+            # The rest of the window has not been read, none of its timers can be forgotten
+            self._scheduled.update(seen)
+        else:
+            # Timers which left the pending window have been fired or removed in the meantime
+            self._scheduled = seen
+        self._next_poll_at = now + self.poll_interval
+
+        if added:
+            logger.info(f"Dispatcher loaded {added} timer(s) expiring before {window_end}")
+
+    def tick(self) -> int:
+        """Enqueue the timers whose deadline has passed, as far as the rate limits allow.
+
+        Returns:
+            int: The number of enqueued timers.
+        """
+        now = self.clock()
+        if self.coordinator is not None:
+            self._update_owned(self.coordinator.owned_at(now), now)
+
+        # The next timers of a backlog are loaded as soon as the previous ones have been enqueued
+        is_polling = now >= self._next_poll_at or (self._is_backlogged and not len(self.scheduler))
+        if is_polling:
+            self.poll()
+
+        for key, host_key in self._wheel.advance(now):
+            if self._owns(key):
+                self.scheduler.add(host_key, key)
+
+        released = [key for key in self.scheduler.take(now) if self._owns(key)]
+        for start in range(0, len(released), self.batch_size):
+            batch = released[start : start + self.batch_size]
+            timer_ids = [timer_id for timer_id, _, _ in batch]
+            try:
+                self.enqueue(timer_ids, [version for _, _, version in batch])
+            except Exception as err:
+                # Forget the timers, so that the next poll loads and enqueues them again
+                self._scheduled.difference_update(batch)
+                logger.error(f"Failed to enqueue {len(timer_ids)} timer(s): {str(err)}")
+
+        if is_polling:
+            self._publish_queue_depths(now)
+        return len(released)
+
+    def run_forever(self, stop_event: threading.Event | None = None):
+        """Run the dispatcher loop until the stop event is set.
+
+        Args:
+            stop_event (threading.Event, optional): Event stopping the loop. Defaults to None.
+        """
+        stop_event = stop_event or threading.Event()
+        logger.info(
+            f"Dispatcher started with a horizon of {self.horizon}s and a tick of "
+            f"{self._wheel.tick}s"
+        )
+
+        while not stop_event.is_set():
+            # Outside of requests and tasks nothing recycles the connection of the loop, which
+            # would otherwise stay broken once the database has dropped it
+            close_old_connections()
+            self.tick()
+            stop_event.wait(self._wheel.tick)
+
+        if self.coordinator is not None:
+            # Taken over by the other dispatchers right away instead of once the leases expire
+            self.coordinator.release()
+        logger.info("Dispatcher stopped")
+
+    def _owns(self, key: tuple[UUID, datetime, int]) -> bool:
+        return self._owned is None or get_shard(key[0]) in self._owned
+
+    def _update_owned(self, owned: frozenset[int], now: float):
+        if owned == self._owned:
+            return
+
+        # The timers of the shards given up are forgotten, those of the shards taken over are
+        # loaded by a poll right away
+        self._owned = owned
+        self._scheduled = {key for key in self._scheduled if self._owns(key)}
+        self._next_poll_at = 0.0
+
+        share = len(owned) / self.coordinator.shard_count
+        if share and share != self._share:
+            self._share = share
+            max_rate = settings.TIMER_DISPATCHER_MAX_RATE
+            self.scheduler.reset_limits(now, rate=max_rate * share if max_rate else None)
+
+    def _get_host_limits(self, host_key: str) -> tuple[float | None, float]:
+        rate, burst = get_host_limits(host_key)
+        if rate is None or self._share == 1.0:
+            return rate, burst
+        return rate * self._share, max(burst * self._share, 1.0)
+
+    def _iter_window(self, window_end: datetime):
+        if self._owned is not None and not self._owned:
+            return
+
+        queryset = WebhookTimer.objects.all()
+        if self._owned is not None:
+            queryset = queryset.filter(shard__in=sorted(self._owned))
+
+        after = None
+        while True:
+            rows = list(
+                queryset.due(before=window_end, after=after, limit=self.chunk_size).values_list(
+                    "id", "expires_at", "version", "url"
+                )
+            )
+            yield from rows
+
+            if len(rows) < self.chunk_size:
+                return
+            last_id, last_expires_at, _, _ = rows[-1]
+            after = (last_expires_at, last_id)
+
+    def _publish_queue_depths(self, now: float):
+        depths = self.scheduler.queue_depths()
+        caches["shared"].set(
+            get_queue_depths_key(self.coordinator.node_id if self.coordinator else None),
+            {
+                "hosts": depths,
+                "total": sum(depths.values()),
+                "updated_at": datetime.fromtimestamp(now, tz=timezone.utc).isoformat(),
+            },
+            # Stale depths disappear if the dispatcher stops
+            timeout=max(self.poll_interval * 3, 60),
+        )
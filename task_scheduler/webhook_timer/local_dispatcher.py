@@ -0,0 +1,218 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from uuid import UUID
+
+from django.conf import settings
+
+from task_scheduler.webhook_timer.cache import timer_cache
+from task_scheduler.webhook_timer.circuit_breaker import circuit_breaker
+from task_scheduler.webhook_timer.delivery import deliver_in_batches, prewarm_hosts
+from task_scheduler.webhook_timer.memory_store import MemoryTimerStore, StoredTimer
+from task_scheduler.webhook_timer.metrics import observe_lateness, timer_deliveries
+from task_scheduler.webhook_timer.retry_policy import get_retry_delay
+from task_scheduler.webhook_timer.tasks import trigger_webhook
+from task_scheduler.webhook_timer.timer_store import close_timer_stores, get_timer_store
+
+
+logger = logging.getLogger("webhook_timer")
+
+
+class LocalDispatcher:
+    """Fires the due timers of a MemoryTimerStore from the process holding the store.
+
+    The dispatcher sleeps until the earliest due time of the store, waking up early when a timer
+    is scheduled and at least every `tick` seconds, so that the timers are fired within about a
+    millisecond of their expiry. The due timers are claimed from the store, `batch_size` at a
+    time, and their webhooks fired by `threads` threads like the start_timers task fires them:
+    grouped by host on keep-alive connections, skipping the hosts whose circuit is open,
+    retrying the failed webhooks with backoff up to WEBHOOK_MAX_RETRIES times and moving the
+    recurring timers to their next occurrence. No message goes through the broker and no row
+    through the database, except for the delivery history.
+
+    Timers are often set with round durations, so that thousands of them expire in the same
+    second. Every `lookahead / 2` seconds the dispatcher therefore looks at the timers due
+    within the next `lookahead` seconds and opens the connections to their hosts ahead of time,
+    see prewarm_hosts. The timers themselves are already in memory, so at their expiry only the
+    webhooks are left to be sent.
+
+    Attributes:
+        store (MemoryTimerStore): The store of the timers.
+        tick (float): Maximum seconds between two looks for due timers.
+        batch_size (int): Maximum number of timers fired at once.
+        threads (int): Number of threads firing the webhooks.
+        lookahead (float): Seconds ahead of their expiry the connections of the timers are
+            opened, 0 not to open them ahead.
+    """
+
+    def __init__(
+        self,
+        store: MemoryTimerStore,
+        tick: float | None = None,
+        batch_size: int | None = None,
+        threads: int | None = None,
+        lookahead: float | None = None,
+    ):
+        self.store = store
+        self.tick_interval = tick or settings.TIMER_LOCAL_DISPATCHER_TICK
+        self.batch_size = batch_size or settings.TIMER_LOCAL_DISPATCHER_BATCH_SIZE
+        self.threads = threads or settings.TIMER_LOCAL_DISPATCHER_THREADS
+        self.lookahead = (
+            settings.TIMER_LOCAL_DISPATCHER_LOOKAHEAD if lookahead is None else lookahead
+        )
+
+    def tick(self, now: float | None = None) -> int:
+        """Fire the timers due at the given time, from the calling thread.
+
+        Args:
+            now (float, optional): POSIX timestamp. Defaults to the current time.
+
+        Returns:
+            int: The number of timers fired, successfully or not.
+        """
+        fired_count = 0
+        for lease_owner, timers in self._claim_due(now):
+            self.fire(lease_owner, timers)
+            fired_count += len(timers)
+        return fired_count
+
+    def prepare(self, now: float | None = None) -> int:
+        """Open the connections to the hosts of the timers due within the look-ahead.
+
+        Args:
+            now (float, optional): POSIX timestamp. Defaults to the current time.
+
+        Returns:
+            int: The number of connections opened.
+        """
+        now = time.time() if now is None else now
+        return prewarm_hosts(self.store.upcoming(now + self.lookahead, limit=self.batch_size))
+
+    def fire(self, lease_owner: UUID, timers: list[StoredTimer]):
+        """Fire the webhooks of the given claimed timers and release them with their outcome."""
+        observe_lateness(timer.expires_at for timer in timers if not timer.attempts)
+
+        timers, short_circuited = circuit_breaker.split(timers)
+        if short_circuited:
+            timer_deliveries.labels("short_circuited").inc(len(short_circuited))
+            self.store.release(
+                lease_owner,
+                short_circuited,
+                retry_at=time.time() + circuit_breaker.get_requeue_delay(),
+            )
+
+        attempts = {str(timer.id): timer.attempts + 1 for timer in timers}
+        delivered, failed, rejected = deliver_in_batches(
+            timers,
+            lambda url, timer_id: trigger_webhook(url, timer_id, attempt=attempts[timer_id]),
+        )
+        for outcome, outcome_timers in (
+            ("delivered", delivered),
+            ("failed", failed),
+            ("rejected", rejected),
+        ):
+            if outcome_timers:
+                timer_deliveries.labels(outcome).inc(len(outcome_timers))
+        circuit_breaker.record(delivered, failed, rejected)
+
+        retried, given_up = [], []
+        for timer in failed:
+            (given_up if timer.attempts >= settings.WEBHOOK_MAX_RETRIES else retried).append(timer)
+        for timer in retried:
+            self.store.mark_failed(
+                lease_owner, [timer], retry_at=time.time() + get_retry_delay(timer.attempts)
+            )
+
+        # A recurring timer goes on with its next occurrence whatever the outcome of this one
+        recurring = [timer for timer in [*delivered, *rejected, *given_up] if timer.is_recurring]
+        self.store.reschedule(lease_owner, recurring)
+        self.store.mark_delivered(lease_owner, delivered)
+        self.store.mark_failed(lease_owner, [*rejected, *given_up], final=True)
+        timer_cache.invalidate(timer.id for timer in [*delivered, *rejected, *given_up])
+
+    def run_forever(self, stop_event: threading.Event | None = None):
+        """Fire the due timers as they become due until the stop event is set.
+
+        Args:
+            stop_event (threading.Event, optional): Event stopping the loop. Defaults to None.
+        """
+        stop_event = stop_event or threading.Event()
+        logger.info(f"Local dispatcher started with {self.threads} thread(s)")
+
+        preparing = None
+        next_prepare_at = 0.0
+        with ThreadPoolExecutor(self.threads, thread_name_prefix="local-dispatcher") as executor:
+            while not stop_event.is_set():
+                # Cleared before claiming, a timer scheduled meanwhile wakes the loop right away
+                self.store.due_changed.clear()
+                try:
+                    for lease_owner, timers in self._claim_due():
+                        executor.submit(self._fire_or_release, lease_owner, timers)
+                except Exception as err:
+                    logger.error(f"Local dispatcher tick failed: {str(err)}")
+
+                # Prepared off the loop, a slow host must not hold back the due timers
+                is_prepared = preparing is None or preparing.done()
+                if self.lookahead and is_prepared and time.monotonic() >= next_prepare_at:
+                    preparing = executor.submit(self.prepare)
+                    next_prepare_at = time.monotonic() + self.lookahead / 2
+
+                # Event.wait times out on the monotonic clock, the wall clock only gives the delay
+                next_due_at = self.store.next_due_at()
+                timeout = self.tick_interval
+                if next_due_at is not None:
+                    timeout = min(max(next_due_at - time.time(), 0), timeout)
+                self.store.due_changed.wait(timeout)
+
+        logger.info("Local dispatcher stopped")
+
+    def _claim_due(self, now: float | None = None):
+        self.store.maintain()
+        while True:
+            lease_owner, timers = self.store.claim_due(now, limit=self.batch_size)
+            if timers:
+                yield lease_owner, timers
+            if len(timers) < self.batch_size:
+                return
+
+    def _fire_or_release(self, lease_owner: UUID, timers: list[StoredTimer]):
+        try:
+            self.fire(lease_owner, timers)
+        except Exception as err:
+            # The timers not released yet by fire are fired again after a backoff
+            logger.error(f"Failed to fire {len(timers)} timer(s): {str(err)}")
+            self.store.release(lease_owner, timers, retry_at=time.time() + get_retry_delay(0))
+
+
+_stop_event = threading.Event()
+_started_pid = None
+
+
+def start_local_dispatcher():
+    """Open the memory store and fire its timers from a thread, once per process.
+
+    Called by the WSGI and ASGI applications. Does nothing unless TIMER_STORE_BACKEND is
+    "memory". The store takes a last snapshot when the process exits.
+    """
+    global _started_pid
+
+    if settings.TIMER_STORE_BACKEND != "memory" or _started_pid == os.getpid():
+        return
+    _started_pid = os.getpid()
+
+    dispatcher = LocalDispatcher(get_timer_store())
+    thread = threading.Thread(
+        target=dispatcher.run_forever, args=(_stop_event,), name="local-dispatcher", daemon=True
+    )
+    thread.start()
+
+    def stop():
+        _stop_event.set()
+        dispatcher.store.due_changed.set()
+        thread.join()
+        close_timer_stores()
+
+    atexit.register(stop)
@@ -0,0 +1,56 @@
+import signal
+import threading
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from task_scheduler.webhook_timer.models import WebhookTimer
+
+
+class Command(BaseCommand):
+    help = "Move the timers fired or cancelled before the retention period to the archive."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--retention-days",
+            type=float,
+            help="Days the timers stay after their expiry (TIMER_ARCHIVE_RETENTION_DAYS).",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            help="Number of timers moved per transaction (TIMER_ARCHIVE_CHUNK_SIZE).",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            help="Archive every given number of seconds instead of once.",
+        )
+
+    def handle(self, *args, **options):
+        retention_days = options["retention_days"]
+        if retention_days is None:
+            retention_days = settings.TIMER_ARCHIVE_RETENTION_DAYS
+
+        if options["interval"] is None:
+            self.archive(retention_days, options["chunk_size"])
+            return
+
+        stop_event = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+        signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+
+        while not stop_event.is_set():
+            close_old_connections()
+            try:
+                self.archive(retention_days, options["chunk_size"])
+            except Exception as err:
+                self.stderr.write(f"Archiving failed: {str(err)}")
+            stop_event.wait(options["interval"])
+
+    def archive(self, retention_days: float, chunk_size: int | None):
+        before = datetime.now(timezone.utc) - timedelta(days=retention_days)
+        archived = WebhookTimer.objects.archive(before, chunk_size=chunk_size)
+        self.stdout.write(f"Archived {archived} timer(s) expired before {before.isoformat()}.")
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from task_scheduler.webhook_timer.models import WebhookTimer
+
+
+class Command(BaseCommand):
+    help = "Set the shard of the pending timers from their id, after TIMER_SHARD_COUNT changed."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Number of timers read per query.",
+        )
+
+    def handle(self, *args, **options):
+        changed = WebhookTimer.objects.assign_shards(chunk_size=options["chunk_size"])
+        self.stdout.write(
+            f"Moved {changed} pending timer(s) to their shard out of {settings.TIMER_SHARD_COUNT}."
+        )
@@ -0,0 +1,104 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from task_scheduler.webhook_timer.benchmark import (
+    DISTRIBUTIONS,
+    FIRING_PATHS,
+    TimerBenchmark,
+    get_commit,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the timers end to end against a local webhook sink: create throughput, "
+        "delivery throughput and firing lateness, reported as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--timers", type=int, default=1000, help="Number of timers.")
+        parser.add_argument(
+            "--distribution",
+            choices=DISTRIBUTIONS,
+            default="uniform",
+            help="Distribution of the expiry times of the timers.",
+        )
+        parser.add_argument(
+            "--spread",
+            type=float,
+            default=10,
+            help="Seconds over which the expiry times are spread.",
+        )
+        parser.add_argument(
+            "--path",
+            choices=FIRING_PATHS,
+            default="start_timers",
+            help="Task firing the timers in-process: start_timer per timer or dispatcher batches.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=8,
+            help="Tasks executed concurrently in-process, 1 to run them in the calling thread.",
+        )
+        parser.add_argument(
+            "--use-workers",
+            action="store_true",
+            help="Let the running Celery workers fire the timers instead of the benchmark.",
+        )
+        parser.add_argument("--base-url", help="Create the timers on a running server.")
+        parser.add_argument("--sink-host", default="127.0.0.1", help="Address of the sink.")
+        parser.add_argument("--sink-port", type=int, default=0, help="Port of the sink.")
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            help="Seconds the webhooks are waited for after the last expiry (spread + 60).",
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Seed of the expiry times.")
+        parser.add_argument("--output", help="Also write the report to this file.")
+        parser.add_argument(
+            "--compare", help="Report of a previous run to compare the results with."
+        )
+
+    def handle(self, *args, **options):
+        if options["timers"] < 1:
+            raise CommandError("--timers must be positive.")
+
+        baseline = None
+        if options["compare"]:
+            try:
+                with open(options["compare"]) as file:
+                    baseline = json.load(file)
+            except (OSError, ValueError) as err:
+                raise CommandError(f"Failed to read the report to compare with: {err}")
+
+        benchmark = TimerBenchmark(
+            timers=options["timers"],
+            distribution=options["distribution"],
+            spread=options["spread"],
+            firing_path=options["path"],
+            fire_locally=not options["use_workers"],
+            workers=options["workers"],
+            base_url=options["base_url"],
+            sink_host=options["sink_host"],
+            sink_port=options["sink_port"],
+            timeout=options["timeout"],
+            seed=options["seed"],
+        )
+        results = benchmark.run()
+
+        report = {
+            "benchmark": "timers",
+            "commit": get_commit(),
+            "parameters": benchmark.parameters,
+            "results": results,
+        }
+        if baseline is not None:
+            report["comparison"] = TimerBenchmark.compare(results, baseline["results"])
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                file.write(output + "\n")
+        self.stdout.write(output)
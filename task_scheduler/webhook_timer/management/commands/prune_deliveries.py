@@ -0,0 +1,58 @@
+import signal
+import threading
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from task_scheduler.webhook_timer.models import WebhookDelivery
+
+
+class Command(BaseCommand):
+    help = "Delete the delivery attempts older than the retention period, in chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--retention-days",
+            type=float,
+            help="Days the attempts are kept for (WEBHOOK_DELIVERY_RETENTION_DAYS).",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            help="Number of attempts deleted per statement (WEBHOOK_DELIVERY_PRUNE_CHUNK_SIZE).",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            help="Prune every given number of seconds instead of once.",
+        )
+
+    def handle(self, *args, **options):
+        retention_days = options["retention_days"]
+        if retention_days is None:
+            retention_days = settings.WEBHOOK_DELIVERY_RETENTION_DAYS
+
+        if options["interval"] is None:
+            self.prune(retention_days, options["chunk_size"])
+            return
+
+        stop_event = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+        signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+
+        while not stop_event.is_set():
+            close_old_connections()
+            try:
+                self.prune(retention_days, options["chunk_size"])
+            except Exception as err:
+                self.stderr.write(f"Pruning failed: {str(err)}")
+            stop_event.wait(options["interval"])
+
+    def prune(self, retention_days: float, chunk_size: int | None):
+        before = datetime.now(timezone.utc) - timedelta(days=retention_days)
+        deleted = WebhookDelivery.objects.prune(before, chunk_size=chunk_size)
+        self.stdout.write(
+            f"Deleted {deleted} delivery attempt(s) made before {before.isoformat()}."
+        )
@@ -0,0 +1,54 @@
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from task_scheduler.webhook_timer.dispatcher import TimerDispatcher
+from task_scheduler.webhook_timer.sharding import ShardCoordinator
+
+
+class Command(BaseCommand):
+    help = "Run the dispatcher enqueueing the due webhook timers from the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--horizon",
+            type=float,
+            help="Seconds ahead of now the pending timers are loaded (TIMER_DISPATCHER_HORIZON).",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            help="Seconds between two database polls (TIMER_DISPATCHER_POLL_INTERVAL).",
+        )
+        parser.add_argument(
+            "--tick",
+            type=float,
+            help="Resolution of the timing wheel in seconds (TIMER_DISPATCHER_TICK).",
+        )
+        parser.add_argument(
+            "--node-id",
+            help="Id of this dispatcher among those sharing the shards. Defaults to a new one.",
+        )
+
+    def handle(self, *args, **options):
+        if settings.TIMER_DISPATCH_MODE != "dispatcher":
+            # The timers are published as ETA messages, enqueueing them again would fire twice
+            self.stderr.write(
+                f"TIMER_DISPATCH_MODE is '{settings.TIMER_DISPATCH_MODE}', nothing to dispatch."
+            )
+            return
+
+        dispatcher = TimerDispatcher(
+            horizon=options["horizon"],
+            poll_interval=options["poll_interval"],
+            tick=options["tick"],
+            coordinator=ShardCoordinator(node_id=options["node_id"]),
+        )
+
+        stop_event = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+        signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+
+        dispatcher.run_forever(stop_event)
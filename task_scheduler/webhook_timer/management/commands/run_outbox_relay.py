@@ -0,0 +1,41 @@
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from task_scheduler.webhook_timer.outbox import OutboxRelay
+
+
+class Command(BaseCommand):
+    help = "Run the relay publishing the messages of the timer outbox to the broker."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            help="Maximum number of messages published at once (TIMER_OUTBOX_BATCH_SIZE).",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            help="Seconds between two reads of an empty outbox (TIMER_OUTBOX_POLL_INTERVAL).",
+        )
+
+    def handle(self, *args, **options):
+        if settings.TIMER_DISPATCH_MODE != "outbox":
+            # The timers are published by the views or enqueued by the dispatcher instead
+            self.stderr.write(
+                f"TIMER_DISPATCH_MODE is '{settings.TIMER_DISPATCH_MODE}', nothing to relay."
+            )
+            return
+
+        relay = OutboxRelay(
+            batch_size=options["batch_size"], poll_interval=options["poll_interval"]
+        )
+
+        stop_event = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+        signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+
+        relay.run_forever(stop_event)
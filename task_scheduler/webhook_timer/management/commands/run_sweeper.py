@@ -0,0 +1,47 @@
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from task_scheduler.webhook_timer.sweeper import TimerSweeper
+
+
+class Command(BaseCommand):
+    help = "Run the sweeper re-publishing the pending webhook timers whose ETA message is lost."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=None,
+            help="Seconds between two sweeps (TIMER_SWEEPER_INTERVAL).",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            help="Number of pending timers read per query (TIMER_SWEEPER_CHUNK_SIZE).",
+        )
+        parser.add_argument("--once", action="store_true", help="Sweep once and exit.")
+
+    def handle(self, *args, **options):
+        if settings.TIMER_DISPATCH_MODE == "dispatcher":
+            # The dispatcher reads the pending timers from the database, no message can be lost
+            self.stderr.write("TIMER_DISPATCH_MODE is 'dispatcher', nothing to sweep.")
+            return
+
+        sweeper = TimerSweeper(chunk_size=options["chunk_size"])
+
+        if options["once"]:
+            republished = sweeper.sweep()
+            self.stdout.write(f"Re-published {republished} timer(s).")
+            return
+
+        stop_event = threading.Event()
+        signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+        signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+
+        interval = options["interval"]
+        sweeper.run_forever(
+            interval if interval is not None else settings.TIMER_SWEEPER_INTERVAL, stop_event
+        )
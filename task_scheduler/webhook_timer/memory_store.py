@@ -0,0 +1,615 @@
+import fcntl
+import heapq
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Iterable
+
+from django.conf import settings
+
+from task_scheduler.utils import fast_json
+from task_scheduler.webhook_timer.cache import CachedTimer
+from task_scheduler.webhook_timer.models import WebhookTimer
+
+
+logger = logging.getLogger("webhook_timer")
+
+CLAIMABLE_STATES = (WebhookTimer.State.PENDING, WebhookTimer.State.FAILED)
+
+
+class StoredTimer:
+    """A timer of the memory store, with the fields of WebhookTimer.
+
+    Attributes:
+        Same as WebhookTimer, plus:
+        attempts (int): Number of failed attempts at firing the current occurrence.
+        due_at (float): POSIX timestamp the timer is fired at next, its expiry or the time the
+            webhook is retried at.
+    """
+
+    __slots__ = (
+        "id",
+        "url",
+        "expires_at",
+        "interval",
+        "cron",
+        "state",
+        "is_url_called",
+        "version",
+        "attempts",
+        "due_at",
+        "lease_owner",
+    )
+
+    # Same schedule as the timers of the database, the methods only read the fields above
+    is_recurring = WebhookTimer.is_recurring
+    get_next_expires_at = WebhookTimer.get_next_expires_at
+
+    def __init__(
+        self,
+        id: uuid.UUID,
+        url: str,
+        expires_at: datetime,
+        interval: int | None = None,
+        cron: str | None = None,
+        state: str = WebhookTimer.State.PENDING,
+        is_url_called: bool = False,
+        version: int = 0,
+        attempts: int = 0,
+        due_at: float | None = None,
+    ):
+        self.id = id
+        self.url = url
+        self.expires_at = expires_at
+        self.interval = interval
+        self.cron = cron
+        self.state = state
+        self.is_url_called = is_url_called
+        self.version = version
+        self.attempts = attempts
+        self.due_at = expires_at.timestamp() if due_at is None else due_at
+        self.lease_owner = None
+
+    def to_record(self) -> dict:
+        """Return the fields of the timer as written to the log and the snapshots."""
+        return {
+            "id": str(self.id),
+            "url": self.url,
+            "expires_at": self.expires_at.isoformat(),
+            "interval": self.interval,
+            "cron": self.cron,
+            "state": str(self.state),
+            "is_url_called": self.is_url_called,
+            "version": self.version,
+            "attempts": self.attempts,
+            "due_at": self.due_at,
+        }
+
+    @classmethod
+    def from_record(cls, record: dict) -> "StoredTimer":
+        """Rebuild a timer from its record, see to_record."""
+        record = dict(record, id=uuid.UUID(record["id"]))
+        record["expires_at"] = datetime.fromisoformat(record["expires_at"])
+        if record["state"] == WebhookTimer.State.IN_FLIGHT:
+            # The claims are not logged, a timer is only ever logged in flight by mistake
+            record["state"] = WebhookTimer.State.PENDING
+        return cls(**record)
+
+
+class _Shard:
+    """The timers whose id falls into one shard, with their log and their snapshot.
+
+    The pending timers are also kept in a min-heap of (due_at, id) entries. An entry is not
+    removed when its timer is cancelled, moved or fired, it is skipped once it reaches the top
+    of the heap if its timer is no longer pending at that time.
+    """
+
+    def __init__(self, path: Path):
+        self.snapshot_path = path.with_suffix(".snapshot")
+        self.wal_path = path.with_suffix(".wal")
+        self.timers: dict[uuid.UUID, StoredTimer] = {}
+        self.heap: list[tuple[float, uuid.UUID]] = []
+        self.lock = threading.Lock()
+        self.wal = None
+        self.wal_size = 0
+        self.is_synced = True
+
+
+class MemoryTimerStore:
+    """Timer store holding the timers in memory, made durable by a write-ahead log.
+
+    The timers are split into `shard_count` shards by id, each with a lock of its own, so that
+    the requests and the local dispatcher rarely wait on each other. Every change of a timer is
+    appended to the log of its shard as the whole record of the timer, with a single unbuffered
+    write, before the change is acknowledged: a change survives the crash of the process as soon
+    as it is made, and the crash of the machine once the log is synced to disk, at most every
+    `fsync_interval` seconds (on every write if 0). Claiming a timer for delivery is not logged,
+    a timer claimed when the process stops is pending again once the store is opened.
+
+    Every `snapshot_interval` seconds the timers of every shard are written to a snapshot and
+    the log of the shard is emptied, dropping the timers fired or cancelled more than
+    `retention` seconds ago. Opening the store loads the snapshots and replays the logs on top.
+
+    The store lives in the memory of a single process, which must serve the timer endpoints and
+    fire the timers (see local_dispatcher.py): a lock file keeps a second process from opening
+    the same directory.
+
+    Attributes:
+        directory (Path): Directory of the logs and the snapshots.
+        shard_count (int): Number of shards.
+        fsync_interval (float): Maximum seconds between two syncs of the logs to disk.
+        snapshot_interval (float): Seconds between two snapshots.
+        retention (float): Seconds the fired and cancelled timers are kept after their expiry.
+        due_changed (threading.Event): Set whenever a timer is scheduled, for the dispatcher to
+            look again at the next due time.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        shard_count: int | None = None,
+        fsync_interval: float | None = None,
+        snapshot_interval: float | None = None,
+        retention: float | None = None,
+    ):
+        self.directory = Path(directory)
+        self.shard_count = shard_count or settings.TIMER_STORE_SHARDS
+        self.fsync_interval = (
+            settings.TIMER_STORE_FSYNC_INTERVAL if fsync_interval is None else fsync_interval
+        )
+        self.snapshot_interval = snapshot_interval or settings.TIMER_STORE_SNAPSHOT_INTERVAL
+        self.retention = (
+            settings.TIMER_ARCHIVE_RETENTION_DAYS * 86400 if retention is None else retention
+        )
+
+        self._shards = [
+            _Shard(self.directory / f"shard-{index:03d}") for index in range(self.shard_count)
+        ]
+        self.due_changed = threading.Event()
+        self._next_shard = 0
+        self._lock_file = None
+        self._last_sync = self._last_snapshot = time.monotonic()
+
+    def open(self):
+        """Lock the directory, then load the snapshots and replay the logs of every shard.
+
+        Raises:
+            RuntimeError: If another process has opened the store.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock_file = open(self.directory / "LOCK", "w")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._lock_file.close()
+            self._lock_file = None
+            raise RuntimeError(f"The timer store '{self.directory}' is open in another process")
+
+        started_at = time.perf_counter()
+        for shard in self._shards:
+            self._recover(shard)
+            shard.wal = open(shard.wal_path, "ab", buffering=0)
+        logger.info(
+            f"Timer store '{self.directory}' opened with {len(self)} timer(s) in "
+            f"{time.perf_counter() - started_at:.3f}s"
+        )
+
+    def close(self):
+        """Take a snapshot of every shard, then close the logs and unlock the directory."""
+        if self._lock_file is None:
+            return
+
+        self.snapshot()
+        for shard in self._shards:
+            shard.wal.close()
+            shard.wal = None
+        self._lock_file.close()
+        self._lock_file = None
+
+    def __len__(self) -> int:
+        return sum(len(shard.timers) for shard in self._shards)
+
+    def create(
+        self,
+        timer_id: uuid.UUID,
+        url: str,
+        expires_at: datetime,
+        interval: int | None = None,
+        cron: str | None = None,
+    ) -> StoredTimer:
+        """Store a new pending timer."""
+        timer = StoredTimer(timer_id, url, expires_at, interval=interval, cron=cron)
+        shard = self._get_shard(timer_id)
+        with shard.lock:
+            self._put(shard, timer)
+            self._log(shard, [timer])
+        return timer
+
+    async def acreate(
+        self,
+        timer_id: uuid.UUID,
+        url: str,
+        expires_at: datetime,
+        interval: int | None = None,
+        cron: str | None = None,
+    ) -> StoredTimer:
+        """Asynchronous version of create, run on the event loop as it only appends to a log."""
+        return self.create(timer_id, url, expires_at, interval=interval, cron=cron)
+
+    def create_many(self, webhook_timers: Iterable[WebhookTimer]) -> list[StoredTimer]:
+        """Store new pending timers, with one write to the log of every shard they fall into."""
+        timers_by_shard = defaultdict(list)
+        for webhook_timer in webhook_timers:
+            timer = StoredTimer(
+                webhook_timer.id,
+                webhook_timer.url,
+                webhook_timer.expires_at,
+                interval=webhook_timer.interval,
+                cron=webhook_timer.cron,
+            )
+            timers_by_shard[self._get_shard(timer.id)].append(timer)
+
+        for shard, timers in timers_by_shard.items():
+            with shard.lock:
+                for timer in timers:
+                    self._put(shard, timer)
+                self._log(shard, timers)
+        return [timer for timers in timers_by_shard.values() for timer in timers]
+
+    def lookup(self, timer_id: uuid.UUID) -> CachedTimer | None:
+        """Return the expiry of the timer, None if no timer matches the id."""
+        timer = self._get_shard(timer_id).timers.get(timer_id)
+        if timer is None:
+            return None
+        return CachedTimer(timer.expires_at, timer.is_url_called)
+
+    async def alookup(self, timer_id: uuid.UUID) -> CachedTimer | None:
+        """Asynchronous version of lookup."""
+        return self.lookup(timer_id)
+
+    def lookup_many(self, timer_ids: Iterable[uuid.UUID]) -> dict[uuid.UUID, CachedTimer]:
+        """Return the expiry of the timers found, by timer id."""
+        found = {timer_id: self.lookup(timer_id) for timer_id in timer_ids}
+        return {timer_id: value for timer_id, value in found.items() if value is not None}
+
+    def exists(self, timer_id: uuid.UUID) -> bool:
+        """Return whether a timer matches the id."""
+        return timer_id in self._get_shard(timer_id).timers
+
+    async def aexists(self, timer_id: uuid.UUID) -> bool:
+        """Asynchronous version of exists."""
+        return self.exists(timer_id)
+
+    def cancel(self, timer_id: uuid.UUID) -> bool:
+        """Cancel the given timer if it is pending and not being fired, see WebhookTimer.cancel."""
+        shard = self._get_shard(timer_id)
+        with shard.lock:
+            timer = shard.timers.get(timer_id)
+            if timer is None or timer.state not in CLAIMABLE_STATES:
+                return False
+
+            timer.state = WebhookTimer.State.CANCELLED
+            timer.is_url_called = True
+            timer.version += 1
+            self._log(shard, [timer])
+        return True
+
+    async def acancel(self, timer_id: uuid.UUID) -> bool:
+        """Asynchronous version of cancel."""
+        return self.cancel(timer_id)
+
+    def move(self, timer_id: uuid.UUID, expires_at: datetime) -> int | None:
+        """Move the given timer to a new expiry time, see WebhookTimerQuerySet.move.
+
+        Returns:
+            int | None: The new version of the timer, or None if the timer cannot be moved.
+        """
+        shard = self._get_shard(timer_id)
+        with shard.lock:
+            timer = shard.timers.get(timer_id)
+            if timer is None or timer.state not in CLAIMABLE_STATES:
+                return None
+
+            timer.expires_at = expires_at
+            timer.state = WebhookTimer.State.PENDING
+            timer.version += 1
+            timer.attempts = 0
+            timer.due_at = expires_at.timestamp()
+            self._put(shard, timer)
+            self._log(shard, [timer])
+            return timer.version
+
+    async def amove(self, timer_id: uuid.UUID, expires_at: datetime) -> int | None:
+        """Asynchronous version of move."""
+        return self.move(timer_id, expires_at)
+
+    def next_due_at(self) -> float | None:
+        """Return the earliest time a timer may be due at, None if no timer is pending.
+
+        The time may be that of a timer cancelled or moved since, the caller then finds no due
+        timer at that time.
+        """
+        due_ats = [shard.heap[0][0] for shard in self._shards if shard.heap]
+        return min(due_ats) if due_ats else None
+
+    def upcoming(self, until: float, limit: int | None = None) -> list[StoredTimer]:
+        """Return the pending timers due by the given time, without claiming them.
+
+        Only the heap entries due by then are visited, so the cost does not depend on the
+        number of timers due later.
+
+        Args:
+            until (float): POSIX timestamp.
+            limit (int, optional): Maximum number of timers to return per shard. Defaults to None.
+
+        Returns:
+            list[StoredTimer]: The timers, in no particular order.
+        """
+        upcoming = []
+        for shard in self._shards:
+            with shard.lock:
+                heap = shard.heap
+                # The entries due by then form a subtree of the heap rooted at its top
+                indexes = [0] if heap and heap[0][0] <= until else []
+                found = 0
+                while indexes and (limit is None or found < limit):
+                    index = indexes.pop()
+                    due_at, timer_id = heap[index]
+                    timer = shard.timers.get(timer_id)
+                    if (
+                        timer is not None
+                        and timer.due_at == due_at
+                        and timer.state in CLAIMABLE_STATES
+                    ):
+                        upcoming.append(timer)
+                        found += 1
+                    indexes.extend(
+                        child
+                        for child in (2 * index + 1, 2 * index + 2)
+                        if child < len(heap) and heap[child][0] <= until
+                    )
+        return upcoming
+
+    def claim_due(
+        self, now: float | None = None, limit: int | None = None
+    ) -> tuple[uuid.UUID, list[StoredTimer]]:
+        """Claim the pending timers due at the given time for delivery, earliest first per shard.
+
+        The claimed timers are in flight until they are marked delivered or failed, or released.
+
+        Args:
+            now (float, optional): POSIX timestamp. Defaults to the current time.
+            limit (int, optional): Maximum number of timers to claim. Defaults to None.
+
+        Returns:
+            tuple[UUID, list[StoredTimer]]: The lease owner, to release the claimed timers with,
+                and the claimed timers.
+        """
+        now = time.time() if now is None else now
+        lease_owner = uuid.uuid4()
+        claimed = []
+
+        # The shards are visited from a different one every time, so that a limit does not
+        # always leave out the same shards
+        start = self._next_shard
+        self._next_shard = (start + 1) % self.shard_count
+        for index in range(self.shard_count):
+            shard = self._shards[(start + index) % self.shard_count]
+            with shard.lock:
+                heap = shard.heap
+                while heap and heap[0][0] <= now and (limit is None or len(claimed) < limit):
+                    due_at, timer_id = heapq.heappop(heap)
+                    timer = shard.timers.get(timer_id)
+                    if (
+                        timer is None
+                        or timer.due_at != due_at
+                        or timer.state not in CLAIMABLE_STATES
+                    ):
+                        continue
+
+                    timer.state = WebhookTimer.State.IN_FLIGHT
+                    timer.lease_owner = lease_owner
+                    claimed.append(timer)
+        return lease_owner, claimed
+
+    def mark_delivered(self, lease_owner: uuid.UUID, timers: Iterable[StoredTimer]) -> int:
+        """Mark the given timers claimed by the lease owner as delivered and release them."""
+
+        def update(timer: StoredTimer):
+            timer.state = WebhookTimer.State.DELIVERED
+            timer.is_url_called = True
+
+        return self._release(lease_owner, timers, update)
+
+    def mark_failed(
+        self,
+        lease_owner: uuid.UUID,
+        timers: Iterable[StoredTimer],
+        final: bool = False,
+        retry_at: float | None = None,
+    ) -> int:
+        """Mark the given timers claimed by the lease owner as failed and release them.
+
+        Args:
+            lease_owner (UUID): The lease owner the timers were claimed with.
+            timers (Iterable[StoredTimer]): The claimed timers.
+            final (bool, optional): Whether the webhooks are given up. Defaults to False.
+            retry_at (float, optional): POSIX timestamp the webhooks which are not given up are
+                retried at. Defaults to right away.
+
+        Returns:
+            int: The number of released timers.
+        """
+
+        def update(timer: StoredTimer):
+            timer.state = WebhookTimer.State.FAILED
+            timer.is_url_called = final
+            timer.attempts += 1
+            if not final:
+                timer.due_at = time.time() if retry_at is None else retry_at
+
+        return self._release(lease_owner, timers, update)
+
+    def release(
+        self, lease_owner: uuid.UUID, timers: Iterable[StoredTimer], retry_at: float
+    ) -> int:
+        """Release the given claimed timers unfired, to be fired at the given time instead."""
+
+        def update(timer: StoredTimer):
+            timer.state = WebhookTimer.State.PENDING
+            timer.due_at = retry_at
+
+        return self._release(lease_owner, timers, update)
+
+    def reschedule(
+        self,
+        lease_owner: uuid.UUID,
+        timers: Iterable[StoredTimer],
+        now: datetime | None = None,
+    ) -> int:
+        """Move the given recurring timers to their next occurrence, see WebhookTimer.reschedule."""
+        now = now or datetime.now(timezone.utc)
+
+        def update(timer: StoredTimer):
+            timer.expires_at = timer.get_next_expires_at(now)
+            timer.due_at = timer.expires_at.timestamp()
+            timer.state = WebhookTimer.State.PENDING
+            timer.version += 1
+            timer.attempts = 0
+
+        return self._release(lease_owner, timers, update)
+
+    def sync(self):
+        """Sync the logs written since the last sync to disk."""
+        for shard in self._shards:
+            with shard.lock:
+                if shard.is_synced or shard.wal is None:
+                    continue
+                os.fsync(shard.wal.fileno())
+                shard.is_synced = True
+        self._last_sync = time.monotonic()
+
+    def snapshot(self):
+        """Write the timers of every shard to its snapshot and empty the log of the shard.
+
+        A shard is locked while its snapshot is written, the other shards are not.
+        """
+        expired_before = datetime.now(timezone.utc) - timedelta(seconds=self.retention)
+        for shard in self._shards:
+            with shard.lock:
+                for timer_id in [
+                    timer.id
+                    for timer in shard.timers.values()
+                    if timer.is_url_called and timer.expires_at < expired_before
+                ]:
+                    del shard.timers[timer_id]
+
+                temporary_path = shard.snapshot_path.with_suffix(".snapshot.tmp")
+                with open(temporary_path, "wb") as file:
+                    file.writelines(
+                        fast_json.dumps(timer.to_record()) + b"\n"
+                        for timer in shard.timers.values()
+                    )
+                    file.flush()
+                    os.fsync(file.fileno())
+                # The log is replayed on top of the new snapshot if the process stops in between,
+                # the records of the log being whole timers this leaves the same timers
+                os.replace(temporary_path, shard.snapshot_path)
+                if shard.wal is not None:
+                    shard.wal.truncate(0)
+                shard.wal_size = 0
+                shard.is_synced = True
+
+                # Drops the entries of the timers fired, cancelled or moved since they were pushed
+                shard.heap = [
+                    (timer.due_at, timer.id)
+                    for timer in shard.timers.values()
+                    if timer.state in CLAIMABLE_STATES
+                ]
+                heapq.heapify(shard.heap)
+        self._last_snapshot = time.monotonic()
+
+    def maintain(self):
+        """Sync the logs and take the snapshots when their interval has elapsed."""
+        now = time.monotonic()
+        if self.fsync_interval and now - self._last_sync >= self.fsync_interval:
+            self.sync()
+        if now - self._last_snapshot >= self.snapshot_interval:
+            self.snapshot()
+
+    def _get_shard(self, timer_id: uuid.UUID) -> _Shard:
+        return self._shards[timer_id.int % self.shard_count]
+
+    def _put(self, shard: _Shard, timer: StoredTimer):
+        shard.timers[timer.id] = timer
+        self._push(shard, timer)
+
+    def _push(self, shard: _Shard, timer: StoredTimer):
+        heapq.heappush(shard.heap, (timer.due_at, timer.id))
+        self.due_changed.set()
+
+    def _log(self, shard: _Shard, timers: list[StoredTimer]):
+        data = b"".join(fast_json.dumps(timer.to_record()) + b"\n" for timer in timers)
+        shard.wal.write(data)
+        shard.wal_size += len(data)
+        if self.fsync_interval:
+            shard.is_synced = False
+        else:
+            os.fsync(shard.wal.fileno())
+
+    def _release(self, lease_owner: uuid.UUID, timers: Iterable[StoredTimer], update) -> int:
+        timers_by_shard = defaultdict(list)
+        for timer in timers:
+            timers_by_shard[self._get_shard(timer.id)].append(timer)
+
+        released_count = 0
+        for shard, shard_timers in timers_by_shard.items():
+            with shard.lock:
+                released = [timer for timer in shard_timers if timer.lease_owner == lease_owner]
+                for timer in released:
+                    timer.lease_owner = None
+                    update(timer)
+                    if timer.state in CLAIMABLE_STATES:
+                        self._push(shard, timer)
+                if released:
+                    self._log(shard, released)
+            released_count += len(released)
+        return released_count
+
+    def _recover(self, shard: _Shard):
+        if shard.snapshot_path.exists():
+            with open(shard.snapshot_path, "rb") as file:
+                for line in file:
+                    timer = StoredTimer.from_record(fast_json.loads(line))
+                    shard.timers[timer.id] = timer
+
+        if shard.wal_path.exists():
+            with open(shard.wal_path, "rb") as file:
+                for line in file:
+                    # The last write may have been cut short by the crash of the machine
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("Incomplete record")
+                        timer = StoredTimer.from_record(fast_json.loads(line))
+                    except (ValueError, KeyError, TypeError):
+                        logger.warning(
+                            f"Ignoring the log of '{shard.wal_path}' after byte {shard.wal_size}"
+                        )
+                        break
+                    shard.timers[timer.id] = timer
+                    shard.wal_size += len(line)
+
+            if shard.wal_path.stat().st_size > shard.wal_size:
+                os.truncate(shard.wal_path, shard.wal_size)
+
+        shard.heap = [
+            (timer.due_at, timer.id)
+            for timer in shard.timers.values()
+            if timer.state in CLAIMABLE_STATES
+        ]
+        heapq.heapify(shard.heap)
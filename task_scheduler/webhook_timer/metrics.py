@@ -0,0 +1,209 @@
+import functools
+import inspect
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterable
+
+from celery.signals import worker_process_init, worker_process_shutdown, worker_ready
+from django.conf import settings
+from django.core.cache import caches
+
+from task_scheduler.utils.metrics import (
+    REGISTRY,
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsRegistry,
+    SnapshotWriter,
+    merge_snapshots,
+    read_snapshots,
+    render,
+)
+
+
+logger = logging.getLogger("webhook_timer")
+
+LATENESS_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900, 3600)
+
+http_request_duration = Histogram(
+    "timer_http_request_duration_seconds",
+    "Time spent handling the requests of the timer endpoints.",
+    labelnames=("endpoint", "method", "status"),
+)
+timers_created = Counter(
+    "timer_created_total", "Timers created through the API.", labelnames=("kind",)
+)
+timer_lateness = Histogram(
+    "timer_fire_lateness_seconds",
+    "Seconds between the expiry of a timer and the moment its webhook is sent.",
+    buckets=LATENESS_BUCKETS,
+)
+timer_deliveries = Counter(
+    "timer_deliveries_total",
+    "Outcomes of the webhook deliveries: delivered, failed, rejected or short_circuited.",
+    labelnames=("outcome",),
+)
+webhook_request_duration = Histogram(
+    "webhook_request_duration_seconds",
+    "Duration of the webhook HTTP requests, by response status class.",
+    labelnames=("status_class",),
+)
+
+# The gauges counting the timers in the database are only collected by the process serving
+# GET /metrics, not by every worker process writing its snapshot
+DB_GAUGES = MetricsRegistry()
+
+pending_timers = Gauge(
+    "timer_pending",
+    "Timers whose webhook has not been called yet (refreshed periodically).",
+    registry=DB_GAUGES,
+)
+overdue_timers = Gauge(
+    "timer_overdue",
+    "Pending timers whose expiry time has passed, the delivery backlog (refreshed periodically).",
+    registry=DB_GAUGES,
+)
+
+
+def get_status_class(status_code: int | None) -> str:
+    """Return the class of a webhook response status code, e.g. "2xx", or "error" if none."""
+    return f"{status_code // 100}xx" if status_code is not None else "error"
+
+
+def observe_lateness(expiry_times: Iterable[datetime]):
+    """Observe the lateness of the timers whose webhooks are about to be sent."""
+    now = datetime.now(timezone.utc)
+    for expires_at in expiry_times:
+        timer_lateness.observe(max((now - expires_at).total_seconds(), 0.0))
+
+
+def instrument_view(endpoint: str):
+    """Decorate a sync or async view method, observing its duration by endpoint, method, status."""
+
+    def observe(request, response, started_at: float):
+        http_request_duration.labels(endpoint, request.method, response.status_code).observe(
+            time.perf_counter() - started_at
+        )
+
+    def decorator(method):
+        if inspect.iscoroutinefunction(method):
+
+            @functools.wraps(method)
+            async def async_wrapper(view, request, *args, **kwargs):
+                started_at = time.perf_counter()
+                response = await method(view, request, *args, **kwargs)
+                observe(request, response, started_at)
+                return response
+
+            return async_wrapper
+
+        @functools.wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            started_at = time.perf_counter()
+            response = method(view, request, *args, **kwargs)
+            observe(request, response, started_at)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def _count_timers(cache_key: str, count) -> float:
+    # Counting the pending timers scans the pending range of the index, so the count is only
+    # refreshed every METRICS_DB_GAUGES_TTL seconds whatever the scrape interval
+    value = caches["shared"].get(cache_key)
+    if value is None:
+        value = count()
+        caches["shared"].set(cache_key, value, timeout=settings.METRICS_DB_GAUGES_TTL)
+    return value
+
+
+def _count_pending_timers() -> float:
+    from task_scheduler.webhook_timer.models import WebhookTimer
+
+    return _count_timers("metrics:timer_pending", lambda: WebhookTimer.objects.pending().count())
+
+
+def _count_overdue_timers() -> float:
+    from task_scheduler.webhook_timer.models import WebhookTimer
+
+    return _count_timers(
+        "metrics:timer_overdue",
+        lambda: WebhookTimer.objects.due(before=datetime.now(timezone.utc)).count(),
+    )
+
+
+pending_timers.set_function(_count_pending_timers)
+overdue_timers.set_function(_count_overdue_timers)
+
+
+def generate_metrics(include_live: bool = True) -> str:
+    """Render the metrics of the process, merged with the snapshots of the other processes.
+
+    Args:
+        include_live (bool, optional): Whether to include the live metrics of the calling
+            process and the timer counts of the database. Defaults to True.
+
+    Returns:
+        str: The metrics in the Prometheus text exposition format.
+    """
+    snapshots = []
+    if settings.METRICS_DIR:
+        snapshots = read_snapshots(settings.METRICS_DIR, exclude_pid=os.getpid())
+    if include_live:
+        snapshots.extend((REGISTRY.collect(), DB_GAUGES.collect()))
+    return render(merge_snapshots(snapshots))
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+
+        # The main worker process does not fire webhooks, its children write their snapshots
+        body = generate_metrics(include_live=False).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+_snapshot_writer: SnapshotWriter | None = None
+
+
+@worker_process_init.connect
+def start_snapshot_writer(**kwargs):
+    """Write the metrics of every worker child process to METRICS_DIR."""
+    global _snapshot_writer
+
+    if settings.METRICS_DIR:
+        _snapshot_writer = SnapshotWriter(settings.METRICS_DIR, settings.METRICS_FLUSH_INTERVAL)
+        _snapshot_writer.start()
+
+
+@worker_process_shutdown.connect
+def stop_snapshot_writer(**kwargs):
+    if _snapshot_writer is not None:
+        _snapshot_writer.stop()
+
+
+@worker_ready.connect
+def start_metrics_server(**kwargs):
+    """Serve the merged metrics of the worker children on METRICS_WORKER_PORT."""
+    if not settings.METRICS_DIR or not settings.METRICS_WORKER_PORT:
+        return
+
+    server = ThreadingHTTPServer(("0.0.0.0", settings.METRICS_WORKER_PORT), _MetricsRequestHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    logger.info(f"Serving the worker metrics on port {settings.METRICS_WORKER_PORT}")
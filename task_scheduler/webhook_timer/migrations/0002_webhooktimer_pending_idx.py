@@ -0,0 +1,19 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("webhook_timer", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="webhooktimer",
+            index=models.Index(
+                fields=["is_url_called", "expires_at"], name="webhook_timer_pending_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:13
+
+from django.db import migrations, models
+
+
+def mark_fired_timers_delivered(apps, schema_editor):
+    WebhookTimer = apps.get_model("webhook_timer", "WebhookTimer")
+    WebhookTimer.objects.filter(is_url_called=True).update(state="delivered")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("webhook_timer", "0002_webhooktimer_pending_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="webhooktimer",
+            name="lease_expires_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="webhooktimer",
+            name="lease_owner",
+            field=models.UUIDField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="webhooktimer",
+            name="state",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("in_flight", "In Flight"),
+                    ("delivered", "Delivered"),
+                    ("failed", "Failed"),
+                ],
+                default="pending",
+                max_length=16,
+            ),
+        ),
+        migrations.RunPython(mark_fired_timers_delivered, migrations.RunPython.noop),
+    ]
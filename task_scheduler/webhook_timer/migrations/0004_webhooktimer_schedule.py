@@ -0,0 +1,23 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("webhook_timer", "0003_webhooktimer_delivery_state"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="webhooktimer",
+            name="cron",
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name="webhooktimer",
+            name="interval",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("webhook_timer", "0004_webhooktimer_schedule"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="webhooktimer",
+            name="version",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name="webhooktimer",
+            name="state",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("in_flight", "In Flight"),
+                    ("delivered", "Delivered"),
+                    ("failed", "Failed"),
+                    ("cancelled", "Cancelled"),
+                ],
+                default="pending",
+                max_length=16,
+            ),
+        ),
+    ]
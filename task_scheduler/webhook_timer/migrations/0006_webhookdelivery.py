@@ -0,0 +1,49 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("webhook_timer", "0005_webhooktimer_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WebhookDelivery",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("timer_id", models.UUIDField()),
+                ("attempt", models.PositiveIntegerField()),
+                ("attempted_at", models.DateTimeField()),
+                (
+                    "outcome",
+                    models.CharField(
+                        choices=[
+                            ("delivered", "Delivered"),
+                            ("failed", "Failed"),
+                            ("rejected", "Rejected"),
+                        ],
+                        max_length=16,
+                    ),
+                ),
+                ("status_code", models.PositiveSmallIntegerField(blank=True, null=True)),
+                ("duration", models.FloatField()),
+                ("error", models.TextField(blank=True, default="")),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["timer_id", "attempted_at"], name="webhook_delivery_timer_idx"
+                    ),
+                    models.Index(fields=["attempted_at"], name="webhook_delivery_attempted_idx"),
+                ],
+            },
+        ),
+    ]
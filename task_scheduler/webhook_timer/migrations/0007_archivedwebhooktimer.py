@@ -0,0 +1,38 @@
+# Generated by Django 5.1.15 on 2026-10-18 19:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("webhook_timer", "0006_webhookdelivery"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedWebhookTimer",
+            fields=[
+                ("id", models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ("expires_at", models.DateTimeField()),
+                ("url", models.URLField()),
+                (
+                    "state",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("in_flight", "In Flight"),
+                            ("delivered", "Delivered"),
+                            ("failed", "Failed"),
+                            ("cancelled", "Cancelled"),
+                        ],
+                        max_length=16,
+                    ),
+                ),
+                ("interval", models.PositiveIntegerField(blank=True, null=True)),
+                ("cron", models.CharField(blank=True, max_length=255, null=True)),
+                ("version", models.PositiveIntegerField()),
+                ("archived_at", models.DateTimeField()),
+            ],
+        ),
+    ]
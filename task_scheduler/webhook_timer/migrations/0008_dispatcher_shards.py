@@ -0,0 +1,63 @@
+# Generated by Django 5.1.15 on 2026-10-18 20:20
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+# Frozen copy of get_shard with the default TIMER_SHARD_COUNT, so that the migration does not
+# change with the models or the settings. A different shard count is applied afterwards with
+# "python manage.py assign_timer_shards".
+SHARD_COUNT = 64
+
+
+def assign_shards(apps, schema_editor):
+    # Only the pending timers are loaded by the dispatchers, the others keep shard 0
+    WebhookTimer = apps.get_model("webhook_timer", "WebhookTimer")
+    ids_by_shard = defaultdict(list)
+    timer_ids = WebhookTimer.objects.filter(is_url_called__in=[False]).values_list("id", flat=True)
+    for timer_id in timer_ids.iterator(chunk_size=1000):
+        shard = timer_id.int % SHARD_COUNT
+        ids_by_shard[shard].append(timer_id)
+        if len(ids_by_shard[shard]) >= 1000:
+            WebhookTimer.objects.filter(id__in=ids_by_shard.pop(shard)).update(shard=shard)
+
+    for shard, shard_ids in ids_by_shard.items():
+        WebhookTimer.objects.filter(id__in=shard_ids).update(shard=shard)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("webhook_timer", "0007_archivedwebhooktimer"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DispatcherNode",
+            fields=[
+                ("id", models.CharField(max_length=128, primary_key=True, serialize=False)),
+                ("last_seen_at", models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name="DispatcherShard",
+            fields=[
+                ("shard", models.PositiveSmallIntegerField(primary_key=True, serialize=False)),
+                ("owner", models.CharField(blank=True, max_length=128, null=True)),
+                ("lease_expires_at", models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="webhooktimer",
+            name="shard",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name="webhooktimer",
+            index=models.Index(
+                fields=["is_url_called", "shard", "expires_at"], name="webhook_timer_shard_idx"
+            ),
+        ),
+        migrations.RunPython(assign_shards, migrations.RunPython.noop),
+    ]
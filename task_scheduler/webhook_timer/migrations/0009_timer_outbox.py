@@ -0,0 +1,22 @@
+# Generated by Django 5.1.15 on 2026-10-18 20:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("webhook_timer", "0008_dispatcher_shards"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TimerOutbox",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("timer_id", models.UUIDField(db_index=True)),
+                ("expires_at", models.DateTimeField()),
+                ("version", models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
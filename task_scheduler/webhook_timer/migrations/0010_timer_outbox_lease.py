@@ -0,0 +1,23 @@
+# Generated by Django 5.1.15 on 2026-10-18 20:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("webhook_timer", "0009_timer_outbox"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="timeroutbox",
+            name="lease_expires_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="timeroutbox",
+            name="lease_owner",
+            field=models.UUIDField(blank=True, null=True),
+        ),
+    ]
@@ -1,6 +1,384 @@
+import time
 import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
 
-from django.db import models
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import F, Q
+
+from task_scheduler.webhook_timer.utils.cron import parse_cron
+
+
+def get_shard(timer_id: uuid.UUID | str, shard_count: int | None = None) -> int:
+    """Return the shard of the timer with the given id, see DispatcherShard.
+
+    Args:
+        timer_id (UUID | str): The id of the timer.
+        shard_count (int, optional): Number of shards. Defaults to TIMER_SHARD_COUNT.
+
+    Returns:
+        int: The shard, between 0 and shard_count - 1.
+    """
+    if not isinstance(timer_id, uuid.UUID):
+        timer_id = uuid.UUID(timer_id)
+    return timer_id.int % (shard_count or settings.TIMER_SHARD_COUNT)
+
+
+class WebhookTimerQuerySet(models.QuerySet):
+    """QuerySet of the WebhookTimer model with the queries scanning timers by expiry."""
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """Same as QuerySet.bulk_create, setting the shard of the timers, see get_shard."""
+        objs = list(objs)
+        for webhook_timer in objs:
+            webhook_timer.shard = get_shard(webhook_timer.id)
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def pending(self):
+        """Return the timers whose webhook has not been called yet."""
+        # is_url_called=False would be compiled to "NOT is_url_called", which neither MySQL nor
+        # SQLite can resolve with an index, while "is_url_called IN (false)" is an equality
+        return self.filter(is_url_called__in=[False])
+
+    def pending_by_expiry(
+        self, after: tuple[datetime, uuid.UUID] | None = None, limit: int | None = None
+    ):
+        """Return the pending timers in expiry order, one keyset page at a time.
+
+        The query is a range scan of the `webhook_timer_pending_idx` index on
+        (is_url_called, expires_at): an equality on the first column and the order of the index
+        itself, extended by the primary key InnoDB appends to every secondary index. Continuing
+        from the last timer of the previous page neither requires reading the rows of the
+        previous pages nor sorting them.
+
+        Args:
+            after (tuple[datetime, UUID], optional): The (expires_at, id) of the last timer of
+                the previous page, to continue from with keyset pagination. Defaults to None.
+            limit (int, optional): Maximum number of timers to return. Defaults to None.
+
+        Returns:
+            WebhookTimerQuerySet: The pending timers ordered by (expires_at, id).
+        """
+        queryset = self.pending()
+
+        if after is not None:
+            last_expires_at, last_id = after
+            queryset = queryset.filter(
+                Q(expires_at__gt=last_expires_at) | Q(expires_at=last_expires_at, id__gt=last_id)
+            )
+
+        queryset = queryset.order_by("expires_at", "id")
+        return queryset[:limit] if limit is not None else queryset
+
+    def claimable(self, now: datetime):
+        """Return the pending timers no task is delivering, or whose delivery lease has expired."""
+        return self.pending().filter(
+            Q(state__in=[WebhookTimer.State.PENDING, WebhookTimer.State.FAILED])
+            | Q(state=WebhookTimer.State.IN_FLIGHT, lease_expires_at__lt=now)
+        )
+
+    def claim(
+        self,
+        timer_ids: list[uuid.UUID | str],
+        lease: float | None = None,
+        versions: dict[str, int] | None = None,
+    ) -> tuple[uuid.UUID, list["WebhookTimer"]]:
+        """Claim the given timers for delivery, so that no other task delivers them meanwhile.
+
+        The claimable timers are moved to the in_flight state under a new lease owner with a
+        single conditional UPDATE, so of concurrent claims of the same timer only one matches
+        the row, without holding any lock beyond the statement itself. A task losing its worker
+        in the middle of a delivery leaves its timers in flight until the lease expires, after
+        which they can be claimed again.
+
+        A timer cancelled or rescheduled since its task was published has a newer version than
+        the one the task was published with (see `versions`): the claim of such a timer is
+        released right away, so the stale task does not fire it. A timer which is not due yet is
+        not claimed either, so that no task fires a timer before its expiry time.
+
+        Args:
+            timer_ids (list[UUID | str]): The ids of the timers to claim.
+            lease (float, optional): Seconds the claim is held. Defaults to TIMER_CLAIM_LEASE.
+            versions (dict[str, int], optional): The expected version of the timers by id
+                string. The timers without an expected version are claimed whatever their
+                version. Defaults to None.
+
+        Returns:
+            tuple[UUID, list[WebhookTimer]]: The lease owner, to release the claimed timers
+                with, and the claimed timers.
+        """
+        now = datetime.now(timezone.utc)
+        lease = lease if lease is not None else settings.TIMER_CLAIM_LEASE
+        lease_owner = uuid.uuid4()
+
+        claimed_count = (
+            self.filter(id__in=timer_ids, expires_at__lte=now)
+            .claimable(now)
+            .update(
+                state=WebhookTimer.State.IN_FLIGHT,
+                lease_owner=lease_owner,
+                lease_expires_at=now + timedelta(seconds=lease),
+            )
+        )
+        if not claimed_count:
+            return lease_owner, []
+
+        claimed = list(self.filter(id__in=timer_ids, lease_owner=lease_owner))
+        if not versions:
+            return lease_owner, claimed
+
+        current, stale_ids = [], []
+        for webhook_timer in claimed:
+            expected_version = versions.get(str(webhook_timer.id), webhook_timer.version)
+            if expected_version == webhook_timer.version:
+                current.append(webhook_timer)
+            else:
+                stale_ids.append(webhook_timer.id)
+
+        if stale_ids:
+            self.filter(id__in=stale_ids, lease_owner=lease_owner).update(
+                state=WebhookTimer.State.PENDING, lease_owner=None, lease_expires_at=None
+            )
+        return lease_owner, current
+
+    def cancel(self, timer_id: uuid.UUID) -> bool:
+        """Cancel the given timer if it is pending and not being fired.
+
+        The timer is no longer pending and its version is bumped with a single conditional
+        UPDATE. Nothing is sent to the broker: a task published for the timer cannot claim it
+        any more and is dropped when it runs.
+
+        Returns:
+            bool: Whether the timer has been cancelled.
+        """
+        return bool(
+            self.filter(id=timer_id)
+            .claimable(datetime.now(timezone.utc))
+            .update(
+                state=WebhookTimer.State.CANCELLED,
+                is_url_called=True,
+                version=F("version") + 1,
+                lease_owner=None,
+                lease_expires_at=None,
+            )
+        )
+
+    async def acancel(self, timer_id: uuid.UUID) -> bool:
+        """Asynchronous version of cancel."""
+        return await sync_to_async(self.cancel)(timer_id)
+
+    def move(self, timer_id: uuid.UUID, expires_at: datetime) -> int | None:
+        """Move the given timer to a new expiry time if it is pending and not being fired.
+
+        The version of the timer is bumped, so that the tasks published for its previous expiry
+        time are dropped when they run.
+
+        Args:
+            timer_id (UUID): The id of the timer.
+            expires_at (datetime): The new expiry time.
+
+        Returns:
+            int | None: The new version of the timer, to publish its task with, or None if the
+                timer cannot be moved.
+        """
+        webhook_timer = self.filter(id=timer_id).only("version").first()
+        if webhook_timer is None:
+            return None
+
+        # The version read above makes the UPDATE fail if the timer has changed in between
+        version = webhook_timer.version + 1
+        moved_count = (
+            self.filter(id=timer_id, version=webhook_timer.version)
+            .claimable(datetime.now(timezone.utc))
+            .update(
+                expires_at=expires_at,
+                state=WebhookTimer.State.PENDING,
+                version=version,
+                lease_owner=None,
+                lease_expires_at=None,
+            )
+        )
+        return version if moved_count else None
+
+    async def amove(self, timer_id: uuid.UUID, expires_at: datetime) -> int | None:
+        """Asynchronous version of move."""
+        return await sync_to_async(self.move)(timer_id, expires_at)
+
+    def reschedule(
+        self,
+        lease_owner: uuid.UUID,
+        webhook_timers: list["WebhookTimer"],
+        now: datetime | None = None,
+    ) -> list["WebhookTimer"]:
+        """Move the given recurring timers claimed by the lease owner to their next occurrence.
+
+        The next occurrence of every timer is computed from its schedule, skipping the
+        occurrences missed in the meantime, and the timers are released back to the pending
+        state with a single UPDATE. The timers stay pending (is_url_called is False) for as long
+        as they recur.
+
+        Args:
+            lease_owner (UUID): The lease owner the timers were claimed with.
+            webhook_timers (list[WebhookTimer]): The claimed recurring timers, updated in place.
+            now (datetime, optional): The time after which the next occurrences are computed.
+                Defaults to the current time.
+
+        Returns:
+            list[WebhookTimer]: The rescheduled timers.
+        """
+        now = now or datetime.now(timezone.utc)
+
+        for webhook_timer in webhook_timers:
+            webhook_timer.expires_at = webhook_timer.get_next_expires_at(now)
+            webhook_timer.version += 1
+            webhook_timer.state = WebhookTimer.State.PENDING
+            webhook_timer.lease_owner = None
+            webhook_timer.lease_expires_at = None
+
+        # bulk_update keeps the filter, so the timers whose claim has been lost are left alone
+        self.filter(lease_owner=lease_owner).bulk_update(
+            webhook_timers, ["expires_at", "version", "state", "lease_owner", "lease_expires_at"]
+        )
+        return webhook_timers
+
+    def mark_delivered(self, lease_owner: uuid.UUID) -> int:
+        """Mark the timers claimed by the lease owner as delivered and release them."""
+        return self.filter(lease_owner=lease_owner).update(
+            state=WebhookTimer.State.DELIVERED,
+            is_url_called=True,
+            lease_owner=None,
+            lease_expires_at=None,
+        )
+
+    def mark_failed(self, lease_owner: uuid.UUID, final: bool = False) -> int:
+        """Mark the timers claimed by the lease owner as failed and release them.
+
+        Args:
+            lease_owner (UUID): The lease owner the timers were claimed with.
+            final (bool, optional): Whether the webhooks are given up, in which case the timers
+                are no longer pending and cannot be claimed again. Otherwise they are released
+                for a retry. Defaults to False.
+
+        Returns:
+            int: The number of released timers.
+        """
+        return self.filter(lease_owner=lease_owner).update(
+            state=WebhookTimer.State.FAILED,
+            is_url_called=final,
+            lease_owner=None,
+            lease_expires_at=None,
+        )
+
+    def archive(
+        self, before: datetime, chunk_size: int | None = None, pause: float | None = None
+    ) -> int:
+        """Move the timers fired or cancelled which expired before the given time to the archive.
+
+        The timers are moved one chunk at a time, every chunk being copied to the
+        ArchivedWebhookTimer table and deleted from this one in a short transaction. The chunks
+        are found with a range scan of the `webhook_timer_pending_idx` index, without locking
+        anything, then locked and deleted by primary key, which only locks the rows of the chunk
+        for the duration of the transaction.
+
+        Args:
+            before (datetime): The timers which expired before this time are archived.
+            chunk_size (int, optional): Maximum number of timers moved per transaction.
+                Defaults to TIMER_ARCHIVE_CHUNK_SIZE.
+            pause (float, optional): Seconds slept between two chunks, leaving room for the
+                other queries. Defaults to TIMER_ARCHIVE_PAUSE.
+
+        Returns:
+            int: The number of timers archived.
+        """
+        chunk_size = chunk_size or settings.TIMER_ARCHIVE_CHUNK_SIZE
+        pause = settings.TIMER_ARCHIVE_PAUSE if pause is None else pause
+        archived = 0
+
+        while True:
+            timer_ids = list(
+                self.filter(is_url_called__in=[True], expires_at__lt=before)
+                .order_by("expires_at", "id")
+                .values_list("id", flat=True)[:chunk_size]
+            )
+            if timer_ids:
+                archived_at = datetime.now(timezone.utc)
+                with transaction.atomic(using=self.db):
+                    # Locked and read again by primary key, a timer rescheduled in the meantime is
+                    # pending again and stays where it is
+                    rows = list(
+                        self.model.objects.using(self.db)
+                        .select_for_update()
+                        .filter(id__in=timer_ids, is_url_called__in=[True])
+                        .values(*ArchivedWebhookTimer.ARCHIVED_FIELDS)
+                    )
+                    ArchivedWebhookTimer.objects.using(self.db).bulk_create(
+                        [ArchivedWebhookTimer(**row, archived_at=archived_at) for row in rows]
+                    )
+                    self.model.objects.using(self.db).filter(
+                        id__in=[row["id"] for row in rows]
+                    ).delete()
+                archived += len(rows)
+
+            if len(timer_ids) < chunk_size:
+                return archived
+            if pause:
+                time.sleep(pause)
+
+    def assign_shards(self, chunk_size: int = 1000) -> int:
+        """Set the shard of the pending timers from their id, see get_shard.
+
+        Needed after TIMER_SHARD_COUNT has changed, the timers being assigned their shard when
+        they are created.
+
+        Args:
+            chunk_size (int, optional): Number of timers read per query. Defaults to 1000.
+
+        Returns:
+            int: The number of timers whose shard changed.
+        """
+        changed_count = 0
+        after = None
+        while True:
+            rows = list(
+                self.pending_by_expiry(after=after, limit=chunk_size).values_list(
+                    "id", "expires_at", "shard"
+                )
+            )
+
+            ids_by_shard = defaultdict(list)
+            for timer_id, _, shard in rows:
+                if get_shard(timer_id) != shard:
+                    ids_by_shard[get_shard(timer_id)].append(timer_id)
+            for shard, timer_ids in ids_by_shard.items():
+                changed_count += self.filter(id__in=timer_ids).update(shard=shard)
+
+            if len(rows) < chunk_size:
+                return changed_count
+            last_id, last_expires_at, _ = rows[-1]
+            after = (last_expires_at, last_id)
+
+    def due(
+        self,
+        before: datetime,
+        after: tuple[datetime, uuid.UUID] | None = None,
+        limit: int | None = None,
+    ):
+        """Return the pending timers expiring at or before the given time, in expiry order.
+
+        Same as pending_by_expiry, with a range on the expiry time as well.
+
+        Args:
+            before (datetime): Upper bound (inclusive) of the expiry time.
+            after (tuple[datetime, UUID], optional): The (expires_at, id) of the last timer of
+                the previous page, to continue from with keyset pagination. Defaults to None.
+            limit (int, optional): Maximum number of timers to return. Defaults to None.
+
+        Returns:
+            WebhookTimerQuerySet: The due timers ordered by (expires_at, id).
+        """
+        return self.filter(expires_at__lte=before).pending_by_expiry(after=after, limit=limit)
 
 
 class WebhookTimer(models.Model):
@@ -15,9 +393,296 @@ class WebhookTimer(models.Model):
         url (URLField): The URL to which the webhook will be sent when the timer expires.
         is_url_called (BooleanField): A flag indicating whether the webhook has already been
             called.
+        state (CharField): The delivery state of the timer, see WebhookTimer.State.
+        lease_owner (UUIDField): The claim of the task delivering the timer, if in flight.
+        lease_expires_at (DateTimeField): The time until which the timer stays claimed, if in
+            flight.
+        interval (PositiveIntegerField): Seconds between two occurrences of a recurring timer.
+        cron (CharField): Cron expression of the occurrences of a recurring timer, in UTC.
+        version (PositiveIntegerField): Bumped whenever the timer is cancelled or rescheduled.
+            The tasks are published with the version of their timer and only fire it if it
+            has not changed since.
+        shard (PositiveSmallIntegerField): The shard of the timer, derived from its id (see
+            get_shard), which decides the dispatcher node loading it.
+
+    A timer with an interval or a cron expression recurs: expires_at is its next occurrence,
+    moved forward after every delivery (see WebhookTimerQuerySet.reschedule), so a recurring
+    timer is a single row whatever the number of its occurrences.
     """
 
+    class State(models.TextChoices):
+        """Delivery state of a timer.
+
+        pending -> in_flight -> delivered, or -> failed -> in_flight again on a retry. A timer
+        stays pending (is_url_called is False) until it is delivered or its webhook is given up,
+        in which case it stays failed. A pending or failed timer may be cancelled instead.
+        """
+
+        PENDING = "pending"
+        IN_FLIGHT = "in_flight"
+        DELIVERED = "delivered"
+        FAILED = "failed"
+        CANCELLED = "cancelled"
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     expires_at = models.DateTimeField()
     url = models.URLField()
     is_url_called = models.BooleanField(default=False)
+    state = models.CharField(max_length=16, choices=State.choices, default=State.PENDING)
+    lease_owner = models.UUIDField(null=True, blank=True)
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    interval = models.PositiveIntegerField(null=True, blank=True)
+    cron = models.CharField(max_length=255, null=True, blank=True)
+    version = models.PositiveIntegerField(default=0)
+    shard = models.PositiveSmallIntegerField(default=0)
+
+    objects = WebhookTimerQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Serves the scans of the pending timers by expiry, see WebhookTimerQuerySet.due
+            models.Index(fields=["is_url_called", "expires_at"], name="webhook_timer_pending_idx"),
+            # Serves the same scans restricted to the shards of a dispatcher node
+            models.Index(
+                fields=["is_url_called", "shard", "expires_at"], name="webhook_timer_shard_idx"
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.shard = get_shard(self.id)
+        super().save(*args, **kwargs)
+
+    @property
+    def is_recurring(self) -> bool:
+        """Whether the timer recurs on an interval or a cron expression."""
+        return self.interval is not None or bool(self.cron)
+
+    def get_next_expires_at(self, now: datetime) -> datetime:
+        """Return the first occurrence of the schedule of the recurring timer after now.
+
+        An interval keeps the phase of the timer: the next occurrence is expires_at plus a whole
+        number of intervals. The occurrences missed, e.g. while the webhook was retried, are
+        skipped rather than fired in a row.
+        """
+        if self.interval is not None:
+            interval = timedelta(seconds=self.interval)
+            missed = max((now - self.expires_at) // interval, 0)
+            return self.expires_at + (missed + 1) * interval
+
+        return parse_cron(self.cron).next_after(now)
+
+
+class ArchivedWebhookTimer(models.Model):
+    """Model representing a timer fired or cancelled long ago, see WebhookTimerQuerySet.archive.
+
+    The timers whose webhook has been called are moved here TIMER_ARCHIVE_RETENTION_DAYS after
+    their expiry, so that the table of the timers only holds the recent and pending ones and
+    its indexes stay small. The lookups of a timer fall back to this table.
+
+    Attributes:
+        Same as WebhookTimer, less the fields of a pending timer, plus:
+        archived_at (DateTimeField): The time the timer was archived.
+    """
+
+    ARCHIVED_FIELDS = ("id", "expires_at", "url", "state", "interval", "cron", "version")
+
+    id = models.UUIDField(primary_key=True, editable=False)
+    expires_at = models.DateTimeField()
+    url = models.URLField()
+    state = models.CharField(max_length=16, choices=WebhookTimer.State.choices)
+    interval = models.PositiveIntegerField(null=True, blank=True)
+    cron = models.CharField(max_length=255, null=True, blank=True)
+    version = models.PositiveIntegerField()
+    archived_at = models.DateTimeField()
+
+    @property
+    def is_url_called(self) -> bool:
+        """Always true, as for the timers which can be archived."""
+        return True
+
+
+class TimerOutboxQuerySet(models.QuerySet):
+    """QuerySet of the TimerOutbox model."""
+
+    def add(self, webhook_timers: list[WebhookTimer]) -> list["TimerOutbox"]:
+        """Store the messages of the given timers, with their current expiry time and version."""
+        return self.bulk_create(
+            TimerOutbox(
+                timer_id=webhook_timer.id,
+                expires_at=webhook_timer.expires_at,
+                version=webhook_timer.version,
+            )
+            for webhook_timer in webhook_timers
+        )
+
+    def claimable(self, now: datetime):
+        """Return the messages no relay is publishing, or whose publishing lease has expired."""
+        return self.filter(Q(lease_expires_at__isnull=True) | Q(lease_expires_at__lt=now))
+
+    def claim(self, limit: int, lease: float) -> tuple[uuid.UUID, list["TimerOutbox"]]:
+        """Claim the oldest messages for publishing, so that no other relay publishes them.
+
+        The messages are claimed with a single conditional UPDATE under a new lease owner, as
+        WebhookTimerQuerySet.claim does, so no lock is held while they are being published. The
+        messages of a relay dying while publishing them can be claimed again once the lease
+        has expired.
+
+        Args:
+            limit (int): Maximum number of messages to claim.
+            lease (float): Seconds the claim is held.
+
+        Returns:
+            tuple[UUID, list[TimerOutbox]]: The lease owner, to delete or release the claimed
+                messages with, and the claimed messages, oldest first.
+        """
+        now = datetime.now(timezone.utc)
+        lease_owner = uuid.uuid4()
+
+        candidate_ids = list(
+            self.claimable(now).order_by("id").values_list("id", flat=True)[:limit]
+        )
+        if not candidate_ids:
+            return lease_owner, []
+
+        # A message claimed by another relay since it was read is no longer matched
+        self.filter(id__in=candidate_ids).claimable(now).update(
+            lease_owner=lease_owner, lease_expires_at=now + timedelta(seconds=lease)
+        )
+        return lease_owner, list(self.filter(lease_owner=lease_owner).order_by("id"))
+
+
+class TimerOutbox(models.Model):
+    """Model representing the ETA message of a timer waiting to be published, see OutboxRelay.
+
+    With TIMER_DISPATCH_MODE="outbox" the message of a timer is stored in the transaction storing
+    the timer when it is created or rescheduled, instead of being published by the request, so
+    that a timer is stored if and only if its message is eventually published. The messages are
+    published in batches by the outbox relay and deleted once the broker has confirmed them.
+
+    Attributes:
+        id (BigAutoField): The order the messages are published in (primary key).
+        timer_id (UUIDField): The id of the timer, used as the id of its task.
+        expires_at (DateTimeField): The expiry time of the timer, the ETA of its task.
+        version (PositiveIntegerField): The version of the timer the task is published with. A
+            rescheduled timer gets a message per version, those of the older versions being
+            dropped by start_timer.
+        lease_owner (UUIDField): The claim of the relay publishing the message, if any.
+        lease_expires_at (DateTimeField): The time until which the message stays claimed, if
+            it is being published.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    timer_id = models.UUIDField(db_index=True)
+    expires_at = models.DateTimeField()
+    version = models.PositiveIntegerField(default=0)
+    lease_owner = models.UUIDField(null=True, blank=True)
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+
+    objects = TimerOutboxQuerySet.as_manager()
+
+
+class DispatcherNode(models.Model):
+    """Model representing a running dispatcher node, see ShardCoordinator.
+
+    Attributes:
+        id (CharField): The id of the node, unique per process.
+        last_seen_at (DateTimeField): The last time the node renewed its leases. A node not
+            seen for TIMER_SHARD_LEASE seconds is considered dead.
+    """
+
+    id = models.CharField(primary_key=True, max_length=128)
+    last_seen_at = models.DateTimeField()
+
+
+class DispatcherShard(models.Model):
+    """Model representing the lease of a shard of the timers by a dispatcher node.
+
+    The timers are split into TIMER_SHARD_COUNT shards by their id, see get_shard. Only the node
+    holding the lease of a shard loads its timers, and a lease is taken or renewed with a single
+    conditional UPDATE, so that a shard has at most one owner at any time.
+
+    Attributes:
+        shard (PositiveSmallIntegerField): The shard (primary key).
+        owner (CharField): The id of the node holding the lease, None if the shard is free.
+        lease_expires_at (DateTimeField): The time until which the lease is held, after which
+            any node may take the shard over.
+    """
+
+    shard = models.PositiveSmallIntegerField(primary_key=True)
+    owner = models.CharField(max_length=128, null=True, blank=True)
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+
+
+class WebhookDeliveryQuerySet(models.QuerySet):
+    """QuerySet of the WebhookDelivery model."""
+
+    def prune(self, before: datetime, chunk_size: int | None = None) -> int:
+        """Delete the delivery attempts made before the given time, one chunk at a time.
+
+        Every chunk is a short DELETE of at most `chunk_size` rows by primary key, selected with
+        the `webhook_delivery_attempted_idx` index, so that pruning a large backlog neither holds
+        locks on the whole range nor competes for long with the inserts of the workers.
+
+        Args:
+            before (datetime): The attempts made before this time are deleted.
+            chunk_size (int, optional): Maximum number of rows deleted per statement. Defaults
+                to WEBHOOK_DELIVERY_PRUNE_CHUNK_SIZE.
+
+        Returns:
+            int: The number of attempts deleted.
+        """
+        chunk_size = chunk_size or settings.WEBHOOK_DELIVERY_PRUNE_CHUNK_SIZE
+        deleted = 0
+
+        while True:
+            delivery_ids = list(
+                self.filter(attempted_at__lt=before)
+                .order_by("attempted_at")
+                .values_list("id", flat=True)[:chunk_size]
+            )
+            if delivery_ids:
+                deleted += self.model.objects.filter(id__in=delivery_ids).delete()[0]
+            if len(delivery_ids) < chunk_size:
+                return deleted
+
+
+class WebhookDelivery(models.Model):
+    """Model representing one attempt at firing the webhook of a timer.
+
+    The attempts are written in batches by the delivery log of the worker processes (see
+    delivery_log.DeliveryLog), a little after they are made. They reference their timer by id
+    without a foreign key, so that they neither slow the inserts down nor hold on to the timers.
+
+    Attributes:
+        timer_id (UUIDField): The id of the timer.
+        attempt (PositiveIntegerField): The attempt number, 1 for the first try of the webhook.
+        attempted_at (DateTimeField): The time the request was sent.
+        outcome (CharField): Whether the webhook was delivered, failed and is retried, or was
+            rejected by its endpoint, see WebhookDelivery.Outcome.
+        status_code (PositiveSmallIntegerField): The status code of the response, if any.
+        duration (FloatField): Seconds until the response or the error.
+        error (TextField): The error of a request which got no response, or of a failed response.
+    """
+
+    class Outcome(models.TextChoices):
+        DELIVERED = "delivered"
+        FAILED = "failed"
+        REJECTED = "rejected"
+
+    timer_id = models.UUIDField()
+    attempt = models.PositiveIntegerField()
+    attempted_at = models.DateTimeField()
+    outcome = models.CharField(max_length=16, choices=Outcome.choices)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    duration = models.FloatField()
+    error = models.TextField(blank=True, default="")
+
+    objects = WebhookDeliveryQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Serves the delivery history of a timer
+            models.Index(fields=["timer_id", "attempted_at"], name="webhook_delivery_timer_idx"),
+            # Serves the pruning of the old attempts, see WebhookDeliveryQuerySet.prune
+            models.Index(fields=["attempted_at"], name="webhook_delivery_attempted_idx"),
+        ]
@@ -0,0 +1,108 @@
+import logging
+import threading
+from functools import partial
+from typing import Callable
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from task_scheduler.webhook_timer.models import TimerOutbox, WebhookTimer
+from task_scheduler.webhook_timer.publishing import publish_timers
+
+
+logger = logging.getLogger("webhook_timer")
+
+
+class OutboxRelay:
+    """Relay publishing the messages of the timer outbox to the broker, see TimerOutbox.
+
+    With TIMER_DISPATCH_MODE="outbox" the views store the start_timer message of a timer in the
+    transaction storing the timer, and leave the broker out of the request. The relay claims the
+    oldest messages in batches of up to `batch_size` (see TimerOutboxQuerySet.claim), publishes
+    every batch over a single channel in confirm mode and deletes the batch once the broker has
+    confirmed all of its messages. No transaction or row lock is held while a batch is being
+    published, so several relays can drain the outbox together. A batch failing to be published
+    is released and published again, as is the batch of a relay dying before deleting it once
+    its lease has expired, so every message is published at least once: a message published
+    twice is a duplicate task dropped by start_timer like any other.
+
+    Attributes:
+        batch_size (int): Maximum number of messages published at once.
+        poll_interval (float): Seconds waited before reading an empty outbox again.
+        publish (Callable[[list[WebhookTimer]], int]): Publishes the messages of a batch, as the
+            timers they fire, raising if the broker has not taken all of them.
+        lease (float): Seconds a batch stays claimed, longer than its publishing may take.
+    """
+
+    def __init__(
+        self,
+        batch_size: int | None = None,
+        poll_interval: float | None = None,
+        publish: Callable[[list[WebhookTimer]], int] | None = None,
+        lease: float | None = None,
+    ):
+        self.batch_size = batch_size or settings.TIMER_OUTBOX_BATCH_SIZE
+        self.poll_interval = (
+            poll_interval if poll_interval is not None else settings.TIMER_OUTBOX_POLL_INTERVAL
+        )
+        self.publish = publish or partial(
+            publish_timers, confirm_timeout=settings.TIMER_OUTBOX_CONFIRM_TIMEOUT
+        )
+        self.lease = lease if lease is not None else settings.TIMER_CLAIM_LEASE
+
+    def relay(self) -> int:
+        """Publish the oldest batch of messages and delete them from the outbox.
+
+        Returns:
+            int: The number of published messages.
+
+        Raises:
+            Exception: If the batch could not be published, in which case it is released.
+        """
+        lease_owner, messages = TimerOutbox.objects.claim(self.batch_size, self.lease)
+        if not messages:
+            return 0
+
+        claimed = TimerOutbox.objects.filter(lease_owner=lease_owner)
+        try:
+            self.publish(
+                [
+                    WebhookTimer(
+                        id=message.timer_id, expires_at=message.expires_at, version=message.version
+                    )
+                    for message in messages
+                ]
+            )
+        except Exception:
+            # Released to be published again right away instead of once the lease has expired
+            claimed.update(lease_owner=None, lease_expires_at=None)
+            raise
+
+        claimed.delete()
+        return len(messages)
+
+    def run_forever(self, stop_event: threading.Event | None = None):
+        """Relay the messages until the stop event is set.
+
+        Full batches are relayed back to back, the outbox is polled every `poll_interval`
+        seconds once drained and after a batch failed to be published.
+
+        Args:
+            stop_event (threading.Event, optional): Event stopping the loop. Defaults to None.
+        """
+        stop_event = stop_event or threading.Event()
+        logger.info(f"Outbox relay started with batches of up to {self.batch_size} message(s)")
+
+        while not stop_event.is_set():
+            # Same connection recycling as between two requests, see TimerDispatcher.run_forever
+            close_old_connections()
+            try:
+                relayed = self.relay()
+            except Exception as err:
+                logger.error(f"Failed to relay the timer outbox: {str(err)}")
+                relayed = 0
+
+            if relayed < self.batch_size:
+                stop_event.wait(self.poll_interval)
+
+        logger.info("Outbox relay stopped")
@@ -0,0 +1,136 @@
+import time
+from typing import Iterable
+
+from amqp import spec
+from amqp.exceptions import MessageNacked
+
+from task_scheduler.webhook_timer.models import WebhookTimer
+from task_scheduler.webhook_timer.tasks import start_timer
+
+
+class PublisherConfirms:
+    """Tracks the confirms of the messages published on a channel in confirm mode.
+
+    The broker confirms the messages asynchronously, possibly several at once, so a batch of
+    messages is published without waiting and the confirms of all of them are waited for at the
+    end, instead of a round trip per message.
+
+    Attributes:
+        channel (amqp.Channel): The channel the messages are published on, put in confirm mode.
+        published (int): Number of messages published, which are the delivery tags 1 to published.
+        unconfirmed (set[int]): The delivery tags of the messages not confirmed yet.
+        nacked (set[int]): The delivery tags of the messages the broker failed to take.
+    """
+
+    def __init__(self, channel):
+        self.channel = channel
+        self.published = 0
+        self.unconfirmed: set[int] = set()
+        self.nacked: set[int] = set()
+
+        channel.events["basic_ack"].add(self._on_ack)
+        channel.events["basic_nack"].add(self._on_nack)
+        channel.confirm_select()
+
+    def add(self):
+        """Count a message published on the channel."""
+        self.published += 1
+        self.unconfirmed.add(self.published)
+
+    def wait(self, timeout: float):
+        """Wait until the broker has confirmed every message published.
+
+        Args:
+            timeout (float): Seconds to wait at most.
+
+        Raises:
+            TimeoutError: If some messages are not confirmed in time.
+            MessageNacked: If the broker failed to take some messages.
+        """
+        deadline = time.monotonic() + timeout
+        while self.unconfirmed:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(
+                    f"{len(self.unconfirmed)} of {self.published} message(s) not confirmed "
+                    f"by the broker within {timeout}s"
+                )
+            self.channel.wait([spec.Basic.Ack, spec.Basic.Nack], timeout=remaining)
+
+        if self.nacked:
+            raise MessageNacked(
+                f"{len(self.nacked)} of {self.published} message(s) rejected by the broker"
+            )
+
+    def _settle(self, delivery_tag: int, multiple: bool) -> set[int]:
+        settled = (
+            {tag for tag in self.unconfirmed if tag <= delivery_tag}
+            if multiple
+            else {delivery_tag} & self.unconfirmed
+        )
+        self.unconfirmed -= settled
+        return settled
+
+    def _on_ack(self, delivery_tag: int, multiple: bool):
+        self._settle(delivery_tag, multiple)
+
+    def _on_nack(self, delivery_tag: int, multiple: bool):
+        self.nacked |= self._settle(delivery_tag, multiple)
+
+
+def publish_timers(
+    webhook_timers: Iterable[WebhookTimer], confirm_timeout: float | None = None
+) -> int:
+    """Publish the start_timer ETA messages of the given timers over a single broker connection.
+
+    A producer is acquired once from the connection pool of the Celery app and reused for every
+    message, instead of acquiring a connection and a channel per apply_async call.
+
+    With a confirm timeout, the messages are published on a channel of their own in confirm mode
+    and the broker must confirm having taken all of them (see PublisherConfirms). Transports
+    without publisher confirms, e.g. the in-memory one, publish the messages as usual.
+
+    Args:
+        webhook_timers (Iterable[WebhookTimer]): The timers to publish. The id of every timer is
+            used as the id of its task, which is published with the version of the timer.
+        confirm_timeout (float, optional): Seconds to wait for the confirms of the broker.
+            Defaults to None, for publishing without confirms.
+
+    Returns:
+        int: The number of published messages.
+
+    Raises:
+        TimeoutError: If some messages are not confirmed in time.
+        MessageNacked: If the broker failed to take some messages.
+    """
+    if confirm_timeout is None:
+        with start_timer.app.producer_or_acquire() as producer:
+            return _publish(webhook_timers, producer)
+
+    with start_timer.app.pool.acquire(block=True) as connection:
+        channel = connection.channel()
+        try:
+            confirms = PublisherConfirms(channel) if hasattr(channel, "confirm_select") else None
+            published = _publish(
+                webhook_timers, start_timer.app.amqp.Producer(channel), confirms=confirms
+            )
+            if confirms is not None:
+                confirms.wait(confirm_timeout)
+        finally:
+            channel.close()
+    return published
+
+
+def _publish(webhook_timers: Iterable[WebhookTimer], producer, confirms=None) -> int:
+    published = 0
+    for webhook_timer in webhook_timers:
+        start_timer.apply_async(
+            eta=webhook_timer.expires_at,
+            task_id=str(webhook_timer.id),
+            kwargs={"version": webhook_timer.version},
+            producer=producer,
+        )
+        if confirms is not None:
+            confirms.add()
+        published += 1
+    return published
@@ -0,0 +1,34 @@
+import random
+
+from django.conf import settings
+
+
+def is_retryable_status(status_code: int) -> bool:
+    """Return whether a webhook answered with the given error status code should be retried.
+
+    Args:
+        status_code (int): The status code of the webhook response, 400 or above.
+
+    Returns:
+        bool: True for the WEBHOOK_RETRYABLE_STATUS_CODES, e.g. 429 or 503, False for the other
+            status codes, e.g. 404 or 410, which are not expected to change on a retry.
+    """
+    return status_code in settings.WEBHOOK_RETRYABLE_STATUS_CODES
+
+
+def get_retry_delay(retries: int) -> float:
+    """Return the delay before the next retry of a webhook, using exponential backoff with jitter.
+
+    The delay is drawn uniformly between 0 and the exponential backoff (full jitter), so the
+    webhooks which failed together, e.g. timers expiring at the same time on an endpoint which
+    went down, are spread over the whole backoff instead of being retried in lockstep.
+
+    Args:
+        retries (int): The number of retries already made.
+
+    Returns:
+        float: A delay in seconds between 0 and
+            min(WEBHOOK_RETRY_MAX_DELAY, WEBHOOK_RETRY_BASE_DELAY * 2^retries).
+    """
+    backoff = min(settings.WEBHOOK_RETRY_MAX_DELAY, settings.WEBHOOK_RETRY_BASE_DELAY * 2**retries)
+    return random.uniform(0, backoff)
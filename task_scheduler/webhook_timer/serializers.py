@@ -1,4 +1,106 @@
-from rest_framework.serializers import IntegerField, Serializer, URLField, ValidationError
+from datetime import datetime, timezone
+
+from django.conf import settings
+from rest_framework.serializers import (
+    CharField,
+    DateTimeField,
+    IntegerField,
+    ListField,
+    ListSerializer,
+    Serializer,
+    URLField,
+    ValidationError,
+)
+
+from task_scheduler.utils import schema
+from task_scheduler.utils.schema import Schema
+from task_scheduler.webhook_timer.utils.cron import parse_cron
+
+
+def validate_cron(cron: str) -> str:
+    """Validate the cron expression of a timer, shared by the SetTimerSerializer and its schema."""
+    try:
+        parse_cron(cron)
+    except ValueError as exc:
+        raise ValidationError(f"Invalid cron expression: {str(exc)}.")
+    return cron
+
+
+DURATION_FIELDS = ("hours", "minutes", "seconds")
+
+
+def _validate_duration(data: dict, is_required: bool) -> dict:
+    """Validate the duration or the fire_at of a timer, the duration being at least 1ms.
+
+    With the duration fields optional for the recurring timers, a required duration is checked
+    here: a timer without a fire_at must give hours, minutes and seconds, so that a body
+    without any of them does not set a timer expiring right away.
+    """
+    if "fire_at" in data:
+        if any(field in data for field in (*DURATION_FIELDS, "milliseconds")):
+            raise ValidationError("Only one of fire_at and the duration can be given.")
+        if data["fire_at"] <= datetime.now(timezone.utc):
+            raise ValidationError({"fire_at": ["Ensure this time is in the future."]})
+        return data
+
+    if not is_required:
+        return data
+    missing = [field for field in DURATION_FIELDS if field not in data]
+    if missing:
+        raise ValidationError({field: ["This field is required."] for field in missing})
+
+    total_milliseconds = (
+        data["hours"] * 3_600_000
+        + data["minutes"] * 60_000
+        + data["seconds"] * 1000
+        + data.get("milliseconds", 0)
+    )
+    if total_milliseconds == 0:
+        raise ValidationError("Timer duration must be greater than 0 seconds.")
+    return data
+
+
+def validate_set_timer(data: dict) -> dict:
+    """Validate a timer as a whole, shared by the SetTimerSerializer and its schema."""
+    if "interval" in data and "cron" in data:
+        raise ValidationError("Only one of interval and cron can be given.")
+
+    # The duration of a recurring timer is optional, it only delays its first occurrence
+    is_recurring = "interval" in data or "cron" in data
+    return _validate_duration(data, is_required=not is_recurring)
+
+
+def validate_reschedule_timer(data: dict) -> dict:
+    """Validate a new duration, shared by the RescheduleTimerSerializer and its schema."""
+    return _validate_duration(data, is_required=True)
+
+
+class SetTimerListSerializer(ListSerializer):
+    """List version of the SetTimerSerializer used by the bulk endpoint.
+
+    Unlike the default list serializer, an invalid item does not invalidate the whole list. The
+    list itself is still validated as a whole (type, emptiness, maximum length), but the items are
+    validated independently: `validated_data` holds `None` in place of every invalid item and the
+    errors of the items are collected in `item_errors`, index by index.
+
+    Attributes:
+        item_errors (list[dict | None]): The validation errors of every item, `None` if the item
+            is valid.
+    """
+
+    def to_internal_value(self, data):
+        self.item_errors = []
+        return super().to_internal_value(data)
+
+    def run_child_validation(self, data):
+        try:
+            validated = super().run_child_validation(data)
+        except ValidationError as exc:
+            self.item_errors.append(exc.detail)
+            return None
+
+        self.item_errors.append(None)
+        return validated
 
 
 class SetTimerSerializer(Serializer):
@@ -8,27 +110,115 @@ class SetTimerSerializer(Serializer):
     hours, minutes, seconds, and the URL. It ensures that the time is a positive value,
     the total timer duration is greater than zero, and given url is valid.
 
+    A recurring timer is set with either an interval or a cron expression. The duration is then
+    optional and delays its first occurrence, which is otherwise one interval from now or the next
+    match of the cron expression.
+
     Attributes:
         hours (IntegerField): The number of hours for the timer. Must be a non-negative integer.
         minutes (IntegerField): The number of minutes for the timer. Must be a non-negative integer.
         seconds (IntegerField): The number of seconds for the timer. Must be a non-negative integer.
+        milliseconds (IntegerField): The number of milliseconds added to the duration.
+        fire_at (DateTimeField): The time the timer expires at, instead of a duration. Taken as
+            UTC without an offset.
         url (URLField): The URL to which the webhook will be sent when the timer expires.
+        interval (IntegerField): Seconds between two occurrences of a recurring timer.
+        cron (CharField): Cron expression of the occurrences of a recurring timer, in UTC.
 
     Overriding Methods:
         validate(data): Custom validation to ensure the total timer duration is greater than 0
-            seconds.
+            seconds, and that the duration of a timer which does not recur is given.
     """
 
-    hours = IntegerField(min_value=0, required=True)
-    minutes = IntegerField(min_value=0, required=True)
-    seconds = IntegerField(min_value=0, required=True)
+    hours = IntegerField(min_value=0, required=False)
+    minutes = IntegerField(min_value=0, required=False)
+    seconds = IntegerField(min_value=0, required=False)
+    milliseconds = IntegerField(min_value=0, required=False)
+    fire_at = DateTimeField(default_timezone=timezone.utc, required=False)
     url = URLField(required=True)
+    interval = IntegerField(min_value=1, required=False)
+    cron = CharField(max_length=255, required=False)
+
+    class Meta:
+        list_serializer_class = SetTimerListSerializer
+
+    def validate_cron(self, cron):
+        return validate_cron(cron)
 
     def validate(self, data):
         """
-        Custom validation to check the total time is within a reasonable limit.
+        Custom validation to check the duration is given and greater than 0, see
+        validate_set_timer.
         """
-        total_seconds = data["hours"] * 3600 + data["minutes"] * 60 + data["seconds"]
-        if total_seconds == 0:
-            raise ValidationError("Timer duration must be greater than 0 seconds.")
-        return data
+        return validate_set_timer(data)
+
+
+class RescheduleTimerSerializer(Serializer):
+    """Input serializer of the timer rescheduling endpoint.
+
+    Attributes:
+        hours (IntegerField): The number of hours from now the timer expires in.
+        minutes (IntegerField): The number of minutes from now the timer expires in.
+        seconds (IntegerField): The number of seconds from now the timer expires in.
+        milliseconds (IntegerField): The number of milliseconds added to the duration.
+        fire_at (DateTimeField): The time the timer expires at, instead of a duration.
+
+    The duration fields are required unless fire_at is given.
+    """
+
+    hours = IntegerField(min_value=0, required=False)
+    minutes = IntegerField(min_value=0, required=False)
+    seconds = IntegerField(min_value=0, required=False)
+    milliseconds = IntegerField(min_value=0, required=False)
+    fire_at = DateTimeField(default_timezone=timezone.utc, required=False)
+
+    def validate(self, data):
+        return validate_reschedule_timer(data)
+
+
+# Precompiled versions of the serializers above, validating the body of a timer request on the
+# fast path (TIMER_FAST_PATH) with the same validated data and the same errors
+SET_TIMER_SCHEMA = Schema(
+    {
+        "hours": schema.integer(min_value=0),
+        "minutes": schema.integer(min_value=0),
+        "seconds": schema.integer(min_value=0),
+        "milliseconds": schema.integer(min_value=0),
+        "fire_at": schema.date_time(),
+        "url": schema.url(required=True),
+        "interval": schema.integer(min_value=1),
+        "cron": schema.string(max_length=255),
+    },
+    validate=validate_set_timer,
+    field_validators={"cron": validate_cron},
+)
+RESCHEDULE_TIMER_SCHEMA = Schema(
+    {
+        "hours": schema.integer(min_value=0),
+        "minutes": schema.integer(min_value=0),
+        "seconds": schema.integer(min_value=0),
+        "milliseconds": schema.integer(min_value=0),
+        "fire_at": schema.date_time(),
+    },
+    validate=validate_reschedule_timer,
+)
+
+
+class TimerStatusSerializer(Serializer):
+    """Input serializer of the timer status endpoint.
+
+    The ids are only checked to be strings here, so that an id which is not a UUID is reported
+    for that id alone by the view instead of failing the whole request.
+
+    Attributes:
+        ids (ListField): The ids of the timers, at most TIMER_STATUS_MAX_IDS of them.
+    """
+
+    ids = ListField(child=CharField(), allow_empty=False, required=True)
+
+    def validate_ids(self, ids):
+        if len(ids) > settings.TIMER_STATUS_MAX_IDS:
+            raise ValidationError(
+                f"Ensure this field has no more than {settings.TIMER_STATUS_MAX_IDS} elements."
+            )
+        return ids
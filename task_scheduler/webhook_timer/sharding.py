@@ -0,0 +1,165 @@
+import logging
+import math
+import os
+import random
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from django.db.models import Q
+
+from task_scheduler.webhook_timer.models import DispatcherNode, DispatcherShard
+
+
+logger = logging.getLogger("webhook_timer")
+
+
+def get_node_id() -> str:
+    """Return a new id for a dispatcher node, unique per process and start."""
+    return f"{socket.gethostname()[:64]}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+
+class ShardCoordinator:
+    """Shares the shards of the timers out between the running dispatcher nodes.
+
+    Every node renews its leases and registers itself as alive in DispatcherNode with every
+    heartbeat, at least every `lease / 3` seconds. Each node aims at holding an equal share of
+    the shards, `ceil(shard_count / alive nodes)`: it gives up the shards above its share and
+    takes over free shards, or shards whose lease has expired, up to it. A node joining thus
+    gets its share once the other nodes have released theirs, and the shards of a node dying
+    are taken over by the others once its leases expire, within about two leases.
+
+    A lease is taken, renewed and released with a conditional UPDATE, so that a shard never has
+    two owners. A node which could not renew its leases in time, e.g. after a long pause, stops
+    loading the timers of its shards as soon as they would have expired.
+
+    Attributes:
+        node_id (str): The id of this node.
+        shard_count (int): Number of shards.
+        lease (float): Seconds a lease is held without being renewed.
+        owned (frozenset[int]): The shards held by this node as of the last heartbeat.
+    """
+
+    def __init__(
+        self,
+        node_id: str | None = None,
+        shard_count: int | None = None,
+        lease: float | None = None,
+    ):
+        self.node_id = node_id or get_node_id()
+        self.shard_count = shard_count or settings.TIMER_SHARD_COUNT
+        self.lease = lease or settings.TIMER_SHARD_LEASE
+        self.owned: frozenset[int] = frozenset()
+
+        self._valid_until = 0.0
+        self._next_heartbeat_at = 0.0
+        self._is_initialized = False
+
+    def owned_at(self, now: float) -> frozenset[int]:
+        """Return the shards held by this node at the given time, renewing the leases if due.
+
+        Args:
+            now (float): POSIX timestamp.
+
+        Returns:
+            frozenset[int]: The shards whose timers this node may load.
+        """
+        if now >= self._next_heartbeat_at:
+            try:
+                self.heartbeat(now)
+            except Exception as err:
+                logger.error(f"Failed to renew the shard leases of '{self.node_id}': {str(err)}")
+                self._next_heartbeat_at = now + self.lease / 10
+
+        # Leases which could not be renewed are no longer trusted once they may have expired
+        return self.owned if now < self._valid_until else frozenset()
+
+    def heartbeat(self, now: float | None = None) -> frozenset[int]:
+        """Renew the leases of this node and rebalance the shards between the alive nodes.
+
+        Args:
+            now (float, optional): POSIX timestamp. Defaults to the current time.
+
+        Returns:
+            frozenset[int]: The shards held by this node.
+        """
+        now = time.time() if now is None else now
+        now_dt = datetime.fromtimestamp(now, tz=timezone.utc)
+        lease_expires_at = now_dt + timedelta(seconds=self.lease)
+
+        if not self._is_initialized:
+            DispatcherShard.objects.bulk_create(
+                [DispatcherShard(shard=shard) for shard in range(self.shard_count)],
+                ignore_conflicts=True,
+            )
+            self._is_initialized = True
+
+        DispatcherNode.objects.update_or_create(id=self.node_id, defaults={"last_seen_at": now_dt})
+        alive_count = DispatcherNode.objects.filter(
+            last_seen_at__gt=now_dt - timedelta(seconds=self.lease)
+        ).count()
+        share = math.ceil(self.shard_count / max(alive_count, 1))
+
+        previously_owned = self.owned
+        # A shard taken over by another node since the last heartbeat is no longer matched
+        held = DispatcherShard.objects.filter(owner=self.node_id)
+        held.update(lease_expires_at=lease_expires_at)
+        owned = set(held.values_list("shard", flat=True))
+
+        if len(owned) > share:
+            released = sorted(owned)[share:]
+            DispatcherShard.objects.filter(owner=self.node_id, shard__in=released).update(
+                owner=None, lease_expires_at=None
+            )
+            owned.difference_update(released)
+            # Given up before anything else may fail, another node can take them over right away
+            self.owned = self.owned & frozenset(owned)
+        elif len(owned) < share:
+            owned.update(self._take_over(share - len(owned), now_dt, lease_expires_at))
+
+        if frozenset(owned) != previously_owned:
+            logger.info(
+                f"Dispatcher node '{self.node_id}' holds {len(owned)} of {self.shard_count} "
+                f"shard(s), {alive_count} node(s) alive"
+            )
+        self.owned = frozenset(owned)
+        self._valid_until = now + self.lease
+        self._next_heartbeat_at = now + self.lease / 3
+
+        # The nodes dead for long are forgotten, they no longer count towards the alive ones
+        DispatcherNode.objects.filter(
+            last_seen_at__lt=now_dt - timedelta(seconds=self.lease * 10)
+        ).delete()
+        return self.owned
+
+    def release(self):
+        """Give up the shards of this node right away, e.g. when it stops."""
+        DispatcherShard.objects.filter(owner=self.node_id).update(owner=None, lease_expires_at=None)
+        DispatcherNode.objects.filter(id=self.node_id).delete()
+        self.owned = frozenset()
+        self._valid_until = 0.0
+
+    def _take_over(self, count: int, now: datetime, lease_expires_at: datetime) -> set[int]:
+        is_free = Q(owner__isnull=True) | Q(lease_expires_at__lte=now)
+        candidates = list(
+            DispatcherShard.objects.filter(is_free, shard__lt=self.shard_count).values_list(
+                "shard", flat=True
+            )
+        )
+        # Tried in random order, so that the nodes taking over shards together rarely compete
+        random.shuffle(candidates)
+
+        taken = set()
+        for shard in candidates:
+            if len(taken) >= count:
+                break
+            if (
+                DispatcherShard.objects.filter(is_free, shard=shard).update(
+                    owner=self.node_id, lease_expires_at=lease_expires_at
+                )
+                == 1
+            ):
+                taken.add(shard)
+        return taken
@@ -0,0 +1,164 @@
+import logging
+import threading
+from typing import Callable, Iterable
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from task_scheduler.webhook_timer.models import TimerOutbox, WebhookTimer
+from task_scheduler.webhook_timer.publishing import publish_timers
+from task_scheduler.webhook_timer.tasks import start_timer
+
+
+logger = logging.getLogger("webhook_timer")
+
+
+def get_live_task_ids(timeout: float | None = None) -> set[str] | None:
+    """Return the ids of the tasks held by the running Celery workers.
+
+    The workers consume the ETA messages as soon as they are published and keep them until they
+    are due, so the tasks scheduled, reserved or executed by the workers are every task the
+    broker still has a copy of.
+
+    Args:
+        timeout (float, optional): Seconds to wait for the replies of the workers. Defaults to
+            TIMER_SWEEPER_INSPECT_TIMEOUT.
+
+    Returns:
+        set[str] | None: The ids of the tasks, or None if no worker replied.
+    """
+    inspect = start_timer.app.control.inspect(
+        timeout=timeout if timeout is not None else settings.TIMER_SWEEPER_INSPECT_TIMEOUT
+    )
+
+    replies = [inspect.active(), inspect.reserved(), inspect.scheduled()]
+    if all(reply is None for reply in replies):
+        return None
+
+    active, reserved, scheduled = (reply or {} for reply in replies)
+    live_task_ids = set()
+    for requests in (*active.values(), *reserved.values()):
+        live_task_ids.update(request["id"] for request in requests)
+    for entries in scheduled.values():
+        live_task_ids.update(entry["request"]["id"] for entry in entries)
+    return live_task_ids
+
+
+class TimerSweeper:
+    """Sweeper re-publishing the pending timers whose ETA message has been lost.
+
+    When the timers are published as ETA messages, the broker holds the only copy of their
+    schedule: if its queues are purged or lost, the pending timers are never fired. The sweeper
+    scans the pending timers, overdue ones included, in chunks ordered by (expires_at, id) using
+    keyset pagination, and re-publishes the timers none of the workers holds a task for.
+
+    Every chunk is a short read of the pending index, so no lock is held between two chunks and
+    only one chunk is in memory at a time. The tasks held by the workers are listed again after
+    reading a chunk with unknown timers: the message of a timer is published before its row is
+    stored, so a listing taken after reading a row includes the task of that row if it is live.
+    With TIMER_DISPATCH_MODE="outbox" the row is stored first, the timers whose message is still
+    in the outbox are skipped, the others having been published before the listing.
+
+    Should a live task be missed nonetheless, the re-published task of the timer is cancelled by
+    start_timer once the webhook has been fired, like any other duplicate.
+
+    Attributes:
+        chunk_size (int): Number of pending timers read per query.
+        get_live_task_ids (Callable[[], set[str] | None]): Returns the ids of the tasks held by
+            the workers, or None if they cannot be listed.
+        publish (Callable[[list[WebhookTimer]], None]): Called with every chunk of orphaned
+            timers.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int | None = None,
+        get_live_task_ids: Callable[[], set[str] | None] = get_live_task_ids,
+        publish: Callable[[Iterable[WebhookTimer]], None] = publish_timers,
+    ):
+        self.chunk_size = chunk_size or settings.TIMER_SWEEPER_CHUNK_SIZE
+        self.get_live_task_ids = get_live_task_ids
+        self.publish = publish
+
+    def sweep(self) -> int:
+        """Re-publish the pending timers none of the workers holds a task for.
+
+        Returns:
+            int: The number of re-published timers.
+        """
+        live_task_ids = set()
+        scanned = 0
+        republished = 0
+        after = None
+
+        while True:
+            webhook_timers = list(
+                WebhookTimer.objects.pending_by_expiry(after=after, limit=self.chunk_size).only(
+                    "id", "expires_at", "version"
+                )
+            )
+            scanned += len(webhook_timers)
+
+            unknown_timers = [
+                webhook_timer
+                for webhook_timer in webhook_timers
+                if str(webhook_timer.id) not in live_task_ids
+            ]
+            if unknown_timers and settings.TIMER_DISPATCH_MODE == "outbox":
+                # Checked before listing the tasks, so that a message published in between is
+                # part of the listing
+                unpublished_ids = set(
+                    TimerOutbox.objects.filter(
+                        timer_id__in=[webhook_timer.id for webhook_timer in unknown_timers]
+                    ).values_list("timer_id", flat=True)
+                )
+                unknown_timers = [
+                    webhook_timer
+                    for webhook_timer in unknown_timers
+                    if webhook_timer.id not in unpublished_ids
+                ]
+
+            if unknown_timers:
+                live_task_ids = self.get_live_task_ids()
+                if live_task_ids is None:
+                    # Without the tasks held by the workers every timer would look orphaned
+                    logger.warning("No worker replied, the timers cannot be swept")
+                    break
+
+                orphaned_timers = [
+                    webhook_timer
+                    for webhook_timer in unknown_timers
+                    if str(webhook_timer.id) not in live_task_ids
+                ]
+                if orphaned_timers:
+                    self.publish(orphaned_timers)
+                    republished += len(orphaned_timers)
+
+            if len(webhook_timers) < self.chunk_size:
+                break
+            after = (webhook_timers[-1].expires_at, webhook_timers[-1].id)
+
+        log = logger.warning if republished else logger.info
+        log(f"Sweeper scanned {scanned} pending timer(s) and re-published {republished}")
+        return republished
+
+    def run_forever(self, interval: float, stop_event: threading.Event | None = None):
+        """Sweep every `interval` seconds until the stop event is set.
+
+        Args:
+            interval (float): Seconds waited between two sweeps.
+            stop_event (threading.Event, optional): Event stopping the loop. Defaults to None.
+        """
+        stop_event = stop_event or threading.Event()
+        logger.info(f"Sweeper started with an interval of {interval}s")
+
+        while not stop_event.is_set():
+            # Same connection recycling as between two requests, see TimerDispatcher.run_forever
+            close_old_connections()
+            try:
+                self.sweep()
+            except Exception as err:
+                logger.error(f"Sweep failed: {str(err)}")
+            stop_event.wait(interval)
+
+        logger.info("Sweeper stopped")
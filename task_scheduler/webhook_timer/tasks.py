@@ -1,11 +1,30 @@
-import requests
+import time
+from datetime import datetime, timezone
+from functools import partial
+from uuid import UUID
+
 from celery import shared_task
-from celery.exceptions import MaxRetriesExceededError
+from celery.exceptions import MaxRetriesExceededError, Retry
 from celery.utils.log import get_task_logger
+from django.conf import settings
 from django.db import transaction
 
-from task_scheduler.webhook_timer.models import WebhookTimer
-from task_scheduler.webhook_timer.utils.exceptions import WebhookTriggerError
+from task_scheduler.webhook_timer.cache import timer_cache
+from task_scheduler.webhook_timer.circuit_breaker import OPEN, circuit_breaker
+from task_scheduler.webhook_timer.delivery import deliver_in_batches, get_host_key, session_pool
+from task_scheduler.webhook_timer.delivery_log import delivery_log
+from task_scheduler.webhook_timer.metrics import (
+    get_status_class,
+    observe_lateness,
+    timer_deliveries,
+    webhook_request_duration,
+)
+from task_scheduler.webhook_timer.models import TimerOutbox, WebhookDelivery, WebhookTimer
+from task_scheduler.webhook_timer.retry_policy import get_retry_delay, is_retryable_status
+from task_scheduler.webhook_timer.utils.exceptions import (
+    WebhookRejectedError,
+    WebhookTriggerError,
+)
 
 
 logger = get_task_logger(__name__)
@@ -15,75 +34,408 @@ logger = get_task_logger(__name__)
     bind=True,
     acks_late=True,
     task_reject_on_worker_lost=True,
-    max_retries=3,
-    default_retry_delay=10,
+    max_retries=settings.WEBHOOK_MAX_RETRIES,
 )
-def start_timer(self):
+def start_timer(self, version: int | None = None):
     """Celery task to trigger a webhook when the timer expires.
 
     This task must be enqueued by setting either eta (estimated time of arrival) or countdown
     parameters to ensure delay in execution.
 
+    The timer is claimed before its webhook is fired (see WebhookTimerQuerySet.claim), so of the
+    redelivered or duplicate copies of the task only one fires the webhook. A copy finding the
+    timer claimed by another one checks it again once the claim has expired, and a copy running
+    before the expiry time of the timer, e.g. on a worker whose clock is behind, is enqueued
+    again for that time. A task published before its timer was cancelled or rescheduled, i.e.
+    with an older version, is dropped. A task published without any version, as they were
+    before the timers had one, stands for the first version.
+
+    A failed webhook is retried with exponential backoff and jitter (see
+    retry_policy.get_retry_delay), unless the endpoint rejected it with a status code which is
+    not retryable. No webhook is sent while the circuit of its host is open (see
+    CircuitBreaker), the task is enqueued again for after the circuit has been probed instead.
+
     Args:
         self (Task): The current Celery task instance.
+        version (int, optional): The version of the timer the task was published with. Defaults
+            to None, for the first version (0).
 
     Configuration:
         - acks_late: Ensures the task is acknowledged only after successful execution, enabling
           retries in case of worker failure.
         - task_reject_on_worker_lost: Rejects the task if the worker processing it is lost.
-        - max_retries: Limits the number of retries for the task to 3.
-        - default_retry_delay: Sets the delay between retries to 10 seconds.
+        - max_retries: Limits the number of retries for the task to WEBHOOK_MAX_RETRIES.
 
     Raises:
-        MaxRetriesExceededError: If the maximum number of retries is exceeded.
+        MaxRetriesExceededError: If the maximum number of retries is exceeded while the timer
+            is claimed by another task.
         Exception: Reraises any exception encountered during processing for retry.
 
     Side Effects:
-        Sets the 'is_url_called' field of the associated WebhookTimer object to True in the
-        database if webhook is successfully triggered.
+        Moves the associated WebhookTimer object to the delivered state and sets its
+        'is_url_called' field to True in the database if webhook is successfully triggered, or
+        to the failed state otherwise, setting 'is_url_called' to True as well once the webhook
+        is given up, and drops the timer from the timer cache.
     """
     timer_id = start_timer.request.id
+    # Published before the upgrade adding the versions, which gave the existing timers version 0
+    version = version if version is not None else 0
+
+    lease_owner = None
+    claimed_timers = []
     try:
-        webhook_timer = WebhookTimer.objects.get(id=timer_id)
+        lease_owner, claimed_timers = WebhookTimer.objects.claim(
+            [timer_id], versions={timer_id: version}
+        )
+
+        if not claimed_timers:
+            webhook_timer = WebhookTimer.objects.only(
+                "url", "expires_at", "is_url_called", "state", "lease_expires_at", "version"
+            ).get(id=timer_id)
+            if webhook_timer.version != version:
+                logger.info(
+                    f"Timer '{timer_id}' has been cancelled or rescheduled. Task '{timer_id}' "
+                    f"of version {version} dropped"
+                )
+                return
+            if (
+                not webhook_timer.is_url_called
+                and webhook_timer.state != WebhookTimer.State.IN_FLIGHT
+                and webhook_timer.expires_at > datetime.now(timezone.utc)
+            ):
+                logger.warning(f"Timer '{timer_id}' is not due yet, enqueued again for its expiry")
+                start_timer.apply_async(
+                    task_id=timer_id, kwargs={"version": version}, eta=webhook_timer.expires_at
+                )
+                return
+            if webhook_timer.state != WebhookTimer.State.IN_FLIGHT:
+                logger.warning(
+                    f"Webhook has already been fired to '{webhook_timer.url}'. "
+                    f"Task '{timer_id}' cancelled"
+                )
+                return
 
-        url = webhook_timer.url
+            # Another copy of the task is firing the webhook, or was until its worker got lost
+            lease_left = (
+                webhook_timer.lease_expires_at - datetime.now(timezone.utc)
+            ).total_seconds()
+            logger.warning(f"Timer '{timer_id}' is being fired by another task, checking it later")
+            raise self.retry(countdown=max(lease_left, 0) + 1)
 
-        if webhook_timer.is_url_called:
-            logger.warning(
-                f"Webhook has already been fired to '{url}'. Task '{timer_id}' cancelled"
+        webhook_timer = claimed_timers[0]
+        if not self.request.retries:
+            observe_lateness([webhook_timer.expires_at])
+
+        if circuit_breaker.acquire(get_host_key(webhook_timer.url)) == OPEN:
+            timer_deliveries.labels("short_circuited").inc()
+            countdown = __release_short_circuited_webhooks(lease_owner, claimed_timers)
+            start_timer.apply_async(
+                task_id=timer_id, kwargs={"version": version}, countdown=countdown
             )
             return
 
-        __trigger_webhook(url, timer_id)
-        __mark_webhook_triggered_in_db(webhook_timer)
+        try:
+            trigger_webhook(webhook_timer.url, timer_id, attempt=self.request.retries + 1)
+        except WebhookRejectedError:
+            timer_deliveries.labels("rejected").inc()
+            circuit_breaker.record(delivered=[], failed=[], rejected=[webhook_timer])
+            __release_failed_webhooks(lease_owner, claimed_timers, final=True)
+            return
+        except Exception:
+            timer_deliveries.labels("failed").inc()
+            circuit_breaker.record(delivered=[], failed=[webhook_timer])
+            raise
+
+        timer_deliveries.labels("delivered").inc()
+        circuit_breaker.record(delivered=[webhook_timer], failed=[])
+        __mark_webhooks_triggered_in_db(lease_owner, claimed_timers)
 
     except WebhookTimer.DoesNotExist:
         logger.error(f"WebhookTimer {timer_id} does not exist.")
+    except (Retry, MaxRetriesExceededError):
+        raise
     except Exception as err:
         logger.error(f"Error updating WebhookTimer '{timer_id}': {str(err)}")
-        try:
-            raise self.retry(exc=err)
-        except MaxRetriesExceededError:
+        is_final = __is_last_attempt(self)
+        __release_failed_webhooks(lease_owner, claimed_timers, final=is_final)
+
+        if is_final:
             logger.error(f"Max retries exceeded for timer_id: {timer_id}")
+            return
+        raise self.retry(exc=err, countdown=get_retry_delay(self.request.retries))
 
 
-def __trigger_webhook(url: str, timer_id: str):
+@shared_task(
+    bind=True,
+    acks_late=True,
+    task_reject_on_worker_lost=True,
+    max_retries=settings.WEBHOOK_MAX_RETRIES,
+)
+def start_timers(self, timer_ids: list[str], versions: dict[str, int] | None = None):
+    """Celery task to trigger the webhooks of a batch of expired timers.
+
+    This task is enqueued by the dispatcher process with the ids of the timers that have just
+    expired. The webhooks are fired concurrently by the WEBHOOK_DELIVERY_ENGINE, either grouped by
+    host on a thread pool or on the asyncio event loop of the process, over keep-alive connections.
+    The timers are claimed with a single UPDATE beforehand, and the delivered timers are marked
+    in the database with a single UPDATE. The timers claimed by another task are enqueued again
+    for once that claim has expired, and the timers cancelled or rescheduled since the task was
+    published are dropped.
+
+    Args:
+        self (Task): The current Celery task instance.
+        timer_ids (list[str]): The ids of the expired timers.
+        versions (dict[str, int], optional): The versions of the timers the task was published
+            with, by id. Defaults to None, for firing the timers whatever their version.
+
+    Configuration:
+        Same as the start_timer task. Only the timers whose webhook failed are retried, and the
+        timers of the hosts whose circuit is open are enqueued again without being fired.
+
+    Side Effects:
+        Moves the delivered WebhookTimer objects to the delivered state, setting their
+        'is_url_called' field to True, and the others to the failed state in the database.
+    """
+    lease_owner, webhook_timers = WebhookTimer.objects.claim(timer_ids, versions=versions)
+
+    skipped_count = len(timer_ids) - len(webhook_timers)
+    if skipped_count:
+        logger.warning(
+            f"{skipped_count} timer(s) do not exist, have already been fired, are being fired "
+            f"or have been cancelled or rescheduled"
+        )
+        __recheck_skipped_timers(lease_owner, timer_ids, versions)
+
+    if not self.request.retries:
+        observe_lateness(webhook_timer.expires_at for webhook_timer in webhook_timers)
+
+    webhook_timers, short_circuited = circuit_breaker.split(webhook_timers)
+    if short_circuited:
+        timer_deliveries.labels("short_circuited").inc(len(short_circuited))
+        countdown = __release_short_circuited_webhooks(lease_owner, short_circuited)
+        start_timers.apply_async(
+            args=[[str(webhook_timer.id) for webhook_timer in short_circuited]],
+            kwargs={
+                "versions": {
+                    str(webhook_timer.id): webhook_timer.version
+                    for webhook_timer in short_circuited
+                }
+            },
+            countdown=countdown,
+        )
+
+    if settings.WEBHOOK_DELIVERY_ENGINE == "asyncio":
+        # Imported lazily, the asynchronous HTTP client is only needed by this engine
+        from task_scheduler.webhook_timer.async_delivery import async_engine
+
+        delivered, failed, rejected = async_engine.deliver(
+            webhook_timers, attempt=self.request.retries + 1
+        )
+    else:
+        delivered, failed, rejected = deliver_in_batches(
+            webhook_timers, partial(trigger_webhook, attempt=self.request.retries + 1)
+        )
+    for outcome, outcome_timers in (
+        ("delivered", delivered),
+        ("failed", failed),
+        ("rejected", rejected),
+    ):
+        if outcome_timers:
+            timer_deliveries.labels(outcome).inc(len(outcome_timers))
+    circuit_breaker.record(delivered, failed, rejected)
+    __mark_webhooks_triggered_in_db(lease_owner, delivered)
+
+    if rejected:
+        __release_failed_webhooks(lease_owner, rejected, final=True)
+
+    if failed:
+        failed_ids = [str(webhook_timer.id) for webhook_timer in failed]
+        is_final = __is_last_attempt(self)
+        __release_failed_webhooks(lease_owner, failed, final=is_final)
+
+        if is_final:
+            logger.error(f"Max retries exceeded for timer_ids: {failed_ids}")
+            return
+        logger.error(f"Failed to fire {len(failed_ids)} webhook(s), retrying them")
+        raise self.retry(args=[failed_ids], countdown=get_retry_delay(self.request.retries))
+
+
+def trigger_webhook(url: str, timer_id: str, attempt: int = 1):
+    """Fire the webhook of a timer and record the attempt in its delivery history.
+
+    Args:
+        url (str): The URL of the webhook.
+        timer_id (str): The id of the timer, sent as the payload of the webhook.
+        attempt (int, optional): The number of the attempt, starting at 1. Defaults to 1.
+
+    Raises:
+        WebhookRejectedError: If the endpoint rejected the webhook with a status code which is
+            not retryable.
+        WebhookTriggerError: If the endpoint failed with a retryable status code.
+    """
     logger.debug(f"Firing webhook to url '{url}'")
 
     payload = {"id": timer_id}
-    response = requests.post(url, json=payload)
+    attempted_at = datetime.now(timezone.utc)
+    started_at = time.perf_counter()
+    status_code = None
+    try:
+        response = session_pool.post(url, json=payload, timeout=settings.WEBHOOK_TIMEOUT)
+        status_code = response.status_code
+    except Exception as err:
+        delivery_log.record(
+            timer_id,
+            attempt,
+            WebhookDelivery.Outcome.FAILED,
+            attempted_at,
+            time.perf_counter() - started_at,
+            error=f"{type(err).__name__}: {str(err)}",
+        )
+        raise
+    finally:
+        duration = time.perf_counter() - started_at
+        webhook_request_duration.labels(get_status_class(status_code)).observe(duration)
 
     if response.ok:
+        delivery_log.record(
+            timer_id,
+            attempt,
+            WebhookDelivery.Outcome.DELIVERED,
+            attempted_at,
+            duration,
+            status_code,
+        )
         logger.info(f"Successfully fired a webhook to '{url}'")
     else:
         err_message = f"Failed to fire a webhook to '{url}', status code: {response.status_code}"
         logger.error(err_message)
 
+        is_rejected = not is_retryable_status(response.status_code)
+        delivery_log.record(
+            timer_id,
+            attempt,
+            WebhookDelivery.Outcome.REJECTED if is_rejected else WebhookDelivery.Outcome.FAILED,
+            attempted_at,
+            duration,
+            status_code,
+            error=response.reason or "",
+        )
+        if is_rejected:
+            raise WebhookRejectedError(err_message)
         # Retries the task
         raise WebhookTriggerError(err_message)
 
 
-def __mark_webhook_triggered_in_db(webhook_timer: WebhookTimer):
-    with transaction.atomic():
-        webhook_timer.is_url_called = True
-        webhook_timer.save()
+def __mark_webhooks_triggered_in_db(lease_owner: UUID, webhook_timers: list[WebhookTimer]):
+    recurring, one_shot = __split_recurring(webhook_timers)
+    WebhookTimer.objects.filter(
+        id__in=[webhook_timer.id for webhook_timer in one_shot]
+    ).mark_delivered(lease_owner)
+    __reschedule_recurring_webhooks(lease_owner, recurring)
+    timer_cache.invalidate([webhook_timer.id for webhook_timer in webhook_timers])
+
+
+def __release_failed_webhooks(
+    lease_owner: UUID, webhook_timers: list[WebhookTimer], final: bool = False
+):
+    # Released right away for the retry, otherwise the timers stay claimed until the lease expires
+    timer_ids = [webhook_timer.id for webhook_timer in webhook_timers]
+    try:
+        if not final:
+            WebhookTimer.objects.filter(id__in=timer_ids).mark_failed(lease_owner)
+            return
+
+        # A recurring timer only gives up the current occurrence
+        recurring, one_shot = __split_recurring(webhook_timers)
+        WebhookTimer.objects.filter(
+            id__in=[webhook_timer.id for webhook_timer in one_shot]
+        ).mark_failed(lease_owner, final=True)
+        __reschedule_recurring_webhooks(lease_owner, recurring)
+        timer_cache.invalidate(timer_ids)
+    except Exception as err:
+        logger.error(f"Failed to release timers {timer_ids}: {str(err)}")
+
+
+def __split_recurring(
+    webhook_timers: list[WebhookTimer],
+) -> tuple[list[WebhookTimer], list[WebhookTimer]]:
+    recurring, one_shot = [], []
+    for webhook_timer in webhook_timers:
+        (recurring if webhook_timer.is_recurring else one_shot).append(webhook_timer)
+    return recurring, one_shot
+
+
+def __reschedule_recurring_webhooks(lease_owner: UUID, webhook_timers: list[WebhookTimer]):
+    if not webhook_timers:
+        return
+
+    if settings.TIMER_DISPATCH_MODE == "outbox":
+        # The messages of the next occurrences are stored with them, for the outbox relay
+        with transaction.atomic():
+            WebhookTimer.objects.reschedule(lease_owner, webhook_timers)
+            TimerOutbox.objects.add(webhook_timers)
+    else:
+        WebhookTimer.objects.reschedule(lease_owner, webhook_timers)
+
+    if settings.TIMER_DISPATCH_MODE == "eta":
+        # Imported lazily, the publishing module imports this one. The dispatcher loads the next
+        # occurrences from the database instead.
+        from task_scheduler.webhook_timer.publishing import publish_timers
+
+        publish_timers(webhook_timers)
+    logger.info(f"Rescheduled {len(webhook_timers)} recurring timer(s)")
+
+
+def __is_last_attempt(task) -> bool:
+    return task.max_retries is not None and task.request.retries >= task.max_retries
+
+
+def __release_short_circuited_webhooks(
+    lease_owner: UUID, webhook_timers: list[WebhookTimer]
+) -> float:
+    # No request has been sent, so the timers are enqueued again without using up a retry
+    __release_failed_webhooks(lease_owner, webhook_timers)
+
+    countdown = circuit_breaker.get_requeue_delay()
+    logger.warning(
+        f"Circuit open, {len(webhook_timers)} webhook(s) enqueued again in {countdown:.0f} seconds"
+    )
+    return countdown
+
+
+def __recheck_skipped_timers(
+    lease_owner: UUID, timer_ids: list[str], versions: dict[str, int] | None
+):
+    # The timers held by another task are enqueued again after the lease, in case that task
+    # lost its worker before firing them, and the timers not due yet, e.g. on a worker whose
+    # clock is behind that of the dispatcher, once they are due. Both are enqueued at their
+    # current version, so that they are dropped if they are cancelled or rescheduled meanwhile.
+    now = datetime.now(timezone.utc)
+    in_flight, not_due = {}, {}
+    not_due_until = now
+    for timer_id, version, state, expires_at in (
+        WebhookTimer.objects.filter(id__in=timer_ids)
+        .pending()
+        .exclude(lease_owner=lease_owner)
+        .values_list("id", "version", "state", "expires_at")
+    ):
+        timer_id = str(timer_id)
+        if versions and versions.get(timer_id, version) != version:
+            # Cancelled or rescheduled since the task was published
+            continue
+        if state == WebhookTimer.State.IN_FLIGHT:
+            in_flight[timer_id] = version
+        elif expires_at > now:
+            not_due[timer_id] = version
+            not_due_until = max(not_due_until, expires_at)
+
+    if in_flight:
+        start_timers.apply_async(
+            args=[list(in_flight)],
+            kwargs={"versions": in_flight},
+            countdown=settings.TIMER_CLAIM_LEASE,
+        )
+    if not_due:
+        start_timers.apply_async(
+            args=[list(not_due)], kwargs={"versions": not_due}, eta=not_due_until
+        )
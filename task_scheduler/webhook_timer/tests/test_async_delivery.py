@@ -0,0 +1,75 @@
+import time
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from task_scheduler.utils.webhook_sink import WebhookSink
+from task_scheduler.webhook_timer.async_delivery import AsyncDeliveryEngine
+from task_scheduler.webhook_timer.models import WebhookTimer
+from task_scheduler.webhook_timer.tasks import start_timers
+
+
+class AsyncDeliveryEngineTests(SimpleTestCase):
+
+    def setUp(self):
+        self.engine = AsyncDeliveryEngine(concurrency=100, timeout=2)
+        self.addCleanup(self.engine.close)
+
+    def make_timers(self, url: str, count: int) -> list[WebhookTimer]:
+        return [WebhookTimer(id=uuid4(), url=url, expires_at=None) for _ in range(count)]
+
+    def test_slow_deliveries_are_kept_in_flight_concurrently(self):
+        """Test 100 webhooks to an endpoint answering in 0.2s are delivered well under 20s."""
+        with WebhookSink(delay=0.2) as sink:
+            webhook_timers = self.make_timers(sink.url, 100)
+
+            started_at = time.monotonic()
+            delivered, failed, _ = self.engine.deliver(webhook_timers)
+            elapsed = time.monotonic() - started_at
+
+        self.assertEqual(len(delivered), 100)
+        self.assertEqual(failed, [])
+        self.assertLess(elapsed, 5)
+        self.assertCountEqual(
+            [timer_id for timer_id, _ in sink.received],
+            [str(webhook_timer.id) for webhook_timer in webhook_timers],
+        )
+
+    def test_errors_and_timeouts_fail_the_delivery(self):
+        """Test error status codes and endpoints slower than the timeout fail the delivery.
+
+        The status codes which are not retryable reject the delivery instead.
+        """
+        engine = AsyncDeliveryEngine(concurrency=10, timeout=0.2)
+        self.addCleanup(engine.close)
+
+        with WebhookSink(respond=lambda count: 503) as failing_sink:
+            _, failed, rejected = engine.deliver(self.make_timers(failing_sink.url, 3))
+        self.assertEqual(len(failed), 3)
+
+        with WebhookSink(respond=lambda count: 404) as rejecting_sink:
+            _, failed, rejected = engine.deliver(self.make_timers(rejecting_sink.url, 3))
+        self.assertEqual((len(failed), len(rejected)), (0, 3))
+
+        with WebhookSink(delay=1) as slow_sink:
+            _, failed, _ = engine.deliver(self.make_timers(slow_sink.url, 3))
+        self.assertEqual(len(failed), 3)
+
+
+class CeleryTaskStartTimersAsyncEngineTests(TestCase):
+
+    @override_settings(WEBHOOK_DELIVERY_ENGINE="asyncio")
+    @patch("task_scheduler.webhook_timer.async_delivery.async_engine.deliver")
+    def test_start_timers_uses_async_engine(self, mock_async_engine_deliver: MagicMock):
+        """Test start_timers delivers through the asyncio engine when it is configured."""
+        webhook_timer = WebhookTimer.objects.create(
+            id=uuid4(), url="https://example.com/webhook", expires_at=datetime.now(timezone.utc)
+        )
+        mock_async_engine_deliver.return_value = ([webhook_timer], [], [])
+
+        start_timers([str(webhook_timer.id)])
+
+        self.assertEqual(mock_async_engine_deliver.call_count, 1)
+        self.assertTrue(WebhookTimer.objects.get(id=webhook_timer.id).is_url_called)
@@ -0,0 +1,107 @@
+import json
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.client import AsyncRequestFactory
+from rest_framework import status
+
+from task_scheduler.webhook_timer.async_views import AsyncWebhookTimerView
+from task_scheduler.webhook_timer.cache import timer_cache
+from task_scheduler.webhook_timer.models import WebhookTimer
+
+
+class AsyncWebhookTimerViewTests(TestCase):
+
+    def setUp(self):
+        self.factory = AsyncRequestFactory()
+        self.view = AsyncWebhookTimerView.as_view()
+        timer_cache.backend.clear()
+
+    async def request(self, method: str, path: str, payload=None, **kwargs):
+        request = getattr(self.factory, method)(
+            path, json.dumps(payload) if payload is not None else None, "application/json"
+        )
+        return await self.view(request, **kwargs)
+
+    @override_settings(TIMER_DISPATCH_MODE="eta")
+    @patch("task_scheduler.webhook_timer.async_views.start_timer.apply_async")
+    async def test_set_and_get_timer(self, mock_start_timer_apply_async: MagicMock):
+        """Test a timer created by the async view is published and then looked up."""
+        self.assertTrue(AsyncWebhookTimerView.view_is_async)
+        payload = {"hours": 0, "minutes": 1, "seconds": 30, "url": "https://example.com/webhook"}
+
+        response = await self.request("post", "/timer", payload)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        timer_id = json.loads(response.content)["id"]
+        self.assertEqual(json.loads(response.content)["time_left"], 90)
+
+        webhook_timer = await WebhookTimer.objects.aget(id=timer_id)
+        mock_start_timer_apply_async.assert_called_once_with(
+            eta=webhook_timer.expires_at, task_id=timer_id, kwargs={"version": 0}
+        )
+
+        # Looked up from the database once the timer cache is cleared
+        timer_cache.backend.clear()
+        for _ in range(2):
+            response = await self.request("get", f"/timer/{timer_id}/", timer_id=timer_id)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertAlmostEqual(json.loads(response.content)["time_left"], 90, delta=1)
+
+        response = await self.request("get", "/timer/x/", timer_id=str(uuid4()))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = await self.request("get", "/timer/x/", timer_id="invalid-uuid")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(TIMER_DISPATCH_MODE="eta")
+    @patch("task_scheduler.webhook_timer.async_views.start_timer.apply_async")
+    async def test_failed_publish_stores_no_timer(self, mock_start_timer_apply_async: MagicMock):
+        """Test a timer whose task failed to be published is not stored."""
+        mock_start_timer_apply_async.side_effect = ConnectionError("broker down")
+        payload = {"hours": 0, "minutes": 1, "seconds": 0, "url": "https://example.com/webhook"}
+
+        response = await self.request("post", "/timer", payload)
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertEqual(mock_start_timer_apply_async.call_count, 1)
+        self.assertFalse(await WebhookTimer.objects.aexists())
+
+    @override_settings(TIMER_DISPATCH_MODE="dispatcher")
+    async def test_invalid_requests(self):
+        """Test invalid bodies are rejected with the error format of the sync views."""
+        for body in ("not json", "[1, 2]", json.dumps({"hours": -1, "url": "invalid"})):
+            with self.subTest(body=body):
+                request = self.factory.post("/timer", body, "application/json")
+                response = await self.view(request)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn("error", json.loads(response.content))
+
+        self.assertFalse(await WebhookTimer.objects.aexists())
+
+    @override_settings(TIMER_DISPATCH_MODE="dispatcher")
+    async def test_reschedule_and_cancel_timer(self):
+        """Test a timer is rescheduled, then cancelled once, by the async view."""
+        payload = {"hours": 1, "minutes": 0, "seconds": 0, "url": "https://example.com/webhook"}
+        timer_id = json.loads((await self.request("post", "/timer", payload)).content)["id"]
+
+        response = await self.request(
+            "patch", "/timer/x/", {"hours": 0, "minutes": 2, "seconds": 0}, timer_id=timer_id
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content)["time_left"], 120)
+
+        response = await self.request("delete", "/timer/x/", timer_id=timer_id)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        response = await self.request("delete", "/timer/x/", timer_id=timer_id)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        webhook_timer = await WebhookTimer.objects.aget(id=timer_id)
+        self.assertEqual(webhook_timer.state, WebhookTimer.State.CANCELLED)
+        self.assertEqual(webhook_timer.version, 2)
+
+    def test_async_view_served_by_wsgi(self):
+        """Test the async view also answers when called synchronously, as under WSGI."""
+        from asgiref.sync import async_to_sync
+
+        request = RequestFactory().get("/timer/x/")
+        response = async_to_sync(self.view)(request, timer_id=str(uuid4()))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,54 @@
+import json
+from io import StringIO
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase
+
+from task_scheduler.webhook_timer.benchmark import TimerBenchmark, get_expiry_offsets
+from task_scheduler.webhook_timer.models import WebhookTimer
+
+
+class BenchmarkCommandTests(TestCase):
+
+    def setUp(self):
+        caches["shared"].clear()
+
+    def test_benchmark_report(self):
+        """Test the benchmark fires every timer through both paths and reports them as JSON."""
+        for path in ("start_timer", "start_timers"):
+            with self.subTest(path=path):
+                stdout = StringIO()
+                call_command(
+                    "benchmark", timers=3, spread=1, path=path, workers=1, timeout=10, stdout=stdout
+                )
+
+                report = json.loads(stdout.getvalue())
+                self.assertEqual(report["parameters"]["firing_path"], path)
+                self.assertEqual(report["results"]["create"]["timers"], 3)
+                self.assertEqual(report["results"]["delivery"]["delivered"], 3)
+                self.assertEqual(report["results"]["delivery"]["missing"], 0)
+                self.assertEqual(report["results"]["lateness"]["count"], 3)
+                self.assertLess(report["results"]["lateness"]["max"], 5)
+                self.assertFalse(WebhookTimer.objects.exists())
+
+    def test_expiry_offsets_and_comparison(self):
+        """Test the expiry distributions and the comparison with a previous report."""
+        self.assertEqual(get_expiry_offsets("burst", 3, 5), [5, 5, 5])
+        offsets = get_expiry_offsets("uniform", 100, 10)
+        self.assertTrue(all(1 <= offset <= 10 for offset in offsets))
+        self.assertTrue(all(offset >= 1 for offset in get_expiry_offsets("exponential", 100, 0)))
+        with self.assertRaises(ValueError):
+            get_expiry_offsets("normal", 1, 1)
+
+        comparison = TimerBenchmark.compare(
+            {"create": {"timers_per_second": 150}, "lateness": {"p99": 0.5}},
+            {"create": {"timers_per_second": 100}, "lateness": {"p99": 0.25}},
+        )
+        self.assertEqual(
+            comparison["create.timers_per_second"],
+            {"baseline": 100, "current": 150, "change_percent": 50.0, "improved": True},
+        )
+        self.assertEqual(comparison["lateness.p99"]["change_percent"], 100.0)
+        self.assertFalse(comparison["lateness.p99"]["improved"])
+        self.assertNotIn("lateness.p50", comparison)
@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from freezegun import freeze_time
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from task_scheduler.webhook_timer.models import WebhookTimer
+from task_scheduler.webhook_timer.publishing import publish_timers
+
+
+class BulkWebhookTimerViewTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+
+        self.set_timers_bulk_url = reverse("set_timers_bulk")
+
+    @freeze_time("2025-01-01 00:00:00")
+    @patch("task_scheduler.webhook_timer.views.publish_timers")
+    def test_set_timers_bulk_partial_success(self, mock_publish_timers: MagicMock):
+        """Test valid items are created and invalid items are reported individually."""
+        payload = [
+            {"hours": 0, "minutes": 1, "seconds": 0, "url": "https://example.com/first"},
+            {"hours": -1, "minutes": 0, "seconds": 0, "url": "https://example.com/invalid"},
+            {"hours": 2, "minutes": 0, "seconds": 5, "url": "https://example.com/second"},
+        ]
+
+        response = self.client.post(self.set_timers_bulk_url, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        results = response.json()["timers"]
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0]["time_left"], 60)
+        self.assertIn("hours", results[1]["error"])
+        self.assertEqual(results[2]["time_left"], 7205)
+
+        # Assert the created timers are published all at once
+        self.assertEqual(mock_publish_timers.call_count, 1)
+        published_timers = mock_publish_timers.call_args.args[0]
+        self.assertEqual(
+            [str(webhook_timer.id) for webhook_timer in published_timers],
+            [results[0]["id"], results[2]["id"]],
+        )
+
+        webhook_timer = WebhookTimer.objects.get(id=results[2]["id"])
+        self.assertEqual(webhook_timer.url, "https://example.com/second")
+        self.assertEqual(
+            webhook_timer.expires_at,
+            datetime.now(timezone.utc) + timedelta(hours=2, seconds=5),
+        )
+        self.assertEqual(WebhookTimer.objects.count(), 2)
+
+    @patch("task_scheduler.webhook_timer.views.publish_timers")
+    def test_set_timers_bulk_all_invalid(self, mock_publish_timers: MagicMock):
+        """Test nothing is created when none of the items is valid."""
+        payload = [{"hours": 0, "minutes": 0, "seconds": 0, "url": "https://example.com/webhook"}]
+
+        response = self.client.post(self.set_timers_bulk_url, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        results = response.json()["timers"]
+        self.assertIn("non_field_errors", results[0]["error"])
+        self.assertEqual(mock_publish_timers.call_count, 0)
+        self.assertFalse(WebhookTimer.objects.exists())
+
+    @override_settings(TIMER_BULK_MAX_ITEMS=2)
+    def test_set_timers_bulk_invalid_list(self):
+        """Test the request body must be a non-empty list within the size limit."""
+        item = {"hours": 0, "minutes": 1, "seconds": 0, "url": "https://example.com/webhook"}
+
+        for payload in ({"timers": [item]}, [], [item] * 3):
+            response = self.client.post(self.set_timers_bulk_url, payload, format="json")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+            response_data = response.json()
+            self.assertIn("error", response_data)
+            self.assertIn("non_field_errors", response_data["error"])
+
+    @override_settings(TIMER_DISPATCH_MODE="dispatcher")
+    @patch("task_scheduler.webhook_timer.views.publish_timers")
+    def test_set_timers_bulk_dispatcher_mode(self, mock_publish_timers: MagicMock):
+        """Test the timers are not published in dispatcher mode."""
+        payload = [{"hours": 0, "minutes": 1, "seconds": 0, "url": "https://example.com/webhook"}]
+
+        response = self.client.post(self.set_timers_bulk_url, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(mock_publish_timers.call_count, 0)
+
+
+class PublishTimersTests(TestCase):
+
+    @patch("task_scheduler.webhook_timer.tasks.start_timer.apply_async")
+    @patch("task_scheduler.webhook_timer.tasks.start_timer.app.producer_or_acquire")
+    def test_publish_timers_reuses_producer(
+        self, mock_producer_or_acquire: MagicMock, mock_start_timer_apply_async: MagicMock
+    ):
+        """Test every message is published with the same producer and the timer id as task id."""
+        producer = mock_producer_or_acquire.return_value.__enter__.return_value
+        webhook_timers = [
+            WebhookTimer(id=uuid4(), url="https://example.com/webhook", expires_at=datetime.now())
+            for _ in range(3)
+        ]
+
+        publish_timers(webhook_timers)
+
+        self.assertEqual(mock_producer_or_acquire.call_count, 1)
+        self.assertEqual(mock_start_timer_apply_async.call_count, 3)
+        for webhook_timer, call in zip(webhook_timers, mock_start_timer_apply_async.call_args_list):
+            self.assertEqual(call.kwargs["task_id"], str(webhook_timer.id))
+            self.assertEqual(call.kwargs["eta"], webhook_timer.expires_at)
+            self.assertIs(call.kwargs["producer"], producer)
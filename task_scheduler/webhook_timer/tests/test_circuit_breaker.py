@@ -0,0 +1,153 @@
+import time
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+from celery.exceptions import Retry
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from task_scheduler.utils.webhook_sink import WebhookSink
+from task_scheduler.webhook_timer.circuit_breaker import CircuitBreaker
+from task_scheduler.webhook_timer.models import WebhookTimer
+from task_scheduler.webhook_timer.retry_policy import get_retry_delay, is_retryable_status
+from task_scheduler.webhook_timer.tasks import start_timers
+
+
+class FakeClock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class RetryPolicyTests(SimpleTestCase):
+
+    @override_settings(WEBHOOK_RETRY_BASE_DELAY=10, WEBHOOK_RETRY_MAX_DELAY=60)
+    def test_retry_delay_is_jittered_exponential_backoff(self):
+        """Test the retry delay is drawn between 0 and the capped exponential backoff."""
+        with patch("task_scheduler.webhook_timer.retry_policy.random.uniform") as mock_uniform:
+            mock_uniform.side_effect = lambda low, high: high
+            self.assertEqual([get_retry_delay(retries) for retries in range(4)], [10, 20, 40, 60])
+
+        delays = [get_retry_delay(2) for _ in range(100)]
+        self.assertTrue(all(0 <= delay <= 40 for delay in delays))
+        self.assertGreater(len(set(delays)), 1)
+
+    def test_retryable_status_codes(self):
+        """Test throttling and server errors are retried while client errors are not."""
+        self.assertTrue(all(map(is_retryable_status, (408, 429, 500, 502, 503, 504))))
+        self.assertFalse(any(map(is_retryable_status, (400, 401, 404, 410, 422, 501))))
+
+
+class CircuitBreakerTests(SimpleTestCase):
+
+    def setUp(self):
+        caches["shared"].clear()
+        self.clock = FakeClock(datetime(2025, 1, 1, tzinfo=timezone.utc).timestamp())
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold=3, window=60, open_seconds=30, clock=self.clock
+        )
+        self.host = "https://example.com"
+
+    def test_circuit_opens_and_is_probed(self):
+        """Test the circuit opens at the threshold, lets a single probe through, then closes."""
+        self.circuit_breaker.record_failure(self.host, count=2)
+        self.assertEqual(self.circuit_breaker.acquire(self.host), "closed")
+
+        self.circuit_breaker.record_failure(self.host)
+        self.assertEqual(self.circuit_breaker.acquire(self.host), "open")
+        self.assertEqual(self.circuit_breaker.get_state(self.host)["state"], "open")
+
+        self.clock.now += 31
+        self.assertEqual(self.circuit_breaker.acquire(self.host), "half_open")
+        self.assertEqual(self.circuit_breaker.acquire(self.host), "open")
+
+        # A failed probe opens the circuit again
+        self.circuit_breaker.record_failure(self.host)
+        self.assertEqual(self.circuit_breaker.acquire(self.host), "open")
+
+        self.clock.now += 31
+        self.assertEqual(self.circuit_breaker.acquire(self.host), "half_open")
+        self.circuit_breaker.record_success(self.host)
+        self.assertEqual(
+            self.circuit_breaker.get_state(self.host),
+            {"host": self.host, "state": "closed", "failures": 0, "opened_until": None},
+        )
+
+
+@override_settings(WEBHOOK_CIRCUIT_FAILURE_THRESHOLD=3, WEBHOOK_CIRCUIT_OPEN_SECONDS=0.3)
+class CircuitBreakerDeliveryTests(TestCase):
+
+    def setUp(self):
+        caches["shared"].clear()
+
+    def create_timers(self, url: str, count: int) -> list[str]:
+        return [
+            str(webhook_timer.id)
+            for webhook_timer in WebhookTimer.objects.bulk_create(
+                WebhookTimer(id=uuid4(), url=url, expires_at=datetime.now(timezone.utc))
+                for _ in range(count)
+            )
+        ]
+
+    @patch("task_scheduler.webhook_timer.tasks.start_timers.apply_async")
+    @patch("task_scheduler.webhook_timer.tasks.start_timers.retry")
+    def test_flaky_endpoint(
+        self, mock_start_timers_retry: MagicMock, mock_start_timers_apply_async: MagicMock
+    ):
+        """Test a failing host is short-circuited until a probe is delivered."""
+        mock_start_timers_retry.side_effect = Retry()
+
+        # The stub server fails the first 3 webhooks and delivers the next ones
+        with WebhookSink(respond=lambda count: 503 if count <= 3 else 200) as sink:
+            with self.assertRaises(Retry):
+                start_timers(self.create_timers(sink.url, 3))
+            circuit = APIClient().get(reverse("webhook_circuit"), {"url": sink.url}).json()
+            self.assertEqual(circuit["state"], "open")
+
+            # No webhook is sent while the circuit is open
+            short_circuited_ids = self.create_timers(sink.url, 2)
+            start_timers(short_circuited_ids)
+            self.assertEqual(len(sink.received), 3)
+            self.assertCountEqual(
+                mock_start_timers_apply_async.call_args.kwargs["args"][0], short_circuited_ids
+            )
+            self.assertTrue(
+                WebhookTimer.objects.filter(
+                    id__in=short_circuited_ids, state=WebhookTimer.State.FAILED
+                ).exists()
+            )
+
+            # A single webhook probes the host once the circuit is half open
+            time.sleep(0.35)
+            start_timers(short_circuited_ids)
+            self.assertEqual(len(sink.received), 4)
+
+            start_timers(short_circuited_ids)
+            self.assertEqual(len(sink.received), 5)
+
+        self.assertEqual(WebhookTimer.objects.filter(is_url_called=True).count(), 2)
+        response = APIClient().get(reverse("webhook_circuit"), {"url": sink.url})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["state"], "closed")
+
+    @patch("task_scheduler.webhook_timer.tasks.start_timers.retry")
+    def test_rejected_webhooks_are_not_retried(self, mock_start_timers_retry: MagicMock):
+        """Test a webhook rejected with a status code which is not retryable is given up."""
+        with WebhookSink(respond=lambda count: 410) as sink:
+            timer_ids = self.create_timers(sink.url, 2)
+            start_timers(timer_ids)
+
+        self.assertEqual(mock_start_timers_retry.call_count, 0)
+        self.assertEqual(
+            WebhookTimer.objects.filter(
+                id__in=timer_ids, state=WebhookTimer.State.FAILED, is_url_called=True
+            ).count(),
+            2,
+        )
+        self.assertEqual(WebhookTimer.objects.claim(timer_ids)[1], [])
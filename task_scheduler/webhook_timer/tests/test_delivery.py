@@ -0,0 +1,148 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+from celery.exceptions import Retry
+from django.conf import settings
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase
+
+from task_scheduler.webhook_timer.delivery import HostSessionPool, deliver_in_batches
+from task_scheduler.webhook_timer.models import WebhookTimer
+from task_scheduler.webhook_timer.tasks import start_timers
+
+
+class HostSessionPoolTests(SimpleTestCase):
+
+    def test_session_is_shared_per_host(self):
+        """Test the URLs of a host share a session and the least recently used host is evicted."""
+        session_pool = HostSessionPool(max_hosts=2, maxsize=4)
+
+        first = session_pool.get_session("https://first.example.com/a")
+        self.assertIs(session_pool.get_session("https://FIRST.example.com/b?c=d"), first)
+        self.assertIsNot(session_pool.get_session("http://first.example.com/a"), first)
+
+        session_pool.get_session("https://first.example.com/a")
+        session_pool.get_session("https://second.example.com/a")
+        self.assertEqual(len(session_pool), 2)
+        self.assertIs(session_pool.get_session("https://first.example.com/a"), first)
+
+
+class DeliverInBatchesTests(SimpleTestCase):
+
+    def test_failed_webhooks_are_reported(self):
+        """Test every timer ends up either delivered or failed."""
+        webhook_timers = [
+            WebhookTimer(id=uuid4(), url=f"https://host-{index % 3}.example.com/", expires_at=None)
+            for index in range(20)
+        ]
+        failing_timer = webhook_timers[7]
+
+        def trigger_webhook(url: str, timer_id: str):
+            if timer_id == str(failing_timer.id):
+                raise ConnectionError("Connection refused")
+
+        delivered, failed, rejected = deliver_in_batches(
+            webhook_timers, trigger_webhook, max_workers=4
+        )
+
+        self.assertEqual(failed, [failing_timer])
+        self.assertEqual(rejected, [])
+        self.assertCountEqual(delivered, [t for t in webhook_timers if t is not failing_timer])
+
+
+class CeleryTaskStartTimersTests(TestCase):
+
+    def setUp(self):
+        # Closes the circuits opened by the failed webhooks of other tests
+        caches["shared"].clear()
+
+    def create_timers(self, count: int, **kwargs) -> list[WebhookTimer]:
+        return WebhookTimer.objects.bulk_create(
+            WebhookTimer(
+                id=uuid4(),
+                url="https://example.com/webhook",
+                expires_at=datetime.now(timezone.utc),
+                **kwargs,
+            )
+            for _ in range(count)
+        )
+
+    @patch("task_scheduler.webhook_timer.tasks.session_pool.post")
+    def test_start_timers_success(self, mock_session_pool_post: MagicMock):
+        """Test start_timers claims the pending timers and marks them fired with one UPDATE each."""
+        mock_session_pool_post.return_value.ok = True
+        pending_timers = self.create_timers(3)
+        fired_timers = self.create_timers(1, is_url_called=True)
+        timer_ids = [str(webhook_timer.id) for webhook_timer in pending_timers + fired_timers]
+
+        # The already fired timer is also checked for being in flight with another task
+        with self.assertNumQueries(4):
+            start_timers(timer_ids)
+
+        self.assertEqual(mock_session_pool_post.call_count, 3)
+        self.assertEqual(WebhookTimer.objects.filter(is_url_called=True).count(), 4)
+
+    @patch("task_scheduler.webhook_timer.tasks.start_timers.retry")
+    @patch("task_scheduler.webhook_timer.tasks.session_pool.post")
+    def test_start_timers_retries_failed_timers(
+        self, mock_session_pool_post: MagicMock, mock_start_timers_retry: MagicMock
+    ):
+        """Test start_timers retries only the timers whose webhook failed."""
+        delivered_timer, failed_timer = self.create_timers(2)
+        mock_session_pool_post.side_effect = lambda url, json, timeout: MagicMock(
+            ok=json["id"] == str(delivered_timer.id), status_code=503
+        )
+        mock_start_timers_retry.side_effect = Retry()
+
+        with self.assertRaises(Retry):
+            start_timers([str(delivered_timer.id), str(failed_timer.id)])
+
+        self.assertEqual(mock_start_timers_retry.call_args.kwargs["args"], [[str(failed_timer.id)]])
+        self.assertTrue(WebhookTimer.objects.get(id=delivered_timer.id).is_url_called)
+        self.assertFalse(WebhookTimer.objects.get(id=failed_timer.id).is_url_called)
+        self.assertEqual(
+            WebhookTimer.objects.get(id=failed_timer.id).state, WebhookTimer.State.FAILED
+        )
+
+    @patch("task_scheduler.webhook_timer.tasks.start_timers.apply_async")
+    @patch("task_scheduler.webhook_timer.tasks.session_pool.post")
+    def test_start_timers_skips_timers_in_flight(
+        self, mock_session_pool_post: MagicMock, mock_start_timers_apply_async: MagicMock
+    ):
+        """Test the timers claimed by another task are not fired but checked again later."""
+        mock_session_pool_post.return_value.ok = True
+        (in_flight_timer,) = self.create_timers(1)
+        WebhookTimer.objects.claim([in_flight_timer.id])
+
+        start_timers([str(in_flight_timer.id)])
+
+        self.assertEqual(mock_session_pool_post.call_count, 0)
+        mock_start_timers_apply_async.assert_called_once_with(
+            args=[[str(in_flight_timer.id)]],
+            kwargs={"versions": {str(in_flight_timer.id): 0}},
+            countdown=settings.TIMER_CLAIM_LEASE,
+        )
+
+    @patch("task_scheduler.webhook_timer.tasks.start_timers.apply_async")
+    @patch("task_scheduler.webhook_timer.tasks.session_pool.post")
+    def test_start_timers_skips_timers_not_due(
+        self, mock_session_pool_post: MagicMock, mock_start_timers_apply_async: MagicMock
+    ):
+        """Test the timers not due yet are not fired but enqueued again for their expiry."""
+        mock_session_pool_post.return_value.ok = True
+        (early_timer,) = self.create_timers(1)
+        early_timer.expires_at = datetime.now(timezone.utc) + timedelta(minutes=1)
+        early_timer.save()
+
+        start_timers([str(early_timer.id)], versions={str(early_timer.id): 0})
+
+        self.assertEqual(mock_session_pool_post.call_count, 0)
+        self.assertEqual(
+            WebhookTimer.objects.get(id=early_timer.id).state, WebhookTimer.State.PENDING
+        )
+        mock_start_timers_apply_async.assert_called_once_with(
+            args=[[str(early_timer.id)]],
+            kwargs={"versions": {str(early_timer.id): 0}},
+            eta=early_timer.expires_at,
+        )
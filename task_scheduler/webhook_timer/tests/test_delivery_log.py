@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+from celery.exceptions import Retry
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from task_scheduler.webhook_timer.delivery_log import DeliveryLog, delivery_log
+from task_scheduler.webhook_timer.models import WebhookDelivery, WebhookTimer
+from task_scheduler.webhook_timer.tasks import start_timer
+
+
+class DeliveryLogTests(TestCase):
+
+    def setUp(self):
+        delivery_log.clear()
+
+    def record(self, log: DeliveryLog, timer_id, attempted_at: datetime | None = None):
+        log.record(
+            timer_id,
+            1,
+            WebhookDelivery.Outcome.DELIVERED,
+            attempted_at or datetime.now(timezone.utc),
+            0.01,
+            200,
+        )
+
+    @patch("task_scheduler.webhook_timer.tasks.start_timer.retry")
+    @patch("task_scheduler.webhook_timer.tasks.session_pool.post")
+    @patch("celery.app.task.Context")
+    def test_attempts_are_recorded_and_served(
+        self,
+        mock_celery_context: MagicMock,
+        mock_session_pool_post: MagicMock,
+        mock_start_timer_retry: MagicMock,
+    ):
+        """Test a failed then delivered webhook leaves both attempts in the delivery history."""
+        timer_id = str(uuid4())
+        WebhookTimer.objects.create(
+            id=timer_id, url="https://example.com/webhook", expires_at=datetime.now(timezone.utc)
+        )
+        mock_celery_context.return_value = MagicMock(id=timer_id, retries=0)
+        mock_session_pool_post.return_value = MagicMock(
+            ok=False, status_code=503, reason="Service Unavailable"
+        )
+        mock_start_timer_retry.side_effect = Retry()
+
+        with self.assertRaises(Retry):
+            start_timer(version=0)
+
+        mock_celery_context.return_value = MagicMock(id=timer_id, retries=1)
+        mock_session_pool_post.return_value = MagicMock(ok=True, status_code=200)
+        start_timer(version=0)
+
+        # Nothing is written until the buffer is flushed
+        self.assertFalse(WebhookDelivery.objects.exists())
+        self.assertEqual(delivery_log.flush(), 2)
+
+        response = APIClient().get(reverse("timer_deliveries", args=[timer_id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        deliveries = response.json()["deliveries"]
+        self.assertEqual(
+            [
+                (delivery["attempt"], delivery["outcome"], delivery["status_code"])
+                for delivery in deliveries
+            ],
+            [(2, "delivered", 200), (1, "failed", 503)],
+        )
+        self.assertEqual(deliveries[1]["error"], "Service Unavailable")
+
+        response = APIClient().get(reverse("timer_deliveries", args=[str(uuid4())]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = APIClient().get(reverse("timer_deliveries", args=["invalid-uuid"]))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_buffer_is_written_in_batches_and_bounded(self):
+        """Test the attempts are written with one INSERT per batch and the oldest are dropped."""
+        log = DeliveryLog(batch_size=2, flush_interval=60, max_buffered=5)
+        timer_ids = [uuid4() for _ in range(6)]
+        for timer_id in timer_ids:
+            self.record(log, timer_id)
+
+        self.assertEqual(log.pending_count(), 5)
+        with self.assertNumQueries(3):
+            self.assertEqual(log.flush(), 5)
+
+        self.assertCountEqual(
+            WebhookDelivery.objects.values_list("timer_id", flat=True), timer_ids[1:]
+        )
+        self.assertEqual(log.pending_count(), 0)
+
+    def test_prune_deletes_old_attempts_in_chunks(self):
+        """Test the pruning command only deletes the attempts older than the retention period."""
+        now = datetime.now(timezone.utc)
+        log = DeliveryLog(batch_size=10, flush_interval=60)
+        old_timer_id, recent_timer_id = uuid4(), uuid4()
+        for days in (40, 35, 31):
+            self.record(log, old_timer_id, now - timedelta(days=days))
+        self.record(log, recent_timer_id, now - timedelta(days=1))
+        log.flush()
+
+        stdout = StringIO()
+        call_command("prune_deliveries", retention_days=30, chunk_size=2, stdout=stdout)
+
+        self.assertIn("Deleted 3 delivery attempt(s)", stdout.getvalue())
+        self.assertEqual(
+            list(WebhookDelivery.objects.values_list("timer_id", flat=True)), [recent_timer_id]
+        )
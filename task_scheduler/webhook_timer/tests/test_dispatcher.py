@@ -0,0 +1,192 @@
+import threading
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from task_scheduler.webhook_timer.dispatcher import TimerDispatcher
+from task_scheduler.webhook_timer.models import WebhookTimer
+
+
+class FakeClock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TimerDispatcherTests(TestCase):
+
+    def setUp(self):
+        caches["shared"].clear()
+        self.clock = FakeClock(datetime(2025, 1, 1, tzinfo=timezone.utc).timestamp())
+        self.enqueued = []
+        self.dispatcher = TimerDispatcher(
+            horizon=60,
+            poll_interval=5,
+            tick=0.1,
+            chunk_size=2,
+            batch_size=2,
+            enqueue=self.enqueue,
+            clock=self.clock,
+        )
+
+    def enqueue(self, timer_ids: list, versions: list[int]):
+        self.enqueued.append(timer_ids)
+
+    def create_timer(
+        self, seconds: float, url: str = "https://example.com/webhook", **kwargs
+    ) -> WebhookTimer:
+        expires_at = datetime.fromtimestamp(self.clock.now, tz=timezone.utc) + timedelta(
+            seconds=seconds
+        )
+        return WebhookTimer.objects.create(id=uuid4(), url=url, expires_at=expires_at, **kwargs)
+
+    def test_only_timers_within_horizon_are_loaded(self):
+        """Test the dispatcher holds only the timers expiring within the horizon."""
+        for seconds in (10, 20, 30):
+            self.create_timer(seconds)
+        self.create_timer(3600)
+        self.create_timer(15, is_url_called=True)
+
+        self.dispatcher.poll()
+        self.assertEqual(self.dispatcher.scheduled_count, 3)
+
+    def test_timers_are_enqueued_once_when_due(self):
+        """Test a timer is enqueued once after its deadline even though the window is re-read."""
+        soon = self.create_timer(10)
+        later = self.create_timer(40)
+        overdue = self.create_timer(-5)
+
+        self.dispatcher.tick()
+        self.assertEqual(self.enqueued, [[overdue.id]])
+
+        for _ in range(5):
+            self.clock.now += 10
+            self.dispatcher.tick()
+
+        self.assertEqual(self.enqueued, [[overdue.id], [soon.id], [later.id]])
+
+    def test_due_timers_are_enqueued_in_batches(self):
+        """Test timers expiring together are enqueued in batches of at most batch_size."""
+        timers = [self.create_timer(1) for _ in range(5)]
+
+        self.clock.now += 1
+        self.dispatcher.tick()
+
+        self.assertEqual([len(batch) for batch in self.enqueued], [2, 2, 1])
+        self.assertCountEqual(
+            [timer_id for batch in self.enqueued for timer_id in batch],
+            [timer.id for timer in timers],
+        )
+
+    def test_backlog_is_loaded_batch_by_batch(self):
+        """Test the timers left overdue by an outage are loaded batch_size at a time."""
+        backlog = [self.create_timer(-3600 + index) for index in range(5)]
+        soon = self.create_timer(10)
+
+        self.dispatcher.tick()
+        self.assertEqual(self.enqueued, [[timer.id for timer in backlog[:2]]])
+        self.assertEqual(self.dispatcher.scheduled_count, 0)
+
+        # The next batches are loaded by the following ticks, without waiting for a poll
+        self.dispatcher.tick()
+        self.dispatcher.tick()
+        self.dispatcher.tick()
+        self.assertEqual(
+            self.enqueued,
+            [[timer.id for timer in backlog[:2]], [timer.id for timer in backlog[2:4]]]
+            + [[backlog[4].id]],
+        )
+        self.assertEqual(self.dispatcher.scheduled_count, 1)
+
+        self.clock.now += 10
+        self.dispatcher.tick()
+        self.assertEqual(self.enqueued[-1], [soon.id])
+
+    def test_failed_enqueue_is_retried_on_next_poll(self):
+        """Test a timer which could not be enqueued is loaded again by the next poll."""
+        timer = self.create_timer(1)
+        enqueue = MagicMock(side_effect=[ConnectionError("broker down"), None])
+        self.dispatcher.enqueue = enqueue
+
+        self.clock.now += 2
+        self.dispatcher.tick()
+        self.clock.now += 5
+        self.dispatcher.tick()
+
+        self.assertEqual(enqueue.call_count, 2)
+        enqueue.assert_called_with([timer.id], [0])
+
+    @override_settings(
+        WEBHOOK_HOST_LIMITS={"https://big.example.com": (10, 10)},
+        TIMER_DISPATCHER_MAX_RATE=0,
+    )
+    def test_due_timers_are_rate_limited_per_host(self):
+        """Test a burst of one host is spread over time without holding back the other hosts."""
+        self.dispatcher = TimerDispatcher(
+            horizon=60,
+            tick=0.1,
+            chunk_size=50,
+            batch_size=100,
+            enqueue=self.enqueue,
+            clock=self.clock,
+        )
+        big = [self.create_timer(1, url="https://big.example.com/hook") for _ in range(25)]
+        small = self.create_timer(1, url="https://small.example.com/hook")
+
+        self.clock.now += 1
+        self.assertEqual(self.dispatcher.tick(), 11)
+        self.assertIn(small.id, self.enqueued[0])
+        self.assertEqual(self.dispatcher.held_back_count, 15)
+
+        self.clock.now += 5
+        self.dispatcher.tick()
+        self.assertEqual(
+            APIClient().get(reverse("webhook_queues")).json()["hosts"],
+            {"https://big.example.com": 5},
+        )
+        self.clock.now += 1
+        self.dispatcher.tick()
+        self.assertCountEqual(
+            [timer_id for batch in self.enqueued for timer_id in batch],
+            [timer.id for timer in [*big, small]],
+        )
+
+    @patch("task_scheduler.webhook_timer.dispatcher.close_old_connections")
+    def test_run_forever_recycles_the_connection(self, mock_close_old_connections: MagicMock):
+        """Test the loop closes an obsolete or broken database connection before every tick."""
+        stop_event = threading.Event()
+        ticks = []
+
+        def tick():
+            self.assertEqual(mock_close_old_connections.call_count, len(ticks) + 1)
+            ticks.append(self.clock.now)
+            if len(ticks) == 3:
+                stop_event.set()
+            return 0
+
+        with patch.object(self.dispatcher, "tick", side_effect=tick):
+            self.dispatcher.run_forever(stop_event)
+        self.assertEqual(mock_close_old_connections.call_count, 3)
+
+
+class DispatcherModeViewTests(TestCase):
+
+    @override_settings(TIMER_DISPATCH_MODE="dispatcher")
+    @patch("task_scheduler.webhook_timer.tasks.start_timer.apply_async")
+    def test_set_timer_does_not_publish(self, mock_start_timer_apply_async: MagicMock):
+        """Test setting a timer in dispatcher mode only stores it in the database."""
+        payload = {"hours": 0, "minutes": 1, "seconds": 0, "url": "https://example.com/webhook"}
+
+        response = APIClient().post(reverse("set_timer"), payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(mock_start_timer_apply_async.call_count, 0)
+        self.assertTrue(WebhookTimer.objects.filter(id=response.json()["id"]).exists())
@@ -0,0 +1,86 @@
+from collections import Counter
+
+from django.test import SimpleTestCase
+
+from task_scheduler.webhook_timer.utils.fair_scheduler import FairScheduler, TokenBucket
+
+
+class TokenBucketTests(SimpleTestCase):
+
+    def test_refill_is_capped_at_burst(self):
+        """Test the bucket starts full and refills at its rate up to its burst."""
+        bucket = TokenBucket(rate=10, burst=5, now=0)
+        bucket.tokens -= 5
+
+        bucket.refill(0.2)
+        self.assertAlmostEqual(bucket.tokens, 2)
+        self.assertFalse(bucket.is_full(0.4))
+        self.assertTrue(bucket.is_full(0.5))
+
+        bucket.refill(60)
+        self.assertEqual(bucket.tokens, 5)
+
+
+class FairSchedulerTests(SimpleTestCase):
+
+    def test_per_key_rate_limit(self):
+        """Test a key is released at most at its rate beyond its burst, in arrival order."""
+        scheduler = FairScheduler(get_limits=lambda key: (10, 5))
+        for item in range(20):
+            scheduler.add("a", item)
+
+        self.assertEqual(scheduler.take(0), [0, 1, 2, 3, 4])
+        self.assertEqual(scheduler.take(0.5), [5, 6, 7, 8, 9])
+        self.assertEqual(scheduler.queue_depths(), {"a": 10})
+        self.assertEqual(len(scheduler), 10)
+
+    def test_unlimited_keys_are_released_at_once(self):
+        """Test the keys without a rate limit are released right away without a global rate."""
+        scheduler = FairScheduler(get_limits=lambda key: (None, 0))
+        for item in range(1000):
+            scheduler.add(item % 3, item)
+
+        self.assertEqual(len(scheduler.take(0)), 1000)
+        self.assertEqual(scheduler.queue_depths(), {})
+
+    def test_global_rate_is_shared_by_weight(self):
+        """Test a backlogged key gets no more than its weighted share of the global rate."""
+        scheduler = FairScheduler(
+            get_limits=lambda key: (None, 0),
+            get_weight=lambda key: 2 if key == "heavy" else 1,
+            rate=400,
+            quantum=10,
+        )
+        for item in range(10000):
+            scheduler.add("big", ("big", item))
+        for key in ("heavy", "small"):
+            for item in range(1000):
+                scheduler.add(key, (key, item))
+
+        released = Counter()
+        for second in range(1, 4):
+            taken = scheduler.take(second)
+            self.assertEqual(len(taken), 400)
+            released.update(key for key, _ in taken)
+
+        self.assertEqual(released, {"big": 300, "heavy": 600, "small": 300})
+
+    def test_small_key_is_not_starved(self):
+        """Test an item of a new key is released on the next take despite a large backlog."""
+        scheduler = FairScheduler(get_limits=lambda key: (None, 0), rate=100, quantum=10)
+        for item in range(100000):
+            scheduler.add("big", item)
+        scheduler.take(0)
+
+        scheduler.add("small", "late")
+        self.assertIn("late", scheduler.take(0.5))
+
+    def test_idle_buckets_are_pruned(self):
+        """Test the bucket of a key without queued items is dropped once full again."""
+        scheduler = FairScheduler(get_limits=lambda key: (10, 10))
+        scheduler.add("a", 1)
+        scheduler.take(0)
+        self.assertIn("a", scheduler._buckets)
+
+        scheduler.take(1)
+        self.assertNotIn("a", scheduler._buckets)
@@ -0,0 +1,139 @@
+import json
+from unittest.mock import patch
+from uuid import uuid4
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from freezegun import freeze_time
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from task_scheduler.webhook_timer.cache import timer_cache
+from task_scheduler.webhook_timer.serializers import (
+    RESCHEDULE_TIMER_SCHEMA,
+    SET_TIMER_SCHEMA,
+    RescheduleTimerSerializer,
+    SetTimerSerializer,
+)
+
+
+URL = "https://example.com/webhook"
+
+
+class FastPathTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        timer_cache.backend.clear()
+
+    def assertSameValidation(self, serializer_class, schema, data):
+        serializer = serializer_class(data=data)
+        if serializer.is_valid():
+            expected = (dict(serializer.validated_data), None)
+        else:
+            expected = (None, json.loads(json.dumps(serializer.errors)))
+        self.assertEqual(schema(data), expected)
+
+    def test_schemas_match_serializers(self):
+        """Test the schemas validate and reject the bodies exactly like their serializers."""
+        set_timer_bodies = [
+            {"hours": 1, "minutes": 30, "seconds": 15, "url": URL},
+            {"hours": "1", "minutes": 2.0, "seconds": " 3 ", "url": f" {URL} ", "extra": True},
+            {"hours": -1, "minutes": 1.5, "seconds": True, "url": "invalid"},
+            {"hours": None, "minutes": "", "seconds": [], "url": 5},
+            {"hours": 1, "minutes": 0, "seconds": 0, "url": ""},
+            {"hours": 0, "minutes": 0, "seconds": 0, "url": URL},
+            {"hours": 1, "url": URL},
+            {"interval": 60, "url": URL},
+            {"interval": 0, "cron": "* * * * *", "url": URL},
+            {"interval": 60, "cron": "* * * * *", "url": URL},
+            {"cron": "*/15 9-17 * * mon-fri", "seconds": 5, "url": URL},
+            {"cron": "61 * * * *", "url": URL},
+            {"cron": "x" * 256, "url": URL},
+            {"seconds": "9" * 1001, "url": URL},
+            {"hours": 0, "minutes": 0, "seconds": 0, "milliseconds": 250, "url": URL},
+            {"fire_at": "2999-01-01T00:00:00.250+02:00", "url": URL},
+            {"fire_at": "2999-01-01T00:00:00", "seconds": 1, "url": URL},
+            {"fire_at": "2000-01-01T00:00:00Z", "url": URL},
+            {"fire_at": "2999-13-01", "milliseconds": -1, "url": URL},
+            {},
+            [],
+            "body",
+        ]
+        for data in set_timer_bodies:
+            with self.subTest(data=data):
+                self.assertSameValidation(SetTimerSerializer, SET_TIMER_SCHEMA, data)
+
+        for data in [
+            {"hours": 0, "minutes": 2, "seconds": 0},
+            {"hours": 0, "minutes": 0, "seconds": 0},
+            {"hours": 0, "seconds": "x"},
+            {"milliseconds": 1},
+            {"fire_at": "2999-01-01T00:00:00.001Z"},
+        ]:
+            with self.subTest(data=data):
+                self.assertSameValidation(RescheduleTimerSerializer, RESCHEDULE_TIMER_SCHEMA, data)
+
+    @freeze_time("2025-01-01 00:00:00")
+    @override_settings(TIMER_DISPATCH_MODE="dispatcher")
+    def test_endpoints_on_both_paths(self):
+        """Test the timer endpoints answer the same with and without the fast path."""
+        for fast_path in (False, True):
+            with self.subTest(fast_path=fast_path), override_settings(TIMER_FAST_PATH=fast_path):
+                payload = {"hours": 0, "minutes": 1, "seconds": 30, "url": URL}
+                response = self.client.post(reverse("set_timer"), payload, format="json")
+                self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+                self.assertEqual(response["Content-Type"], "application/json")
+                timer_id = response.json()["id"]
+                self.assertEqual(response.json()["time_left"], 90)
+
+                response = self.client.get(reverse("get_timer", args=[timer_id]))
+                self.assertEqual(response.json(), {"id": timer_id, "time_left": 90})
+
+                response = self.client.patch(
+                    reverse("get_timer", args=[timer_id]),
+                    {"hours": 0, "minutes": 0, "seconds": 0},
+                    format="json",
+                )
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertEqual(
+                    response.json(),
+                    {
+                        "error": {
+                            "non_field_errors": ["Timer duration must be greater than 0 seconds."]
+                        }
+                    },
+                )
+
+                response = self.client.post(
+                    reverse("set_timer"), {"hours": -1, "url": "invalid"}, format="json"
+                )
+                self.assertEqual(
+                    response.json()["error"],
+                    {
+                        "hours": ["Ensure this value is greater than or equal to 0."],
+                        "url": ["Enter a valid URL."],
+                    },
+                )
+
+                # Errors raised outside the views are formatted by custom_exception_handler
+                response = self.client.post(
+                    reverse("set_timer"), "{not json", content_type="application/json"
+                )
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertTrue(response.json()["error"].startswith("JSON parse error - "))
+
+                response = self.client.post(reverse("set_timer"), "x", content_type="text/plain")
+                self.assertEqual(response.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+                self.assertIn("error", response.json())
+
+    @override_settings(TIMER_FAST_PATH=True, TIMER_DISPATCH_MODE="eta")
+    @patch("task_scheduler.webhook_timer.tasks.start_timer.apply_async")
+    def test_fast_path_form_body(self, mock_start_timer_apply_async):
+        """Test a body which is not JSON is still parsed by DRF on the fast path."""
+        mock_start_timer_apply_async.return_value.id = str(uuid4())
+        response = self.client.post(
+            reverse("set_timer"), {"hours": 1, "minutes": 0, "seconds": 0, "url": URL}
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()["time_left"], 3600)
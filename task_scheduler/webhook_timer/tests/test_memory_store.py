@@ -0,0 +1,175 @@
+import tempfile
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+from uuid import UUID, uuid4
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from freezegun import freeze_time
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from task_scheduler.utils.webhook_sink import WebhookSink
+from task_scheduler.webhook_timer.cache import timer_cache
+from task_scheduler.webhook_timer.delivery import session_pool
+from task_scheduler.webhook_timer.local_dispatcher import LocalDispatcher
+from task_scheduler.webhook_timer.memory_store import MemoryTimerStore
+from task_scheduler.webhook_timer.models import WebhookTimer
+from task_scheduler.webhook_timer.timer_store import close_timer_stores, get_timer_store
+from task_scheduler.webhook_timer.utils.exceptions import WebhookTriggerError
+
+
+class MemoryTimerStoreTests(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.now = datetime.now(timezone.utc).replace(microsecond=0)
+
+    def open_store(self) -> MemoryTimerStore:
+        store = MemoryTimerStore(self.directory.name, shard_count=4, fsync_interval=0)
+        store.open()
+        return store
+
+    def crash(self, store: MemoryTimerStore):
+        # Leaves the logs as they are, only the lock is released as the process would
+        store._lock_file.close()
+        store._lock_file = None
+
+    def test_timers_are_recovered_from_the_log_and_the_snapshots(self):
+        """Test the timers are the same after reopening the store, with or without a snapshot."""
+        store = self.open_store()
+        timer_ids = [uuid4() for _ in range(3)]
+        for index, timer_id in enumerate(timer_ids):
+            store.create(
+                timer_id, "https://example.com/webhook", self.now + timedelta(minutes=index)
+            )
+        self.assertTrue(store.cancel(timer_ids[0]))
+        self.assertEqual(store.move(timer_ids[1], self.now + timedelta(hours=1)), 1)
+        self.crash(store)
+
+        # The last record, cut short by the crash, is ignored
+        with open(store._get_shard(timer_ids[2]).wal_path, "ab") as wal:
+            wal.write(b'{"id": "')
+
+        expected = {
+            timer_ids[0]: (self.now, True),
+            timer_ids[1]: (self.now + timedelta(hours=1), False),
+            timer_ids[2]: (self.now + timedelta(minutes=2), False),
+        }
+        store = self.open_store()
+        self.assertEqual(store.lookup_many(timer_ids), expected)
+        with self.assertRaises(RuntimeError):
+            self.open_store()
+
+        store.close()
+        store = self.open_store()
+        self.assertEqual(store.lookup_many(timer_ids), expected)
+        self.assertEqual(store._get_shard(timer_ids[1]).wal_path.stat().st_size, 0)
+        store.close()
+
+    @patch("task_scheduler.webhook_timer.local_dispatcher.trigger_webhook")
+    def test_local_dispatcher_fires_due_timers(self, mock_trigger_webhook: MagicMock):
+        """Test the due timers are fired once, the failed ones retried and the recurring moved."""
+        store = self.open_store()
+        self.addCleanup(store.close)
+        one_shot, failing, recurring, later = uuid4(), uuid4(), uuid4(), uuid4()
+        store.create(one_shot, "https://example.com/one-shot", self.now)
+        store.create(failing, "https://example.com/failing", self.now)
+        store.create(recurring, "https://example.com/recurring", self.now, interval=60)
+        store.create(later, "https://example.com/later", self.now + timedelta(minutes=5))
+
+        def trigger_webhook(url: str, timer_id: str, attempt: int):
+            if timer_id == str(failing):
+                raise WebhookTriggerError("Service Unavailable")
+
+        mock_trigger_webhook.side_effect = trigger_webhook
+        dispatcher = LocalDispatcher(store, batch_size=2)
+
+        self.assertEqual(dispatcher.tick(now=self.now.timestamp()), 3)
+        self.assertEqual(dispatcher.tick(now=self.now.timestamp()), 0)
+        self.assertEqual(mock_trigger_webhook.call_count, 3)
+
+        timers = {
+            timer_id: store._get_shard(timer_id).timers[timer_id]
+            for timer_id in (one_shot, failing, recurring, later)
+        }
+        self.assertEqual(timers[one_shot].state, WebhookTimer.State.DELIVERED)
+        self.assertEqual(timers[failing].state, WebhookTimer.State.FAILED)
+        self.assertFalse(timers[failing].is_url_called)
+        self.assertEqual(timers[failing].attempts, 1)
+        self.assertEqual(timers[recurring].state, WebhookTimer.State.PENDING)
+        self.assertEqual(timers[recurring].expires_at, self.now + timedelta(seconds=60))
+        self.assertEqual(timers[later].state, WebhookTimer.State.PENDING)
+
+        # The failed webhook is retried after its backoff, attempt 2
+        self.assertEqual(dispatcher.tick(now=timers[failing].due_at), 1)
+        self.assertEqual(mock_trigger_webhook.call_args.kwargs["attempt"], 2)
+
+    def test_local_dispatcher_prepares_upcoming_timers(self):
+        """Test the connections of the timers due within the look-ahead are opened beforehand."""
+        store = self.open_store()
+        self.addCleanup(store.close)
+        session_pool.close()
+        self.addCleanup(session_pool.close)
+
+        with WebhookSink() as soon_sink, WebhookSink() as later_sink:
+            soon = [uuid4() for _ in range(3)]
+            for timer_id in soon:
+                store.create(timer_id, soon_sink.url, self.now + timedelta(seconds=1))
+            store.create(uuid4(), later_sink.url, self.now + timedelta(seconds=10))
+            self.assertCountEqual(
+                [timer.id for timer in store.upcoming(self.now.timestamp() + 2)], soon
+            )
+
+            dispatcher = LocalDispatcher(store, lookahead=2)
+            self.assertEqual(dispatcher.prepare(now=self.now.timestamp()), 3)
+            self.assertEqual(dispatcher.prepare(now=self.now.timestamp()), 0)
+
+            # The webhooks are sent over the connections opened ahead
+            self.assertEqual(dispatcher.tick(now=self.now.timestamp() + 1), 3)
+            self.assertEqual(len(soon_sink.received), 3)
+            self.assertEqual(soon_sink.connection_count, 3)
+            self.assertEqual(later_sink.connection_count, 0)
+
+
+class MemoryStoreViewTests(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(
+            TIMER_STORE_BACKEND="memory", TIMER_STORE_DIR=directory.name
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(close_timer_stores)
+        timer_cache.backend.clear()
+
+    @freeze_time("2025-01-01 00:00:00")
+    @patch("task_scheduler.webhook_timer.tasks.start_timer.apply_async")
+    def test_timer_endpoints(self, mock_start_timer_apply_async: MagicMock):
+        """Test the timer endpoints store the timers in memory, without the database or broker."""
+        client = APIClient()
+        payload = {"hours": 0, "minutes": 1, "seconds": 0, "url": "https://example.com/webhook"}
+
+        with self.assertNumQueries(0):
+            response = client.post(reverse("set_timer"), payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        timer_id = response.json()["id"]
+        timer_url = reverse("get_timer", args=[timer_id])
+
+        timer_cache.backend.clear()
+        response = client.get(timer_url)
+        self.assertEqual(response.json(), {"id": timer_id, "time_left": 60})
+
+        response = client.patch(timer_url, {"hours": 0, "minutes": 5, "seconds": 0}, format="json")
+        self.assertEqual(response.json()["time_left"], 300)
+        self.assertEqual(client.delete(timer_url).status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(client.delete(timer_url).status_code, status.HTTP_409_CONFLICT)
+        response = client.delete(reverse("get_timer", args=[str(uuid4())]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        self.assertEqual(mock_start_timer_apply_async.call_count, 0)
+        self.assertFalse(WebhookTimer.objects.exists())
+        self.assertTrue(get_timer_store().lookup(UUID(timer_id)).is_url_called)
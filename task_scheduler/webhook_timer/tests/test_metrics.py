@@ -0,0 +1,150 @@
+import os
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from freezegun import freeze_time
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from task_scheduler.utils.metrics import (
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsRegistry,
+    SnapshotWriter,
+    merge_snapshots,
+    read_snapshots,
+    render,
+)
+from task_scheduler.utils.webhook_sink import WebhookSink
+from task_scheduler.webhook_timer.models import WebhookTimer
+from task_scheduler.webhook_timer.tasks import start_timers
+
+
+def get_sample(metrics: str, sample: str) -> float:
+    """Return the value of a sample, e.g. 'name{label="value"}', of rendered metrics, 0 if none."""
+    for line in metrics.splitlines():
+        name, _, value = line.rpartition(" ")
+        if name == sample:
+            return float(value)
+    return 0.0
+
+
+class MetricsRegistryTests(SimpleTestCase):
+
+    def test_render_metrics_recorded_by_threads(self):
+        """Test the values recorded by concurrent threads are all counted and rendered."""
+        registry = MetricsRegistry()
+        counter = Counter("deliveries_total", "Deliveries.", ("outcome",), registry=registry)
+        histogram = Histogram("latency_seconds", "Latency.", buckets=(0.1, 1), registry=registry)
+        gauge = Gauge("backlog", 'Backlog "now".', registry=registry)
+        gauge.set(7)
+
+        def record():
+            for _ in range(1000):
+                counter.labels("delivered").inc()
+                histogram.observe(0.5)
+
+        threads = [threading.Thread(target=record) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        histogram.observe(0.05)
+        counter.labels(outcome="failed").inc(2)
+
+        metrics = render(registry.collect())
+        self.assertIn('# HELP backlog Backlog "now".\n# TYPE backlog gauge\nbacklog 7\n', metrics)
+        self.assertEqual(get_sample(metrics, 'deliveries_total{outcome="delivered"}'), 8000)
+        self.assertEqual(get_sample(metrics, 'deliveries_total{outcome="failed"}'), 2)
+        self.assertEqual(get_sample(metrics, 'latency_seconds_bucket{le="0.1"}'), 1)
+        self.assertEqual(get_sample(metrics, 'latency_seconds_bucket{le="1"}'), 8001)
+        self.assertEqual(get_sample(metrics, 'latency_seconds_bucket{le="+Inf"}'), 8001)
+        self.assertEqual(get_sample(metrics, "latency_seconds_count"), 8001)
+        self.assertAlmostEqual(get_sample(metrics, "latency_seconds_sum"), 4000.05)
+
+        with self.assertRaises(ValueError):
+            Counter("backlog", "Duplicate.", registry=registry)
+
+    def test_merge_process_snapshots(self):
+        """Test the snapshots written by several processes are merged by the reader."""
+        registry = MetricsRegistry()
+        counter = Counter("fired_total", "Fired.", registry=registry)
+
+        with tempfile.TemporaryDirectory() as directory:
+            counter.inc(3)
+            SnapshotWriter(directory, interval=60, registry=registry).write()
+            # The snapshot of another process
+            with open(os.path.join(directory, "1.json"), "w") as file:
+                file.write('{"fired_total": ' + '{"type": "counter", "help": "Fired.", ')
+                file.write('"labelnames": [], "values": {"[]": [4.0]}}}')
+
+            snapshots = read_snapshots(directory)
+            self.assertEqual(len(snapshots), 2)
+            self.assertEqual(len(read_snapshots(directory, exclude_pid=os.getpid())), 1)
+
+        metrics = render(merge_snapshots(snapshots))
+        self.assertEqual(get_sample(metrics, "fired_total"), 7)
+
+
+class MetricsViewTests(TestCase):
+
+    def setUp(self):
+        caches["shared"].clear()
+
+    @override_settings(TIMER_DISPATCH_MODE="dispatcher")
+    def test_metrics_of_created_and_fired_timers(self):
+        """Test the metrics exposed by GET /metrics follow the timers created and fired."""
+        client = APIClient()
+        before = client.get(reverse("metrics")).content.decode()
+
+        with WebhookSink() as sink:
+            response = client.post(
+                reverse("set_timer"),
+                {"hours": 0, "minutes": 0, "seconds": 1, "url": sink.url},
+                format="json",
+            )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            late_timer = WebhookTimer.objects.create(
+                id=uuid4(),
+                url=sink.url,
+                expires_at=datetime.now(timezone.utc) - timedelta(seconds=20),
+            )
+            # Fired once due, with a lateness below a second
+            with freeze_time(datetime.now(timezone.utc) + timedelta(seconds=1)):
+                start_timers([response.json()["id"], str(late_timer.id)])
+
+        response = client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        after = response.content.decode()
+
+        for sample, increase in (
+            ('timer_created_total{kind="one_shot"}', 1),
+            (
+                'timer_http_request_duration_seconds_count{endpoint="timer",method="POST",'
+                'status="201"}',
+                1,
+            ),
+            ('timer_deliveries_total{outcome="delivered"}', 2),
+            ('webhook_request_duration_seconds_count{status_class="2xx"}', 2),
+            ("timer_fire_lateness_seconds_count", 2),
+            ('timer_fire_lateness_seconds_bucket{le="10"}', 1),
+        ):
+            with self.subTest(sample=sample):
+                self.assertEqual(get_sample(after, sample) - get_sample(before, sample), increase)
+
+        # The timer counts were cached by the first scrape, before the timers were created
+        self.assertEqual(get_sample(after, "timer_pending"), 0)
+        caches["shared"].clear()
+        WebhookTimer.objects.create(
+            id=uuid4(), url=sink.url, expires_at=datetime.now(timezone.utc) - timedelta(seconds=1)
+        )
+        after = client.get(reverse("metrics")).content.decode()
+        self.assertEqual(get_sample(after, "timer_pending"), 1)
+        self.assertEqual(get_sample(after, "timer_overdue"), 1)
@@ -0,0 +1,144 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from freezegun import freeze_time
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from task_scheduler.utils.webhook_sink import WebhookSink
+from task_scheduler.webhook_timer.models import WebhookTimer
+from task_scheduler.webhook_timer.tasks import start_timers
+from task_scheduler.webhook_timer.utils.cron import CronExpression
+
+
+class CronExpressionTests(SimpleTestCase):
+
+    def next_occurrences(self, expression: str, after: datetime, count: int = 3) -> list[str]:
+        cron = CronExpression(expression)
+        occurrences = []
+        for _ in range(count):
+            after = cron.next_after(after)
+            occurrences.append(after.strftime("%Y-%m-%d %H:%M"))
+        return occurrences
+
+    def test_next_occurrences(self):
+        """Test the next occurrences skip the months, days, hours and minutes not matching."""
+        after = datetime(2025, 1, 1, 12, 30, 15, tzinfo=timezone.utc)
+
+        self.assertEqual(
+            self.next_occurrences("*/15 * * * *", after),
+            ["2025-01-01 12:45", "2025-01-01 13:00", "2025-01-01 13:15"],
+        )
+        self.assertEqual(
+            self.next_occurrences("0 9 * * mon-fri", after),
+            ["2025-01-02 09:00", "2025-01-03 09:00", "2025-01-06 09:00"],
+        )
+        self.assertEqual(
+            self.next_occurrences("0 0 29 2 *", after),
+            ["2028-02-29 00:00", "2032-02-29 00:00", "2036-02-29 00:00"],
+        )
+        # A restricted day of the month or day of the week matches (Friday 3, 10, Monday 13)
+        self.assertEqual(
+            self.next_occurrences("0 0 13 * 5", after),
+            ["2025-01-03 00:00", "2025-01-10 00:00", "2025-01-13 00:00"],
+        )
+        self.assertEqual(self.next_occurrences("@monthly", after, 1), ["2025-02-01 00:00"])
+
+    def test_invalid_expressions(self):
+        """Test the invalid expressions are rejected when parsed."""
+        for expression in ("* * *", "61 * * * *", "*/0 * * * *", "5-1 * * * *", "0 0 31 2 *"):
+            with self.subTest(expression=expression), self.assertRaises(ValueError):
+                CronExpression(expression)
+
+
+class RecurringTimerViewTests(TestCase):
+
+    @freeze_time("2025-01-01 00:00:00")
+    @override_settings(TIMER_DISPATCH_MODE="dispatcher")
+    def test_set_recurring_timers(self):
+        """Test a recurring timer is stored once with its schedule and its first occurrence."""
+        client = APIClient()
+        url = "https://example.com/webhook"
+
+        response = client.post(reverse("set_timer"), {"interval": 90, "url": url}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()["time_left"], 90)
+
+        response = client.post(
+            reverse("set_timer"), {"cron": "30 9 * * *", "url": url}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        webhook_timer = WebhookTimer.objects.get(id=response.json()["id"])
+        self.assertEqual(webhook_timer.cron, "30 9 * * *")
+        self.assertEqual(webhook_timer.expires_at, datetime(2025, 1, 1, 9, 30, tzinfo=timezone.utc))
+
+    def test_set_recurring_timer_invalid(self):
+        """Test invalid schedules and one-shot timers without a duration are rejected."""
+        client = APIClient()
+        url = "https://example.com/webhook"
+
+        for payload, field in (
+            ({"cron": "61 * * * *", "url": url}, "cron"),
+            ({"interval": 0, "url": url}, "interval"),
+            ({"interval": 60, "cron": "* * * * *", "url": url}, "non_field_errors"),
+            ({"minutes": 1, "url": url}, "hours"),
+        ):
+            with self.subTest(payload=payload):
+                response = client.post(reverse("set_timer"), payload, format="json")
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn(field, response.json()["error"])
+
+        self.assertFalse(WebhookTimer.objects.exists())
+
+
+class RecurringTimerDeliveryTests(TestCase):
+
+    def setUp(self):
+        caches["shared"].clear()
+
+    @override_settings(TIMER_DISPATCH_MODE="dispatcher")
+    def test_delivered_recurring_timer_is_rescheduled(self):
+        """Test a delivered recurring timer moves to its next occurrence and stays pending."""
+        now = datetime.now(timezone.utc)
+
+        with WebhookSink() as sink:
+            recurring = WebhookTimer.objects.create(
+                id=uuid4(), url=sink.url, expires_at=now - timedelta(seconds=250), interval=100
+            )
+            one_shot = WebhookTimer.objects.create(id=uuid4(), url=sink.url, expires_at=now)
+
+            start_timers([str(recurring.id), str(one_shot.id)])
+            self.assertEqual(len(sink.received), 2)
+
+        recurring.refresh_from_db()
+        # The occurrences missed in the meantime are skipped
+        self.assertEqual(recurring.expires_at, now + timedelta(seconds=50))
+        self.assertEqual(recurring.state, WebhookTimer.State.PENDING)
+        self.assertFalse(recurring.is_url_called)
+        self.assertIsNone(recurring.lease_owner)
+        self.assertTrue(WebhookTimer.objects.get(id=one_shot.id).is_url_called)
+
+    @override_settings(TIMER_DISPATCH_MODE="eta")
+    @patch("task_scheduler.webhook_timer.publishing.start_timer.apply_async")
+    def test_rejected_recurring_timer_waits_for_next_occurrence(
+        self, mock_start_timer_apply_async: MagicMock
+    ):
+        """Test a recurring timer whose webhook is given up is published for its next occurrence."""
+        with WebhookSink(respond=lambda count: 410) as sink:
+            recurring = WebhookTimer.objects.create(
+                id=uuid4(), url=sink.url, expires_at=datetime.now(timezone.utc), cron="@hourly"
+            )
+            start_timers([str(recurring.id)])
+
+        recurring.refresh_from_db()
+        self.assertFalse(recurring.is_url_called)
+        self.assertEqual((recurring.expires_at.minute, recurring.expires_at.second), (0, 0))
+        mock_start_timer_apply_async.assert_called_once()
+        self.assertEqual(mock_start_timer_apply_async.call_args.kwargs["eta"], recurring.expires_at)
+        self.assertEqual(
+            mock_start_timer_apply_async.call_args.kwargs["task_id"], str(recurring.id)
+        )
@@ -0,0 +1,209 @@
+import multiprocessing
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from uuid import uuid4
+
+from django.core.cache import caches
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from task_scheduler.webhook_timer.dispatcher import TimerDispatcher
+from task_scheduler.webhook_timer.models import DispatcherShard, WebhookTimer, get_shard
+from task_scheduler.webhook_timer.sharding import ShardCoordinator
+
+
+def run_node(node_id: str, lease: float, stop_at: float, log_path: str):
+    """Run a dispatcher node until the given time, logging the ids of the timers it enqueues.
+
+    The enqueued timers are claimed, logged and marked delivered right away, in place of the
+    start_timers task.
+    """
+
+    def enqueue(timer_ids: list, versions: list[int]):
+        # A failed enqueue is retried by the dispatcher, only the claimed timers count as enqueued
+        lease_owner, webhook_timers = WebhookTimer.objects.claim(timer_ids)
+        with open(log_path, "a") as log:
+            log.write("".join(f"{webhook_timer.id}\n" for webhook_timer in webhook_timers))
+        WebhookTimer.objects.filter(
+            id__in=[webhook_timer.id for webhook_timer in webhook_timers]
+        ).mark_delivered(lease_owner)
+
+    dispatcher = TimerDispatcher(
+        horizon=10,
+        poll_interval=0.2,
+        tick=0.05,
+        enqueue=enqueue,
+        coordinator=ShardCoordinator(node_id=node_id, lease=lease),
+    )
+    stop_event = threading.Event()
+    threading.Timer(stop_at - time.time(), stop_event.set).start()
+    dispatcher.run_forever(stop_event)
+
+
+class ShardCoordinatorTests(TestCase):
+
+    def setUp(self):
+        caches["shared"].clear()
+        self.now = datetime(2025, 1, 1, tzinfo=timezone.utc).timestamp()
+
+    def heartbeat(self, *coordinators: ShardCoordinator, seconds: float = 0) -> list[set]:
+        self.now += seconds
+        return [set(coordinator.heartbeat(self.now)) for coordinator in coordinators]
+
+    def assertShardedOnce(self, owned: list[set], shard_count: int = 8):
+        self.assertEqual(sum(len(shards) for shards in owned), shard_count)
+        self.assertEqual(set().union(*owned), set(range(shard_count)))
+
+    def test_shards_are_rebalanced_when_nodes_join_and_die(self):
+        """Test the shards are shared out evenly between the alive nodes, each held by one node."""
+        first, second, third = (
+            ShardCoordinator(node_id=node_id, shard_count=8, lease=10)
+            for node_id in ("first", "second", "third")
+        )
+        self.assertEqual(self.heartbeat(first), [set(range(8))])
+
+        # A node joining gets its share once the others have given theirs up
+        self.assertEqual(self.heartbeat(second, seconds=1), [set()])
+        owned = self.heartbeat(first, second, seconds=1)
+        self.assertEqual([len(shards) for shards in owned], [4, 4])
+        self.assertShardedOnce(owned)
+
+        self.heartbeat(third, seconds=1)
+        owned = self.heartbeat(first, second, third, seconds=1)
+        self.assertEqual([len(shards) for shards in owned], [3, 3, 2])
+        self.assertShardedOnce(owned)
+
+        # The shards of a node which stopped renewing its leases are taken over once they expire
+        self.assertEqual(self.heartbeat(first, second, seconds=5), owned[:2])
+        owned = self.heartbeat(first, second, seconds=5)
+        self.assertEqual([len(shards) for shards in owned], [4, 4])
+        self.assertShardedOnce(owned)
+        self.assertEqual(third.owned_at(self.now), frozenset())
+
+        # A node stopping gives its shards up right away
+        second.release()
+        self.assertEqual(self.heartbeat(first, seconds=11), [set(range(8))])
+
+    def test_dispatchers_only_load_the_timers_of_their_shards(self):
+        """Test two sharded dispatchers load every pending timer exactly once between them."""
+        expires_at = datetime.fromtimestamp(self.now, tz=timezone.utc) + timedelta(seconds=30)
+        timers = WebhookTimer.objects.bulk_create(
+            WebhookTimer(id=uuid4(), url="https://example.com/webhook", expires_at=expires_at)
+            for _ in range(40)
+        )
+        self.assertEqual(
+            list(WebhookTimer.objects.order_by("id").values_list("shard", flat=True)),
+            [get_shard(timer.id) for timer in sorted(timers, key=lambda timer: str(timer.id))],
+        )
+
+        dispatchers = [
+            TimerDispatcher(
+                horizon=60,
+                clock=lambda: self.now,
+                coordinator=ShardCoordinator(node_id=node_id, lease=10),
+            )
+            for node_id in ("first", "second")
+        ]
+        # The first node holds every shard until the second one joins and gets its share
+        for seconds in (0, 5):
+            self.now += seconds
+            for dispatcher in dispatchers:
+                dispatcher.tick()
+
+        loaded = [{key[0] for key in dispatcher._scheduled} for dispatcher in dispatchers]
+        self.assertTrue(all(loaded))
+        self.assertFalse(loaded[0] & loaded[1])
+        self.assertEqual(loaded[0] | loaded[1], {timer.id for timer in timers})
+        self.assertEqual(
+            DispatcherShard.objects.filter(owner__isnull=True).count(), 0, "every shard is owned"
+        )
+
+    @override_settings(WEBHOOK_HOST_RATE=10, WEBHOOK_HOST_BURST=10, TIMER_DISPATCHER_MAX_RATE=0)
+    def test_dispatchers_share_the_host_limits_and_publish_their_own_queue_depths(self):
+        """Test the dispatchers together enqueue a host at its rate and report all its timers."""
+        expires_at = datetime.fromtimestamp(self.now, tz=timezone.utc) + timedelta(seconds=10)
+        WebhookTimer.objects.bulk_create(
+            WebhookTimer(id=uuid4(), url="https://example.com/webhook", expires_at=expires_at)
+            for _ in range(40)
+        )
+
+        enqueued = {"first": [], "second": []}
+        dispatchers = [
+            TimerDispatcher(
+                horizon=60,
+                clock=lambda: self.now,
+                enqueue=lambda timer_ids, versions, node_id=node_id: enqueued[node_id].extend(
+                    timer_ids
+                ),
+                coordinator=ShardCoordinator(node_id=node_id, lease=10),
+            )
+            for node_id in enqueued
+        ]
+        for seconds in (0, 5, 5):
+            self.now += seconds
+            for dispatcher in dispatchers:
+                dispatcher.tick()
+
+        # Each node holds half of the shards, so half of the burst of the host
+        self.assertEqual([len(timer_ids) for timer_ids in enqueued.values()], [5, 5])
+        response = APIClient().get(reverse("webhook_queues"))
+        self.assertEqual(response.json()["hosts"], {"https://example.com": 30})
+        self.assertEqual(response.json()["total"], 30)
+
+
+class MultiProcessShardingTests(TransactionTestCase):
+
+    def setUp(self):
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            self.skipTest("the processes need a database they can share")
+
+    def test_timers_are_enqueued_once_by_the_alive_nodes(self):
+        """Test 3 node processes share the timers, one of them being killed before they expire.
+
+        Every timer is enqueued by exactly one node, the timers of the shards of the killed node
+        by the nodes which took them over.
+        """
+        fork_context = multiprocessing.get_context("fork")
+        started_at = time.time()
+        expires_at = datetime.fromtimestamp(started_at + 3, tz=timezone.utc)
+        timer_ids = {
+            str(timer.id)
+            for timer in WebhookTimer.objects.bulk_create(
+                WebhookTimer(
+                    id=uuid4(), url=f"https://{index % 7}.example.com", expires_at=expires_at
+                )
+                for index in range(300)
+            )
+        }
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        log_paths = [Path(directory.name) / f"node-{index}.log" for index in range(3)]
+        # The children open their own connections instead of sharing those of the parent
+        connections.close_all()
+        processes = [
+            fork_context.Process(
+                target=run_node, args=(f"node-{index}", 0.6, started_at + 5, str(log_path))
+            )
+            for index, log_path in enumerate(log_paths)
+        ]
+        for process in processes:
+            process.start()
+
+        time.sleep(1)
+        processes[2].kill()
+        for process in processes:
+            process.join(timeout=30)
+
+        enqueued = [
+            log_path.read_text().split() if log_path.exists() else [] for log_path in log_paths
+        ]
+        self.assertEqual(enqueued[2], [])
+        self.assertTrue(enqueued[0] and enqueued[1])
+        self.assertEqual(sorted(enqueued[0] + enqueued[1]), sorted(timer_ids))
+        self.assertFalse(WebhookTimer.objects.exclude(state=WebhookTimer.State.DELIVERED).exists())
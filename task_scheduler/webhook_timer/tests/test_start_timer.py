@@ -1,8 +1,9 @@
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from unittest.mock import MagicMock, patch
 from uuid import uuid4
 
 from celery.exceptions import Retry
+from django.conf import settings
 from django.test import TestCase
 
 from task_scheduler.webhook_timer.models import WebhookTimer
@@ -11,10 +12,10 @@ from task_scheduler.webhook_timer.tasks import start_timer
 
 class CeleryTaskStartTimerTests(TestCase):
 
-    @patch("task_scheduler.webhook_timer.tasks.requests.post")
+    @patch("task_scheduler.webhook_timer.tasks.session_pool.post")
     @patch("celery.app.task.Context")
     def test_start_timer_success(
-        self, mock_celery_context: MagicMock, mock_requests_post: MagicMock
+        self, mock_celery_context: MagicMock, mock_session_pool_post: MagicMock
     ):
         """Test start_timer task successfully triggers webhook and updates db."""
         timer_id = str(uuid4())
@@ -26,44 +27,48 @@ class CeleryTaskStartTimerTests(TestCase):
         mock_celery_request.id = timer_id
         mock_celery_context.return_value = mock_celery_request
 
-        # Mock the requests.post method to return ok response
+        # Mock the session_pool.post method to return ok response
         mock_http_response = MagicMock()
         mock_http_response.ok = True
-        mock_requests_post.return_value = mock_http_response
+        mock_session_pool_post.return_value = mock_http_response
 
         WebhookTimer.objects.create(id=timer_id, url=webhook_url, expires_at=datetime.now())
 
-        start_timer()
+        start_timer(version=0)
 
         # Assert the payload sent to webhook url
-        self.assertEqual(mock_requests_post.call_count, 1)
-        mock_requests_post.assert_called_with(webhook_url, json=expected_payload_to_url)
+        self.assertEqual(mock_session_pool_post.call_count, 1)
+        mock_session_pool_post.assert_called_with(
+            webhook_url, json=expected_payload_to_url, timeout=settings.WEBHOOK_TIMEOUT
+        )
 
         # Assert if the task entry in the database gets updated after executing start_timer task
         webhook_timer = WebhookTimer.objects.get(id=timer_id)
         self.assertTrue(webhook_timer.is_url_called)
 
     @patch("task_scheduler.webhook_timer.tasks.start_timer.retry")
-    @patch("task_scheduler.webhook_timer.tasks.requests.post")
+    @patch("task_scheduler.webhook_timer.tasks.session_pool.post")
     @patch("celery.app.task.Context")
     def test_start_timer_retry(
         self,
         mock_celery_context: MagicMock,
-        mock_requests_post: MagicMock,
+        mock_session_pool_post: MagicMock,
         mock_start_timer_retry: MagicMock,
     ):
         """Test start_timer task retries if triggering webhook fails."""
         timer_id = str(uuid4())
 
-        # Mock the request.id property of the celery task object
+        # Mock the request.id and request.retries properties of the celery task object
         mock_celery_request = MagicMock()
         mock_celery_request.id = timer_id
+        mock_celery_request.retries = 0
         mock_celery_context.return_value = mock_celery_request
 
-        # Mock the requests.post method to retrun not ok response
+        # Mock the session_pool.post method to retrun not ok response
         mock_http_response = MagicMock()
         mock_http_response.ok = False
-        mock_requests_post.return_value = mock_http_response
+        mock_http_response.status_code = 503
+        mock_session_pool_post.return_value = mock_http_response
 
         # Mock the retry method of task to raise Retry exception when called
         mock_start_timer_retry.side_effect = Retry()
@@ -74,9 +79,9 @@ class CeleryTaskStartTimerTests(TestCase):
 
         # Assert if the task gets retried after triggering webhook fails
         with self.assertRaises(Retry):
-            start_timer()
+            start_timer(version=0)
 
-    @patch("task_scheduler.webhook_timer.tasks.__trigger_webhook")
+    @patch("task_scheduler.webhook_timer.tasks.trigger_webhook")
     @patch("celery.app.task.Context")
     def test_start_timer_no_db_entry(
         self, mock_celery_context: MagicMock, mock_trigger_webhook: MagicMock
@@ -90,5 +95,79 @@ class CeleryTaskStartTimerTests(TestCase):
         mock_celery_context.return_value = mock_celery_request
 
         # With no entry in the database, test if the trigger_webhook function gets called
+        start_timer(version=0)
+        self.assertEqual(mock_trigger_webhook.call_count, 0)
+
+    @patch("task_scheduler.webhook_timer.tasks.start_timer.retry")
+    @patch("task_scheduler.webhook_timer.tasks.trigger_webhook")
+    @patch("celery.app.task.Context")
+    def test_start_timer_in_flight(
+        self,
+        mock_celery_context: MagicMock,
+        mock_trigger_webhook: MagicMock,
+        mock_start_timer_retry: MagicMock,
+    ):
+        """Test a copy of the task finding the timer claimed checks it again after the lease."""
+        timer_id = str(uuid4())
+
+        # Mock the request.id property of the celery task object
+        mock_celery_request = MagicMock()
+        mock_celery_request.id = timer_id
+        mock_celery_context.return_value = mock_celery_request
+
+        mock_start_timer_retry.side_effect = Retry()
+
+        WebhookTimer.objects.create(
+            id=timer_id, url="https://example.com/webhook", expires_at=datetime.now()
+        )
+        WebhookTimer.objects.claim([timer_id], lease=30)
+
+        # Assert the webhook is not fired while another copy of the task holds the timer
+        with self.assertRaises(Retry):
+            start_timer(version=0)
+        self.assertEqual(mock_trigger_webhook.call_count, 0)
+        self.assertAlmostEqual(mock_start_timer_retry.call_args.kwargs["countdown"], 31, delta=1)
+
+    @patch("task_scheduler.webhook_timer.tasks.session_pool.post")
+    @patch("celery.app.task.Context")
+    def test_start_timer_without_version(
+        self, mock_celery_context: MagicMock, mock_session_pool_post: MagicMock
+    ):
+        """Test a task published before the timers had a version fires them at version 0."""
+        timer_id = str(uuid4())
+        mock_celery_context.return_value = MagicMock(id=timer_id, retries=0)
+        mock_session_pool_post.return_value.ok = True
+
+        WebhookTimer.objects.create(
+            id=timer_id, url="https://example.com/webhook", expires_at=datetime.now()
+        )
+
         start_timer()
+        self.assertEqual(mock_session_pool_post.call_count, 1)
+        self.assertTrue(WebhookTimer.objects.get(id=timer_id).is_url_called)
+
+    @patch("task_scheduler.webhook_timer.tasks.start_timer.apply_async")
+    @patch("task_scheduler.webhook_timer.tasks.trigger_webhook")
+    @patch("celery.app.task.Context")
+    def test_start_timer_not_due(
+        self,
+        mock_celery_context: MagicMock,
+        mock_trigger_webhook: MagicMock,
+        mock_start_timer_apply_async: MagicMock,
+    ):
+        """Test a task running before the expiry time of its timer is enqueued again for it."""
+        timer_id = str(uuid4())
+        mock_celery_context.return_value = MagicMock(id=timer_id, retries=0)
+
+        webhook_timer = WebhookTimer.objects.create(
+            id=timer_id,
+            url="https://example.com/webhook",
+            expires_at=datetime.now(timezone.utc) + timedelta(seconds=30),
+        )
+
+        start_timer(version=0)
         self.assertEqual(mock_trigger_webhook.call_count, 0)
+        mock_start_timer_apply_async.assert_called_once_with(
+            task_id=timer_id, kwargs={"version": 0}, eta=webhook_timer.expires_at
+        )
+        self.assertEqual(WebhookTimer.objects.get(id=timer_id).state, WebhookTimer.State.PENDING)
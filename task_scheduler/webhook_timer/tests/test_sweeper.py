@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+from django.test import TestCase, override_settings
+
+from task_scheduler.webhook_timer.models import TimerOutbox, WebhookTimer
+from task_scheduler.webhook_timer.sweeper import TimerSweeper, get_live_task_ids
+
+
+class TimerSweeperTests(TestCase):
+
+    def setUp(self):
+        self.published = []
+        self.live_task_ids = set()
+        self.sweeper = TimerSweeper(
+            chunk_size=2,
+            get_live_task_ids=lambda: self.live_task_ids,
+            publish=lambda webhook_timers: self.published.extend(
+                webhook_timer.id for webhook_timer in webhook_timers
+            ),
+        )
+
+    def create_timers(self, offsets: list[int], **kwargs) -> list[WebhookTimer]:
+        now = datetime.now(timezone.utc)
+        return WebhookTimer.objects.bulk_create(
+            WebhookTimer(
+                id=uuid4(),
+                url="https://example.com/webhook",
+                expires_at=now + timedelta(seconds=offset),
+                **kwargs,
+            )
+            for offset in offsets
+        )
+
+    def test_sweep_republishes_orphaned_timers(self):
+        """Test only the pending timers, overdue or not, without a live task are re-published."""
+        overdue, live, orphaned, live_later = self.create_timers([-60, 10, 20, 3600])
+        self.create_timers([-30], is_url_called=True)
+        self.live_task_ids = {str(live.id), str(live_later.id)}
+
+        self.assertEqual(self.sweeper.sweep(), 2)
+        self.assertEqual(self.published, [overdue.id, orphaned.id])
+
+    def test_sweep_is_idempotent(self):
+        """Test the re-published timers are not published again once the workers hold them."""
+        webhook_timers = self.create_timers([10, 20, 30])
+
+        self.sweeper.sweep()
+        self.live_task_ids = {str(webhook_timer.id) for webhook_timer in webhook_timers}
+
+        self.assertEqual(self.sweeper.sweep(), 0)
+        self.assertEqual(len(self.published), 3)
+
+    def test_sweep_without_workers(self):
+        """Test nothing is re-published when the tasks held by the workers are unknown."""
+        self.create_timers([10])
+        self.live_task_ids = None
+
+        self.assertEqual(self.sweeper.sweep(), 0)
+        self.assertEqual(self.published, [])
+
+    @override_settings(TIMER_DISPATCH_MODE="outbox")
+    def test_sweep_skips_timers_in_the_outbox(self):
+        """Test the timers whose message is still in the outbox are not re-published."""
+        unpublished, orphaned = self.create_timers([10, 20])
+        TimerOutbox.objects.add([unpublished])
+
+        self.assertEqual(self.sweeper.sweep(), 1)
+        self.assertEqual(self.published, [orphaned.id])
+
+    @patch("task_scheduler.webhook_timer.sweeper.start_timer.app.control.inspect")
+    def test_get_live_task_ids(self, mock_inspect: MagicMock):
+        """Test the active, reserved and scheduled tasks of every worker are collected."""
+        mock_inspect.return_value.active.return_value = {"w1": [{"id": "a"}], "w2": []}
+        mock_inspect.return_value.reserved.return_value = {"w1": [{"id": "b"}]}
+        mock_inspect.return_value.scheduled.return_value = {
+            "w2": [{"eta": "2025-01-01T00:00:00", "request": {"id": "c"}}]
+        }
+
+        self.assertEqual(get_live_task_ids(timeout=1), {"a", "b", "c"})
+
+        for method in ("active", "reserved", "scheduled"):
+            getattr(mock_inspect.return_value, method).return_value = None
+        self.assertIsNone(get_live_task_ids(timeout=1))
@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+from uuid import uuid4
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from task_scheduler.webhook_timer.cache import timer_cache
+from task_scheduler.webhook_timer.models import ArchivedWebhookTimer, WebhookTimer
+
+
+class TimerArchiveTests(TestCase):
+
+    def setUp(self):
+        timer_cache.backend.clear()
+        self.now = datetime.now(timezone.utc)
+
+    def create_timer(self, days: float, **kwargs) -> WebhookTimer:
+        return WebhookTimer.objects.create(
+            id=uuid4(),
+            url="https://example.com/webhook",
+            expires_at=self.now - timedelta(days=days),
+            **kwargs,
+        )
+
+    def test_only_old_fired_timers_are_archived_in_chunks(self):
+        """Test the timers fired or cancelled before the given time are moved chunk by chunk."""
+        old_timers = [
+            self.create_timer(10, is_url_called=True, state=WebhookTimer.State.DELIVERED),
+            self.create_timer(9, is_url_called=True, state=WebhookTimer.State.FAILED),
+            self.create_timer(8, is_url_called=True, state=WebhookTimer.State.CANCELLED),
+        ]
+        recent_timer = self.create_timer(1, is_url_called=True)
+        pending_timer = self.create_timer(10)
+
+        # Two chunks of 2 timers, each read, locked, copied and deleted
+        with self.assertNumQueries(2 * 6):
+            archived = WebhookTimer.objects.archive(
+                self.now - timedelta(days=7), chunk_size=2, pause=0
+            )
+
+        self.assertEqual(archived, 3)
+        self.assertCountEqual(
+            WebhookTimer.objects.values_list("id", flat=True), [recent_timer.id, pending_timer.id]
+        )
+        archived_timers = ArchivedWebhookTimer.objects.in_bulk()
+        self.assertCountEqual(archived_timers, [timer.id for timer in old_timers])
+        for timer in old_timers:
+            self.assertEqual(archived_timers[timer.id].expires_at, timer.expires_at)
+            self.assertEqual(archived_timers[timer.id].state, timer.state)
+
+    def test_archived_timers_are_still_served(self):
+        """Test the lookups of a timer fall back to the archive."""
+        timer = self.create_timer(10, is_url_called=True, state=WebhookTimer.State.DELIVERED)
+        WebhookTimer.objects.archive(self.now - timedelta(days=7), pause=0)
+        client = APIClient()
+
+        response = client.get(reverse("get_timer", args=[timer.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {"id": str(timer.id), "time_left": 0})
+
+        timer_cache.backend.clear()
+        response = client.post(reverse("timers_status"), {"ids": [str(timer.id)]}, format="json")
+        self.assertEqual(
+            response.json()["timers"],
+            [{"id": str(timer.id), "time_left": 0, "is_url_called": True}],
+        )
+
+        response = client.delete(reverse("get_timer", args=[timer.id]))
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        response = client.get(reverse("timer_deliveries", args=[timer.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_archive_command(self):
+        """Test the command archives the timers expired before the retention period."""
+        old_timer = self.create_timer(10, is_url_called=True)
+        self.create_timer(1, is_url_called=True)
+
+        stdout = StringIO()
+        call_command("archive_timers", retention_days=7, stdout=stdout)
+
+        self.assertIn("Archived 1 timer(s)", stdout.getvalue())
+        self.assertEqual(
+            list(ArchivedWebhookTimer.objects.values_list("id", flat=True)), [old_timer.id]
+        )
@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from freezegun import freeze_time
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from task_scheduler.webhook_timer.cache import CachedTimer, LocalTimerCacheBackend, timer_cache
+from task_scheduler.webhook_timer.models import WebhookTimer
+from task_scheduler.webhook_timer.tasks import start_timers
+
+
+class LocalTimerCacheBackendTests(SimpleTestCase):
+
+    def test_entries_expire_and_least_recently_used_is_evicted(self):
+        """Test entries are dropped after their TTL and beyond the maximum number of entries."""
+        cached_timer = CachedTimer(datetime.now(timezone.utc), False)
+        backend = LocalTimerCacheBackend(ttl=10, max_entries=2)
+
+        with freeze_time("2025-01-01 00:00:00") as frozen_datetime:
+            backend.set_many({"a": cached_timer, "b": cached_timer})
+            self.assertEqual(backend.get("a"), cached_timer)
+
+            # "b" is the least recently used entry
+            backend.set_many({"c": cached_timer})
+            self.assertIsNone(backend.get("b"))
+            self.assertEqual(backend.get("a"), cached_timer)
+
+            frozen_datetime.tick(delta=timedelta(seconds=11))
+            self.assertIsNone(backend.get("a"))
+            self.assertIsNone(backend.get("c"))
+
+
+class TimerCacheTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        timer_cache.backend.clear()
+
+    def create_timer(self) -> str:
+        with patch(
+            "task_scheduler.webhook_timer.tasks.start_timer.apply_async"
+        ) as mock_apply_async:
+            mock_apply_async.return_value.id = str(uuid4())
+            payload = {"hours": 0, "minutes": 2, "seconds": 0, "url": "https://example.com/webhook"}
+            response = self.client.post(reverse("set_timer"), payload, format="json")
+
+        return response.json()["id"]
+
+    def test_get_timer_is_served_from_cache(self):
+        """Test polling a created timer does not read the database."""
+        timer_id = self.create_timer()
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("get_timer", args=[timer_id]))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["time_left"], 119)
+        self.assertEqual(timer_cache.stats()["backend"], "local")
+
+    def test_get_timer_populates_cache_on_miss(self):
+        """Test a timer missing from the cache is read once and then served from the cache."""
+        timer_id = uuid4()
+        WebhookTimer.objects.create(
+            id=timer_id,
+            url="https://example.com/webhook",
+            expires_at=datetime.now(timezone.utc) + timedelta(minutes=1),
+        )
+        hits, misses = timer_cache.hits, timer_cache.misses
+
+        with self.assertNumQueries(1):
+            self.client.get(reverse("get_timer", args=[timer_id]))
+        with self.assertNumQueries(0):
+            self.client.get(reverse("get_timer", args=[timer_id]))
+
+        self.assertEqual((timer_cache.hits - hits, timer_cache.misses - misses), (1, 1))
+
+    @override_settings(TIMER_CACHE_BACKEND="shared")
+    @patch("task_scheduler.webhook_timer.tasks.session_pool.post")
+    def test_firing_invalidates_shared_cache(self, mock_session_pool_post: MagicMock):
+        """Test firing a timer drops it from the shared cache."""
+        mock_session_pool_post.return_value.ok = True
+        timer_id = self.create_timer()
+        self.assertIsNotNone(timer_cache.get(timer_id))
+
+        with freeze_time(datetime.now(timezone.utc) + timedelta(minutes=2)):
+            start_timers([timer_id])
+
+        self.assertIsNone(timer_cache.get(timer_id))
+
+    @override_settings(TIMER_CACHE_BACKEND="none")
+    def test_disabled_cache(self):
+        """Test every poll reads the database when the cache is disabled."""
+        timer_id = self.create_timer()
+
+        with self.assertNumQueries(1):
+            self.client.get(reverse("get_timer", args=[timer_id]))
+
+    def test_cache_stats(self):
+        """Test the cache counters are exposed."""
+        response = self.client.get(reverse("timer_cache_stats"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response_data = response.json()
+        self.assertEqual(response_data["backend"], "local")
+        self.assertIn("hits", response_data)
+        self.assertIn("misses", response_data)
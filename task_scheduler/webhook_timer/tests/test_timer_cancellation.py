@@ -0,0 +1,173 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from freezegun import freeze_time
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from task_scheduler.webhook_timer.models import WebhookTimer
+from task_scheduler.webhook_timer.tasks import start_timer, start_timers
+
+
+class TimerCancellationTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.webhook_timer = WebhookTimer.objects.create(
+            id=uuid4(),
+            url="https://example.com/webhook",
+            expires_at=datetime.now(timezone.utc) + timedelta(minutes=5),
+        )
+        self.timer_url = reverse("get_timer", args=[self.webhook_timer.id])
+
+    def test_cancel_timer(self):
+        """Test a pending timer is cancelled once and its version bumped."""
+        response = self.client.delete(self.timer_url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        self.webhook_timer.refresh_from_db()
+        self.assertEqual(self.webhook_timer.state, WebhookTimer.State.CANCELLED)
+        self.assertTrue(self.webhook_timer.is_url_called)
+        self.assertEqual(self.webhook_timer.version, 1)
+
+        response = self.client.delete(self.timer_url)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        response = self.client.patch(
+            self.timer_url, {"hours": 0, "minutes": 1, "seconds": 0}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        response = self.client.delete(reverse("get_timer", args=[uuid4()]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.delete(reverse("get_timer", args=["invalid-uuid"]))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(TIMER_DISPATCH_MODE="eta")
+    @patch("task_scheduler.webhook_timer.views.start_timer.apply_async")
+    def test_reschedule_timer(self, mock_start_timer_apply_async: MagicMock):
+        """Test a rescheduled timer is published for its new expiry time with its new version."""
+        response = self.client.patch(
+            self.timer_url, {"hours": 0, "minutes": 30, "seconds": 0}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["time_left"], 1800)
+
+        self.webhook_timer.refresh_from_db()
+        self.assertEqual(self.webhook_timer.version, 1)
+        mock_start_timer_apply_async.assert_called_once_with(
+            eta=self.webhook_timer.expires_at,
+            task_id=str(self.webhook_timer.id),
+            kwargs={"version": 1},
+        )
+
+        # The cached timer has been invalidated
+        response = self.client.get(self.timer_url)
+        self.assertAlmostEqual(response.json()["time_left"], 1800, delta=1)
+
+        response = self.client.patch(
+            self.timer_url, {"hours": 0, "minutes": 0, "seconds": 0}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @patch("task_scheduler.webhook_timer.tasks.session_pool.post")
+    @patch("celery.app.task.Context")
+    def test_stale_tasks_are_dropped(
+        self, mock_celery_context: MagicMock, mock_session_pool_post: MagicMock
+    ):
+        """Test the tasks published before a timer was rescheduled do not fire it."""
+        WebhookTimer.objects.move(self.webhook_timer.id, datetime.now(timezone.utc))
+
+        mock_celery_request = MagicMock()
+        mock_celery_request.id = str(self.webhook_timer.id)
+        mock_celery_context.return_value = mock_celery_request
+
+        start_timer(version=0)
+        start_timers([str(self.webhook_timer.id)], versions={str(self.webhook_timer.id): 0})
+        self.assertEqual(mock_session_pool_post.call_count, 0)
+
+        self.webhook_timer.refresh_from_db()
+        self.assertEqual(self.webhook_timer.state, WebhookTimer.State.PENDING)
+        self.assertIsNone(self.webhook_timer.lease_owner)
+
+        # The task published with the current version fires the timer
+        mock_session_pool_post.return_value.ok = True
+        start_timer(version=1)
+        self.assertEqual(mock_session_pool_post.call_count, 1)
+        self.assertTrue(WebhookTimer.objects.get(id=self.webhook_timer.id).is_url_called)
+
+    @override_settings(TIMER_DISPATCH_MODE="eta")
+    @patch("task_scheduler.webhook_timer.tasks.session_pool.post")
+    @patch("celery.app.task.Context")
+    @patch("task_scheduler.webhook_timer.views.start_timer.apply_async")
+    def test_creation_task_is_dropped_after_a_reschedule(
+        self,
+        mock_start_timer_apply_async: MagicMock,
+        mock_celery_context: MagicMock,
+        mock_session_pool_post: MagicMock,
+    ):
+        """Test the task published when a timer is created does not fire it once rescheduled."""
+        timer_id = str(uuid4())
+        mock_start_timer_apply_async.return_value.id = timer_id
+        payload = {"hours": 0, "minutes": 1, "seconds": 0, "url": "https://example.com/webhook"}
+        self.assertEqual(
+            self.client.post(reverse("set_timer"), payload, format="json").json()["id"], timer_id
+        )
+        creation_kwargs = mock_start_timer_apply_async.call_args.kwargs["kwargs"]
+        self.assertEqual(creation_kwargs, {"version": 0})
+
+        response = self.client.patch(
+            reverse("get_timer", args=[timer_id]),
+            {"hours": 1, "minutes": 0, "seconds": 0},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # The creation task runs at the former expiry time
+        mock_celery_context.return_value = MagicMock(id=timer_id, retries=0)
+        mock_session_pool_post.return_value.ok = True
+        start_timer(**creation_kwargs)
+        # As is a task published before the timers had a version, standing for the first one
+        start_timer()
+        self.assertEqual(mock_session_pool_post.call_count, 0)
+
+        webhook_timer = WebhookTimer.objects.get(id=timer_id)
+        self.assertEqual(webhook_timer.state, WebhookTimer.State.PENDING)
+        self.assertEqual(webhook_timer.version, 1)
+
+    @override_settings(TIMER_DISPATCH_MODE="dispatcher")
+    @patch("task_scheduler.webhook_timer.tasks.session_pool.post")
+    @patch("task_scheduler.webhook_timer.tasks.start_timers.apply_async")
+    def test_recheck_task_does_not_fire_a_moved_timer(
+        self, mock_start_timers_apply_async: MagicMock, mock_session_pool_post: MagicMock
+    ):
+        """Test the task checking a timer in flight again drops it once it has been moved."""
+        mock_session_pool_post.return_value.ok = True
+        now = datetime.now(timezone.utc)
+        WebhookTimer.objects.move(self.webhook_timer.id, now)
+        timer_id = str(self.webhook_timer.id)
+
+        with freeze_time(now) as frozen_datetime:
+            # The task holding the timer loses its worker, a duplicate checks it again later
+            WebhookTimer.objects.claim([timer_id], lease=30)
+            start_timers([timer_id], versions={timer_id: 1})
+            recheck_kwargs = mock_start_timers_apply_async.call_args.kwargs
+            self.assertEqual(recheck_kwargs["kwargs"], {"versions": {timer_id: 1}})
+
+            # Once the lease has expired, the timer is moved later before the check runs
+            frozen_datetime.tick(delta=timedelta(seconds=31))
+            response = self.client.patch(
+                self.timer_url, {"hours": 1, "minutes": 0, "seconds": 0}, format="json"
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+            start_timers(*recheck_kwargs["args"], **recheck_kwargs["kwargs"])
+            # Neither does a task without versions fire the timer before its new expiry time
+            start_timers([timer_id])
+
+        self.assertEqual(mock_session_pool_post.call_count, 0)
+        self.webhook_timer.refresh_from_db()
+        self.assertEqual(self.webhook_timer.state, WebhookTimer.State.PENDING)
+        self.assertEqual(self.webhook_timer.version, 2)
@@ -0,0 +1,171 @@
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+from amqp.exceptions import MessageNacked
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from freezegun import freeze_time
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from task_scheduler.utils.webhook_sink import WebhookSink
+from task_scheduler.webhook_timer.models import TimerOutbox, TimerOutboxQuerySet, WebhookTimer
+from task_scheduler.webhook_timer.outbox import OutboxRelay
+from task_scheduler.webhook_timer.publishing import PublisherConfirms
+from task_scheduler.webhook_timer.tasks import start_timers
+
+
+@override_settings(TIMER_DISPATCH_MODE="outbox")
+class TimerOutboxTests(TestCase):
+
+    def messages(self) -> list[tuple]:
+        return list(TimerOutbox.objects.order_by("id").values_list("timer_id", "version"))
+
+    @freeze_time("2025-01-01 00:00:00")
+    @patch("task_scheduler.webhook_timer.views.publish_timers")
+    @patch("task_scheduler.webhook_timer.tasks.start_timer.apply_async")
+    def test_timers_are_stored_with_their_message(
+        self, mock_start_timer_apply_async: MagicMock, mock_publish_timers: MagicMock
+    ):
+        """Test the views store the messages with the timers instead of publishing them."""
+        client = APIClient()
+        payload = {"hours": 0, "minutes": 1, "seconds": 0, "url": "https://example.com/webhook"}
+
+        timer_id = client.post(reverse("set_timer"), payload, format="json").json()["id"]
+        timer_url = reverse("get_timer", args=[timer_id])
+        client.patch(timer_url, {"hours": 0, "minutes": 5, "seconds": 0}, format="json")
+        bulk_ids = [
+            result["id"]
+            for result in client.post(
+                reverse("set_timers_bulk"), [payload, payload], format="json"
+            ).json()["timers"]
+        ]
+
+        self.assertEqual(mock_start_timer_apply_async.call_count, 0)
+        self.assertEqual(mock_publish_timers.call_count, 0)
+        self.assertEqual(
+            [(str(timer_id), version) for timer_id, version in self.messages()],
+            [(timer_id, 0), (timer_id, 1), (bulk_ids[0], 0), (bulk_ids[1], 0)],
+        )
+        self.assertEqual(
+            TimerOutbox.objects.filter(version=1).get().expires_at,
+            datetime.now(timezone.utc) + timedelta(minutes=5),
+        )
+
+        # Neither the timer nor its message is stored if either fails to be
+        with patch.object(TimerOutboxQuerySet, "add", side_effect=DatabaseError("lost")):
+            response = client.post(reverse("set_timer"), payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertEqual(WebhookTimer.objects.count(), 3)
+        self.assertEqual(len(self.messages()), 4)
+
+    def test_relay_publishes_the_messages_in_batches(self):
+        """Test the messages are published oldest first and only deleted once published."""
+        now = datetime.now(timezone.utc)
+        webhook_timers = WebhookTimer.objects.bulk_create(
+            WebhookTimer(url="https://example.com/webhook", expires_at=now + timedelta(minutes=1))
+            for _ in range(3)
+        )
+        TimerOutbox.objects.add(webhook_timers)
+        messages = TimerOutbox.objects.order_by("id")
+
+        published = []
+        is_broker_down = True
+
+        def publish(batch: list[WebhookTimer]):
+            if is_broker_down:
+                raise ConnectionError("broker down")
+            published.append([(webhook_timer.id, webhook_timer.version) for webhook_timer in batch])
+
+        relay = OutboxRelay(batch_size=2, publish=publish)
+        with self.assertRaises(ConnectionError):
+            relay.relay()
+        self.assertEqual(TimerOutbox.objects.count(), 3)
+        self.assertFalse(TimerOutbox.objects.filter(lease_owner__isnull=False).exists())
+
+        # A batch claimed by another relay is skipped until its lease expires
+        _, claimed = TimerOutbox.objects.claim(limit=1, lease=60)
+        self.assertEqual(TimerOutbox.objects.claim(limit=3, lease=60)[1], list(messages[1:]))
+        TimerOutbox.objects.update(lease_owner=None, lease_expires_at=None)
+        with freeze_time(now + timedelta(seconds=61)):
+            self.assertEqual(TimerOutbox.objects.claim(limit=1, lease=60)[1], claimed)
+        TimerOutbox.objects.update(lease_owner=None, lease_expires_at=None)
+
+        is_broker_down = False
+        self.assertEqual([relay.relay(), relay.relay(), relay.relay()], [2, 1, 0])
+        self.assertEqual(
+            published,
+            [
+                [(webhook_timer.id, 0) for webhook_timer in webhook_timers[:2]],
+                [(webhook_timers[2].id, 0)],
+            ],
+        )
+        self.assertFalse(TimerOutbox.objects.exists())
+
+    @patch("task_scheduler.webhook_timer.publishing.start_timer.apply_async")
+    def test_next_occurrence_is_stored_with_its_message(
+        self, mock_start_timer_apply_async: MagicMock
+    ):
+        """Test the next occurrence of a recurring timer is stored with its message."""
+        now = datetime.now(timezone.utc)
+        with WebhookSink() as sink:
+            recurring = WebhookTimer.objects.create(
+                id=uuid4(), url=sink.url, expires_at=now, interval=60
+            )
+            start_timers([str(recurring.id)])
+            self.assertEqual(len(sink.received), 1)
+
+        recurring.refresh_from_db()
+        self.assertEqual(self.messages(), [(recurring.id, recurring.version)])
+        self.assertEqual(TimerOutbox.objects.get().expires_at, recurring.expires_at)
+        self.assertEqual(mock_start_timer_apply_async.call_count, 0)
+
+        # Neither is stored if either fails to be
+        recurring.expires_at = datetime.now(timezone.utc)
+        recurring.save()
+        with (
+            WebhookSink(),
+            patch.object(TimerOutboxQuerySet, "add", side_effect=DatabaseError("lost")),
+            self.assertRaises(DatabaseError),
+        ):
+            start_timers([str(recurring.id)])
+        self.assertEqual(WebhookTimer.objects.get(id=recurring.id).expires_at, recurring.expires_at)
+        self.assertEqual(TimerOutbox.objects.count(), 1)
+
+    def test_publisher_confirms(self):
+        """Test the confirms of a batch are waited for, acknowledged several at once or not."""
+
+        def open_channel(*replies: tuple[str, int, bool]) -> MagicMock:
+            channel = MagicMock(events=defaultdict(set))
+            replies = iter(replies)
+
+            def wait(methods: list, timeout: float):
+                event, delivery_tag, multiple = next(replies)
+                for callback in channel.events[event]:
+                    callback(delivery_tag, multiple)
+
+            channel.wait.side_effect = wait
+            return channel
+
+        def publish(channel: MagicMock, count: int) -> PublisherConfirms:
+            confirms = PublisherConfirms(channel)
+            for _ in range(count):
+                confirms.add()
+            return confirms
+
+        channel = open_channel(("basic_ack", 2, True), ("basic_ack", 3, False))
+        publish(channel, 3).wait(timeout=1)
+        channel.confirm_select.assert_called_once_with()
+        self.assertEqual(channel.wait.call_count, 2)
+
+        channel = open_channel(("basic_ack", 1, False), ("basic_nack", 2, False))
+        with self.assertRaises(MessageNacked):
+            publish(channel, 2).wait(timeout=1)
+
+        channel = open_channel()
+        channel.wait.side_effect = None
+        with self.assertRaises(TimeoutError):
+            publish(channel, 1).wait(timeout=0.01)
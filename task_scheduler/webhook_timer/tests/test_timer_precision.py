@@ -0,0 +1,157 @@
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+from uuid import UUID, uuid4
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from freezegun import freeze_time
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from task_scheduler.webhook_timer.local_dispatcher import LocalDispatcher
+from task_scheduler.webhook_timer.memory_store import MemoryTimerStore
+from task_scheduler.webhook_timer.models import WebhookTimer
+
+
+URL = "https://example.com/webhook"
+
+
+class SubSecondTimerViewTests(TestCase):
+
+    @freeze_time("2025-01-01 00:00:00")
+    @override_settings(TIMER_DISPATCH_MODE="dispatcher")
+    def test_millisecond_durations_and_fire_at(self):
+        """Test the timers expire at the millisecond given, as a duration or as a time."""
+        client = APIClient()
+        now = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+        response = client.post(
+            reverse("set_timer"),
+            {"hours": 0, "minutes": 0, "seconds": 1, "milliseconds": 250, "url": URL},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        webhook_timer = WebhookTimer.objects.get(id=response.json()["id"])
+        self.assertEqual(webhook_timer.expires_at, now + timedelta(milliseconds=1250))
+
+        response = client.post(
+            reverse("set_timer"), {"fire_at": "2025-01-01T02:00:00.5+02:00", "url": URL}
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        webhook_timer = WebhookTimer.objects.get(id=response.json()["id"])
+        self.assertEqual(webhook_timer.expires_at, now + timedelta(milliseconds=500))
+
+        response = client.patch(
+            reverse("get_timer", args=[webhook_timer.id]),
+            {"fire_at": "2025-01-01T00:01:00.001Z"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        webhook_timer.refresh_from_db()
+        self.assertEqual(webhook_timer.expires_at, now + timedelta(minutes=1, milliseconds=1))
+
+        for payload, field in (
+            ({"fire_at": "2025-01-01T00:00:01Z", "seconds": 1, "url": URL}, "non_field_errors"),
+            ({"fire_at": "2024-12-31T23:59:59.999Z", "url": URL}, "fire_at"),
+            ({"fire_at": "tomorrow", "url": URL}, "fire_at"),
+            ({"hours": 0, "minutes": 0, "seconds": 0, "milliseconds": 0, "url": URL}, None),
+        ):
+            with self.subTest(payload=payload):
+                response = client.post(reverse("set_timer"), payload, format="json")
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                if field:
+                    self.assertIn(field, response.json()["error"])
+
+    @override_settings(TIMER_DISPATCH_MODE="dispatcher")
+    def test_timer_without_duration_is_rejected(self):
+        """Test a timer is neither set nor rescheduled without a duration, on both paths."""
+        client = APIClient()
+        webhook_timer = WebhookTimer.objects.create(
+            url=URL, expires_at=datetime.now(timezone.utc) + timedelta(minutes=1)
+        )
+
+        for is_fast_path in (False, True):
+            for method, url, payload in (
+                ("post", reverse("set_timer"), {"url": URL}),
+                ("post", reverse("set_timer"), {"milliseconds": 500, "url": URL}),
+                ("patch", reverse("get_timer", args=[webhook_timer.id]), {}),
+                ("patch", reverse("get_timer", args=[webhook_timer.id]), {"milliseconds": 1}),
+            ):
+                with (
+                    self.subTest(is_fast_path=is_fast_path, method=method, payload=payload),
+                    override_settings(TIMER_FAST_PATH=is_fast_path),
+                ):
+                    response = getattr(client, method)(url, payload, format="json")
+                    self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                    self.assertIn("hours", response.json()["error"])
+
+        self.assertEqual(WebhookTimer.objects.get(), webhook_timer)
+        self.assertEqual(WebhookTimer.objects.get().expires_at, webhook_timer.expires_at)
+
+
+class LocalDispatcherPrecisionTests(TestCase):
+
+    @patch("task_scheduler.webhook_timer.local_dispatcher.trigger_webhook")
+    def test_firing_lateness_under_load(self, mock_trigger_webhook: MagicMock):
+        """Test the timers are fired within milliseconds of their expiry while more are created.
+
+        600 timers are created by 4 threads while the dispatcher runs, due at times spread over
+        300ms, every webhook taking 1ms.
+        """
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        store = MemoryTimerStore(directory.name, shard_count=4)
+        store.open()
+        self.addCleanup(store.close)
+
+        start = time.time() + 0.2
+        expires_ats = {}
+        for index in range(600):
+            # Spread over 300ms, a few timers being due at the same millisecond
+            expires_ats[uuid4()] = datetime.fromtimestamp(
+                start + (index * 7919 % 300) / 1000, timezone.utc
+            )
+
+        lateness = []
+
+        def trigger_webhook(url: str, timer_id: str, attempt: int):
+            lateness.append(time.time() - expires_ats[UUID(timer_id)].timestamp())
+            time.sleep(0.001)
+
+        def create_timers(timer_ids: list):
+            for timer_id in timer_ids:
+                store.create(timer_id, URL, expires_ats[timer_id])
+
+        mock_trigger_webhook.side_effect = trigger_webhook
+        stop_event = threading.Event()
+        threads = [
+            threading.Thread(
+                target=LocalDispatcher(store, tick=1, lookahead=0).run_forever,
+                args=(stop_event,),
+            )
+        ]
+        timer_ids = list(expires_ats)
+        threads += [
+            threading.Thread(target=create_timers, args=(timer_ids[index::4],))
+            for index in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+
+        deadline = time.time() + 5
+        while len(lateness) < len(expires_ats) and time.time() < deadline:
+            time.sleep(0.01)
+        stop_event.set()
+        store.due_changed.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(lateness), len(expires_ats))
+        self.assertGreaterEqual(min(lateness), 0)
+        percentiles = statistics.quantiles(lateness, n=100)
+        self.assertLess(percentiles[49], 0.01, "p50 lateness")
+        self.assertLess(percentiles[98], 0.05, "p99 lateness")
@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from freezegun import freeze_time
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from task_scheduler.webhook_timer import tasks
+from task_scheduler.webhook_timer.cache import timer_cache
+from task_scheduler.webhook_timer.models import WebhookTimer
+
+
+@freeze_time("2025-01-01 00:00:00")
+class TimerStatusViewTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        timer_cache.backend.clear()
+
+        self.timers_status_url = reverse("timers_status")
+
+    def create_timers(self, offsets: list[int], **kwargs) -> list[WebhookTimer]:
+        now = datetime.now(timezone.utc)
+        return WebhookTimer.objects.bulk_create(
+            WebhookTimer(
+                id=uuid4(),
+                url="https://example.com/webhook",
+                expires_at=now + timedelta(seconds=offset),
+                **kwargs,
+            )
+            for offset in offsets
+        )
+
+    def test_timers_status(self):
+        """Test the status of every id is returned in order, with the ids read in one query.
+
+        The unknown id is looked up in the archived timers with a second query.
+        """
+        pending, expired = self.create_timers([120, -5])
+        (fired,) = self.create_timers([-60], is_url_called=True)
+        unknown_id = str(uuid4())
+        ids = [str(expired.id), "invalid-uuid", str(pending.id), unknown_id, str(fired.id)]
+
+        with self.assertNumQueries(2):
+            response = self.client.post(self.timers_status_url, {"ids": ids}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(
+            response.json()["timers"],
+            [
+                {"id": str(expired.id), "time_left": 0, "is_url_called": False},
+                {
+                    "id": "invalid-uuid",
+                    "error": "The timer_id must be UUID, but given 'invalid-uuid'",
+                },
+                {"id": str(pending.id), "time_left": 120, "is_url_called": False},
+                {"id": unknown_id, "error": "No timer matches the given id"},
+                {"id": str(fired.id), "time_left": 0, "is_url_called": True},
+            ],
+        )
+
+        # The timers found are served from the timer cache afterwards
+        with self.assertNumQueries(0):
+            self.client.post(self.timers_status_url, {"ids": [str(pending.id)]}, format="json")
+
+    @override_settings(TIMER_STATUS_MAX_IDS=2)
+    def test_timers_status_invalid_ids(self):
+        """Test the ids must be a non-empty list within the size limit."""
+        for payload in ({}, {"ids": "invalid"}, {"ids": []}, {"ids": [str(uuid4())] * 3}):
+            response = self.client.post(self.timers_status_url, payload, format="json")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+            response_data = response.json()
+            self.assertIn("error", response_data)
+            self.assertIn("ids", response_data["error"])
+
+    @override_settings(TIMER_CACHE_BACKEND="local")
+    @patch("task_scheduler.webhook_timer.tasks.session_pool.post")
+    def test_timers_status_after_firing_in_a_worker(self, mock_session_pool_post: MagicMock):
+        """Test a timer fired by a worker is reported as fired by the local cache of the views."""
+        mock_session_pool_post.return_value.ok = True
+        pending, due = self.create_timers([120, 0])
+        ids = [str(pending.id), str(due.id)]
+        self.client.post(self.timers_status_url, {"ids": ids}, format="json")
+
+        # The invalidation of the worker does not reach the cache of the web process
+        with patch.object(tasks.timer_cache, "invalidate"):
+            tasks.start_timers([str(due.id)])
+        self.assertTrue(WebhookTimer.objects.get(id=due.id).is_url_called)
+
+        # Only the due timer is read again
+        with self.assertNumQueries(1):
+            response = self.client.post(self.timers_status_url, {"ids": ids}, format="json")
+        self.assertEqual(
+            [timer["is_url_called"] for timer in response.json()["timers"]], [False, True]
+        )
@@ -0,0 +1,41 @@
+from django.test import SimpleTestCase
+
+from task_scheduler.webhook_timer.utils.timing_wheel import HierarchicalTimingWheel
+
+
+class HierarchicalTimingWheelTests(SimpleTestCase):
+
+    def test_items_expire_in_deadline_order(self):
+        """Test items are returned once their deadline passes, never earlier."""
+        wheel = HierarchicalTimingWheel(tick=1, wheel_size=4, levels=2, start=0)
+        wheel.add("c", 11)
+        wheel.add("a", 2)
+        wheel.add("b", 5)
+
+        self.assertEqual(wheel.advance(1), [])
+        self.assertEqual(wheel.advance(2), ["a"])
+        self.assertEqual(wheel.advance(10), ["b"])
+        self.assertEqual(len(wheel), 1)
+        self.assertEqual(wheel.advance(11), ["c"])
+        self.assertEqual(len(wheel), 0)
+
+    def test_deadlines_beyond_the_top_level_overflow(self):
+        """Test items further away than the span of the wheel cascade down from the overflow."""
+        wheel = HierarchicalTimingWheel(tick=1, wheel_size=4, levels=2, start=0)
+        deadlines = [3, 17, 40, 63, 64, 100]
+        for deadline in deadlines:
+            wheel.add(deadline, deadline)
+
+        expired = {}
+        for now in range(1, 101):
+            for item in wheel.advance(now):
+                expired[item] = now
+
+        self.assertEqual(expired, {deadline: deadline for deadline in deadlines})
+
+    def test_past_deadlines_expire_on_next_advance(self):
+        """Test items added with a deadline in the past are returned immediately."""
+        wheel = HierarchicalTimingWheel(tick=0.5, start=100)
+        wheel.add("late", 10)
+
+        self.assertEqual(wheel.advance(100), ["late"])
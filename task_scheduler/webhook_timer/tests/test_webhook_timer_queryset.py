@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from django.test import TestCase
+from freezegun import freeze_time
+
+from task_scheduler.webhook_timer.models import WebhookTimer
+
+
+class WebhookTimerQuerySetTests(TestCase):
+
+    def setUp(self):
+        self.now = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+    def create_timers(self, offsets: list[int], **kwargs) -> list[WebhookTimer]:
+        return WebhookTimer.objects.bulk_create(
+            WebhookTimer(
+                id=uuid4(),
+                url="https://example.com/webhook",
+                expires_at=self.now + timedelta(seconds=offset),
+                **kwargs,
+            )
+            for offset in offsets
+        )
+
+    def test_due_returns_pending_timers_in_expiry_order(self):
+        """Test due returns the pending timers expiring before the given time, earliest first."""
+        late, early, _ = self.create_timers([20, -10, 30])
+        self.create_timers([0], is_url_called=True)
+
+        due_timers = list(WebhookTimer.objects.due(before=self.now + timedelta(seconds=20)))
+        self.assertEqual(due_timers, [early, late])
+
+        due_timers = list(WebhookTimer.objects.due(before=self.now + timedelta(days=1), limit=1))
+        self.assertEqual(due_timers, [early])
+
+    def test_due_keyset_pagination(self):
+        """Test paging with `after` returns every due timer once, including expiry ties."""
+        expected = sorted(
+            self.create_timers([5, 5, 5, 1, 9, 9, 3]), key=lambda t: (t.expires_at, t.id)
+        )
+
+        pages = []
+        after = None
+        while True:
+            page = list(
+                WebhookTimer.objects.due(
+                    before=self.now + timedelta(seconds=10), after=after, limit=2
+                )
+            )
+            if not page:
+                break
+            pages.append(page)
+            after = (page[-1].expires_at, page[-1].id)
+
+        self.assertEqual([len(page) for page in pages], [2, 2, 2, 1])
+        self.assertEqual([timer for page in pages for timer in page], expected)
+
+    def test_claim_is_exclusive_until_lease_expires(self):
+        """Test a timer is claimed once, then again only after its lease or a failure."""
+        first, fired = self.create_timers([0, 0])
+        WebhookTimer.objects.filter(id=fired.id).update(is_url_called=True, state="delivered")
+
+        with freeze_time(self.now) as frozen_datetime:
+            lease_owner, claimed = WebhookTimer.objects.claim([first.id, fired.id], lease=10)
+            self.assertEqual(claimed, [first])
+            self.assertEqual(claimed[0].state, WebhookTimer.State.IN_FLIGHT)
+            self.assertEqual(WebhookTimer.objects.claim([first.id], lease=10)[1], [])
+
+            frozen_datetime.tick(delta=timedelta(seconds=11))
+            new_lease_owner, claimed = WebhookTimer.objects.claim([first.id], lease=10)
+            self.assertEqual(claimed, [first])
+
+            # The expired lease no longer releases the timer
+            self.assertEqual(WebhookTimer.objects.mark_delivered(lease_owner), 0)
+            self.assertEqual(WebhookTimer.objects.mark_failed(new_lease_owner), 1)
+            self.assertEqual(WebhookTimer.objects.claim([first.id], lease=10)[1], [first])
+
+    def test_due_uses_pending_index(self):
+        """Test the query plan of due is a scan of the pending index."""
+        self.create_timers(range(-500, 500), is_url_called=False)
+        self.create_timers(range(-5000, 0), is_url_called=True)
+
+        query_plan = WebhookTimer.objects.due(before=self.now, limit=100).explain()
+
+        self.assertIn("webhook_timer_pending_idx", query_plan)
@@ -0,0 +1,214 @@
+import threading
+import uuid
+from datetime import datetime
+from typing import Iterable
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+
+from task_scheduler.webhook_timer.cache import CachedTimer
+from task_scheduler.webhook_timer.memory_store import MemoryTimerStore
+from task_scheduler.webhook_timer.models import ArchivedWebhookTimer, TimerOutbox, WebhookTimer
+
+
+def _uses_outbox() -> bool:
+    """Return whether the messages of the timers are stored in the outbox, see TimerOutbox."""
+    return settings.TIMER_DISPATCH_MODE == "outbox"
+
+
+class DatabaseTimerStore:
+    """Timer store keeping the timers in the WebhookTimer table, fired by the Celery tasks.
+
+    The lookups fall back to the timers archived since they were fired, see
+    WebhookTimerQuerySet.archive. With TIMER_DISPATCH_MODE="outbox" the timers created or
+    rescheduled are stored together with their message in the outbox, in a single transaction.
+    """
+
+    def create(
+        self,
+        timer_id: uuid.UUID,
+        url: str,
+        expires_at: datetime,
+        interval: int | None = None,
+        cron: str | None = None,
+    ):
+        """Store a new pending timer."""
+        if not _uses_outbox():
+            WebhookTimer.objects.create(
+                id=timer_id, url=url, expires_at=expires_at, interval=interval, cron=cron
+            )
+            return
+
+        with transaction.atomic():
+            webhook_timer = WebhookTimer.objects.create(
+                id=timer_id, url=url, expires_at=expires_at, interval=interval, cron=cron
+            )
+            TimerOutbox.objects.add([webhook_timer])
+
+    async def acreate(
+        self,
+        timer_id: uuid.UUID,
+        url: str,
+        expires_at: datetime,
+        interval: int | None = None,
+        cron: str | None = None,
+    ):
+        """Asynchronous version of create."""
+        if _uses_outbox():
+            # The async ORM has no transactions, the timer and its message are stored by a thread
+            await sync_to_async(self.create)(timer_id, url, expires_at, interval, cron)
+            return
+
+        await WebhookTimer.objects.acreate(
+            id=timer_id, url=url, expires_at=expires_at, interval=interval, cron=cron
+        )
+
+    def create_many(self, webhook_timers: list[WebhookTimer]):
+        """Store new pending timers with a single query, and their messages with another one."""
+        if not _uses_outbox():
+            WebhookTimer.objects.bulk_create(webhook_timers)
+            return
+
+        with transaction.atomic():
+            WebhookTimer.objects.bulk_create(webhook_timers)
+            TimerOutbox.objects.add(webhook_timers)
+
+    def lookup(self, timer_id: uuid.UUID) -> CachedTimer | None:
+        """Return the expiry of the timer, None if no timer matches the id."""
+        row = (
+            WebhookTimer.objects.filter(id=timer_id)
+            .values_list("expires_at", "is_url_called")
+            .first()
+        )
+        if row is not None:
+            return CachedTimer(*row)
+
+        # The timers fired or cancelled long ago are moved away, see WebhookTimerQuerySet.archive
+        expires_at = (
+            ArchivedWebhookTimer.objects.filter(id=timer_id)
+            .values_list("expires_at", flat=True)
+            .first()
+        )
+        if expires_at is not None:
+            return CachedTimer(expires_at, True)
+        return None
+
+    async def alookup(self, timer_id: uuid.UUID) -> CachedTimer | None:
+        """Asynchronous version of lookup."""
+        row = await (
+            WebhookTimer.objects.filter(id=timer_id)
+            .values_list("expires_at", "is_url_called")
+            .afirst()
+        )
+        if row is not None:
+            return CachedTimer(*row)
+
+        expires_at = await (
+            ArchivedWebhookTimer.objects.filter(id=timer_id)
+            .values_list("expires_at", flat=True)
+            .afirst()
+        )
+        if expires_at is not None:
+            return CachedTimer(expires_at, True)
+        return None
+
+    def lookup_many(self, timer_ids: Iterable[uuid.UUID]) -> dict[uuid.UUID, CachedTimer]:
+        """Return the expiry of the timers found, by timer id, with one query per table."""
+        timer_ids = set(timer_ids)
+        found = {
+            timer_id: CachedTimer(expires_at, is_url_called)
+            for timer_id, expires_at, is_url_called in WebhookTimer.objects.filter(
+                id__in=timer_ids
+            ).values_list("id", "expires_at", "is_url_called")
+        }
+
+        archived_ids = timer_ids - found.keys()
+        if archived_ids:
+            found.update(
+                (timer_id, CachedTimer(expires_at, True))
+                for timer_id, expires_at in ArchivedWebhookTimer.objects.filter(
+                    id__in=archived_ids
+                ).values_list("id", "expires_at")
+            )
+        return found
+
+    def exists(self, timer_id: uuid.UUID) -> bool:
+        """Return whether a timer matches the id, archived or not."""
+        return (
+            WebhookTimer.objects.filter(id=timer_id).exists()
+            or ArchivedWebhookTimer.objects.filter(id=timer_id).exists()
+        )
+
+    async def aexists(self, timer_id: uuid.UUID) -> bool:
+        """Asynchronous version of exists."""
+        return (
+            await WebhookTimer.objects.filter(id=timer_id).aexists()
+            or await ArchivedWebhookTimer.objects.filter(id=timer_id).aexists()
+        )
+
+    def cancel(self, timer_id: uuid.UUID) -> bool:
+        """Cancel the given timer, see WebhookTimerQuerySet.cancel."""
+        return WebhookTimer.objects.cancel(timer_id)
+
+    async def acancel(self, timer_id: uuid.UUID) -> bool:
+        """Asynchronous version of cancel."""
+        return await WebhookTimer.objects.acancel(timer_id)
+
+    def move(self, timer_id: uuid.UUID, expires_at: datetime) -> int | None:
+        """Move the given timer to a new expiry time, see WebhookTimerQuerySet.move."""
+        if not _uses_outbox():
+            return WebhookTimer.objects.move(timer_id, expires_at)
+
+        with transaction.atomic():
+            version = WebhookTimer.objects.move(timer_id, expires_at)
+            if version is not None:
+                TimerOutbox.objects.add(
+                    [WebhookTimer(id=timer_id, expires_at=expires_at, version=version)]
+                )
+            return version
+
+    async def amove(self, timer_id: uuid.UUID, expires_at: datetime) -> int | None:
+        """Asynchronous version of move."""
+        if _uses_outbox():
+            return await sync_to_async(self.move)(timer_id, expires_at)
+        return await WebhookTimer.objects.amove(timer_id, expires_at)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_timer_store() -> DatabaseTimerStore | MemoryTimerStore:
+    """Return the store of the timers, chosen by the TIMER_STORE_BACKEND setting.
+
+    - "database": the WebhookTimer table, the timers are fired by the Celery tasks published by
+      the views or the dispatcher.
+    - "memory": the MemoryTimerStore in TIMER_STORE_DIR, opened on first use. The timers are
+      fired by the local dispatcher of the process, see local_dispatcher.py.
+
+    Both stores have the same methods, used by the timer endpoints.
+    """
+    key = (settings.TIMER_STORE_BACKEND, settings.TIMER_STORE_DIR)
+    store = _stores.get(key)
+    if store is not None:
+        return store
+
+    with _stores_lock:
+        if key not in _stores:
+            if settings.TIMER_STORE_BACKEND == "memory":
+                store = MemoryTimerStore(settings.TIMER_STORE_DIR)
+                store.open()
+            else:
+                store = DatabaseTimerStore()
+            _stores[key] = store
+        return _stores[key]
+
+
+def close_timer_stores():
+    """Close the memory stores opened by get_timer_store, e.g. when the process stops."""
+    with _stores_lock:
+        for store in _stores.values():
+            if isinstance(store, MemoryTimerStore):
+                store.close()
+        _stores.clear()
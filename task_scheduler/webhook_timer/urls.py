@@ -1,9 +1,30 @@
+from django.conf import settings
 from django.urls import path
 
-from task_scheduler.webhook_timer.views import WebhookTimerView
+from task_scheduler.webhook_timer.async_views import AsyncWebhookTimerView
+from task_scheduler.webhook_timer.views import (
+    BulkWebhookTimerView,
+    MetricsView,
+    TimerCacheStatsView,
+    TimerDeliveriesView,
+    TimerStatusView,
+    WebhookCircuitView,
+    WebhookQueuesView,
+    WebhookTimerView,
+)
 
 
+# Under ASGI the async views keep many requests in flight without a thread each
+TimerView = AsyncWebhookTimerView if settings.TIMER_ASYNC_VIEWS else WebhookTimerView
+
 urlpatterns = [
-    path("timer", WebhookTimerView.as_view(), name="set_timer"),
-    path("timer/<timer_id>/", WebhookTimerView.as_view(), name="get_timer"),
+    path("timer", TimerView.as_view(), name="set_timer"),
+    path("timer/<timer_id>/", TimerView.as_view(), name="get_timer"),
+    path("timer/<timer_id>/deliveries", TimerDeliveriesView.as_view(), name="timer_deliveries"),
+    path("timers/bulk", BulkWebhookTimerView.as_view(), name="set_timers_bulk"),
+    path("timers/status", TimerStatusView.as_view(), name="timers_status"),
+    path("timers/cache-stats", TimerCacheStatsView.as_view(), name="timer_cache_stats"),
+    path("webhooks/circuit", WebhookCircuitView.as_view(), name="webhook_circuit"),
+    path("webhooks/queues", WebhookQueuesView.as_view(), name="webhook_queues"),
+    path("metrics", MetricsView.as_view(), name="metrics"),
 ]
@@ -0,0 +1,156 @@
+import calendar
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+
+MONTH_NAMES = {name.lower(): number for number, name in enumerate(calendar.month_abbr) if name}
+DAY_NAMES = {name.lower(): (number + 1) % 7 for number, name in enumerate(calendar.day_abbr)}
+
+MACROS = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+
+# Longest gap between two occurrences of a valid expression, e.g. "0 0 29 2 *" around 2100
+MAX_SEARCH_YEARS = 8
+
+
+class CronExpression:
+    """Standard 5-field cron expression: minute, hour, day of month, month and day of week.
+
+    Every field is a comma-separated list of "*", values or ranges ("a-b"), each with an
+    optional step ("*/15", "1-30/2"). Months and days of the week may be given by their English
+    abbreviations ("jan", "mon"), and Sunday is either 0 or 7. As in cron, when both the day of
+    the month and the day of the week are restricted, a day matching either of them matches.
+    The @yearly, @monthly, @weekly, @daily and @hourly macros are supported as well.
+
+    The occurrences are computed in UTC, at minute resolution.
+
+    Attributes:
+        expression (str): The expression as given.
+    """
+
+    def __init__(self, expression: str):
+        """Parse the expression.
+
+        Raises:
+            ValueError: If the expression is not a valid cron expression, with the reason.
+        """
+        self.expression = expression
+        fields = MACROS.get(expression.strip().lower(), expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"Expected 5 fields in the cron expression, but given {len(fields)}")
+
+        self.minutes = self._parse_field(fields[0], 0, 59)
+        self.hours = self._parse_field(fields[1], 0, 23)
+        self.days = self._parse_field(fields[2], 1, 31)
+        self.months = self._parse_field(fields[3], 1, 12, MONTH_NAMES)
+        self.weekdays = frozenset(
+            weekday % 7 for weekday in self._parse_field(fields[4], 0, 7, DAY_NAMES)
+        )
+        self._any_day = fields[2].startswith("*")
+        self._any_weekday = fields[4].startswith("*")
+
+        if self._any_weekday and all(
+            day > max(calendar.monthrange(2000, month)[1] for month in self.months)
+            for day in self.days
+        ):
+            raise ValueError("The cron expression never matches any day")
+
+    def __repr__(self) -> str:
+        return f"CronExpression({self.expression!r})"
+
+    def next_after(self, after: datetime) -> datetime:
+        """Return the first occurrence strictly after the given time.
+
+        The search skips whole months, days and hours which do not match, so it takes at most a
+        few hundred steps whatever the expression.
+
+        Args:
+            after (datetime): A timezone-aware datetime.
+
+        Raises:
+            ValueError: If the expression has no occurrence within MAX_SEARCH_YEARS years.
+
+        Returns:
+            datetime: The next occurrence, in the timezone of `after`.
+        """
+        moment = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        end_year = moment.year + MAX_SEARCH_YEARS
+
+        while moment.year <= end_year:
+            if moment.month not in self.months:
+                moment = self._start_of_next_month(moment)
+            elif not self._matches_day(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+            elif moment.hour not in self.hours:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+            else:
+                minute = next((minute for minute in self.minutes if minute >= moment.minute), None)
+                if minute is not None:
+                    return moment.replace(minute=minute)
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+
+        raise ValueError(f"The cron expression '{self.expression}' never matches")
+
+    def _matches_day(self, moment: datetime) -> bool:
+        day_matches = moment.day in self.days
+        # Python counts the days of the week from Monday (0), cron from Sunday (0)
+        weekday_matches = (moment.weekday() + 1) % 7 in self.weekdays
+
+        if self._any_day or self._any_weekday:
+            return day_matches and weekday_matches
+        return day_matches or weekday_matches
+
+    @staticmethod
+    def _start_of_next_month(moment: datetime) -> datetime:
+        if moment.month == 12:
+            return moment.replace(year=moment.year + 1, month=1, day=1, hour=0, minute=0)
+        return moment.replace(month=moment.month + 1, day=1, hour=0, minute=0)
+
+    @staticmethod
+    def _parse_field(
+        field: str, low: int, high: int, names: dict[str, int] | None = None
+    ) -> tuple[int, ...]:
+        def parse_value(value: str) -> int:
+            value = value.lower()
+            if names and value in names:
+                return names[value]
+            if not value.isdigit() or not low <= int(value) <= high:
+                raise ValueError(f"'{value}' is not a value between {low} and {high}")
+            return int(value)
+
+        values = set()
+        for item in field.split(","):
+            item_range, _, step = item.partition("/")
+            if step and (not step.isdigit() or int(step) == 0):
+                raise ValueError(f"'{step}' is not a valid step")
+
+            if item_range == "*":
+                start, end = low, high
+            elif "-" in item_range:
+                start, end = map(parse_value, item_range.split("-", 1))
+            else:
+                start = parse_value(item_range)
+                end = high if step else start
+
+            if start > end:
+                raise ValueError(f"'{item_range}' is not a valid range")
+            values.update(range(start, end + 1, int(step or 1)))
+
+        return tuple(sorted(values))
+
+
+@lru_cache(maxsize=1024)
+def parse_cron(expression: str) -> CronExpression:
+    """Return the parsed cron expression, parsing every distinct expression once.
+
+    Raises:
+        ValueError: If the expression is not a valid cron expression.
+    """
+    return CronExpression(expression)
@@ -2,3 +2,9 @@ class WebhookTriggerError(Exception):
     """Custom exception to raise if triggering webhook fails."""
 
     pass
+
+
+class WebhookRejectedError(WebhookTriggerError):
+    """Custom exception to raise if the webhook endpoint rejects the webhook for good."""
+
+    pass
@@ -0,0 +1,196 @@
+import math
+from collections import deque
+from typing import Any, Callable, Hashable
+
+
+class TokenBucket:
+    """Token bucket allowing `rate` items per second on average and bursts of `burst` items.
+
+    Attributes:
+        rate (float): Tokens added per second.
+        burst (float): Maximum number of tokens held.
+        tokens (float): Tokens currently held, as of the last refill.
+    """
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self._updated_at = now
+
+    def refill(self, now: float):
+        """Add the tokens accumulated since the last refill."""
+        self.tokens = min(self.burst, self.tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def is_full(self, now: float) -> bool:
+        """Return whether the bucket would be full at the given time."""
+        return self.tokens + (now - self._updated_at) * self.rate >= self.burst
+
+
+class FairScheduler:
+    """Per-key queues released under per-key token buckets with weighted fair queuing.
+
+    Items are queued by key (e.g. the host of a webhook) in arrival order. Every call to `take`
+    releases the items the rate limits allow at that time:
+
+    - every key has a token bucket given by `get_limits`, so no key is released faster than its
+      rate beyond its burst;
+    - all the keys share a global token bucket of `rate` items per second, if any, e.g. the
+      delivery capacity of the workers;
+    - the global budget is shared by the keys with weighted deficit round robin: every round
+      grants each key with queued items `quantum * weight` items, so a key with a long backlog
+      gets no more than its share while other keys have items waiting.
+
+    Adding an item is O(1) and releasing n items is O(n + keys with queued items).
+
+    Attributes:
+        rate (float | None): Items released per second over all the keys, None for no limit.
+        quantum (int): Items granted per round to a key of weight 1.
+    """
+
+    def __init__(
+        self,
+        get_limits: Callable[[Hashable], tuple[float | None, float]],
+        get_weight: Callable[[Hashable], float] = lambda key: 1,
+        rate: float | None = None,
+        quantum: int = 10,
+        start: float = 0.0,
+    ):
+        """Initialize an empty scheduler.
+
+        Args:
+            get_limits (Callable[[Hashable], tuple[float | None, float]]): Returns the rate and
+                the burst of the token bucket of a key, a rate of None for no limit.
+            get_weight (Callable[[Hashable], float], optional): Returns the weight of a key.
+                Defaults to 1 for every key.
+            rate (float, optional): Items released per second over all the keys. Defaults to
+                None, for no limit.
+            quantum (int, optional): Items granted per round to a key of weight 1. Defaults
+                to 10.
+            start (float, optional): Timestamp (seconds) the scheduler starts at. Defaults to 0.0.
+        """
+        self.get_limits = get_limits
+        self.get_weight = get_weight
+        self.rate = rate
+        self.quantum = quantum
+
+        self._queues: dict[Hashable, deque] = {}
+        self._active: deque[Hashable] = deque()
+        self._deficits: dict[Hashable, float] = {}
+        self._buckets: dict[Hashable, TokenBucket] = {}
+        self._global_bucket = TokenBucket(rate, rate, start) if rate else None
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def queue_depths(self) -> dict[Hashable, int]:
+        """Return the number of queued items of every key with queued items."""
+        return {key: len(queue) for key, queue in self._queues.items()}
+
+    def add(self, key: Hashable, item: Any):
+        """Queue an item under the given key."""
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = self._queues[key] = deque()
+            self._active.append(key)
+            self._deficits[key] = 0.0
+        queue.append(item)
+        self._size += 1
+
+    def take(self, now: float) -> list[Any]:
+        """Release the items the rate limits allow at the given time.
+
+        Args:
+            now (float): The current timestamp (seconds).
+
+        Returns:
+            list[Any]: The released items, the items of every key in arrival order.
+        """
+        budget = math.inf
+        if self._global_bucket is not None:
+            self._global_bucket.refill(now)
+            budget = math.floor(self._global_bucket.tokens)
+
+        released = []
+        progressed = True
+        while self._active and budget > 0 and progressed:
+            progressed = False
+
+            for _ in range(len(self._active)):
+                if budget <= 0:
+                    break
+
+                key = self._active[0]
+                self._active.rotate(-1)
+                queue = self._queues[key]
+                bucket = self._get_bucket(key, now)
+
+                if budget == math.inf:
+                    # Without a shared budget the keys are only limited by their own bucket
+                    allowed = len(queue)
+                else:
+                    grant = self.quantum * self.get_weight(key)
+                    # The deficit of a key throttled by its bucket does not build up into a burst
+                    self._deficits[key] = min(self._deficits[key] + grant, grant)
+                    allowed = min(len(queue), math.floor(self._deficits[key]), budget)
+                if bucket is not None:
+                    allowed = min(allowed, math.floor(bucket.tokens))
+                if allowed <= 0:
+                    continue
+
+                released.extend(queue.popleft() for _ in range(allowed))
+                if budget != math.inf:
+                    self._deficits[key] -= allowed
+                budget -= allowed
+                if bucket is not None:
+                    bucket.tokens -= allowed
+                progressed = True
+
+                if not queue:
+                    # The key has just been rotated to the end of the active keys
+                    self._active.pop()
+                    del self._queues[key]
+                    del self._deficits[key]
+
+        if self._global_bucket is not None:
+            self._global_bucket.tokens -= len(released)
+        self._size -= len(released)
+        self._prune_buckets(now)
+        return released
+
+    def reset_limits(self, now: float, rate: float | None = None):
+        """Apply new limits from the given time on, keeping the queued items.
+
+        The token buckets of the keys are created again from `get_limits`, full, and the global
+        bucket from the given rate.
+
+        Args:
+            now (float): The current timestamp (seconds).
+            rate (float, optional): Items released per second over all the keys. Defaults to
+                None, for no limit.
+        """
+        self.rate = rate
+        self._global_bucket = TokenBucket(rate, max(rate, 1.0), now) if rate else None
+        self._buckets.clear()
+
+    def _get_bucket(self, key: Hashable, now: float) -> TokenBucket | None:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            rate, burst = self.get_limits(key)
+            if not rate:
+                return None
+            bucket = self._buckets[key] = TokenBucket(rate, burst, now)
+        bucket.refill(now)
+        return bucket
+
+    def _prune_buckets(self, now: float):
+        # A bucket which would be full again is equivalent to a new one
+        idle_keys = [
+            key
+            for key, bucket in self._buckets.items()
+            if key not in self._queues and bucket.is_full(now)
+        ]
+        for key in idle_keys:
+            del self._buckets[key]
@@ -0,0 +1,131 @@
+import math
+from typing import Any, Hashable
+
+
+class HierarchicalTimingWheel:
+    """Hierarchical timing wheel holding items until their deadline passes.
+
+    Every level is a ring of `wheel_size` slots. A slot of level 0 spans one tick, a slot of
+    level `n` spans `wheel_size ** n` ticks. Items are placed in the lowest level whose span
+    covers their deadline and cascade down to the lower levels as the wheel advances, so adding
+    an item and expiring it are both O(1) regardless of how many items are held.
+
+    Items whose deadline is further away than the span of the top level are kept in an overflow
+    list and re-inserted every time the top level completes a rotation.
+
+    Attributes:
+        tick (float): Resolution of the wheel in seconds.
+        wheel_size (int): Number of slots per level.
+        levels (int): Number of levels in the hierarchy.
+    """
+
+    def __init__(self, tick: float, wheel_size: int = 64, levels: int = 4, start: float = 0.0):
+        """Initialize an empty wheel.
+
+        Args:
+            tick (float): Resolution of the wheel in seconds. Must be positive.
+            wheel_size (int, optional): Number of slots per level. Defaults to 64.
+            levels (int, optional): Number of levels. Defaults to 4.
+            start (float, optional): Timestamp (seconds) the wheel starts at. Defaults to 0.0.
+
+        Raises:
+            ValueError: If any of the sizes is not positive.
+        """
+        if tick <= 0 or wheel_size < 2 or levels < 1:
+            raise ValueError("tick must be positive, wheel_size at least 2 and levels at least 1.")
+
+        self.tick = tick
+        self.wheel_size = wheel_size
+        self.levels = levels
+
+        self._current_tick = math.floor(start / tick)
+        self._slots: list[list[list[tuple[int, Hashable]]]] = [
+            [[] for _ in range(wheel_size)] for _ in range(levels)
+        ]
+        self._overflow: list[tuple[int, Hashable]] = []
+        self._ready: list[Hashable] = []
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def current_time(self) -> float:
+        """The timestamp (seconds) the wheel has advanced to."""
+        return self._current_tick * self.tick
+
+    def add(self, item: Any, deadline: float):
+        """Add an item that expires at the given deadline.
+
+        The deadline is rounded up to the next tick, so an item never expires early. Items whose
+        deadline has already passed are returned by the next call to `advance`.
+
+        Args:
+            item (Any): The item to hold.
+            deadline (float): Timestamp (seconds) at which the item expires.
+        """
+        self._size += 1
+        self._place(math.ceil(deadline / self.tick), item)
+
+    def advance(self, now: float) -> list[Any]:
+        """Advance the wheel to the given time and collect the expired items.
+
+        Args:
+            now (float): The current timestamp (seconds).
+
+        Returns:
+            list[Any]: Items whose deadline is at or before `now`, in deadline order.
+        """
+        target_tick = math.floor(now / self.tick)
+        expired, self._ready = self._ready, []
+
+        while self._current_tick < target_tick:
+            self._current_tick += 1
+            self._cascade()
+
+            slot_index = self._current_tick % self.wheel_size
+            slot = self._slots[0][slot_index]
+            if slot:
+                self._slots[0][slot_index] = []
+                expired.extend(item for _, item in slot)
+            expired.extend(self._ready)
+            self._ready = []
+
+        self._size -= len(expired)
+        return expired
+
+    def _place(self, deadline_tick: int, item: Any):
+        delta = deadline_tick - self._current_tick
+        if delta <= 0:
+            self._ready.append(item)
+            return
+
+        span = 1
+        for level in range(self.levels):
+            if delta < span * self.wheel_size:
+                slot_index = (deadline_tick // span) % self.wheel_size
+                self._slots[level][slot_index].append((deadline_tick, item))
+                return
+            span *= self.wheel_size
+
+        self._overflow.append((deadline_tick, item))
+
+    def _cascade(self):
+        # Re-insert the items of every higher level slot that has just come into range, starting
+        # from the top so that the items can fall through more than one level in a single tick.
+        if self._current_tick % self.wheel_size**self.levels == 0 and self._overflow:
+            overflow, self._overflow = self._overflow, []
+            for deadline_tick, item in overflow:
+                self._place(deadline_tick, item)
+
+        for level in range(self.levels - 1, 0, -1):
+            span = self.wheel_size**level
+            if self._current_tick % span:
+                continue
+
+            slot_index = (self._current_tick // span) % self.wheel_size
+            slot = self._slots[level][slot_index]
+            if slot:
+                self._slots[level][slot_index] = []
+                for deadline_tick, item in slot:
+                    self._place(deadline_tick, item)
@@ -1,21 +1,145 @@
 import logging
 from datetime import datetime, timedelta, timezone
-from uuid import UUID
+from uuid import UUID, uuid4
 
-from django.http import JsonResponse
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpResponse, JsonResponse
+from rest_framework.exceptions import ParseError
 from rest_framework.request import Request
+from rest_framework.serializers import Serializer
 from rest_framework.views import APIView
 
-from task_scheduler.webhook_timer.models import WebhookTimer
-from task_scheduler.webhook_timer.serializers import SetTimerSerializer
+from task_scheduler.utils import fast_json
+from task_scheduler.utils.schema import Schema
+from task_scheduler.webhook_timer.cache import CachedTimer, timer_cache
+from task_scheduler.webhook_timer.circuit_breaker import circuit_breaker
+from task_scheduler.webhook_timer.delivery import get_host_key
+from task_scheduler.webhook_timer.dispatcher import get_queue_depths
+from task_scheduler.webhook_timer.metrics import generate_metrics, instrument_view, timers_created
+from task_scheduler.webhook_timer.models import WebhookDelivery, WebhookTimer
+from task_scheduler.webhook_timer.publishing import publish_timers
+from task_scheduler.webhook_timer.serializers import (
+    RESCHEDULE_TIMER_SCHEMA,
+    SET_TIMER_SCHEMA,
+    RescheduleTimerSerializer,
+    SetTimerSerializer,
+    TimerStatusSerializer,
+)
 from task_scheduler.webhook_timer.tasks import start_timer
+from task_scheduler.webhook_timer.timer_store import get_timer_store
+from task_scheduler.webhook_timer.utils.cron import parse_cron
 
 
 logger = logging.getLogger("webhook_timer")
 
 
+def _parse_timer_id(timer_id: str) -> UUID:
+    """Return the UUID of the given timer id.
+
+    Raises:
+        ValueError: If the timer id is not a UUID, with the message returned to the client.
+    """
+    try:
+        return UUID(timer_id)
+    except ValueError:
+        raise ValueError(f"The timer_id must be UUID, but given '{timer_id}'") from None
+
+
+def _get_first_expires_at(data: dict, now: datetime) -> datetime:
+    """Return the first expiry time of a timer validated by the SetTimerSerializer."""
+    if "fire_at" in data:
+        start = data["fire_at"]
+    else:
+        start = now + timedelta(
+            hours=data.get("hours", 0),
+            minutes=data.get("minutes", 0),
+            seconds=data.get("seconds", 0),
+            milliseconds=data.get("milliseconds", 0),
+        )
+
+    if data.get("cron"):
+        return parse_cron(data["cron"]).next_after(start)
+    if data.get("interval") and start == now:
+        return now + timedelta(seconds=data["interval"])
+    return start
+
+
+def _get_timer_kind(data: dict) -> str:
+    """Return the kind of a timer validated by the SetTimerSerializer, as in the metric labels."""
+    if data.get("cron"):
+        return "cron"
+    return "interval" if data.get("interval") else "one_shot"
+
+
+def _json_response(data: dict, status: int) -> HttpResponse:
+    """Return the JSON response of a timer endpoint, encoded by the fast codec on the fast path."""
+    if settings.TIMER_FAST_PATH:
+        return fast_json.FastJsonResponse(data, status=status)
+    return JsonResponse(data, status=status)
+
+
+def _validate_data(
+    data, serializer_class: type[Serializer], schema: Schema
+) -> tuple[dict | None, dict | None]:
+    """Validate the body of a timer request with its serializer, or its schema on the fast path.
+
+    Returns:
+        tuple[dict | None, dict | None]: The validated data and None, or None and the errors.
+    """
+    if settings.TIMER_FAST_PATH:
+        return schema(data)
+
+    serializer = serializer_class(data=data)
+    if not serializer.is_valid():
+        return None, serializer.errors
+    return serializer.validated_data, None
+
+
+def _get_request_data(request: Request):
+    """Return the body of a timer request, parsed without the parsers of DRF on the fast path.
+
+    Only JSON bodies are parsed on the fast path, the others are still parsed by DRF.
+
+    Raises:
+        ParseError: If the JSON body is invalid, as raised by the JSON parser of DRF.
+    """
+    content_type = request.META.get("CONTENT_TYPE", "").split(";")[0].strip()
+    if not settings.TIMER_FAST_PATH or content_type != "application/json":
+        return request.data
+
+    try:
+        return fast_json.loads(request.body or b"{}")
+    except ValueError as exc:
+        raise ParseError(f"JSON parse error - {str(exc)}") from None
+
+
+def _publishes_tasks() -> bool:
+    """Return whether the views publish the start_timer tasks of the timers they store."""
+    # The outbox relay publishes the messages stored with the timers, the dispatcher process
+    # enqueues the timers once they are about to expire, and the local dispatcher of the process
+    # holding the memory store fires them without any task
+    return settings.TIMER_DISPATCH_MODE == "eta" and settings.TIMER_STORE_BACKEND == "database"
+
+
+def _timer_conflict_response(timer_id: UUID) -> HttpResponse:
+    """Return the response to a timer which could not be cancelled or rescheduled."""
+    if not get_timer_store().exists(timer_id):
+        return _json_response({"error": "No timer matches the given id"}, status=404)
+    return _json_response(
+        {"error": "The timer has already been fired or cancelled, or is being fired"}, status=409
+    )
+
+
+def _get_time_left(expires_at: datetime, now: datetime) -> int:
+    """Return the whole seconds left until expires_at, 0 if it is in the past."""
+    # The expired_at datetime object is in UTC
+    return int(max((expires_at - now).total_seconds(), 0))
+
+
 class WebhookTimerView(APIView):
 
+    @instrument_view("timer")
     def post(self, request: Request, *args, **kwargs):
         """
         Create a new timer for triggering a webhook.
@@ -31,6 +155,10 @@ class WebhookTimerView(APIView):
             minutes (int): The number of minutes for the timer. Must be a non-negative integer.
             seconds (int): The number of seconds for the timer. Must be a non-negative integer.
             url (str): The webhook URL to be triggered when the timer expires. Must be a valid URL.
+            interval (int, optional): Seconds between two occurrences, for a recurring timer.
+            cron (str, optional): Cron expression of the occurrences (UTC), for a recurring timer.
+                The duration fields are optional for a recurring timer and delay its first
+                occurrence.
 
             Example:
             {
@@ -39,6 +167,10 @@ class WebhookTimerView(APIView):
                 "seconds": 15,
                 "url": "https://example.com/webhook"
             }
+            {
+                "cron": "*/15 9-17 * * mon-fri",
+                "url": "https://example.com/webhook"
+            }
 
         Responses:
             201 Created:
@@ -60,32 +192,40 @@ class WebhookTimerView(APIView):
                     }
                 }
         """
-        data = request.data
-        serializer = SetTimerSerializer(data=data)
-
-        if not serializer.is_valid():
-            return JsonResponse({"error": serializer.errors}, status=400)
-
-        hours = int(data["hours"])
-        minutes = int(data["minutes"])
-        seconds = int(data["seconds"])
-        url = data["url"]
+        data, errors = _validate_data(
+            _get_request_data(request), SetTimerSerializer, SET_TIMER_SCHEMA
+        )
+        if errors is not None:
+            return _json_response({"error": errors}, status=400)
 
-        expiration_td = timedelta(hours=hours, minutes=minutes, seconds=seconds)
-        expires_at = datetime.now(timezone.utc) + expiration_td
+        now = datetime.now(timezone.utc)
+        expires_at = _get_first_expires_at(data, now)
 
-        # Start the timer in the background
-        task = start_timer.apply_async(eta=expires_at)
+        if _publishes_tasks():
+            # Start the timer in the background
+            # Published with the first version of the timer, so that it is dropped once the
+            # timer is cancelled or rescheduled
+            task = start_timer.apply_async(eta=expires_at, kwargs={"version": 0})
+            timer_id = task.id
+        else:
+            timer_id = uuid4()
 
-        # Create a new WebhookTimer object in the database
-        timer_id = task.id
-        WebhookTimer.objects.create(id=timer_id, url=url, expires_at=expires_at)
+        get_timer_store().create(
+            timer_id=timer_id,
+            url=data["url"],
+            expires_at=expires_at,
+            interval=data.get("interval"),
+            cron=data.get("cron"),
+        )
+        timer_cache.set(timer_id, expires_at, is_url_called=False)
+        timers_created.labels(_get_timer_kind(data)).inc()
 
-        return JsonResponse(
-            {"id": str(timer_id), "time_left": int(expiration_td.total_seconds())},
+        return _json_response(
+            {"id": str(timer_id), "time_left": _get_time_left(expires_at, now)},
             status=201,
         )
 
+    @instrument_view("timer")
     def get(self, request: Request, timer_id: str, *args, **kwargs):
         """Retrieve the remaining time for a specific timer.
 
@@ -94,6 +234,8 @@ class WebhookTimerView(APIView):
         Description:
             This endpoint retrieves the remaining time (in seconds) for a timer identified by
             its UUID. If the timer has expired, the remaining time will be returned as `0`.
+            The timers fired or cancelled more than TIMER_ARCHIVE_RETENTION_DAYS ago are read
+            from the archive.
 
         Parameters:
             timer_id (str): The UUID of the timer. Must be a valid UUID string.
@@ -120,17 +262,477 @@ class WebhookTimerView(APIView):
                 }
         """
         try:
-            timer_id = UUID(timer_id)
-            webhook_timer = WebhookTimer.objects.get(id=timer_id)
-        except ValueError:
-            return JsonResponse(
-                {"error": f"The timer_id must be UUID, but given '{timer_id}'"}, status=400
+            timer_id = _parse_timer_id(timer_id)
+        except ValueError as exc:
+            return _json_response({"error": str(exc)}, status=400)
+
+        # expires_at only changes when the timer is rescheduled, which invalidates the cached
+        # timer, so the timer is read from the database only on a cache miss
+        cached_timer = timer_cache.get(timer_id)
+        if cached_timer is None:
+            cached_timer = get_timer_store().lookup(timer_id)
+            if cached_timer is None:
+                return _json_response({"error": "No timer matches the given id"}, status=404)
+            timer_cache.set(timer_id, *cached_timer)
+
+        time_left = _get_time_left(cached_timer.expires_at, datetime.now(timezone.utc))
+
+        return _json_response({"id": timer_id, "time_left": time_left}, status=200)
+
+    @instrument_view("timer")
+    def patch(self, request: Request, timer_id: str, *args, **kwargs):
+        """Reschedule a pending timer to expire after a new duration from now.
+
+        PATCH /timer/<timer_id>/
+
+        Description:
+            This endpoint moves the expiry time of a timer which has not been fired yet. The
+            version of the timer is bumped, so that the task published for its previous expiry
+            time is dropped when it runs, and a task is published for the new expiry time unless
+            the timers are dispatched by the dispatcher. The next occurrence of a recurring
+            timer is moved, its schedule goes on from there.
+
+        Request Body:
+            hours (int): The number of hours from now. Must be a non-negative integer.
+            minutes (int): The number of minutes from now. Must be a non-negative integer.
+            seconds (int): The number of seconds from now. Must be a non-negative integer.
+
+        Responses:
+            200 OK:
+                Description: The timer is rescheduled.
+                Example:
+                {
+                    "id": "f7ac3ff6-74a5-44d3-9dc1-e0dcc55d97ab",
+                    "time_left": 600
+                }
+            400 Bad Request:
+                Description: The timer_id is not a UUID or the duration is invalid.
+            404 Not Found:
+                Description: No timer with the specified ID exists in the database.
+            409 Conflict:
+                Description: The timer has already been fired or cancelled, or is being fired.
+                Example:
+                {
+                    "error": "The timer has already been fired or cancelled, or is being fired"
+                }
+        """
+        try:
+            timer_id = _parse_timer_id(timer_id)
+        except ValueError as exc:
+            return _json_response({"error": str(exc)}, status=400)
+
+        data, errors = _validate_data(
+            _get_request_data(request), RescheduleTimerSerializer, RESCHEDULE_TIMER_SCHEMA
+        )
+        if errors is not None:
+            return _json_response({"error": errors}, status=400)
+
+        now = datetime.now(timezone.utc)
+        expires_at = _get_first_expires_at(data, now)
+
+        version = get_timer_store().move(timer_id, expires_at)
+        timer_cache.invalidate([timer_id])
+        if version is None:
+            return _timer_conflict_response(timer_id)
+
+        if _publishes_tasks():
+            start_timer.apply_async(
+                eta=expires_at, task_id=str(timer_id), kwargs={"version": version}
+            )
+
+        return _json_response(
+            {"id": str(timer_id), "time_left": _get_time_left(expires_at, now)}, status=200
+        )
+
+    @instrument_view("timer")
+    def delete(self, request: Request, timer_id: str, *args, **kwargs):
+        """Cancel a pending timer.
+
+        DELETE /timer/<timer_id>/
+
+        Description:
+            This endpoint cancels a timer which has not been fired yet with a single UPDATE of
+            its row. Nothing is sent to the broker: the task published for the timer finds it
+            cancelled and is dropped when it runs.
+
+        Responses:
+            204 No Content:
+                Description: The timer is cancelled.
+            400 Bad Request:
+                Description: The timer_id is not a UUID.
+            404 Not Found:
+                Description: No timer with the specified ID exists in the database.
+            409 Conflict:
+                Description: The timer has already been fired or cancelled, or is being fired.
+        """
+        try:
+            timer_id = _parse_timer_id(timer_id)
+        except ValueError as exc:
+            return _json_response({"error": str(exc)}, status=400)
+
+        is_cancelled = get_timer_store().cancel(timer_id)
+        timer_cache.invalidate([timer_id])
+        if not is_cancelled:
+            return _timer_conflict_response(timer_id)
+
+        return HttpResponse(status=204)
+
+
+class BulkWebhookTimerView(APIView):
+
+    @instrument_view("timers_bulk")
+    def post(self, request: Request, *args, **kwargs):
+        """
+        Create many timers for triggering webhooks in a single request.
+
+        POST /timers/bulk
+
+        Description:
+            This endpoint creates a timer for every valid item of the given list. The timers are
+            inserted into the database with a single query and their messages are published to
+            the broker over a single connection. Invalid items are reported individually and do
+            not prevent the valid items from being created.
+
+        Request Body:
+            A list of at most TIMER_BULK_MAX_ITEMS objects, each having the same fields as the
+            request body of `POST /timer`.
+
+            Example:
+            [
+                {"hours": 0, "minutes": 1, "seconds": 0, "url": "https://example.com/webhook"},
+                {"hours": -1, "minutes": 0, "seconds": 0, "url": "https://example.com/webhook"}
+            ]
+
+        Responses:
+            201 Created:
+                Description: At least one timer is created. The results are returned in the order
+                    of the request items.
+                Example:
+                {
+                    "timers": [
+                        {"id": "a7293427-c147-455e-bf41-ddb36eea4119", "time_left": 60},
+                        {"error": {"hours": ["Ensure this value is greater than or equal to 0."]}}
+                    ]
+                }
+            400 Bad Request:
+                Description: The request body is not a non-empty list within the size limit, or
+                    none of the items is valid.
+                Example:
+                {
+                    "error": {
+                        "non_field_errors": ['Expected a list of items but got type "dict".']
+                    }
+                }
+        """
+        serializer = SetTimerSerializer(
+            data=request.data,
+            many=True,
+            allow_empty=False,
+            max_length=settings.TIMER_BULK_MAX_ITEMS,
+        )
+
+        if not serializer.is_valid():
+            return JsonResponse({"error": serializer.errors}, status=400)
+
+        now = datetime.now(timezone.utc)
+        results = []
+        webhook_timers = []
+        timer_kinds = []
+
+        for item, item_error in zip(serializer.validated_data, serializer.item_errors):
+            if item_error is not None:
+                results.append({"error": item_error})
+                continue
+
+            webhook_timer = WebhookTimer(
+                id=uuid4(),
+                url=item["url"],
+                expires_at=_get_first_expires_at(item, now),
+                interval=item.get("interval"),
+                cron=item.get("cron"),
             )
-        except WebhookTimer.DoesNotExist:
+            webhook_timers.append(webhook_timer)
+            timer_kinds.append(_get_timer_kind(item))
+            results.append(
+                {
+                    "id": str(webhook_timer.id),
+                    "time_left": _get_time_left(webhook_timer.expires_at, now),
+                }
+            )
+
+        if not webhook_timers:
+            return JsonResponse({"timers": results}, status=400)
+
+        # Nothing is stored if publishing fails, the messages published until then are ignored by
+        # start_timer as their timers do not exist
+        with transaction.atomic():
+            get_timer_store().create_many(webhook_timers)
+
+            if _publishes_tasks():
+                publish_timers(webhook_timers)
+
+        timer_cache.set_many(
+            {
+                webhook_timer.id: CachedTimer(webhook_timer.expires_at, is_url_called=False)
+                for webhook_timer in webhook_timers
+            }
+        )
+        for timer_kind in timer_kinds:
+            timers_created.labels(timer_kind).inc()
+        logger.info(f"Created {len(webhook_timers)} timer(s) in bulk")
+
+        return JsonResponse({"timers": results}, status=201)
+
+
+class TimerStatusView(APIView):
+
+    def post(self, request: Request, *args, **kwargs):
+        """
+        Retrieve the remaining time and the fired state of many timers in a single request.
+
+        POST /timers/status
+
+        Description:
+            This endpoint returns the status of every given timer id, in the order of the ids.
+            The timers missing from the timer cache are read from the database with a single
+            query. Ids which are not UUIDs or match no timer are reported individually.
+
+        Request Body:
+            ids (list[str]): At most TIMER_STATUS_MAX_IDS timer ids.
+
+            Example:
+            {
+                "ids": ["f7ac3ff6-74a5-44d3-9dc1-e0dcc55d97ab", "invalid-uuid"]
+            }
+
+        Responses:
+            200 OK:
+                Description: The status of every id is returned.
+                Example:
+                {
+                    "timers": [
+                        {
+                            "id": "f7ac3ff6-74a5-44d3-9dc1-e0dcc55d97ab",
+                            "time_left": 120,
+                            "is_url_called": false
+                        },
+                        {
+                            "id": "invalid-uuid",
+                            "error": "The timer_id must be UUID, but given 'invalid-uuid'"
+                        }
+                    ]
+                }
+            400 Bad Request:
+                Description: The ids are not a non-empty list within the size limit.
+                Example:
+                {
+                    "error": {
+                        "ids": ["This list may not be empty."]
+                    }
+                }
+        """
+        serializer = TimerStatusSerializer(data=request.data)
+
+        if not serializer.is_valid():
+            return JsonResponse({"error": serializer.errors}, status=400)
+
+        timer_ids = {}
+        id_errors = {}
+        for timer_id in serializer.validated_data["ids"]:
+            try:
+                timer_ids[timer_id] = _parse_timer_id(timer_id)
+            except ValueError as exc:
+                id_errors[timer_id] = str(exc)
+
+        cached_timers = timer_cache.get_many(set(timer_ids.values()))
+        missing_ids = set(timer_ids.values()) - cached_timers.keys()
+        if missing_ids:
+            found_timers = get_timer_store().lookup_many(missing_ids)
+            timer_cache.set_many(found_timers)
+            cached_timers.update(found_timers)
+
+        now = datetime.now(timezone.utc)
+        results = []
+        for timer_id in serializer.validated_data["ids"]:
+            if timer_id in id_errors:
+                results.append({"id": timer_id, "error": id_errors[timer_id]})
+            elif timer_ids[timer_id] not in cached_timers:
+                results.append({"id": timer_id, "error": "No timer matches the given id"})
+            else:
+                cached_timer = cached_timers[timer_ids[timer_id]]
+                results.append(
+                    {
+                        "id": timer_id,
+                        "time_left": _get_time_left(cached_timer.expires_at, now),
+                        "is_url_called": cached_timer.is_url_called,
+                    }
+                )
+
+        return JsonResponse({"timers": results}, status=200)
+
+
+class TimerDeliveriesView(APIView):
+
+    @instrument_view("timer_deliveries")
+    def get(self, request: Request, timer_id: str, *args, **kwargs):
+        """Retrieve the attempts at firing the webhook of a timer, the latest first.
+
+        GET /timer/<timer_id>/deliveries
+
+        Description:
+            This endpoint returns the latest WEBHOOK_DELIVERY_HISTORY_LIMIT attempts at firing
+            the webhook of the timer, a recurring timer having attempts for every occurrence.
+            The attempts are written by the workers in batches, so the latest ones show up a few
+            seconds after they are made (WEBHOOK_DELIVERY_LOG_FLUSH_INTERVAL). Attempts older
+            than WEBHOOK_DELIVERY_RETENTION_DAYS are pruned.
+
+        Parameters:
+            timer_id (str): The UUID of the timer. Must be a valid UUID string.
+
+        Responses:
+            200 OK:
+                Example:
+                {
+                    "id": "f7ac3ff6-74a5-44d3-9dc1-e0dcc55d97ab",
+                    "deliveries": [
+                        {
+                            "attempt": 2,
+                            "attempted_at": "2025-01-01T00:00:12.345Z",
+                            "outcome": "delivered",
+                            "status_code": 200,
+                            "duration": 0.084,
+                            "error": ""
+                        },
+                        {
+                            "attempt": 1,
+                            "attempted_at": "2025-01-01T00:00:00.120Z",
+                            "outcome": "failed",
+                            "status_code": 503,
+                            "duration": 0.051,
+                            "error": "Service Unavailable"
+                        }
+                    ]
+                }
+            400 Bad Request:
+                Description: The timer_id is invalid (not a UUID).
+            404 Not Found:
+                Description: No timer with the specified ID exists and no attempt is recorded.
+        """
+        try:
+            timer_id = _parse_timer_id(timer_id)
+        except ValueError as exc:
+            return JsonResponse({"error": str(exc)}, status=400)
+
+        deliveries = list(
+            WebhookDelivery.objects.filter(timer_id=timer_id)
+            .order_by("-attempted_at", "-id")
+            .values("attempt", "attempted_at", "outcome", "status_code", "duration", "error")[
+                : settings.WEBHOOK_DELIVERY_HISTORY_LIMIT
+            ]
+        )
+        if not deliveries and not get_timer_store().exists(timer_id):
             return JsonResponse({"error": "No timer matches the given id"}, status=404)
 
-        # The expired_at datetime object is in UTC
-        time_left = (webhook_timer.expires_at - datetime.now(timezone.utc)).total_seconds()
-        time_left = max(time_left, 0)
+        return JsonResponse({"id": str(timer_id), "deliveries": deliveries}, status=200)
+
+
+class TimerCacheStatsView(APIView):
+
+    def get(self, request: Request, *args, **kwargs):
+        """Retrieve the counters of the timer cache of the serving process.
+
+        GET /timers/cache-stats
+
+        Responses:
+            200 OK:
+                Example:
+                {
+                    "backend": "local",
+                    "hits": 9120,
+                    "misses": 88,
+                    "hit_ratio": 0.99
+                }
+        """
+        return JsonResponse(timer_cache.stats(), status=200)
+
+
+class WebhookCircuitView(APIView):
+
+    def get(self, request: Request, *args, **kwargs):
+        """Retrieve the state of the circuit breaker of the host of a webhook URL.
+
+        GET /webhooks/circuit?url=<url>
+
+        Parameters:
+            url (str): A webhook URL, only its scheme and network location are used.
+
+        Responses:
+            200 OK:
+                Example:
+                {
+                    "host": "https://example.com",
+                    "state": "open",
+                    "failures": 0,
+                    "opened_until": "2025-01-01T00:00:30+00:00"
+                }
+            400 Bad Request:
+                Description: The url query parameter is missing.
+                Example:
+                {
+                    "error": "The url query parameter is required"
+                }
+        """
+        url = request.query_params.get("url")
+        if not url:
+            return JsonResponse({"error": "The url query parameter is required"}, status=400)
+
+        return JsonResponse(circuit_breaker.get_state(get_host_key(url)), status=200)
+
+
+class WebhookQueuesView(APIView):
 
-        return JsonResponse({"id": timer_id, "time_left": int(time_left)}, status=200)
+    def get(self, request: Request, *args, **kwargs):
+        """Retrieve the number of due timers the dispatchers hold back per host.
+
+        GET /webhooks/queues
+
+        The timers are held back by the per-host rate limits of the dispatcher, so the depths are
+        always empty when the timers are not dispatched by the dispatcher. The depths of the
+        sharded dispatcher nodes are summed, see get_queue_depths.
+
+        Responses:
+            200 OK:
+                Example:
+                {
+                    "hosts": {"https://example.com": 1200, "https://example.org": 3},
+                    "total": 1203,
+                    "updated_at": "2025-01-01T00:00:05+00:00"
+                }
+        """
+        return JsonResponse(get_queue_depths(), status=200)
+
+
+class MetricsView(APIView):
+
+    def get(self, request: Request, *args, **kwargs):
+        """Expose the metrics of the service to Prometheus.
+
+        GET /metrics
+
+        Description:
+            This endpoint returns the metrics of the web process, merged with the snapshots the
+            worker processes write to METRICS_DIR: the timer fire lateness, the webhook
+            delivery latency and outcomes, the request durations of the timer endpoints and the
+            number of pending and overdue timers.
+
+        Responses:
+            200 OK:
+                Description: The metrics in the Prometheus text exposition format.
+                Example:
+                    # HELP timer_overdue Pending timers whose expiry time has passed, ...
+                    # TYPE timer_overdue gauge
+                    timer_overdue 0
+        """
+        return HttpResponse(
+            generate_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8"
+        )